@@ -0,0 +1,50 @@
+"""Out-of-process report worker.
+
+Claims queued report jobs ("report" downloads and "report-mail" sends) from
+the jobs collection and renders the workbooks in separate processes, so the
+openpyxl work never runs on the web server's event loop. Run it next to the
+web process with REPORT_WORKER=1 set for both:
+
+    python report_worker.py                 # one process per CPU
+    python report_worker.py --processes 2
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+
+
+def run_worker(index: int):
+    import server
+
+    print(f"Report worker {index} (pid {os.getpid()}) polling for {', '.join(server.REPORT_JOB_TYPES)} jobs")
+    try:
+        asyncio.run(server.job_worker_loop(server.REPORT_JOB_TYPES))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render queued report jobs in worker processes.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker(0)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=run_worker, args=(i,)) for i in range(args.processes)]
+    for proc in workers:
+        proc.start()
+    try:
+        for proc in workers:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in workers:
+            proc.terminate()
+            proc.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import StreamingResponse, JSONResponse
 from dotenv import load_dotenv
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
 import os
 import logging
 from pathlib import Path
@@ -11,22 +15,42 @@ from pydantic import BaseModel, Field, ConfigDict, ValidationError
 from typing import List, Optional, Dict, Any, Tuple
 import uuid
 from datetime import datetime, timezone, timedelta
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from passlib.context import CryptContext
 import jwt
 import io
+import asyncio
+import bisect
+import codecs
+import copy
+import csv
+import gzip
+import hashlib
+import json
 import smtplib
 import calendar
+import struct
+import tempfile
 import re
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
+from email import encoders, message_from_bytes
 import random
 import string
 import secrets
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+import numpy as np
+from openpyxl import Workbook, __version__ as OPENPYXL_VERSION
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import Cell, MergedCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.styles.named_styles import NamedStyleList
 from openpyxl.utils import get_column_letter
+from openpyxl.utils.indexed_list import IndexedList
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.worksheet.page import PrintPageSetup
 from openpyxl import load_workbook
 
 def format_date(date_str):
@@ -67,6 +91,633 @@ def format_time(time_str):
     return s
 
 
+# ---------------------------------------------------------
+# Report styles
+# ---------------------------------------------------------
+# Cell formats shared by the report builders, registered as NamedStyles once
+# per workbook. Assigning a named style copies one prebuilt style array into
+# the cell instead of building and de-duplicating Font/Border/Alignment/Fill
+# objects cell by cell.
+
+THIN_SIDE = Side(style="thin")
+THIN_BORDER = Border(left=THIN_SIDE, right=THIN_SIDE, top=THIN_SIDE, bottom=THIN_SIDE)
+CENTER_ALIGN = Alignment(horizontal="center", vertical="center")
+CENTER_WRAP_ALIGN = Alignment(horizontal="center", vertical="center", wrap_text=True)
+HEADER_FILL = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+BOLD_FONT = Font(bold=True)
+
+REPORT_STYLES = {
+    "MIS Header": {"font": HEADER_FONT, "fill": HEADER_FILL, "alignment": Alignment(horizontal="center")},
+    "MIS Header Boxed": {"font": HEADER_FONT, "fill": HEADER_FILL, "alignment": CENTER_WRAP_ALIGN, "border": THIN_BORDER},
+    "MIS Header Wrap": {"font": HEADER_FONT, "fill": HEADER_FILL, "alignment": CENTER_WRAP_ALIGN},
+    "MIS Heading": {"font": Font(bold=True, size=14)},
+    "MIS Title": {"font": Font(bold=True, size=12), "alignment": CENTER_WRAP_ALIGN},
+    "MIS Feeder Title": {
+        "font": Font(bold=True, size=12),
+        "fill": PatternFill(start_color="E2E8F0", end_color="E2E8F0", fill_type="solid"),
+        "alignment": CENTER_WRAP_ALIGN,
+        "border": THIN_BORDER,
+    },
+    "MIS Section": {
+        "font": BOLD_FONT,
+        "fill": PatternFill(start_color="F1F5F9", end_color="F1F5F9", fill_type="solid"),
+        "border": THIN_BORDER,
+    },
+    "MIS Bold": {"font": BOLD_FONT, "alignment": CENTER_WRAP_ALIGN},
+    "MIS Bold Boxed": {"font": BOLD_FONT, "alignment": CENTER_WRAP_ALIGN, "border": THIN_BORDER},
+    "MIS Boxed": {"border": THIN_BORDER},
+    "MIS Boxed Center": {"border": THIN_BORDER, "alignment": CENTER_ALIGN},
+    "MIS Boxed Wrap": {"border": THIN_BORDER, "alignment": CENTER_WRAP_ALIGN},
+}
+
+
+def report_style(wb, name: str) -> str:
+    """Register the report style `name` on `wb` if needed; returns the name for `cell.style`."""
+    if name not in wb.named_styles:
+        spec = REPORT_STYLES[name]
+        # Unstyled cells use the workbook default font, so styles without one do too
+        wb.add_named_style(NamedStyle(name=name, **{"font": DEFAULT_FONT, **spec}))
+    return name
+
+
+def style_range(ws, min_row: int, min_col: int, max_row: int, max_col: int, style: str):
+    """Give every cell of a rectangular range (merged cells included) one report style."""
+    for row in ws.iter_rows(min_row=min_row, min_col=min_col, max_row=max_row, max_col=max_col):
+        for cell in row:
+            cell.style = style
+
+
+def merge_styled(ws, min_row: int, min_col: int, max_row: int, max_col: int, value, style: str):
+    """Merge a block, write `value` into its top-left cell and style the whole block."""
+    ws.merge_cells(start_row=min_row, start_column=min_col, end_row=max_row, end_column=max_col)
+    style_range(ws, min_row, min_col, max_row, max_col, style)
+    return ws.cell(row=min_row, column=min_col, value=value)
+
+
+def write_styled_row(ws, row: int, values, styles, start_col: int = 1):
+    """Write `values` across a row; `styles` is one report style name or one per value."""
+    if isinstance(styles, str):
+        styles = [styles] * len(values)
+    for col, (value, style) in enumerate(zip(values, styles), start_col):
+        cell = ws.cell(row=row, column=col, value=value)
+        cell.style = style
+
+
+class SheetWriter:
+    """Writes to a worksheet while recording the widest value in each column.
+
+    Builders write through append()/cell()/row()/merge() and call
+    fit_columns() once at the end, instead of re-reading every cell in an
+    autofit pass. Values in rows up to `skip_rows` (titles, wrapped headers)
+    are written but do not count toward the widths.
+    """
+
+    def __init__(self, ws, skip_rows: int = 0):
+        self.ws = ws
+        self.skip_rows = skip_rows
+        self.widths: Dict[int, int] = {}
+
+    def track(self, row: int, column: int, value):
+        if row > self.skip_rows and value is not None:
+            width = len(str(value))
+            if width > self.widths.get(column, 0):
+                self.widths[column] = width
+
+    def append(self, values, style: Optional[str] = None) -> int:
+        """Append a row after the last used one; returns its row number."""
+        self.ws.append(values)
+        row = self.ws._current_row
+        self.track_row(row, values)
+        if style:
+            style_range(self.ws, row, 1, row, len(values), style)
+        return row
+
+    def track_existing(self):
+        """Count the values already on the sheet (a template's headers) toward the widths."""
+        for (row, column), cell in self.ws._cells.items():
+            self.track(row, column, cell.value)
+
+    def track_row(self, row: int, values):
+        if row > self.skip_rows:
+            widths = self.widths
+            for col, value in enumerate(values, 1):
+                if value is not None:
+                    width = len(str(value))
+                    if width > widths.get(col, 0):
+                        widths[col] = width
+
+    def cell(self, row: int, column: int, value=None, style: Optional[str] = None):
+        cell = self.ws.cell(row=row, column=column, value=value)
+        if style:
+            cell.style = style
+        self.track(row, column, value)
+        return cell
+
+    def row(self, row: int, values, styles=None, start_col: int = 1):
+        """Write `values` across a row; `styles` is one report style name or one per value."""
+        if isinstance(styles, str) or styles is None:
+            styles = [styles] * len(values)
+        for col, (value, style) in enumerate(zip(values, styles), start_col):
+            self.cell(row, col, value, style)
+
+    def merge(self, min_row: int, min_col: int, max_row: int, max_col: int, value, style: Optional[str] = None):
+        if style:
+            cell = merge_styled(self.ws, min_row, min_col, max_row, max_col, value, style)
+        else:
+            self.ws.merge_cells(start_row=min_row, start_column=min_col, end_row=max_row, end_column=max_col)
+            cell = self.ws.cell(row=min_row, column=min_col, value=value)
+        self.track(min_row, min_col, value)
+        return cell
+
+    def fit_columns(self, columns=None, pad: int = 2, min_width: Optional[float] = None, max_width: Optional[float] = None):
+        """Set column widths from the recorded values (all used columns by default)."""
+        if columns is None:
+            columns = range(1, self.ws.max_column + 1)
+        for col in columns:
+            width = self.widths.get(col, 0) + pad
+            if min_width is not None:
+                width = max(width, min_width)
+            if max_width is not None:
+                width = min(width, max_width)
+            self.ws.column_dimensions[get_column_letter(col)].width = width
+
+
+async def _iterate_rows(rows):
+    if hasattr(rows, "__aiter__"):
+        async for values in rows:
+            yield values
+    else:
+        for values in rows:
+            yield values
+
+
+class StreamingSheetWriter(SheetWriter):
+    """SheetWriter for a write-only worksheet (Workbook(write_only=True)).
+
+    A write-only sheet needs its column widths before the first row is
+    streamed. Header rows go in through append() and are held until then;
+    they are a handful of rows. The data rows are not held at all:
+    write_rows() goes over its row source twice, once to record the widths
+    and once to stream the rows, so memory does not grow with the export.
+    Rows appended with a style go out as prebuilt WriteOnlyCells. There is no
+    random cell access.
+    """
+
+    def __init__(self, ws, skip_rows: int = 0):
+        super().__init__(ws, skip_rows)
+        self.header = []
+        self.max_column = 0
+
+    def append(self, values, style: Optional[str] = None) -> int:
+        self.header.append((values, style))
+        row = len(self.header)
+        self.max_column = max(self.max_column, len(values))
+        self.track_row(row, values)
+        return row
+
+    def merge_cells(self, min_row: int, min_col: int, max_row: int, max_col: int):
+        self.ws.merged_cells.add(CellRange(min_col=min_col, min_row=min_row, max_col=max_col, max_row=max_row))
+
+    def styled_cell(self, value, style: str):
+        cell = WriteOnlyCell(self.ws, value)
+        cell.style = style
+        return cell
+
+    async def write_rows(self, rows, pad: int = 2, min_width: Optional[float] = None, max_width: Optional[float] = None):
+        """Fit the columns to the header and to every row of `rows()`, then stream it all into the sheet.
+
+        `rows` is called once per pass and returns an iterable or async
+        iterable of value lists, e.g. a generator over loaded entries or over
+        a fresh query cursor.
+        """
+        row = len(self.header)
+        async for values in _iterate_rows(rows()):
+            row += 1
+            self.max_column = max(self.max_column, len(values))
+            self.track_row(row, values)
+        self.fit_columns(range(1, self.max_column + 1), pad, min_width, max_width)
+        for values, style in self.header:
+            if style:
+                values = [self.styled_cell(value, style) for value in values]
+            self.ws.append(values)
+        self.header = []
+        async for values in _iterate_rows(rows()):
+            self.ws.append(values)
+
+
+# Fixed-layout statutory reports (fortnight, KPI, PTR Format-1, TL Format-4,
+# boundary meter) are copied from cached templates. A template is the
+# report's skeleton for one shape (headers, merges, borders, widths and the
+# styled but empty data grid), built once per process and then cloned for
+# each request, so a request only writes the data values and the few
+# month-dependent titles.
+#
+# Setting cell.font/border/alignment costs a style-table lookup per cell;
+# a clone copies each cell's style indexes and shares the style tables
+# instead. Merged ranges are copied as plain ranges, since their border
+# formatting is already on the copied cells. Sheet settings (views and freeze
+# panes, page setup and margins, print titles and area, headers/footers) are
+# copied explicitly; anything a clone cannot copy (conditional formatting,
+# data validation, tables, images, charts, hyperlinks, comments) makes the
+# template fail to build rather than come out silently incomplete.
+#
+# The clone works on openpyxl internals (the workbook style tables and each
+# cell's style array) as laid out in openpyxl 3.1, the version pinned in
+# requirements.txt. Under any other version every request runs the layout
+# builder on a fresh workbook instead: slower, but only public API.
+REPORT_TEMPLATE_CACHE_SIZE = 32
+REPORT_TEMPLATE_CLONE = OPENPYXL_VERSION.startswith("3.1.")
+
+
+def _copy_indexed_list(source: IndexedList) -> IndexedList:
+    """Copy of a workbook style table, keeping every index (and without re-hashing the entries)."""
+    copied = IndexedList()
+    list.extend(copied, source)
+    copied._dict = dict(source._dict)
+    copied.clean = source.clean
+    return copied
+
+
+class ReportTemplate:
+    """A report skeleton built once by `build(wb)` and cloned for each request."""
+
+    STYLE_TABLES = ("_fonts", "_fills", "_borders", "_alignments", "_protections", "_number_formats", "_cell_styles")
+    # Serialisable sheet settings; copy.copy round-trips them through XML
+    SHEET_SETTINGS = (
+        "sheet_properties", "sheet_format", "views", "print_options", "page_margins",
+        "HeaderFooter", "protection", "auto_filter", "row_breaks", "col_breaks",
+    )
+    COLUMN_SETTINGS = ("width", "bestFit", "hidden", "outlineLevel", "collapsed")
+    ROW_SETTINGS = ("height", "hidden", "outlineLevel", "collapsed")
+
+    def __init__(self, build):
+        self.build = build
+        self.skeleton = Workbook()
+        build(self.skeleton)
+        self._check_supported(self.skeleton)
+
+    @staticmethod
+    def _check_supported(wb):
+        unsupported = []
+        if wb.chartsheets:
+            unsupported.append("chart sheets")
+        for ws in wb.worksheets:
+            used = {
+                "conditional formatting": bool(ws.conditional_formatting),
+                "data validation": bool(ws.data_validations.dataValidation),
+                "tables": bool(ws.tables),
+                "images": bool(ws._images),
+                "charts": bool(ws._charts),
+                "sheet-scoped names": bool(ws.defined_names),
+                "hyperlinks or comments": any(cell.hyperlink or cell.comment for cell in ws._cells.values()),
+            }
+            unsupported.extend(f"{name} on {ws.title!r}" for name, found in used.items() if found)
+        if unsupported:
+            raise ValueError(f"Report templates cannot copy {', '.join(unsupported)}")
+
+    def new_workbook(self) -> Workbook:
+        if not REPORT_TEMPLATE_CLONE:
+            wb = Workbook()
+            self.build(wb)
+            return wb
+        source = self.skeleton
+        wb = Workbook()
+        for name in self.STYLE_TABLES:
+            setattr(wb, name, _copy_indexed_list(getattr(source, name)))
+        wb._named_styles = NamedStyleList(source._named_styles)
+        wb.remove(wb.active)
+        for src in source.worksheets:
+            ws = wb.create_sheet(src.title)
+            cells = ws._cells
+            for (row, column), cell in src._cells.items():
+                if isinstance(cell, MergedCell):
+                    copied = MergedCell(ws, row=row, column=column)
+                else:
+                    copied = Cell(ws, row=row, column=column)
+                    copied._value = cell._value
+                    copied.data_type = cell.data_type
+                copied._style = copy.copy(cell._style)
+                cells[(row, column)] = copied
+            ws._current_row = src._current_row
+            for cell_range in src.merged_cells.ranges:
+                ws.merged_cells.add(CellRange(cell_range.coord))
+            self._copy_sheet_settings(src, ws)
+        wb.active = source.index(source.active)
+        return wb
+
+    def _copy_sheet_settings(self, src, ws):
+        ws.sheet_state = src.sheet_state
+        for name in self.SHEET_SETTINGS:
+            setattr(ws, name, copy.copy(getattr(src, name)))
+        # Page setup reads the sheet's properties, so it is rebuilt for the new sheet
+        ws.page_setup = PrintPageSetup(
+            worksheet=ws, **{name: getattr(src.page_setup, name) for name in PrintPageSetup.__attrs__}
+        )
+        ws.print_title_rows = src.print_title_rows
+        ws.print_title_cols = src.print_title_cols
+        if src.print_area:
+            ws.print_area = src.print_area
+        for key, dim in src.column_dimensions.items():
+            target = ws.column_dimensions[key]
+            for name in self.COLUMN_SETTINGS:
+                setattr(target, name, getattr(dim, name))
+        for key, dim in src.row_dimensions.items():
+            target = ws.row_dimensions[key]
+            for name in self.ROW_SETTINGS:
+                setattr(target, name, getattr(dim, name))
+
+
+def fill_row(ws, row: int, values, start_col: int = 1):
+    """Write `values` into a templated row; cells hidden under a merge are skipped."""
+    for col, value in enumerate(values, start_col):
+        cell = ws.cell(row=row, column=col)
+        if not isinstance(cell, MergedCell):
+            cell.value = value
+
+
+_report_templates: Dict[tuple, ReportTemplate] = {}
+
+
+def report_template(key: tuple, build) -> Workbook:
+    """A fresh copy of the template cached under `key`, building it with `build(wb)` on first use.
+
+    The key names the report and every count that changes its layout (data
+    rows, sheets), so a new feeder gets a new template rather than a stale one.
+    """
+    template = _report_templates.get(key)
+    if template is None:
+        if len(_report_templates) >= REPORT_TEMPLATE_CACHE_SIZE:
+            _report_templates.pop(next(iter(_report_templates)))
+        template = _report_templates[key] = ReportTemplate(build)
+    return template.new_workbook()
+
+
+# Workbook downloads are saved to a spooled temp file (in memory up to
+# EXPORT_SPOOL_MAX_BYTES, on disk past it) and sent in fixed-size chunks, so
+# concurrent month-end downloads don't each hold a whole xlsx in RAM.
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXPORT_SPOOL_MAX_BYTES = 2 * 1024 * 1024
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _iter_spooled(spool, chunk_size: int):
+    try:
+        spool.seek(0)
+        while True:
+            chunk = spool.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        spool.close()
+
+
+def spooled_file_response(spool, filename: str, media_type: str, headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """Stream a spooled temp file as an attachment with its Content-Length.
+
+    The file is closed (and any disk spill deleted) when the stream ends; the
+    background close covers clients that disconnect mid-download.
+    """
+    size = spool.seek(0, os.SEEK_END)
+    response_headers = {"Content-Disposition": f"attachment; filename={filename}", **(headers or {})}
+    response_headers["Content-Length"] = str(size)
+    return StreamingResponse(
+        _iter_spooled(spool, EXPORT_CHUNK_BYTES),
+        media_type=media_type,
+        headers=response_headers,
+        background=BackgroundTask(spool.close),
+    )
+
+
+def workbook_response(wb, filename: str, headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """Save `wb` to a spooled temp file and stream it as an xlsx download."""
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
+    try:
+        wb.save(spool)
+    except Exception:
+        spool.close()
+        raise
+    return spooled_file_response(spool, filename, XLSX_MEDIA_TYPE, headers)
+
+
+# ---------------------------------------------------------
+# CSV / Parquet exports
+# ---------------------------------------------------------
+# Plain tables for pandas notebooks, offered next to the styled xlsx by the
+# bulk exports (format=csv|parquet). Rows go straight from the query results
+# into the file; no workbook is built. Parquet is encoded here (one row
+# group, PLAIN values, gzip pages, nullable columns) so the server needs
+# neither pandas nor pyarrow for it.
+
+EXPORT_FORMATS = ("xlsx", "csv", "parquet")
+CSV_MEDIA_TYPE = "text/csv"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+
+def export_format(value: Optional[str]) -> str:
+    fmt = (value or "xlsx").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    return fmt
+
+
+def table_number(value):
+    """Numeric reading for a table cell: numbers pass through, numeric strings
+    are parsed, blanks become None and anything else is kept as text."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+# Thrift compact protocol, just enough for Parquet page headers and footer
+_THRIFT_I32, _THRIFT_I64, _THRIFT_BINARY, _THRIFT_LIST, _THRIFT_STRUCT = 5, 6, 8, 9, 12
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _thrift_value(ftype: int, value) -> bytes:
+    if ftype in (_THRIFT_I32, _THRIFT_I64):
+        return _varint((value << 1) ^ (value >> 63))
+    if ftype == _THRIFT_BINARY:
+        data = value.encode("utf-8") if isinstance(value, str) else value
+        return _varint(len(data)) + data
+    if ftype == _THRIFT_STRUCT:
+        return _thrift_struct(value)
+    elem_type, items = value
+    if len(items) < 15:
+        head = bytes([(len(items) << 4) | elem_type])
+    else:
+        head = bytes([0xF0 | elem_type]) + _varint(len(items))
+    return head + b"".join(_thrift_value(elem_type, item) for item in items)
+
+
+def _thrift_struct(fields) -> bytes:
+    """Encode a struct given as (field id, type, value) in ascending id order; None values are left out."""
+    out = bytearray()
+    last_id = 0
+    for field_id, ftype, value in fields:
+        if value is None:
+            continue
+        out.append(((field_id - last_id) << 4) | ftype)
+        out += _thrift_value(ftype, value)
+        last_id = field_id
+    out.append(0)
+    return bytes(out)
+
+
+_PARQUET_INT64, _PARQUET_DOUBLE, _PARQUET_BYTE_ARRAY = 2, 5, 6
+_PARQUET_UTF8 = 0
+_PARQUET_PLAIN, _PARQUET_RLE = 0, 3
+_PARQUET_GZIP = 2
+
+
+def _parquet_column_values(values):
+    """Physical type, converted type and PLAIN encoding of a column's non-null values.
+
+    Whole-number columns are INT64, other numeric columns DOUBLE and the rest
+    UTF-8 strings.
+    """
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return _PARQUET_INT64, None, np.asarray(present, dtype="<i8").tobytes()
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return _PARQUET_DOUBLE, None, np.asarray(present, dtype="<f8").tobytes()
+    out = bytearray()
+    for v in present:
+        data = str(v).encode("utf-8")
+        out += struct.pack("<I", len(data))
+        out += data
+    return _PARQUET_BYTE_ARRAY, _PARQUET_UTF8, bytes(out)
+
+
+def _parquet_definition_levels(values) -> bytes:
+    """1-bit definition levels (1 = value present) as length-prefixed RLE runs."""
+    out = bytearray()
+    i, n = 0, len(values)
+    while i < n:
+        present = values[i] is not None
+        j = i + 1
+        while j < n and (values[j] is not None) == present:
+            j += 1
+        out += _varint((j - i) << 1)
+        out.append(1 if present else 0)
+        i = j
+    return struct.pack("<I", len(out)) + bytes(out)
+
+
+def write_parquet(fileobj, columns: List[str], data: List[list]):
+    """Write one table (a list of values per column) as a single-row-group Parquet file."""
+    num_rows = len(data[0]) if data else 0
+    fileobj.write(b"PAR1")
+    offset = 4
+    schema = [[(4, _THRIFT_BINARY, "schema"), (5, _THRIFT_I32, len(columns))]]
+    chunks = []
+    total_size = 0
+    for name, values in zip(columns, data):
+        ptype, converted, encoded = _parquet_column_values(values)
+        page = _parquet_definition_levels(values) + encoded
+        compressed = gzip.compress(page, mtime=0)
+        header = _thrift_struct([
+            (1, _THRIFT_I32, 0),  # DATA_PAGE
+            (2, _THRIFT_I32, len(page)),
+            (3, _THRIFT_I32, len(compressed)),
+            (5, _THRIFT_STRUCT, [
+                (1, _THRIFT_I32, num_rows),
+                (2, _THRIFT_I32, _PARQUET_PLAIN),
+                (3, _THRIFT_I32, _PARQUET_RLE),
+                (4, _THRIFT_I32, _PARQUET_RLE),
+            ]),
+        ])
+        fileobj.write(header)
+        fileobj.write(compressed)
+        schema.append([
+            (1, _THRIFT_I32, ptype),
+            (3, _THRIFT_I32, 1),  # OPTIONAL
+            (4, _THRIFT_BINARY, name),
+            (6, _THRIFT_I32, converted),
+        ])
+        chunks.append([
+            (2, _THRIFT_I64, offset),
+            (3, _THRIFT_STRUCT, [
+                (1, _THRIFT_I32, ptype),
+                (2, _THRIFT_LIST, (_THRIFT_I32, [_PARQUET_PLAIN, _PARQUET_RLE])),
+                (3, _THRIFT_LIST, (_THRIFT_BINARY, [name])),
+                (4, _THRIFT_I32, _PARQUET_GZIP),
+                (5, _THRIFT_I64, num_rows),
+                (6, _THRIFT_I64, len(header) + len(page)),
+                (7, _THRIFT_I64, len(header) + len(compressed)),
+                (9, _THRIFT_I64, offset),
+            ]),
+        ])
+        total_size += len(header) + len(page)
+        offset += len(header) + len(compressed)
+    footer = _thrift_struct([
+        (1, _THRIFT_I32, 1),
+        (2, _THRIFT_LIST, (_THRIFT_STRUCT, schema)),
+        (3, _THRIFT_I64, num_rows),
+        (4, _THRIFT_LIST, (_THRIFT_STRUCT, [[
+            (1, _THRIFT_LIST, (_THRIFT_STRUCT, chunks)),
+            (2, _THRIFT_I64, total_size),
+            (3, _THRIFT_I64, num_rows),
+        ]])),
+        (6, _THRIFT_BINARY, "MIS Portal"),
+    ])
+    fileobj.write(footer)
+    fileobj.write(struct.pack("<I", len(footer)))
+    fileobj.write(b"PAR1")
+
+
+class TableExport:
+    """One flat table for a csv or parquet download.
+
+    CSV rows are written to the spooled file as they are appended; Parquet is
+    column-oriented, so values are gathered per column and encoded by
+    response(). Blank strings are stored as nulls.
+    """
+
+    def __init__(self, fmt: str, columns: List[str]):
+        self.fmt = fmt
+        self.columns = list(columns)
+        self.spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
+        if fmt == "csv":
+            self.text = io.TextIOWrapper(self.spool, encoding="utf-8", newline="")
+            self.writer = csv.writer(self.text)
+            self.writer.writerow(self.columns)
+        else:
+            self.data = [[] for _ in self.columns]
+
+    def append(self, values):
+        if self.fmt == "csv":
+            self.writer.writerow(values)
+            return
+        for column, value in zip(self.data, values):
+            column.append(None if value == "" else value)
+
+    def response(self, name: str) -> StreamingResponse:
+        """Finish the file and stream it as `name`.csv / `name`.parquet."""
+        if self.fmt == "csv":
+            self.text.flush()
+            self.text.detach()
+            media_type = CSV_MEDIA_TYPE
+        else:
+            write_parquet(self.spool, self.columns, self.data)
+            media_type = PARQUET_MEDIA_TYPE
+        return spooled_file_response(self.spool, f"{name}.{self.fmt}", media_type)
+
+
 def format_duration_hhmm(value):
     if value is None or value == "":
         return ""
@@ -185,9 +836,36 @@ class IPv4SMTP_SSL(smtplib.SMTP_SSL):
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 import base64
+import threading
+
+# Mail goes out from one thread at a time (the outbox sender's executor), so
+# the cached Gmail service and the SMTP connection below are shared under a lock.
+_mail_lock = threading.RLock()
+_gmail_service = None
+_gmail_service_key = None
+_smtp_connection = None
+
+
+def _get_gmail_service(client_id: str, client_secret: str, refresh_token: str):
+    """Gmail API service built once per credential set; the credentials refresh their access token on expiry."""
+    global _gmail_service, _gmail_service_key
+    key = (client_id, client_secret, refresh_token)
+    if _gmail_service is None or _gmail_service_key != key:
+        creds = Credentials(
+            None, # access_token (will be refreshed)
+            refresh_token=refresh_token,
+            token_uri="https://oauth2.googleapis.com/token",
+            client_id=client_id,
+            client_secret=client_secret
+        )
+        _gmail_service = build('gmail', 'v1', credentials=creds, cache_discovery=False)
+        _gmail_service_key = key
+    return _gmail_service
+
 
 def _send_email_core(to_email: str, subject: str, message: MIMEMultipart):
     """Core function to handle email sending using Gmail API."""
+    global _gmail_service
     sender_email = os.environ.get("SMTP_EMAIL")
     
     # Gmail API Credentials
@@ -201,55 +879,56 @@ def _send_email_core(to_email: str, subject: str, message: MIMEMultipart):
         _send_email_smtp_fallback(to_email, subject, message)
         return
 
-    try:
-        # Construct Credentials object
-        creds = Credentials(
-            None, # access_token (will be refreshed)
-            refresh_token=refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=client_id,
-            client_secret=client_secret
-        )
+    with _mail_lock:
+        try:
+            service = _get_gmail_service(client_id, client_secret, refresh_token)
 
-        # Build Gmail Service
-        service = build('gmail', 'v1', credentials=creds)
+            # Create raw message
+            # message is already a MIMEMultipart object
+            # We need to encode it to base64url
+            raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
+            body = {'raw': raw_message}
 
-        # Create raw message
-        # message is already a MIMEMultipart object
-        # We need to encode it to base64url
-        raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
-        body = {'raw': raw_message}
+            # Send email
+            print(f"Sending email via Gmail API to {to_email}...")
+            sent = service.users().messages().send(userId="me", body=body).execute()
+            print(f"Email sent successfully! Message Id: {sent['id']}")
+            return
 
-        # Send email
-        print(f"Sending email via Gmail API to {to_email}...")
-        message = service.users().messages().send(userId="me", body=body).execute()
-        print(f"Email sent successfully! Message Id: {message['id']}")
-        return
+        except Exception as e:
+            print(f"Gmail API Error: {e}")
+            # Rebuild the service on the next send in case it is stuck on bad auth
+            _gmail_service = None
+            # If API fails (e.g. auth error), SMTP might not work either if blocked.
+            # But let's try fallback just in case we are on a system where SMTP works but API failed.
+            print("Attempting fallback to SMTP...")
+            try:
+                _send_email_smtp_fallback(to_email, subject, message)
+            except Exception as smtp_err:
+                 print(f"Fallback SMTP also failed: {smtp_err}")
+                 raise e # Raise the original API error as it's likely the primary config
 
-    except Exception as e:
-        print(f"Gmail API Error: {e}")
-        # Try fallback if API fails? Or just raise?
-        # If API fails (e.g. auth error), SMTP might not work either if blocked.
-        # But let's try fallback just in case we are on a system where SMTP works but API failed.
-        print("Attempting fallback to SMTP...")
-        try:
-            _send_email_smtp_fallback(to_email, subject, message)
-        except Exception as smtp_err:
-             print(f"Fallback SMTP also failed: {smtp_err}")
-             raise e # Raise the original API error as it's likely the primary config
 
-def _send_email_smtp_fallback(to_email: str, subject: str, message: MIMEMultipart):
-    """Legacy SMTP sending logic as fallback."""
+def _smtp_connect():
+    """Open a logged-in SMTP connection, trying the configured port and then the alternative one."""
     sender_email = os.environ.get("SMTP_EMAIL")
     sender_password = os.environ.get("SMTP_PASSWORD")
     
     # Default to port 587 (STARTTLS)
     smtp_server = os.environ.get("SMTP_SERVER", "smtp.gmail.com")
     env_port = int(os.environ.get("SMTP_PORT", 587))
+    # SMTP_USE_TLS=0 is for a local SMTP stand-in: plain connection, login only if a password is set
+    use_tls = os.environ.get("SMTP_USE_TLS", "1").lower() not in ("0", "false", "no")
     
-    if not sender_email or not sender_password:
+    if not sender_email or (use_tls and not sender_password):
         raise ValueError("SMTP configuration (email/password) missing in environment variables")
 
+    if not use_tls:
+        server = IPv4SMTP(smtp_server, env_port, timeout=60)
+        if sender_password:
+            server.login(sender_email, sender_password)
+        return server
+
     # Define attempts: [primary_config, fallback_config]
     attempts = []
     
@@ -269,26 +948,27 @@ def _send_email_smtp_fallback(to_email: str, subject: str, message: MIMEMultipar
     last_error = None
 
     for i, (server_host, port) in enumerate(attempts):
-        print(f"SMTP Attempt {i+1}/{len(attempts)}: Connecting to {server_host}:{port} for {to_email}")
+        print(f"SMTP Attempt {i+1}/{len(attempts)}: Connecting to {server_host}:{port}")
+        server = None
         try:
             if port == 465:
                 # Implicit SSL - Use IPv4 forced class
-                with IPv4SMTP_SSL(server_host, port, timeout=60) as server:
-                    server.login(sender_email, sender_password)
-                    server.sendmail(sender_email, to_email, message.as_string())
+                server = IPv4SMTP_SSL(server_host, port, timeout=60)
             else:
                 # Explicit SSL (STARTTLS) - usually port 587 - Use IPv4 forced class
-                with IPv4SMTP(server_host, port, timeout=60) as server:
-                    server.starttls()
-                    server.login(sender_email, sender_password)
-                    server.sendmail(sender_email, to_email, message.as_string())
-            
-            print(f"Email sent successfully to {to_email} using port {port}")
-            return # Success!
+                server = IPv4SMTP(server_host, port, timeout=60)
+                server.starttls()
+            server.login(sender_email, sender_password)
+            return server # Success!
             
         except Exception as e:
             print(f"SMTP Attempt {i+1} failed ({server_host}:{port}): {e}")
             last_error = e
+            if server is not None:
+                try:
+                    server.close()
+                except Exception:
+                    pass
             # Continue to next attempt
     
     # If we exit the loop, all attempts failed
@@ -297,8 +977,42 @@ def _send_email_smtp_fallback(to_email: str, subject: str, message: MIMEMultipar
         raise last_error
     else:
         raise HTTPException(status_code=500, detail="Failed to send email (unknown error)")
-            
-def send_otp_email(user_email: str, otp: str, reason: str = "reset"):
+
+
+def _close_smtp_connection():
+    global _smtp_connection
+    with _mail_lock:
+        if _smtp_connection is not None:
+            try:
+                _smtp_connection.quit()
+            except Exception:
+                pass
+            _smtp_connection = None
+
+
+def _send_email_smtp_fallback(to_email: str, subject: str, message: MIMEMultipart):
+    """Legacy SMTP sending logic as fallback, reusing one connection across consecutive sends."""
+    global _smtp_connection
+    sender_email = os.environ.get("SMTP_EMAIL")
+    with _mail_lock:
+        for attempt in range(2):
+            if _smtp_connection is None:
+                _smtp_connection = _smtp_connect()
+            try:
+                _smtp_connection.sendmail(sender_email, to_email, message.as_string())
+                print(f"Email sent successfully to {to_email}")
+                return
+            except smtplib.SMTPServerDisconnected:
+                # Pooled connection timed out on the server side; reconnect once
+                _smtp_connection = None
+                if attempt:
+                    raise
+            except Exception:
+                _close_smtp_connection()
+                raise
+
+
+def _otp_email_message(user_email: str, otp: str, reason: str = "reset") -> MIMEMultipart:
     sender_email = os.environ.get("SMTP_EMAIL")
     # Admin email is same as sender in this requirement
     admin_email = sender_email 
@@ -333,37 +1047,44 @@ def send_otp_email(user_email: str, otp: str, reason: str = "reset"):
     part2 = MIMEText(html, "html")
     message.attach(part1)
     message.attach(part2)
+    return message
 
+
+async def send_otp_email(user_email: str, otp: str, reason: str = "reset"):
+    message = _otp_email_message(user_email, otp, reason)
     try:
-        _send_email_core(admin_email, message["Subject"], message)
+        await enqueue_mail([message["To"]], message)
     except Exception as e:
         print(f"Error sending OTP email: {e}")
         raise HTTPException(status_code=500, detail="Failed to send OTP email")
 
-def send_reports_email(recipient_email: str, attachments: list, subject: str):
-    try:
-        sender_email = os.environ.get("SMTP_EMAIL")
-        
-        message = MIMEMultipart()
-        message["From"] = sender_email
-        message["To"] = recipient_email
-        message["Subject"] = subject
-
-        body = "Please find the attached reports for the selected period."
-        message.attach(MIMEText(body, "plain"))
-
-        for filename, content in attachments:
-            part = MIMEBase("application", "octet-stream")
-            part.set_payload(content)
-            encoders.encode_base64(part)
-            part.add_header(
-                "Content-Disposition",
-                f"attachment; filename= {filename}",
-            )
-            message.attach(part)
 
-        _send_email_core(recipient_email, message["Subject"], message)
-        
+def _reports_email_message(attachments: list, subject: str) -> MIMEMultipart:
+    sender_email = os.environ.get("SMTP_EMAIL")
+    
+    message = MIMEMultipart()
+    message["From"] = sender_email
+    message["Subject"] = subject
+
+    body = "Please find the attached reports for the selected period."
+    message.attach(MIMEText(body, "plain"))
+
+    for filename, content in attachments:
+        part = MIMEBase("application", "octet-stream")
+        part.set_payload(content)
+        encoders.encode_base64(part)
+        part.add_header(
+            "Content-Disposition",
+            f"attachment; filename= {filename}",
+        )
+        message.attach(part)
+    return message
+
+
+async def send_reports_email(recipients: List[str], attachments: list, subject: str, key: Optional[str] = None) -> List[str]:
+    """Queue one rendered report bundle for every recipient; returns the outbox ids."""
+    try:
+        return await enqueue_mail(recipients, _reports_email_message(attachments, subject), key)
     except Exception as e:
         import traceback
         error_msg = traceback.format_exc()
@@ -371,6 +1092,132 @@ def send_reports_email(recipient_email: str, attachments: list, subject: str):
         print(f"Traceback: {error_msg}")
         raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
 
+
+# ---------------------------------------------------------
+# Mail outbox
+# ---------------------------------------------------------
+# Requests queue mail instead of delivering it inline. A message is stored
+# once in mail_bundles (without a To header) and gets one mail_outbox row per
+# recipient; the sender task delivers rows through the shared Gmail service /
+# SMTP connection and retries failures with exponential backoff. Mail queued
+# with a key (a report-mail job id) gets ids derived from it, so queueing it
+# again, e.g. when a job is replayed, adds nothing.
+
+MAIL_SENDER_ENABLED = os.environ.get("MAIL_SENDER", "1").lower() not in ("0", "false", "no")
+MAIL_POLL_SECONDS = 2.0
+MAIL_LEASE_SECONDS = 300
+MAIL_MAX_ATTEMPTS = 5
+MAIL_RETRY_BASE_SECONDS = 30
+MAIL_RETRY_MAX_SECONDS = 1800
+MAIL_BUNDLE_TTL_DAYS = 7
+
+# One thread owns delivery so sends never run concurrently on the cached clients
+_mail_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mail")
+_mail_sender_task: Optional["asyncio.Task"] = None
+
+
+def _mail_retry_delay(attempts: int) -> float:
+    return min(MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAIL_RETRY_MAX_SECONDS)
+
+
+def _mail_id(key: Optional[str], *parts: str) -> str:
+    if key is None:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, "/".join(("mail", key) + parts)))
+
+
+async def enqueue_mail(recipients: List[str], message: MIMEMultipart, key: Optional[str] = None) -> List[str]:
+    recipients = [r.strip() for r in recipients if r and r.strip()]
+    if not recipients:
+        raise ValueError("No recipients")
+    del message["To"]
+    now = datetime.now(timezone.utc)
+    bundle_id = _mail_id(key)
+    bundle = {
+        "id": bundle_id,
+        "subject": message["Subject"],
+        "raw": message.as_bytes(),
+        "created_at": now,
+    }
+    rows = [
+        {
+            "id": _mail_id(key, to),
+            "bundle_id": bundle_id,
+            "to": to,
+            "subject": message["Subject"],
+            "status": "queued",
+            "attempts": 0,
+            "last_error": None,
+            "next_attempt_at": now,
+            "created_at": now.isoformat(),
+            "sent_at": None,
+        }
+        for to in recipients
+    ]
+    if key is None:
+        await db.mail_bundles.insert_one(bundle)
+        await db.mail_outbox.insert_many(rows)
+    else:
+        # Only the first enqueue for a key inserts; a replay leaves the rows as they are
+        await db.mail_bundles.update_one({"id": bundle_id}, {"$setOnInsert": bundle}, upsert=True)
+        for row in rows:
+            await db.mail_outbox.update_one({"id": row["id"]}, {"$setOnInsert": row}, upsert=True)
+    return [row["id"] for row in rows]
+
+
+async def _claim_mail() -> Optional[Dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    return await db.mail_outbox.find_one_and_update(
+        {"$or": [
+            {"status": "queued", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "lease_until": {"$lt": now}},
+        ]},
+        {"$set": {"status": "sending", "lease_until": now + timedelta(seconds=MAIL_LEASE_SECONDS)}},
+        sort=[("next_attempt_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _deliver_mail(row: Dict[str, Any]):
+    bundle = await db.mail_bundles.find_one({"id": row["bundle_id"]})
+    if not bundle:
+        raise ValueError("Mail content has expired")
+    message = message_from_bytes(bundle["raw"])
+    message["To"] = row["to"]
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_mail_executor, _send_email_core, row["to"], bundle["subject"], message)
+
+
+async def mail_sender_loop():
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            row = await _claim_mail()
+        except Exception as e:
+            print(f"Mail sender: failed to claim mail: {e}")
+            row = None
+        if not row:
+            # Queue drained: let go of the pooled SMTP connection until the next batch
+            await loop.run_in_executor(_mail_executor, _close_smtp_connection)
+            await asyncio.sleep(MAIL_POLL_SECONDS)
+            continue
+        try:
+            await _deliver_mail(row)
+            update = {"status": "sent", "sent_at": datetime.now(timezone.utc).isoformat(), "last_error": None}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            attempts = row.get("attempts", 0) + 1
+            error = getattr(e, "detail", None) or str(e)
+            print(f"Mail {row['id']} to {row['to']} failed (attempt {attempts}): {error}")
+            update = {"attempts": attempts, "last_error": error}
+            if attempts >= MAIL_MAX_ATTEMPTS:
+                update["status"] = "failed"
+            else:
+                update["status"] = "queued"
+                update["next_attempt_at"] = datetime.now(timezone.utc) + timedelta(seconds=_mail_retry_delay(attempts))
+        await db.mail_outbox.update_one({"id": row["id"]}, {"$set": update, "$unset": {"lease_until": ""}})
+
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
@@ -399,11 +1246,51 @@ async def startup_db_client():
         # Max Min Entries
         await db.max_min_entries.create_index("id", unique=True)
         await db.max_min_entries.create_index([("feeder_id", 1), ("date", 1)])
+        await db.max_min_entries.create_index("date")
+
+        # Interruption and energy entries (range exports read by date alone)
+        await db.interruption_entries.create_index("date")
+        await db.energy_entries.create_index("date")
+
+        # WhatsApp chat store
+        await db.chat_messages.create_index("hash", unique=True)
+        await db.chat_messages.create_index([("source", 1), ("timestamp", 1), ("seq", 1)])
+        await db.chat_messages.create_index("timestamp")
+
+        # Background jobs
+        await db.jobs.create_index("id", unique=True)
+        await db.jobs.create_index([("status", 1), ("created_at", 1)])
+        await db.job_chunks.create_index([("job_id", 1), ("index", 1)], unique=True)
+        await db.report_files.create_index("job_id", unique=True)
+        await db.report_files.create_index("created_at", expireAfterSeconds=REPORT_FILE_TTL_HOURS * 3600)
+
+        # Mail outbox
+        await db.mail_outbox.create_index("id", unique=True)
+        await db.mail_outbox.create_index([("status", 1), ("next_attempt_at", 1)])
+        await db.mail_bundles.create_index("id", unique=True)
+        await db.mail_bundles.create_index("created_at", expireAfterSeconds=MAIL_BUNDLE_TTL_DAYS * 86400)
+
+        # Staged import sessions (expire via TTL index)
+        await db.import_sessions.create_index("id", unique=True)
+        await db.import_sessions.create_index("expires_at", expireAfterSeconds=0)
+        await db.import_session_rows.create_index([("session_id", 1), ("index", 1)], unique=True)
+        await db.import_session_rows.create_index("expires_at", expireAfterSeconds=0)
+
+        # Month buckets (optional layout, see MONTH_BUCKETS)
+        for bucket_collection in MONTH_BUCKET_COLLECTIONS.values():
+            await db[bucket_collection].create_index([("feeder_id", 1), ("month", 1)], unique=True)
+            await db[bucket_collection].create_index("month")
         
         print("Database indexes created successfully")
     except Exception as e:
         print(f"Error creating indexes: {e}")
 
+    global _job_worker_task, _mail_sender_task
+    if JOB_WORKER_ENABLED and _job_worker_task is None:
+        _job_worker_task = asyncio.create_task(job_worker_loop(WEB_JOB_TYPES))
+    if MAIL_SENDER_ENABLED and _mail_sender_task is None:
+        _mail_sender_task = asyncio.create_task(mail_sender_loop())
+
 
 origins = [
     "http://localhost:3000",
@@ -422,9 +1309,142 @@ app.add_middleware(
     allow_origin_regex=r"https://.*\.vercel\.app|https://.*\.railway\.app", # Regex for dynamic subdomains
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["*"]
+    expose_headers=["*", "X-Import-Session"]
 )
 
+# Negotiated compression for large JSON bodies (report previews, analytics).
+# Spreadsheet downloads are already zip containers and NDJSON streams are sent
+# as they are produced, so only complete application/json bodies are touched.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+# Bodies at least this large are compressed on a worker thread, so a
+# multi-MB analytics preview does not hold up other requests meanwhile
+COMPRESSION_THREAD_MIN_SIZE = int(os.environ.get("COMPRESSION_THREAD_MIN_SIZE", 256 * 1024))
+COMPRESSION_STATS: Dict[str, Any] = {
+    "responses_seen": 0,
+    "responses_compressed": 0,
+    "skipped_small": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "by_encoding": {},
+}
+
+
+def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            accepted[token.strip().lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _record_compression(encoding: Optional[str], size_in: int, size_out: int):
+    COMPRESSION_STATS["responses_seen"] += 1
+    if encoding is None:
+        COMPRESSION_STATS["skipped_small"] += 1
+        return
+    COMPRESSION_STATS["responses_compressed"] += 1
+    COMPRESSION_STATS["bytes_in"] += size_in
+    COMPRESSION_STATS["bytes_out"] += size_out
+    enc = COMPRESSION_STATS["by_encoding"].setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+    enc["responses"] += 1
+    enc["bytes_in"] += size_in
+    enc["bytes_out"] += size_out
+
+
+class JSONCompressionMiddleware:
+    """ASGI middleware that gzip/brotli-encodes JSON responses above a size threshold."""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        thread_minimum_size: int = COMPRESSION_THREAD_MIN_SIZE,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_minimum_size = thread_minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+        body_parts: List[bytes] = []
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    not content_type.startswith("application/json")
+                    or "content-encoding" in headers
+                )
+                if passthrough:
+                    await send(message)
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(body_parts)
+            headers = MutableHeaders(raw=start_message["headers"])
+            if len(body) < self.minimum_size:
+                _record_compression(None, len(body), len(body))
+            else:
+                if len(body) >= self.thread_minimum_size:
+                    compressed = await run_in_threadpool(self._compress, encoding, body)
+                else:
+                    compressed = self._compress(encoding, body)
+                _record_compression(encoding, len(body), len(compressed))
+                body = compressed
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+app.add_middleware(JSONCompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 api_router = APIRouter(prefix="/api")
 
 @api_router.get("/ping")
@@ -689,6 +1709,52 @@ async def get_current_admin(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+@api_router.get("/admin/metrics/compression")
+async def get_compression_metrics(current_admin: User = Depends(get_current_admin)):
+    bytes_in = COMPRESSION_STATS["bytes_in"]
+    bytes_out = COMPRESSION_STATS["bytes_out"]
+    by_encoding = {
+        enc: {**stats, "ratio": round(stats["bytes_in"] / stats["bytes_out"], 2) if stats["bytes_out"] else None}
+        for enc, stats in COMPRESSION_STATS["by_encoding"].items()
+    }
+    return {
+        **COMPRESSION_STATS,
+        "by_encoding": by_encoding,
+        "ratio": round(bytes_in / bytes_out, 2) if bytes_out else None,
+        "minimum_size": COMPRESSION_MIN_SIZE,
+        "brotli_available": brotli is not None,
+    }
+
+
+@api_router.post("/admin/storage/month-buckets/rebuild")
+async def rebuild_month_buckets(
+    collection: Optional[str] = None,
+    month: Optional[str] = None,
+    current_admin: User = Depends(get_current_admin),
+):
+    """Back-fill (or repair) month buckets from the daily documents."""
+    if collection and collection not in MONTH_BUCKET_COLLECTIONS:
+        raise HTTPException(status_code=400, detail=f"collection must be one of {', '.join(MONTH_BUCKET_COLLECTIONS)}")
+    if month and not re.fullmatch(r"\d{4}-\d{2}", month):
+        raise HTTPException(status_code=400, detail="month must be YYYY-MM")
+    result = {}
+    for name in ([collection] if collection else list(MONTH_BUCKET_COLLECTIONS)):
+        pipeline: List[Dict[str, Any]] = []
+        if month:
+            pipeline.append({"$match": {"date": {"$gte": f"{month}-01", "$lte": f"{month}-31"}}})
+        pipeline.append({"$group": {"_id": {"feeder_id": "$feeder_id", "month": {"$substr": ["$date", 0, 7]}}}})
+        groups = await db[name].aggregate(pipeline).to_list(None)
+        buckets = days = 0
+        for g in groups:
+            key = g["_id"]
+            if not key.get("feeder_id") or len(key.get("month") or "") != 7:
+                continue
+            days += await write_month_bucket(name, key["feeder_id"], key["month"])
+            buckets += 1
+        result[name] = {"buckets": buckets, "days": days}
+    return {"enabled": MONTH_BUCKETS_ENABLED, "collections": result}
+
+
 @api_router.get("/admin/me", response_model=User)
 async def get_admin_me(current_admin: User = Depends(get_current_admin)):
     return current_admin
@@ -768,7 +1834,7 @@ async def forgot_password(request: ForgotPasswordRequest):
     )
     
     # Send to admin
-    send_otp_email(request.email, otp)
+    await send_otp_email(request.email, otp)
     
     return {"message": "OTP sent to admin for approval"}
 
@@ -883,7 +1949,7 @@ async def admin_forgot_password(request: ForgotPasswordRequest):
         message.attach(part1)
         message.attach(part2)
         if sender_email:
-            _send_email_core(email, message["Subject"], message)
+            await enqueue_mail([email], message)
         else:
             print("SMTP_EMAIL/SMTP_USER not configured; cannot send admin OTP email")
     except Exception as e:
@@ -1016,7 +2082,7 @@ async def signup_request(user_data: UserRegister):
         upsert=True
     )
     
-    send_otp_email(user_data.email, otp, reason="signup")
+    await send_otp_email(user_data.email, otp, reason="signup")
     
     return {"message": "OTP sent to admin for approval"}
 
@@ -1059,45 +2125,290 @@ async def signup_verify(request: SignupVerifyRequest):
 async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
-@api_router.get("/feeders", response_model=List[Feeder])
-async def get_feeders(current_user: User = Depends(get_current_user)):
-    feeders = await db.feeders.find({}, {"_id": 0}).to_list(100)
-    for feeder in feeders:
-        if isinstance(feeder.get('created_at'), str):
-            feeder['created_at'] = datetime.fromisoformat(feeder['created_at'])
-    return feeders
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
-@api_router.get("/feeders/{feeder_id}", response_model=Feeder)
-async def get_feeder(feeder_id: str, current_user: User = Depends(get_current_user)):
-    feeder = await db.feeders.find_one({"id": feeder_id}, {"_id": 0})
-    if not feeder:
-        raise HTTPException(status_code=404, detail="Feeder not found")
-    if isinstance(feeder.get('created_at'), str):
-        feeder['created_at'] = datetime.fromisoformat(feeder['created_at'])
-    return Feeder(**feeder)
 
-@api_router.post("/entries", response_model=DailyEntry)
-async def create_entry(entry_data: DailyEntryCreate, current_user: User = Depends(get_current_user)):
-    feeder = await db.feeders.find_one({"id": entry_data.feeder_id}, {"_id": 0})
-    if not feeder:
-        raise HTTPException(status_code=404, detail="Feeder not found")
-    
-    existing_entry = await db.entries.find_one({"feeder_id": entry_data.feeder_id, "date": entry_data.date}, {"_id": 0})
-    if existing_entry:
-        raise HTTPException(status_code=400, detail="Entry already exists for this date")
-    
-    date_obj = datetime.strptime(entry_data.date, "%Y-%m-%d")
-    prev_date = (date_obj - timedelta(days=1)).strftime("%Y-%m-%d")
-    prev_entry = await db.entries.find_one({"feeder_id": entry_data.feeder_id, "date": prev_date}, {"_id": 0})
-    
-    if prev_entry:
-        end1_import_initial = prev_entry['end1_import_final']
-        end1_export_initial = prev_entry['end1_export_final']
-        end2_import_initial = prev_entry['end2_import_final']
-        end2_export_initial = prev_entry['end2_export_final']
-    else:
-        end1_import_initial = 0
-        end1_export_initial = 0
+def _wants_ndjson(request: Request) -> bool:
+    """True when the client negotiated newline-delimited JSON via the Accept header."""
+    accept = (request.headers.get("accept") or "").lower()
+    return NDJSON_MEDIA_TYPE in accept
+
+
+def _ndjson_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _ndjson_line(doc: Any) -> bytes:
+    return (json.dumps(doc, default=_ndjson_default, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _ndjson_response(cursor, header: Optional[dict] = None) -> StreamingResponse:
+    """Stream a Motor cursor as NDJSON, one document per line.
+
+    An optional ``header`` object (e.g. the feeder/sheet lookup lists that the
+    analytics endpoints return next to their entries) is written as the first
+    line, so clients can resolve names before the entries start arriving.
+    Documents are encoded as they come off the cursor; nothing is buffered, so
+    callers pass the cursor without the row caps of their JSON lists and the
+    stream covers the whole range.
+    """
+    async def _iter():
+        if header is not None:
+            yield _ndjson_line(header)
+        async for doc in cursor:
+            yield _ndjson_line(doc)
+
+    return StreamingResponse(_iter(), media_type=NDJSON_MEDIA_TYPE)
+
+
+# ---------------------------------------------------------
+# Month buckets: one document per (feeder, month)
+# ---------------------------------------------------------
+# With MONTH_BUCKETS enabled, every write to ``entries`` / ``max_min_entries``
+# also rebuilds the matching bucket in ``<collection>_monthly``:
+#   {"feeder_id", "month": "YYYY-MM", "days": [doc-or-null x 31], "count"}
+# Monthly reports then read one document per feeder instead of ~30. A
+# (feeder, month) without a bucket is read from the daily documents, so the
+# flag can be switched on before POST /api/admin/storage/month-buckets/rebuild
+# has back-filled older data, and a bucket whose refresh failed is dropped so
+# reads fall back the same way.
+
+MONTH_BUCKETS_ENABLED = os.environ.get("MONTH_BUCKETS", "").lower() in ("1", "true", "yes")
+MONTH_BUCKET_COLLECTIONS = {
+    "entries": "entries_monthly",
+    "max_min_entries": "max_min_entries_monthly",
+}
+# Feeder registry of each bucketed collection, used to find the feeders of a
+# month that have no bucket yet
+MONTH_BUCKET_FEEDERS = {
+    "entries": "feeders",
+    "max_min_entries": "max_min_feeders",
+}
+
+
+def _month_keys(start_date: str, end_date: str) -> List[str]:
+    """``YYYY-MM`` keys of the months overlapping ``start_date`` <= date < ``end_date``."""
+    year, month = int(start_date[:4]), int(start_date[5:7])
+    keys = []
+    while f"{year}-{month:02d}-01" < end_date:
+        keys.append(f"{year}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return keys
+
+
+async def write_month_bucket(collection: str, feeder_id: str, month: str) -> int:
+    """Rebuild one (feeder, month) bucket from the daily documents; returns the day count."""
+    daily = await db[collection].find(
+        {"feeder_id": feeder_id, "date": {"$gte": f"{month}-01", "$lte": f"{month}-31"}},
+        {"_id": 0}
+    ).sort("date", 1).to_list(1000)
+    days: List[Optional[dict]] = [None] * 31
+    for e in daily:
+        try:
+            slot = int(e["date"][8:10]) - 1
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= slot < 31 and days[slot] is None:
+            days[slot] = e
+    count = sum(1 for d in days if d is not None)
+    buckets = db[MONTH_BUCKET_COLLECTIONS[collection]]
+    if count:
+        await buckets.replace_one(
+            {"feeder_id": feeder_id, "month": month},
+            {
+                "feeder_id": feeder_id,
+                "month": month,
+                "days": days,
+                "count": count,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            },
+            upsert=True,
+        )
+    else:
+        await buckets.delete_one({"feeder_id": feeder_id, "month": month})
+    return count
+
+
+async def refresh_month_buckets(collection: str, feeder_id: Optional[str], dates) -> None:
+    """Keep the buckets behind ``dates`` in step with the daily documents.
+
+    Called after every daily write; a no-op unless MONTH_BUCKETS is enabled.
+    A failure here is logged rather than failing the request that wrote the
+    daily document, which stays the source of truth; the bucket is deleted so
+    reads fall back to the daily documents until it is rebuilt.
+    """
+    if not MONTH_BUCKETS_ENABLED or not feeder_id:
+        return
+    for month in sorted({d[:7] for d in dates if isinstance(d, str) and len(d) >= 7}):
+        try:
+            await write_month_bucket(collection, feeder_id, month)
+        except Exception as e:
+            print(f"Month bucket refresh failed for {collection} {feeder_id} {month}: {e}")
+            try:
+                await db[MONTH_BUCKET_COLLECTIONS[collection]].delete_one({"feeder_id": feeder_id, "month": month})
+            except Exception as e:
+                print(f"Stale month bucket {collection} {feeder_id} {month} left in place, rebuild it: {e}")
+
+
+async def read_month_entries(
+    collection: str,
+    start_date: str,
+    end_date: str,
+    feeder_ids: Optional[List[str]] = None,
+    sort_by_date: bool = False,
+    limit: Optional[int] = 10000,
+) -> List[dict]:
+    """Daily documents with ``start_date`` <= date < ``end_date``.
+
+    Served from month buckets when they are enabled; each (feeder, month)
+    without a bucket falls back to the daily collection.
+    """
+    daily_query: Dict[str, Any] = {"date": {"$gte": start_date, "$lt": end_date}}
+    if feeder_ids is not None:
+        daily_query["feeder_id"] = {"$in": feeder_ids} if len(feeder_ids) != 1 else feeder_ids[0]
+    if not MONTH_BUCKETS_ENABLED:
+        cursor = db[collection].find(daily_query, {"_id": 0})
+        if sort_by_date:
+            cursor = cursor.sort("date", 1)
+        return await cursor.to_list(limit)
+
+    months = _month_keys(start_date, end_date)
+    bucket_query: Dict[str, Any] = {"month": {"$in": months}}
+    if feeder_ids is not None:
+        bucket_query["feeder_id"] = daily_query["feeder_id"]
+    buckets = await db[MONTH_BUCKET_COLLECTIONS[collection]].find(
+        bucket_query, {"_id": 0}
+    ).sort([("feeder_id", 1), ("month", 1)]).to_list(None)
+
+    entries: List[dict] = []
+    for b in buckets:
+        for e in b.get("days") or []:
+            if e is not None and start_date <= e.get("date", "") < end_date:
+                entries.append(e)
+
+    # Daily documents of every (feeder, month) pair without a bucket, queried
+    # as one clause per distinct set of missing months
+    if feeder_ids is None:
+        feeder_docs = await db[MONTH_BUCKET_FEEDERS[collection]].find({}, {"_id": 0, "id": 1}).to_list(None)
+        feeder_ids = [f["id"] for f in feeder_docs if f.get("id")]
+    bucketed = {(b["feeder_id"], b["month"]) for b in buckets}
+    missing: Dict[Tuple[str, ...], List[str]] = {}
+    for fid in dict.fromkeys(feeder_ids):
+        gaps = tuple(m for m in months if (fid, m) not in bucketed)
+        if gaps:
+            missing.setdefault(gaps, []).append(fid)
+    if missing:
+        legacy_query = {
+            "date": daily_query["date"],
+            "$or": [
+                {
+                    "feeder_id": {"$in": fids},
+                    "$or": [{"date": {"$gte": f"{m}-01", "$lte": f"{m}-31"}} for m in gaps],
+                }
+                for gaps, fids in missing.items()
+            ],
+        }
+        entries.extend(await db[collection].find(legacy_query, {"_id": 0}).to_list(limit))
+    if sort_by_date:
+        entries.sort(key=lambda e: e.get("date", ""))
+    return entries[:limit]
+
+
+def month_range(year: int, month: int) -> Tuple[str, str]:
+    """``(start_date, end_date)`` of a calendar month, end exclusive."""
+    start_date = f"{year}-{month:02d}-01"
+    if month == 12:
+        return start_date, f"{year + 1}-01-01"
+    return start_date, f"{year}-{month + 1:02d}-01"
+
+
+# Longest ?start=&end= export range. read_range_entries holds the whole
+# range in memory while the file is written, so a range export is capped at a
+# (leap) year, which covers a financial-year export.
+EXPORT_RANGE_MAX_DAYS = 366
+
+
+def export_range(start: str, end: str) -> Tuple[str, str]:
+    """Validate an inclusive ``?start=YYYY-MM-DD&end=YYYY-MM-DD`` pair and
+    return it as ``(start_date, end_date)`` with the end exclusive."""
+    try:
+        start_day = datetime.strptime(start, "%Y-%m-%d").date()
+        end_day = datetime.strptime(end, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        start_day = end_day = None
+    if start_day is None or start_day.isoformat() != start or end_day.isoformat() != end:
+        raise HTTPException(status_code=400, detail="start and end must be dates in YYYY-MM-DD format")
+    if end_day < start_day:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end_day - start_day).days >= EXPORT_RANGE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"An export can cover at most {EXPORT_RANGE_MAX_DAYS} days; split longer ranges")
+    return start_day.isoformat(), (end_day + timedelta(days=1)).isoformat()
+
+
+async def read_range_entries(
+    collection: str, start_date: str, end_date: str, key: str = "feeder_id"
+) -> Dict[str, List[dict]]:
+    """Daily documents with ``start_date`` <= date < ``end_date`` grouped by
+    ``key``, each group in date order.
+
+    The range is read in one query rather than once per feeder (or sheet) and
+    month, which is what keeps a financial-year export to a single request's
+    worth of database work. The whole range is held in memory, so callers
+    bound it with export_range().
+    """
+    grouped: Dict[str, List[dict]] = {}
+    if collection in MONTH_BUCKET_COLLECTIONS:
+        for e in await read_month_entries(collection, start_date, end_date, sort_by_date=True, limit=None):
+            grouped.setdefault(e.get(key), []).append(e)
+        return grouped
+    async for e in db[collection].find(
+        {"date": {"$gte": start_date, "$lt": end_date}}, {"_id": 0}
+    ).sort("date", 1):
+        grouped.setdefault(e.get(key), []).append(e)
+    return grouped
+
+
+@api_router.get("/feeders", response_model=List[Feeder])
+async def get_feeders(current_user: User = Depends(get_current_user)):
+    feeders = await db.feeders.find({}, {"_id": 0}).to_list(100)
+    for feeder in feeders:
+        if isinstance(feeder.get('created_at'), str):
+            feeder['created_at'] = datetime.fromisoformat(feeder['created_at'])
+    return feeders
+
+@api_router.get("/feeders/{feeder_id}", response_model=Feeder)
+async def get_feeder(feeder_id: str, current_user: User = Depends(get_current_user)):
+    feeder = await db.feeders.find_one({"id": feeder_id}, {"_id": 0})
+    if not feeder:
+        raise HTTPException(status_code=404, detail="Feeder not found")
+    if isinstance(feeder.get('created_at'), str):
+        feeder['created_at'] = datetime.fromisoformat(feeder['created_at'])
+    return Feeder(**feeder)
+
+@api_router.post("/entries", response_model=DailyEntry)
+async def create_entry(entry_data: DailyEntryCreate, current_user: User = Depends(get_current_user)):
+    feeder = await db.feeders.find_one({"id": entry_data.feeder_id}, {"_id": 0})
+    if not feeder:
+        raise HTTPException(status_code=404, detail="Feeder not found")
+    
+    existing_entry = await db.entries.find_one({"feeder_id": entry_data.feeder_id, "date": entry_data.date}, {"_id": 0})
+    if existing_entry:
+        raise HTTPException(status_code=400, detail="Entry already exists for this date")
+    
+    date_obj = datetime.strptime(entry_data.date, "%Y-%m-%d")
+    prev_date = (date_obj - timedelta(days=1)).strftime("%Y-%m-%d")
+    prev_entry = await db.entries.find_one({"feeder_id": entry_data.feeder_id, "date": prev_date}, {"_id": 0})
+    
+    if prev_entry:
+        end1_import_initial = prev_entry['end1_import_final']
+        end1_export_initial = prev_entry['end1_export_final']
+        end2_import_initial = prev_entry['end2_import_final']
+        end2_export_initial = prev_entry['end2_export_final']
+    else:
+        end1_import_initial = 0
+        end1_export_initial = 0
         end2_import_initial = 0
         end2_export_initial = 0
     
@@ -1134,11 +2445,13 @@ async def create_entry(entry_data: DailyEntryCreate, current_user: User = Depend
     doc['created_at'] = doc['created_at'].isoformat()
     doc['updated_at'] = doc['updated_at'].isoformat()
     await db.entries.insert_one(doc)
+    await refresh_month_buckets("entries", doc['feeder_id'], [doc['date']])
     
     return entry_obj
 
 @api_router.get("/entries", response_model=List[DailyEntry])
 async def get_entries(
+    request: Request,
     feeder_id: Optional[str] = None,
     year: Optional[int] = None,
     month: Optional[int] = None,
@@ -1155,6 +2468,9 @@ async def get_entries(
             end_date = f"{year}-{month + 1:02d}-01"
         query['date'] = {"$gte": start_date, "$lt": end_date}
     
+    if _wants_ndjson(request):
+        return _ndjson_response(db.entries.find(query, {"_id": 0}).sort("date", 1))
+
     entries = await db.entries.find(query, {"_id": 0}).sort("date", 1).to_list(1000)
     for entry in entries:
         if isinstance(entry.get('created_at'), str):
@@ -1165,6 +2481,7 @@ async def get_entries(
 
 @api_router.get("/interruptions/entries/{feeder_id}", response_model=List[InterruptionEntry])
 async def get_interruption_entries(
+    request: Request,
     feeder_id: str,
     year: Optional[int] = None,
     month: Optional[int] = None,
@@ -1178,6 +2495,8 @@ async def get_interruption_entries(
         else:
             end_date = f"{year}-{month + 1:02d}-01"
         query["date"] = {"$gte": start_date, "$lt": end_date}
+    if _wants_ndjson(request):
+        return _ndjson_response(db.interruption_entries.find(query, {"_id": 0}).sort("date", 1))
     entries = await db.interruption_entries.find(query, {"_id": 0}).sort("date", 1).to_list(1000)
     for entry in entries:
         if isinstance(entry.get("created_at"), str):
@@ -1255,14 +2574,26 @@ async def delete_interruption_entry(
         raise HTTPException(status_code=404, detail="Interruption entry not found")
     return {"message": "Interruption entry deleted successfully"}
 
-def _parse_whatsapp_messages(content: str):
-    lines = content.splitlines()
-    messages = []
-    current = None
-    pattern1 = re.compile(r'^(\d{1,2})[\/\-.](\d{1,2})[\/\-.](\d{2,4}),?\s+(\d{1,2}):(\d{2})(?::\d{2})?(?:\s*([AP]M|[ap]m))?\s*-\s*(.*)$')
-    pattern2 = re.compile(r'^\[(\d{1,2})[\/\-.](\d{1,2})[\/\-.](\d{2,4}),\s+(\d{1,2}):(\d{2})(?::\d{2})?(?:\s*([AP]M|[ap]m))?\]\s*(.*)$')
-    for line in lines:
-        m = pattern1.match(line) or pattern2.match(line)
+_WHATSAPP_HEADER_PATTERNS = (
+    re.compile(r'^(\d{1,2})[\/\-.](\d{1,2})[\/\-.](\d{2,4}),?\s+(\d{1,2}):(\d{2})(?::\d{2})?(?:\s*([AP]M|[ap]m))?\s*-\s*(.*)$'),
+    re.compile(r'^\[(\d{1,2})[\/\-.](\d{1,2})[\/\-.](\d{2,4}),\s+(\d{1,2}):(\d{2})(?::\d{2})?(?:\s*([AP]M|[ap]m))?\]\s*(.*)$'),
+)
+CHAT_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class _WhatsAppMessageParser:
+    """Incremental WhatsApp export parser.
+
+    ``feed()`` takes one line at a time and returns the previous message once
+    the next message header shows that it is complete (continuation lines
+    are appended until then); ``close()`` returns the last one.
+    """
+
+    def __init__(self):
+        self.current: Optional[Dict[str, Any]] = None
+
+    def feed(self, line: str) -> Optional[Dict[str, Any]]:
+        m = _WHATSAPP_HEADER_PATTERNS[0].match(line) or _WHATSAPP_HEADER_PATTERNS[1].match(line)
         if m:
             day = int(m.group(1))
             month = int(m.group(2))
@@ -1281,45 +2612,217 @@ def _parse_whatsapp_messages(content: str):
             try:
                 ts = datetime(year, month, day, hour, minute)
             except ValueError:
-                continue
+                return None
             text = m.group(7).strip()
             text = text.replace("*", "")
             sender_split = text.split(":", 1)
             if len(sender_split) == 2:
                 text = sender_split[1].strip()
-            current = {"timestamp": ts, "text": text}
-            messages.append(current)
-        else:
-            if current is not None:
-                extra = line.strip()
-                if extra:
-                    extra = extra.replace("*", "")
-                    current["text"] += " " + extra
-    return messages
-
-def _classify_interruption_message(text: str):
-    s = text.lower()
-    ignore_keywords = [
-        "image omitted",
-        "video omitted",
-        "excel",
-        ".xlsx",
-        "data upload",
-        "data uploaded",
-        "material received",
-    ]
-    s_clean = s
-    for k in ignore_keywords:
-        s_clean = s_clean.replace(k, "")
-    if not s_clean.strip():
-        return None
-    if "lc status:" in s_clean:
+            done, self.current = self.current, {"timestamp": ts, "text": text}
+            return done
+        if self.current is not None:
+            extra = line.strip()
+            if extra:
+                extra = extra.replace("*", "")
+                self.current["text"] += " " + extra
         return None
-    if "stood ok" in s_clean or "line stood ok" in s_clean:
-        return "restore"
-    if "a/r success" in s_clean:
-        return "outage"
-    outage_keywords = [
+
+    def close(self) -> Optional[Dict[str, Any]]:
+        done, self.current = self.current, None
+        return done
+
+
+def _iter_whatsapp_messages_from(parser: _WhatsAppMessageParser, lines):
+    for line in lines:
+        done = parser.feed(line)
+        if done is not None:
+            yield done
+    done = parser.close()
+    if done is not None:
+        yield done
+
+
+def _iter_whatsapp_messages(lines):
+    return _iter_whatsapp_messages_from(_WhatsAppMessageParser(), lines)
+
+
+def _parse_whatsapp_messages(content: str):
+    return list(_iter_whatsapp_messages(content.splitlines()))
+
+
+async def _aiter_upload_lines(file: UploadFile, chunk_size: int = CHAT_UPLOAD_CHUNK_SIZE):
+    """Lines of an uploaded text file, decoded as UTF-8 chunk by chunk.
+
+    Line boundaries are the same as ``str.splitlines()``; a trailing ``\\r``
+    is held back in case its ``\\n`` is in the next chunk.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    pending = ""
+    while True:
+        chunk = await file.read(chunk_size)
+        text = pending + decoder.decode(chunk or b"", final=not chunk)
+        pending = ""
+        if not text:
+            if not chunk:
+                return
+            continue
+        lines = text.splitlines(keepends=True)
+        if chunk:
+            last = lines[-1]
+            if last.endswith("\r") or last.splitlines()[0] == last:
+                pending = lines.pop()
+        for line in lines:
+            yield line.splitlines()[0]
+        if not chunk:
+            return
+
+
+async def _aiter_whatsapp_upload(file: UploadFile):
+    """Stream the messages of an uploaded WhatsApp export without holding the file."""
+    parser = _WhatsAppMessageParser()
+    async for line in _aiter_upload_lines(file):
+        done = parser.feed(line)
+        if done is not None:
+            yield done
+    done = parser.close()
+    if done is not None:
+        yield done
+
+
+# Very large exports can be parsed on several cores: with CHAT_PARSE_WORKERS
+# above 1 the upload is cut into batches of about CHAT_PARSE_BATCH_LINES
+# lines, each cut made at a message header, and the batches are parsed and
+# classified in a process pool while the next one is read. A batch parser
+# starts with a placeholder message that collects any continuation lines
+# before its first header; they belong to the previous batch's last message
+# and are appended to it, so the messages are exactly those of the
+# sequential parser.
+CHAT_PARSE_WORKERS = int(os.environ.get("CHAT_PARSE_WORKERS", "0") or 0)
+CHAT_PARSE_BATCH_LINES = 20000
+_chat_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _parse_whatsapp_batch(lines: List[str]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Worker side: (text continuing the previous batch, classified messages)."""
+    parser = _WhatsAppMessageParser()
+    parser.current = {"timestamp": None, "text": ""}
+    messages = list(_iter_whatsapp_messages_from(parser, lines))
+    lead = messages.pop(0)["text"]
+    for msg in messages:
+        msg["kind"] = _classify_interruption_message(msg["text"])
+    return lead, messages
+
+
+def _get_chat_parse_pool() -> ProcessPoolExecutor:
+    global _chat_parse_pool
+    if _chat_parse_pool is None:
+        _chat_parse_pool = ProcessPoolExecutor(max_workers=CHAT_PARSE_WORKERS)
+    return _chat_parse_pool
+
+
+async def _aiter_whatsapp_upload_parallel(file: UploadFile):
+    """Same messages as ``_aiter_whatsapp_upload``, already classified, parsed
+    batch-wise in the process pool with at most two batches per worker in
+    flight."""
+    loop = asyncio.get_running_loop()
+    pool = _get_chat_parse_pool()
+    inflight: deque = deque()
+    batch: List[str] = []
+    last: Optional[Dict[str, Any]] = None
+
+    def merge(result: Tuple[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        # The last message of a batch is held back until the next batch
+        # shows whether it continues there.
+        nonlocal last
+        lead, messages = result
+        ready: List[Dict[str, Any]] = []
+        if lead and last is not None:
+            last["text"] += lead
+            last["kind"] = _classify_interruption_message(last["text"])
+        if messages:
+            if last is not None:
+                ready.append(last)
+            ready.extend(messages[:-1])
+            last = messages[-1]
+        return ready
+
+    async for line in _aiter_upload_lines(file):
+        if len(batch) >= CHAT_PARSE_BATCH_LINES and (
+            _WHATSAPP_HEADER_PATTERNS[0].match(line) or _WHATSAPP_HEADER_PATTERNS[1].match(line)
+        ):
+            inflight.append(loop.run_in_executor(pool, _parse_whatsapp_batch, batch))
+            batch = []
+            if len(inflight) > 2 * CHAT_PARSE_WORKERS:
+                for msg in merge(await inflight.popleft()):
+                    yield msg
+        batch.append(line)
+    if batch:
+        inflight.append(loop.run_in_executor(pool, _parse_whatsapp_batch, batch))
+    while inflight:
+        for msg in merge(await inflight.popleft()):
+            yield msg
+    if last is not None:
+        yield last
+
+class KeywordScanner:
+    """Finds which keyword classes occur in a lower-cased text in one regex pass.
+
+    All keywords go into a single alternation inside a lookahead, longest
+    first, so ``finditer`` reports the longest keyword starting at each
+    position. Any other keyword starting there is a prefix of it, so each
+    keyword also carries the classes of its prefixes and the result equals
+    testing every keyword of every class with ``in``.
+    """
+
+    def __init__(self, classes: Dict[str, Tuple[str, ...]]):
+        owners: Dict[str, set] = {}
+        for name, keywords in classes.items():
+            for k in keywords:
+                owners.setdefault(k, set()).add(name)
+        self._classes = {
+            k: frozenset().union(*(owners[p] for p in owners if k.startswith(p)))
+            for k in owners
+        }
+        ordered = sorted(owners, key=len, reverse=True)
+        self._regex = re.compile("(?=(" + "|".join(re.escape(k) for k in ordered) + "))")
+
+    def scan(self, lower: str) -> set:
+        found: set = set()
+        for m in self._regex.finditer(lower):
+            found |= self._classes[m.group(1)]
+        return found
+
+
+INTERRUPTION_IGNORE_KEYWORDS = (
+    "image omitted",
+    "video omitted",
+    "excel",
+    ".xlsx",
+    "data upload",
+    "data uploaded",
+    "material received",
+)
+
+INTERRUPTION_REMARK_PHRASES = (
+    ("charged as per ld instructions", "Charged as per LD instructions"),
+    ("informed to ld", "Informed to LD"),
+    ("busbar charged through tie", "Busbar charged through tie"),
+    ("pir replacement done", "PIR replacement done"),
+    ("oil leakage arrested", "Oil leakage arrested"),
+    ("line stood ok", "Line stood OK"),
+    ("stood ok", "Stood OK"),
+    ("taken into service", "Taken into service"),
+    ("taken in to service", "Taken into service"),
+    ("put in to service", "Put into service"),
+    ("put into service", "Put into service"),
+)
+
+INTERRUPTION_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "ignore": INTERRUPTION_IGNORE_KEYWORDS,
+    "lc_status": ("lc status:",),
+    "stood_ok": ("stood ok", "line stood ok"),
+    "ar_success": ("a/r success",),
+    "outage": (
         "tripped",
         "trip",
         "outage",
@@ -1345,8 +2848,8 @@ def _classify_interruption_message(text: str):
         "taken for shutdown",
         "shutdown type: planned",
         "shutdown type: emergency",
-    ]
-    restore_keywords = [
+    ),
+    "restore": (
         "charged",
         "charged at",
         "normalized",
@@ -1367,9 +2870,64 @@ def _classify_interruption_message(text: str):
         "breaker taken into service",
         "line stood ok",
         "stood ok",
-    ]
-    has_outage = any(k in s_clean for k in outage_keywords)
-    has_restore = any(k in s_clean for k in restore_keywords)
+    ),
+    "breakdown": ("breakdown declared", "under breakdown condition"),
+    "fault": (
+        "fault identified",
+        "flashover",
+        "flash over",
+        "conductor",
+        "insulator",
+        "oil leakage",
+        "pole damage",
+    ),
+    "lc_nbfc_ht": (
+        "lc issued",
+        "lc applied",
+        "under lc",
+        "line clear",
+        "line clear for",
+        "nbfc issued",
+        "nbfc applied",
+        "under nbfc",
+        "nbfc for",
+        "nbfc returned",
+        "hand tripped",
+        "hand trip",
+        "hand-tripped",
+    ),
+    "nbfc": ("nbfc",),
+    "ht": ("hand tripped", "hand trip", "hand-tripped", " ht ", "(ht", "ht)"),
+}
+for _needle, _label in INTERRUPTION_REMARK_PHRASES:
+    INTERRUPTION_KEYWORDS["remark:" + _needle] = (_needle,)
+
+_interruption_scanner = KeywordScanner(INTERRUPTION_KEYWORDS)
+_fault_scanner = KeywordScanner({"fault": INTERRUPTION_KEYWORDS["fault"]})
+
+
+def _classify_interruption_message(text: str):
+    s = text.lower()
+    found = _interruption_scanner.scan(s)
+    s_clean = s
+    if "ignore" in found:
+        # Removal order matters (dropping one keyword can join another), so
+        # keep the sequential replace for the few messages that need it.
+        for k in INTERRUPTION_IGNORE_KEYWORDS:
+            s_clean = s_clean.replace(k, "")
+        if not s_clean.strip():
+            return None
+        found = _interruption_scanner.scan(s_clean)
+    elif not s_clean.strip():
+        return None
+    if "lc_status" in found:
+        return None
+    if "stood_ok" in found:
+        return "restore"
+    if "ar_success" in found:
+        return "outage"
+    has_outage = "outage" in found
+    has_restore = "restore" in found
     if has_outage and not has_restore:
         return "outage"
     if has_restore and not has_outage:
@@ -1500,10 +3058,8 @@ def _extract_interruption_metadata(
         elif "replacement" in lower_both and not relay:
             relay = f"for replacement of breaker {bay_id}-52"
 
-    breakdown = "YES" if (
-        "breakdown declared" in lower_both
-        or "under breakdown condition" in lower_both
-    ) else "NO"
+    found = _interruption_scanner.scan(lower_both)
+    breakdown = "YES" if "breakdown" in found else "NO"
 
     fault_identified = ""
     fault_location = ""
@@ -1517,18 +3073,9 @@ def _extract_interruption_metadata(
         km_val = m.group(1)
         fault_location = f"{km_val}km"
 
-    fault_keywords = [
-        "fault identified",
-        "flashover",
-        "flash over",
-        "conductor",
-        "insulator",
-        "oil leakage",
-        "pole damage",
-    ]
-    if any(k in lower_both for k in fault_keywords):
+    if "fault" in found:
         for sentence in re.split(r"[\.!?]+", base + " " + restore):
-            if any(k in sentence.lower() for k in fault_keywords):
+            if _fault_scanner.scan(sentence.lower()):
                 fault_identified = sentence.strip()
                 break
 
@@ -1537,22 +3084,9 @@ def _extract_interruption_metadata(
     if not fault_location:
         fault_location = "-"
 
-    remark_phrases = [
-        ("charged as per ld instructions", "Charged as per LD instructions"),
-        ("informed to ld", "Informed to LD"),
-        ("busbar charged through tie", "Busbar charged through tie"),
-        ("pir replacement done", "PIR replacement done"),
-        ("oil leakage arrested", "Oil leakage arrested"),
-        ("line stood ok", "Line stood OK"),
-        ("stood ok", "Stood OK"),
-        ("taken into service", "Taken into service"),
-        ("taken in to service", "Taken into service"),
-        ("put in to service", "Put into service"),
-        ("put into service", "Put into service"),
-    ]
     remarks_parts: List[str] = []
-    for needle, label in remark_phrases:
-        if needle in lower_both and label not in remarks_parts:
+    for needle, label in INTERRUPTION_REMARK_PHRASES:
+        if "remark:" + needle in found and label not in remarks_parts:
             remarks_parts.append(label)
     remarks = ". ".join(remarks_parts) if remarks_parts else ""
     action_taken = remarks
@@ -1613,8 +3147,320 @@ def _build_feeder_aliases(feeder_name: str):
     return list(aliases)
 
 
+class FeederAliasMatcher:
+    """Aho-Corasick automaton over the aliases of an ordered feeder list.
+
+    ``match`` scans a lower-cased message once and returns the id of the first
+    feeder (in list order) that has any alias occurring in it, which is what
+    testing each feeder's aliases with ``in`` in turn would give.
+    """
+
+    __slots__ = ("feeder_ids", "_goto", "_fail", "_out", "_always")
+
+    def __init__(self, feeders: List[Dict[str, Any]]):
+        self.feeder_ids = [f["id"] for f in feeders]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[int] = [len(feeders)]
+        self._always = len(feeders)
+        for rank, f in enumerate(feeders):
+            for alias in _build_feeder_aliases(f["name"]):
+                if not alias:
+                    # "" is in every message
+                    self._always = min(self._always, rank)
+                    continue
+                node = 0
+                for ch in alias:
+                    nxt = self._goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto[node][ch] = nxt
+                        self._goto.append({})
+                        self._out.append(len(feeders))
+                    node = nxt
+                self._out[node] = min(self._out[node], rank)
+        # Breadth-first failure links; each node's output becomes the best rank
+        # among all aliases ending there (its own and its suffixes').
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = min(self._out[child], self._out[self._fail[child]])
+                queue.append(child)
+
+    def match(self, lower: str) -> Optional[str]:
+        best = self._always
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in lower:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node] < best:
+                best = out[node]
+                if best == 0:
+                    break
+        return self.feeder_ids[best] if best < len(self.feeder_ids) else None
+
+
+FEEDER_MATCHER_CACHE_SIZE = 32
+_feeder_matcher_cache: Dict[Tuple[Tuple[str, str], ...], FeederAliasMatcher] = {}
+
+
+def get_feeder_alias_matcher(feeders: List[Dict[str, Any]]) -> FeederAliasMatcher:
+    """Matcher for this exact feeder list, rebuilt only when a feeder is added,
+    removed, reordered or renamed."""
+    version = tuple((f["id"], f["name"]) for f in feeders)
+    matcher = _feeder_matcher_cache.get(version)
+    if matcher is None:
+        if len(_feeder_matcher_cache) >= FEEDER_MATCHER_CACHE_SIZE:
+            _feeder_matcher_cache.pop(next(iter(_feeder_matcher_cache)))
+        matcher = _feeder_matcher_cache[version] = FeederAliasMatcher(feeders)
+    return matcher
+
+
+# ---------------------------------------------------------
+# WhatsApp chat store
+# ---------------------------------------------------------
+# Parsed chat messages are kept in ``chat_messages`` so a re-uploaded export
+# only adds (and classifies) the messages after the last stored one, and
+# interruption previews can be built from the store without any upload.
+# Messages are grouped by ``source`` (the export's file name), since each
+# WhatsApp group is exported separately and has its own timeline.
+
+CHAT_PAIRING_LOOKBACK_DAYS = 45
+
+
+def _chat_source(filename: Optional[str]) -> str:
+    name = (filename or "").strip().lower()
+    if name.endswith(".txt"):
+        name = name[:-4]
+    return name or "default"
+
+
+def _chat_message_hash(source: str, ts: datetime, occurrence: int, text: str) -> str:
+    key = f"{source}|{ts.isoformat()}|{occurrence}|{text}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _message_kind(msg: Dict[str, Any]):
+    if "kind" in msg:
+        return msg["kind"]
+    return _classify_interruption_message(msg["text"])
+
+
+
+class OpenOutages:
+    """Unrestored outage events of one feeder, bucketed by date.
+
+    Events must be added in timestamp order. ``pop_for`` picks the outage a
+    restore closes: the last one earlier the same day, else the latest
+    earlier one. Only the two newest date buckets can hold either, and
+    within a bucket the split point is found by bisection.
+    """
+
+    __slots__ = ("_dates", "_stamps", "_events")
+
+    def __init__(self):
+        self._dates: List[Any] = []
+        self._stamps: Dict[Any, List[datetime]] = {}
+        self._events: Dict[Any, List[Dict[str, Any]]] = {}
+
+    def add(self, ev: Dict[str, Any]):
+        day = ev["timestamp"].date()
+        if not self._dates or self._dates[-1] != day:
+            self._dates.append(day)
+            self._stamps[day] = []
+            self._events[day] = []
+        self._stamps[day].append(ev["timestamp"])
+        self._events[day].append(ev)
+
+    def _take(self, pos: int, i: int) -> Dict[str, Any]:
+        day = self._dates[pos]
+        stamps, events = self._stamps[day], self._events[day]
+        ev = events[i]
+        # Identical messages with the same stamp are removed earliest first,
+        # i.e. by value, so the order of the ones left is the chat order.
+        j = bisect.bisect_left(stamps, stamps[i])
+        while events[j] != ev:
+            j += 1
+        stamps.pop(j)
+        events.pop(j)
+        if not self._events[day]:
+            del self._dates[pos], self._stamps[day], self._events[day]
+        return ev
+
+    def pop_for(self, restore: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        ts = restore["timestamp"]
+        for pos in (-1, -2):
+            if len(self._dates) < -pos:
+                return None
+            # Outages stamped at or after the restore stay open
+            i = bisect.bisect_left(self._stamps[self._dates[pos]], ts) - 1
+            if i >= 0:
+                return self._take(pos, i)
+        return None
+
+
+CHAT_INGEST_BATCH_SIZE = 1000
+
+
+async def _ingest_chat_messages(
+    messages, source: str, hash_window: Optional[Tuple[datetime, datetime]] = None
+) -> Dict[str, Any]:
+    """Store the messages of an export that are not already in ``chat_messages``.
+
+    ``messages`` is an async iterable (see ``_aiter_whatsapp_upload``) and is
+    written in batches, so memory stays flat however long the chat is. The
+    whole export is parsed, but only messages at or after the newest stored
+    timestamp for ``source`` are classified and written; within that minute,
+    the content hash (which includes how many identical messages preceded it
+    in the same minute) skips the ones already stored.
+
+    With ``hash_window`` (``start`` <= timestamp < ``end``), the result also
+    lists under ``hashes`` the hash of every message of the export in that
+    window, stored before or not, so a preview can be limited to the file.
+    """
+    last = await db.chat_messages.find_one(
+        {"source": source}, {"_id": 0, "timestamp": 1, "seq": 1}, sort=[("timestamp", -1), ("seq", -1)]
+    )
+    last_ts = last["timestamp"] if last else None
+    last_seq = await db.chat_messages.find_one({"source": source}, {"_id": 0, "seq": 1}, sort=[("seq", -1)])
+    seq = (last_seq["seq"] + 1) if last_seq else 0
+    now = datetime.now(timezone.utc).isoformat()
+    minute: Optional[datetime] = None
+    occurrences: Dict[str, int] = {}
+    ops: List[UpdateOne] = []
+    hashes: List[str] = []
+    parsed = checked = added = 0
+
+    async def flush():
+        nonlocal added
+        if ops:
+            result = await db.chat_messages.bulk_write(ops, ordered=True)
+            added += result.upserted_count
+            ops.clear()
+
+    async for msg in messages:
+        parsed += 1
+        ts, text = msg["timestamp"], msg["text"]
+        if ts != minute:
+            minute, occurrences = ts, {}
+        occurrence = occurrences.get(text, 0)
+        occurrences[text] = occurrence + 1
+        if not text:
+            continue
+        in_window = hash_window is not None and hash_window[0] <= ts < hash_window[1]
+        if last_ts is not None and ts < last_ts:
+            if in_window:
+                hashes.append(_chat_message_hash(source, ts, occurrence, text))
+            continue
+        doc_hash = _chat_message_hash(source, ts, occurrence, text)
+        if in_window:
+            hashes.append(doc_hash)
+        ops.append(UpdateOne(
+            {"hash": doc_hash},
+            {"$setOnInsert": {
+                "hash": doc_hash,
+                "source": source,
+                "timestamp": ts,
+                "seq": seq,
+                "text": text,
+                "kind": _message_kind(msg),
+                "imported_at": now,
+            }},
+            upsert=True,
+        ))
+        seq += 1
+        checked += 1
+        if len(ops) >= CHAT_INGEST_BATCH_SIZE:
+            await flush()
+    await flush()
+    result = {"source": source, "parsed": parsed, "checked": checked, "added": added}
+    if hash_window is not None:
+        result["hashes"] = hashes
+    return result
+
+
+def _chat_preview_window(year: Optional[int], month: Optional[int]) -> Tuple[datetime, datetime]:
+    """Timestamps a preview of the period reads: the period plus a pairing
+    margin on either side (outages can be restored days later)."""
+    if not year:
+        return datetime.min, datetime.max
+    if month:
+        start = datetime(year, month, 1)
+        end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    else:
+        start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    margin = timedelta(days=CHAT_PAIRING_LOOKBACK_DAYS)
+    return start - margin, end + margin
+
+
+def _load_chat_messages(
+    source: Optional[str], year: Optional[int], month: Optional[int], hashes: Optional[List[str]] = None
+):
+    """Stored messages in chat order within ``_chat_preview_window``; with
+    ``hashes``, only those messages."""
+    query: Dict[str, Any] = {}
+    if source:
+        query["source"] = source
+    if year:
+        start, end = _chat_preview_window(year, month)
+        query["timestamp"] = {"$gte": start, "$lt": end}
+    if hashes is not None:
+        query["hash"] = {"$in": hashes}
+    cursor = db.chat_messages.find(query, {"_id": 0, "timestamp": 1, "text": 1, "kind": 1})
+    return cursor.sort([("timestamp", 1), ("seq", 1)])
+
+
+async def _chat_messages_for_preview(file: Optional[UploadFile], source: Optional[str], year: Optional[int], month: Optional[int]):
+    """Messages an interruption preview pairs: those of the uploaded export,
+    or without a file, every stored message of ``source``."""
+    if file is not None:
+        filename = file.filename or ""
+        if not filename.lower().endswith(".txt"):
+            raise HTTPException(status_code=400, detail="Only WhatsApp .txt exports are supported")
+        source = _chat_source(filename)
+        if CHAT_PARSE_WORKERS > 1:
+            stream = _aiter_whatsapp_upload_parallel(file)
+        else:
+            stream = _aiter_whatsapp_upload(file)
+        ingested = await _ingest_chat_messages(stream, source, _chat_preview_window(year, month))
+        return _load_chat_messages(source, year, month, ingested["hashes"])
+    if not await db.chat_messages.find_one({"source": source} if source else {}, {"_id": 1}):
+        raise HTTPException(status_code=400, detail="No stored chat messages; upload a WhatsApp .txt export")
+    return _load_chat_messages(source, year, month)
+
+
+@api_router.get("/interruptions/chat-store")
+async def get_chat_store_summary(current_user: User = Depends(get_current_user)):
+    pipeline = [
+        {"$group": {
+            "_id": "$source",
+            "messages": {"$sum": 1},
+            "first_timestamp": {"$min": "$timestamp"},
+            "last_timestamp": {"$max": "$timestamp"},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+    rows = await db.chat_messages.aggregate(pipeline).to_list(None)
+    return [
+        {
+            "source": r["_id"],
+            "messages": r["messages"],
+            "first_timestamp": r["first_timestamp"].isoformat() if r.get("first_timestamp") else None,
+            "last_timestamp": r["last_timestamp"].isoformat() if r.get("last_timestamp") else None,
+        }
+        for r in rows
+    ]
+
+
 async def _build_interruptions_from_chat_for_all_feeders(
-    content: str,
+    messages,
     year: Optional[int],
     month: Optional[int],
 ):
@@ -1622,16 +3468,14 @@ async def _build_interruptions_from_chat_for_all_feeders(
         {"type": {"$in": ["feeder_400kv", "feeder_220kv", "ict_feeder", "reactor_feeder", "bay_feeder"]}},
         {"_id": 0},
     ).to_list(1000)
-    messages = _parse_whatsapp_messages(content)
-    aliases_map = {}
+    matcher = get_feeder_alias_matcher(feeders)
     bus_reactor_feeder_id = None
     for f in feeders:
-        aliases_map[f["id"]] = _build_feeder_aliases(f["name"])
         name_lower = f["name"].lower()
         if "bus reactor" in name_lower and f.get("type") == "reactor_feeder":
             bus_reactor_feeder_id = f["id"]
     events_by_feeder: Dict[str, List[Dict[str, Any]]] = {}
-    for msg in messages:
+    async for msg in messages:
         text = msg["text"]
         if not text:
             continue
@@ -1640,15 +3484,10 @@ async def _build_interruptions_from_chat_for_all_feeders(
         if bus_reactor_feeder_id and "bus reactor" in lower:
             matched_feeder_id = bus_reactor_feeder_id
         else:
-            for feeder in feeders:
-                fid = feeder["id"]
-                aliases = aliases_map.get(fid) or []
-                if any(a in lower for a in aliases):
-                    matched_feeder_id = fid
-                    break
+            matched_feeder_id = matcher.match(lower)
         if not matched_feeder_id:
             continue
-        kind = _classify_interruption_message(text)
+        kind = _message_kind(msg)
         if not kind:
             continue
         ts = _extract_time_from_text(text, msg["timestamp"])
@@ -1668,22 +3507,15 @@ async def _build_interruptions_from_chat_for_all_feeders(
             if not events:
                 continue
         events.sort(key=lambda e: e["timestamp"])
-        open_outages: List[Dict[str, Any]] = []
+        open_outages = OpenOutages()
         pairs: List[Dict[str, Any]] = []
         for ev in events:
             if ev["kind"] == "outage":
-                open_outages.append(ev)
+                open_outages.add(ev)
             elif ev["kind"] == "restore":
-                candidates = [o for o in open_outages if o["timestamp"] < ev["timestamp"]]
-                if not candidates:
+                outage = open_outages.pop_for(ev)
+                if outage is None:
                     continue
-                restore_date = ev["timestamp"].date()
-                same_day = [o for o in candidates if o["timestamp"].date() == restore_date]
-                if same_day:
-                    outage = same_day[-1]
-                else:
-                    outage = candidates[-1]
-                open_outages.remove(outage)
                 start_ts = outage["timestamp"]
                 end_ts = ev["timestamp"]
                 if month and start_ts.month != month:
@@ -1723,12 +3555,149 @@ async def _build_interruptions_from_chat_for_all_feeders(
             preview.append(item)
     return preview
 
+# ---------------------------------------------------------
+# Staged import sessions
+# ---------------------------------------------------------
+# Every import preview keeps the rows it parsed in ``import_sessions`` and
+# sends the session id back in the X-Import-Session header (the body is the
+# same preview list as before). The page then commits with
+# POST /api/import-sessions/{id}/commit, sending only the indexes of preview
+# rows to leave out, instead of posting every row back or uploading the file
+# again. Sessions belong to the user who made the preview and expire after
+# IMPORT_SESSION_TTL_MINUTES through the TTL index on ``expires_at``. The rows
+# go to ``import_session_rows`` in chunks of IMPORT_SESSION_CHUNK_ROWS (with
+# the same expiry), so a large preview stays clear of the 16 MB document limit.
+
+IMPORT_SESSION_TTL_MINUTES = 30
+IMPORT_SESSION_CHUNK_ROWS = 500
+IMPORT_SESSION_HEADER = "X-Import-Session"
+
+
+async def stage_import_session(
+    response: Response,
+    kind: str,
+    target_id: Optional[str],
+    rows: List[Dict[str, Any]],
+    user: User,
+    options: Optional[Dict[str, Any]] = None,
+) -> str:
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(minutes=IMPORT_SESSION_TTL_MINUTES)
+    session_id = str(uuid.uuid4())
+    chunks = [
+        {"session_id": session_id, "index": i, "rows": rows[start:start + IMPORT_SESSION_CHUNK_ROWS], "expires_at": expires_at}
+        for i, start in enumerate(range(0, len(rows), IMPORT_SESSION_CHUNK_ROWS))
+    ]
+    # Rows first, so a session that exists always has all of its rows
+    if chunks:
+        await db.import_session_rows.insert_many(chunks)
+    await db.import_sessions.insert_one({
+        "id": session_id,
+        "kind": kind,
+        "target_id": target_id,
+        "user_id": user.id,
+        "row_count": len(rows),
+        "options": options or {},
+        "created_at": now,
+        "expires_at": expires_at,
+    })
+    response.headers[IMPORT_SESSION_HEADER] = session_id
+    return session_id
+
+
+class ImportSessionCommitPayload(BaseModel):
+    exclude: List[int] = []
+    overwrite: bool = False
+
+
+async def _commit_import_session_rows(session: dict, payload: ImportSessionCommitPayload, current_user: User):
+    """Run the import behind a claimed session; returns the import's result."""
+    session_id = session["id"]
+    expires_at = session.get("expires_at")
+    if expires_at is not None and expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at is None or expires_at < datetime.now(timezone.utc):
+        raise HTTPException(status_code=404, detail="Import session not found or expired; preview the file again")
+    staged = []
+    async for chunk in db.import_session_rows.find({"session_id": session_id}, {"_id": 0, "rows": 1}).sort("index", 1):
+        staged.extend(chunk["rows"])
+    if len(staged) != session.get("row_count", 0):
+        raise HTTPException(status_code=404, detail="Import session not found or expired; preview the file again")
+    excluded = set(payload.exclude)
+    rows = [r for i, r in enumerate(staged) if i not in excluded]
+    kind = session["kind"]
+    target_id = session["target_id"]
+    options = session.get("options") or {}
+    if kind == "line-losses":
+        result = await import_entries(LineLossesImportPayload(feeder_id=target_id, entries=rows), current_user)
+    elif kind == "energy":
+        result = await import_energy_entries(EnergyImportPayload(sheet_id=target_id, entries=rows), current_user)
+    elif kind == "max-min":
+        result = await import_max_min_entries(MaxMinImportPayload(feeder_id=target_id, entries=rows), current_user)
+    elif kind == "interruptions":
+        result = await import_interruption_entries(InterruptionsImportPayload(feeder_id=target_id, entries=rows), current_user)
+    elif kind == "interruptions-all":
+        result = await import_interruption_entries_all(InterruptionsBulkImportPayload(entries=rows), current_user)
+    elif kind.startswith("admin-"):
+        current_admin = await get_current_admin(current_user)
+        admin_payload = {
+            "entries": rows,
+            "overwrite": payload.overwrite,
+            "year": options.get("year"),
+            "month": options.get("month"),
+        }
+        if kind == "admin-line-losses":
+            result = await admin_bulk_import_line_losses(payload={**admin_payload, "feeder_id": target_id}, current_admin=current_admin)
+        elif kind == "admin-energy":
+            result = await admin_bulk_import_energy(payload={**admin_payload, "sheet_id": target_id}, current_admin=current_admin)
+        elif kind == "admin-max-min":
+            result = await admin_bulk_import_max_min(payload={**admin_payload, "feeder_id": target_id}, current_admin=current_admin)
+        elif kind == "admin-interruptions":
+            result = await admin_bulk_import_interruptions(payload=admin_payload, current_admin=current_admin)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown import session type: {kind}")
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown import session type: {kind}")
+    return result
+
+
+@api_router.post("/import-sessions/{session_id}/commit")
+async def commit_import_session(
+    session_id: str,
+    payload: Optional[ImportSessionCommitPayload] = None,
+    current_user: User = Depends(get_current_user),
+):
+    payload = payload or ImportSessionCommitPayload()
+    # Claim the session before importing, so a double click or a client retry
+    # cannot import the same rows twice
+    session = await db.import_sessions.find_one_and_update(
+        {"id": session_id, "user_id": current_user.id, "committing": {"$ne": True}},
+        {"$set": {"committing": True}},
+        projection={"_id": 0},
+    )
+    if not session:
+        if await db.import_sessions.find_one({"id": session_id, "user_id": current_user.id, "committing": True}, {"_id": 1}):
+            raise HTTPException(status_code=409, detail="This import is already being committed")
+        raise HTTPException(status_code=404, detail="Import session not found or expired; preview the file again")
+    try:
+        result = await _commit_import_session_rows(session, payload, current_user)
+    except Exception:
+        # Release the claim so the import can be retried
+        await db.import_sessions.update_one({"id": session_id}, {"$unset": {"committing": ""}})
+        raise
+    await db.import_sessions.delete_one({"id": session_id})
+    await db.import_session_rows.delete_many({"session_id": session_id})
+    return result
+
+
 @api_router.post("/interruptions/preview-import/{feeder_id}")
 async def preview_interruptions_import(
     feeder_id: str,
+    response: Response,
     year: Optional[int] = None,
     month: Optional[int] = None,
-    file: UploadFile = File(...),
+    source: Optional[str] = None,
+    file: Optional[UploadFile] = File(None),
     current_user: User = Depends(get_current_user)
 ):
     feeder = await db.max_min_feeders.find_one({"id": feeder_id}, {"_id": 0})
@@ -1736,25 +3705,18 @@ async def preview_interruptions_import(
         raise HTTPException(status_code=404, detail="Feeder not found")
     if feeder.get("type") not in ["feeder_400kv", "feeder_220kv", "ict_feeder", "reactor_feeder", "bay_feeder"]:
         raise HTTPException(status_code=400, detail="Interruptions supported only for 400KV, 220KV, ICT, Reactor and Bay feeders")
-    filename = file.filename or ""
-    if not filename.lower().endswith(".txt"):
-        raise HTTPException(status_code=400, detail="Only WhatsApp .txt exports are supported")
-    raw = await file.read()
-    try:
-        content = raw.decode("utf-8", errors="ignore")
-    except Exception:
-        raise HTTPException(status_code=400, detail="Failed to decode file as UTF-8 text")
-    messages = _parse_whatsapp_messages(content)
-    aliases = _build_feeder_aliases(feeder["name"])
+    # Pairs are only restricted to a period when both year and month are given
+    messages = await _chat_messages_for_preview(file, source, year if month else None, month)
+    matcher = get_feeder_alias_matcher([feeder])
     events = []
-    for msg in messages:
+    async for msg in messages:
         text = msg["text"]
         if not text:
             continue
         lower = text.lower()
-        if not any(a in lower for a in aliases):
+        if matcher.match(lower) is None:
             continue
-        kind = _classify_interruption_message(text)
+        kind = _message_kind(msg)
         if not kind:
             continue
         events.append(
@@ -1765,22 +3727,15 @@ async def preview_interruptions_import(
             }
         )
     events.sort(key=lambda e: e["timestamp"])
-    open_outages = []
+    open_outages = OpenOutages()
     pairs = []
     for ev in events:
         if ev["kind"] == "outage":
-            open_outages.append(ev)
+            open_outages.add(ev)
         elif ev["kind"] == "restore":
-            candidates = [o for o in open_outages if o["timestamp"] < ev["timestamp"]]
-            if not candidates:
+            outage = open_outages.pop_for(ev)
+            if outage is None:
                 continue
-            restore_date = ev["timestamp"].date()
-            same_day = [o for o in candidates if o["timestamp"].date() == restore_date]
-            if same_day:
-                outage = same_day[-1]
-            else:
-                outage = candidates[-1]
-            open_outages.remove(outage)
             start_ts = _extract_time_from_text(outage["text"], outage["timestamp"])
             end_ts = _extract_time_from_text(ev["text"], ev["timestamp"])
             if year and month:
@@ -1818,6 +3773,7 @@ async def preview_interruptions_import(
         item = dict(p)
         item["exists"] = bool(exists)
         preview.append(item)
+    await stage_import_session(response, "interruptions", feeder_id, preview, current_user)
     return preview
 
 @api_router.post("/interruptions/import-entries")
@@ -1866,20 +3822,16 @@ async def import_interruption_entries(payload: InterruptionsImportPayload, curre
 
 @api_router.post("/interruptions/preview-import-all")
 async def preview_interruptions_import_all(
+    response: Response,
     year: Optional[int] = None,
     month: Optional[int] = None,
-    file: UploadFile = File(...),
+    source: Optional[str] = None,
+    file: Optional[UploadFile] = File(None),
     current_user: User = Depends(get_current_user),
 ):
-    filename = file.filename or ""
-    if not filename.lower().endswith(".txt"):
-        raise HTTPException(status_code=400, detail="Only WhatsApp .txt exports are supported")
-    raw = await file.read()
-    try:
-        content = raw.decode("utf-8", errors="ignore")
-    except Exception:
-        raise HTTPException(status_code=400, detail="Failed to decode file as UTF-8 text")
-    preview = await _build_interruptions_from_chat_for_all_feeders(content, year, month)
+    messages = await _chat_messages_for_preview(file, source, year, month)
+    preview = await _build_interruptions_from_chat_for_all_feeders(messages, year, month)
+    await stage_import_session(response, "interruptions-all", None, preview, current_user)
     return preview
 
 
@@ -1993,6 +3945,7 @@ async def normalize_existing_interruptions(
 @api_router.post("/max-min/preview-import/{feeder_id}")
 async def preview_max_min_import(
     feeder_id: str,
+    response: Response,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user)
 ):
@@ -2205,6 +4158,7 @@ async def preview_max_min_import(
                 continue
         exists = await db.max_min_entries.find_one({"feeder_id": feeder_id, "date": date_str})
         preview.append({"date": date_str, "data": data, "exists": bool(exists)})
+    await stage_import_session(response, "max-min", feeder_id, preview, current_user)
     return preview
 
 class MaxMinImportPayload(BaseModel):
@@ -2238,6 +4192,7 @@ async def import_max_min_entries(payload: MaxMinImportPayload, current_user: Use
         doc['updated_at'] = doc['updated_at'].isoformat()
         await db.max_min_entries.insert_one(doc)
         imported += 1
+    await refresh_month_buckets("max_min_entries", feeder_id, [e['date'] for e in entries_sorted])
     return {"imported": imported}
 
 @api_router.put("/entries/{entry_id}", response_model=DailyEntry)
@@ -2300,6 +4255,7 @@ async def update_entry(entry_id: str, update_data: DailyEntryUpdate, current_use
             
         next_entry['updated_at'] = datetime.now(timezone.utc).isoformat()
         await db.entries.replace_one({"_id": next_entry['_id']}, next_entry)
+    await refresh_month_buckets("entries", entry['feeder_id'], [entry['date'], next_date])
     
     if isinstance(entry.get('created_at'), str):
         entry['created_at'] = datetime.fromisoformat(entry['created_at'])
@@ -2310,9 +4266,10 @@ async def update_entry(entry_id: str, update_data: DailyEntryUpdate, current_use
 
 @api_router.delete("/entries/{entry_id}")
 async def delete_entry(entry_id: str, current_user: User = Depends(get_current_user)):
-    result = await db.entries.delete_one({"id": entry_id})
-    if result.deleted_count == 0:
+    deleted = await db.entries.find_one_and_delete({"id": entry_id}, {"_id": 0, "feeder_id": 1, "date": 1})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Entry not found")
+    await refresh_month_buckets("entries", deleted.get('feeder_id'), [deleted.get('date')])
     return {"message": "Entry deleted successfully"}
 
 # Helper to parse float safely
@@ -2324,188 +4281,7 @@ def get_float(val):
 
 # Helper to calculate stats for a period
 def calculate_period_stats(period_entries, feeder_type):
-    stats = {}
-    
-    if feeder_type == 'bus_station':
-        # Initialize stats with defaults
-        stats = {
-            'max_400kv': -float('inf'), 'max_400kv_date': '-', 'max_400kv_time': '-',
-            'min_400kv': float('inf'), 'min_400kv_date': '-', 'min_400kv_time': '-',
-            'max_220kv': -float('inf'), 'max_220kv_date': '-', 'max_220kv_time': '-',
-            'min_220kv': float('inf'), 'min_220kv_date': '-', 'min_220kv_time': '-',
-            'max_load': -float('inf'), 'max_load_date': '-', 'max_load_time': '-', 'max_load_mvar': '-'
-        }
-
-        # 1. Find Max/Min Values
-        for e in period_entries:
-            d = e.get('data') or {}
-            
-            # 400KV
-            v = get_float((d.get('max_bus_voltage_400kv') or {}).get('value'))
-            if v is not None and v > stats['max_400kv']: stats['max_400kv'] = v
-            v = get_float((d.get('min_bus_voltage_400kv') or {}).get('value'))
-            if v is not None and v < stats['min_400kv']: stats['min_400kv'] = v
-            
-            # 220KV
-            v = get_float((d.get('max_bus_voltage_220kv') or {}).get('value'))
-            if v is not None and v > stats['max_220kv']: stats['max_220kv'] = v
-            v = get_float((d.get('min_bus_voltage_220kv') or {}).get('value'))
-            if v is not None and v < stats['min_220kv']: stats['min_220kv'] = v
-
-            # Load (Independent)
-            v = get_float((d.get('station_load') or {}).get('max_mw'))
-            if v is not None and v > stats['max_load']:
-                stats['max_load'] = v
-                stats['max_load_date'] = e['date']
-                stats['max_load_time'] = (d.get('station_load') or {}).get('time', '-')
-                stats['max_load_mvar'] = (d.get('station_load') or {}).get('mvar', '-')
-
-        # 2. Collect Candidates
-        cands_max_400 = []
-        cands_min_400 = []
-        cands_max_220 = []
-        cands_min_220 = []
-
-        for e in period_entries:
-            d = e.get('data') or {}
-            date = e['date']
-            
-            # Max 400
-            v = get_float((d.get('max_bus_voltage_400kv') or {}).get('value'))
-            if v == stats['max_400kv'] and v is not None:
-                cands_max_400.append({'date': date, 'time': str((d.get('max_bus_voltage_400kv') or {}).get('time', '')).strip()})
-            
-            # Min 400
-            v = get_float((d.get('min_bus_voltage_400kv') or {}).get('value'))
-            if v == stats['min_400kv'] and v is not None:
-                cands_min_400.append({'date': date, 'time': str((d.get('min_bus_voltage_400kv') or {}).get('time', '')).strip()})
-            
-            # Max 220
-            v = get_float((d.get('max_bus_voltage_220kv') or {}).get('value'))
-            if v == stats['max_220kv'] and v is not None:
-                cands_max_220.append({'date': date, 'time': str((d.get('max_bus_voltage_220kv') or {}).get('time', '')).strip()})
-            
-            # Min 220
-            v = get_float((d.get('min_bus_voltage_220kv') or {}).get('value'))
-            if v == stats['min_220kv'] and v is not None:
-                cands_min_220.append({'date': date, 'time': str((d.get('min_bus_voltage_220kv') or {}).get('time', '')).strip()})
-
-        # 3. Find Best Matches (Common Time Priority)
-        def find_best(list_a, list_b):
-            # Try to find intersection
-            for a in list_a:
-                for b in list_b:
-                    if a['date'] == b['date'] and a['time'] == b['time']:
-                        return a, b
-            # No intersection, return first available
-            res_a = list_a[0] if list_a else {'date': '-', 'time': '-'}
-            res_b = list_b[0] if list_b else {'date': '-', 'time': '-'}
-            return res_a, res_b
-
-        final_max_400, final_max_220 = find_best(cands_max_400, cands_max_220)
-        final_min_400, final_min_220 = find_best(cands_min_400, cands_min_220)
-
-        stats['max_400kv_date'] = final_max_400['date']
-        stats['max_400kv_time'] = final_max_400['time']
-        stats['max_220kv_date'] = final_max_220['date']
-        stats['max_220kv_time'] = final_max_220['time']
-
-        stats['min_400kv_date'] = final_min_400['date']
-        stats['min_400kv_time'] = final_min_400['time']
-        stats['min_220kv_date'] = final_min_220['date']
-        stats['min_220kv_time'] = final_min_220['time']
-        
-        # Cleanup infinities
-        if stats['max_400kv'] == -float('inf'): stats['max_400kv'] = '-'
-        if stats['min_400kv'] == float('inf'): stats['min_400kv'] = '-'
-        if stats['max_220kv'] == -float('inf'): stats['max_220kv'] = '-'
-        if stats['min_220kv'] == float('inf'): stats['min_220kv'] = '-'
-        if stats['max_load'] == -float('inf'): stats['max_load'] = '-'
-        
-    else:
-        # Feeder / ICT
-        # Initialize stats
-        stats['max_amps'] = -float('inf'); stats['max_amps_date'] = '-'; stats['max_amps_time'] = '-'
-        stats['min_amps'] = float('inf'); stats['min_amps_date'] = '-'; stats['min_amps_time'] = '-'
-        stats['max_mw'] = -float('inf'); stats['max_mw_date'] = '-'; stats['max_mw_time'] = '-'
-        stats['min_mw'] = float('inf'); stats['min_mw_date'] = '-'; stats['min_mw_time'] = '-'
-        
-        total_amps = 0; count_amps = 0
-        total_mw = 0; count_mw = 0
-        
-        max_mw_entry = None
-        min_mw_entry = None
-        
-        for e in period_entries:
-            d = e.get('data') or {}
-            date = e['date']
-            
-            # Collect Averages (Amps)
-            max_amps = get_float((d.get('max') or {}).get('amps'))
-            min_amps = get_float((d.get('min') or {}).get('amps'))
-            avg_amps = get_float((d.get('avg') or {}).get('amps'))
-            
-            # Auto-calc avg if missing
-            if avg_amps is None and max_amps is not None and min_amps is not None:
-                avg_amps = (max_amps + min_amps) / 2
-            
-            if avg_amps is not None:
-                total_amps += avg_amps
-                count_amps += 1
-                
-            # Collect Averages (MW) and Find Max/Min MW
-            max_mw = get_float((d.get('max') or {}).get('mw'))
-            min_mw = get_float((d.get('min') or {}).get('mw'))
-            avg_mw = get_float((d.get('avg') or {}).get('mw'))
-            
-            # Auto-calc avg if missing
-            if avg_mw is None and max_mw is not None and min_mw is not None:
-                avg_mw = (max_mw + min_mw) / 2
-                
-            if avg_mw is not None:
-                total_mw += avg_mw
-                count_mw += 1
-            
-            # Find Max MW Entry
-            if max_mw is not None and max_mw > stats['max_mw']:
-                stats['max_mw'] = max_mw
-                max_mw_entry = e
-            
-            # Find Min MW Entry
-            if min_mw is not None and min_mw < stats['min_mw']:
-                stats['min_mw'] = min_mw
-                min_mw_entry = e
-        
-        # Apply Max MW Logic: Get corresponding Amps/Time from Max MW entry
-        if max_mw_entry:
-            d = max_mw_entry.get('data') or {}
-            stats['max_mw_date'] = max_mw_entry['date']
-            stats['max_mw_time'] = (d.get('max') or {}).get('time', '-')
-            
-            stats['max_amps'] = get_float((d.get('max') or {}).get('amps'))
-            stats['max_amps_date'] = max_mw_entry['date']
-            stats['max_amps_time'] = (d.get('max') or {}).get('time', '-')
-        
-        # Apply Min MW Logic: Get corresponding Amps/Time from Min MW entry
-        if min_mw_entry:
-            d = min_mw_entry.get('data') or {}
-            stats['min_mw_date'] = min_mw_entry['date']
-            stats['min_mw_time'] = (d.get('min') or {}).get('time', '-')
-            
-            stats['min_amps'] = get_float((d.get('min') or {}).get('amps'))
-            stats['min_amps_date'] = min_mw_entry['date']
-            stats['min_amps_time'] = (d.get('min') or {}).get('time', '-')
-        
-        # Cleanup and averages
-        if stats['max_amps'] is None or stats['max_amps'] == -float('inf'): stats['max_amps'] = '-'
-        if stats['min_amps'] is None or stats['min_amps'] == float('inf'): stats['min_amps'] = '-'
-        stats['avg_amps'] = round(total_amps / count_amps, 2) if count_amps > 0 else '-'
-        
-        if stats['max_mw'] == -float('inf'): stats['max_mw'] = '-'
-        if stats['min_mw'] == float('inf'): stats['min_mw'] = '-'
-        stats['avg_mw'] = round(total_mw / count_mw, 2) if count_mw > 0 else '-'
-        
-    return stats
+    return max_min_standard_stats(FeederMonthSeries(period_entries), feeder_type)
 
 @api_router.get("/export/{feeder_id}/{year}/{month}")
 async def export_feeder_data(feeder_id: str, year: int, month: int, current_user: User = Depends(get_current_user)):
@@ -2519,10 +4295,7 @@ async def export_feeder_data(feeder_id: str, year: int, month: int, current_user
     else:
         end_date = f"{year}-{month + 1:02d}-01"
     
-    entries = await db.entries.find(
-        {"feeder_id": feeder_id, "date": {"$gte": start_date, "$lt": end_date}},
-        {"_id": 0}
-    ).sort("date", 1).to_list(1000)
+    entries = await read_month_entries("entries", start_date, end_date, [feeder_id], sort_by_date=True, limit=1000)
     
     wb = Workbook()
     ws = wb.active
@@ -2552,14 +4325,15 @@ async def export_feeder_data(feeder_id: str, year: int, month: int, current_user
         "% Loss"
     ]
     
-    ws.append(headers)
+    writer = SheetWriter(ws)
+    writer.append(headers)
     for cell in ws[1]:
         cell.fill = header_fill
         cell.font = header_font
         cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
     
     for entry in entries:
-        ws.append([
+        writer.append([
             format_date(entry['date']),
             entry['end1_import_initial'],
             entry['end1_import_final'],
@@ -2580,33 +4354,16 @@ async def export_feeder_data(feeder_id: str, year: int, month: int, current_user
             entry['loss_percent']
         ])
     
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column].width = adjusted_width
-    
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
+    writer.fit_columns()
     
     filename = f"{feeder['name']}_{year}_{month:02d}.xlsx"
     
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return workbook_response(wb, filename)
     
 @api_router.post("/preview-import/{feeder_id}")
 async def preview_import(
     feeder_id: str,
+    response: Response,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user)
 ):
@@ -2689,6 +4446,7 @@ async def preview_import(
             "end2_export_final": e2e,
             "exists": bool(exists)
         })
+    await stage_import_session(response, "line-losses", feeder_id, preview, current_user)
     return preview
 
 class LineLossesImportPayload(BaseModel):
@@ -2745,11 +4503,13 @@ async def import_entries(payload: LineLossesImportPayload, current_user: User =
         entry_obj['updated_at'] = entry_obj['updated_at'].isoformat() if isinstance(entry_obj['updated_at'], datetime) else entry_obj['updated_at']
         await db.entries.insert_one(entry_obj)
         imported += 1
+    await refresh_month_buckets("entries", payload.feeder_id, [e['date'] for e in entries_sorted])
     return {"imported": imported}
 
 @api_router.post("/energy/preview-import/{sheet_id}")
 async def preview_energy_import(
     sheet_id: str,
+    response: Response,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user)
 ):
@@ -2845,6 +4605,7 @@ async def preview_energy_import(
             "exists": bool(exists)
         })
     
+    await stage_import_session(response, "energy", sheet_id, preview, current_user)
     return preview
 
 class EnergyImportPayload(BaseModel):
@@ -3017,6 +4778,7 @@ async def admin_bulk_import_line_losses_excel(
 @api_router.post("/admin/bulk-import/line-losses/excel-preview/{feeder_id}")
 async def admin_bulk_import_line_losses_excel_preview(
     feeder_id: str,
+    response: Response,
     year: int | None = None,
     month: int | None = None,
     file: UploadFile = File(...),
@@ -3130,6 +4892,7 @@ async def admin_bulk_import_line_losses_excel_preview(
                     filtered.append(item)
             preview = filtered
 
+    await stage_import_session(response, "admin-line-losses", feeder_id, preview, current_admin, {"year": year, "month": month})
     return preview
 
 @api_router.post("/admin/bulk-import/energy/excel/{sheet_id}")
@@ -3232,6 +4995,7 @@ async def admin_bulk_import_energy_excel(
 @api_router.post("/admin/bulk-import/energy/excel-preview/{sheet_id}")
 async def admin_bulk_import_energy_excel_preview(
     sheet_id: str,
+    response: Response,
     year: int | None = None,
     month: int | None = None,
     file: UploadFile = File(...),
@@ -3340,6 +5104,7 @@ async def admin_bulk_import_energy_excel_preview(
                     filtered.append(item)
             preview = filtered
 
+    await stage_import_session(response, "admin-energy", sheet_id, preview, current_admin, {"year": year, "month": month})
     return preview
 
 @api_router.post("/admin/bulk-import/max-min/excel/{feeder_id}")
@@ -3621,6 +5386,7 @@ async def admin_bulk_import_max_min_excel(
 @api_router.post("/admin/bulk-import/max-min/excel-preview/{feeder_id}")
 async def admin_bulk_import_max_min_excel_preview(
     feeder_id: str,
+    response: Response,
     year: int | None = None,
     month: int | None = None,
     file: UploadFile = File(...),
@@ -3913,6 +5679,7 @@ async def admin_bulk_import_max_min_excel_preview(
                     filtered_preview.append(item)
             preview = filtered_preview
 
+    await stage_import_session(response, "admin-max-min", feeder_id, preview, current_admin, {"year": year, "month": month})
     return preview
 
 
@@ -4093,6 +5860,7 @@ async def admin_bulk_import_interruptions_excel(
 @api_router.post("/admin/bulk-import/interruptions/excel-preview/{feeder_id}")
 async def admin_bulk_import_interruptions_excel_preview(
     feeder_id: str,
+    response: Response,
     year: int | None = None,
     month: int | None = None,
     file: UploadFile = File(...),
@@ -4269,6 +6037,7 @@ async def admin_bulk_import_interruptions_excel_preview(
                     filtered.append(item)
             preview = filtered
 
+    await stage_import_session(response, "admin-interruptions", feeder_id, preview, current_admin, {"year": year, "month": month})
     return preview
 
 # Max-Min Data Module Endpoints
@@ -4336,6 +6105,7 @@ async def get_max_min_feeders(current_user: User = Depends(get_current_user)):
 
 @api_router.get("/max-min/entries/{feeder_id}", response_model=List[MaxMinEntry])
 async def get_max_min_entries(
+    request: Request,
     feeder_id: str,
     year: Optional[int] = None,
     month: Optional[int] = None,
@@ -4350,6 +6120,9 @@ async def get_max_min_entries(
             end_date = f"{year}-{month + 1:02d}-01"
         query['date'] = {"$gte": start_date, "$lt": end_date}
     
+    if _wants_ndjson(request):
+        return _ndjson_response(db.max_min_entries.find(query, {"_id": 0}).sort("date", 1))
+
     entries = await db.max_min_entries.find(query, {"_id": 0}).sort("date", 1).to_list(1000)
     
     # If it's the Bus + Station page, we might need to calculate Station Load on the fly if it's missing or outdated?
@@ -4381,6 +6154,7 @@ async def create_max_min_entry(entry_data: MaxMinEntryCreate, current_user: User
             {"id": existing_entry['id']},
             {"$set": update_data}
         )
+        await refresh_month_buckets("max_min_entries", existing_entry['feeder_id'], [existing_entry['date']])
         existing_entry['data'] = entry_data.data
         existing_entry['updated_at'] = update_data['updated_at']
         if isinstance(existing_entry.get('created_at'), str):
@@ -4399,6 +6173,7 @@ async def create_max_min_entry(entry_data: MaxMinEntryCreate, current_user: User
         doc['created_at'] = doc['created_at'].isoformat()
         doc['updated_at'] = doc['updated_at'].isoformat()
         await db.max_min_entries.insert_one(doc)
+        await refresh_month_buckets("max_min_entries", doc['feeder_id'], [doc['date']])
         return entry_obj
 
 @api_router.put("/max-min/entries/{entry_id}", response_model=MaxMinEntry)
@@ -4430,6 +6205,8 @@ async def update_max_min_entry(entry_id: str, entry_data: MaxMinEntryCreate, cur
         {"$set": update_data}
     )
     
+    await refresh_month_buckets("max_min_entries", existing_entry['feeder_id'], [existing_entry['date'], entry_data.date])
+    
     updated_entry = await db.max_min_entries.find_one({"id": entry_id}, {"_id": 0})
     if isinstance(updated_entry.get('created_at'), str):
         updated_entry['created_at'] = datetime.fromisoformat(updated_entry['created_at'])
@@ -4439,9 +6216,10 @@ async def update_max_min_entry(entry_id: str, entry_data: MaxMinEntryCreate, cur
 
 @api_router.delete("/max-min/entries/{entry_id}")
 async def delete_max_min_entry(entry_id: str, current_user: User = Depends(get_current_user)):
-    result = await db.max_min_entries.delete_one({"id": entry_id})
-    if result.deleted_count == 0:
+    deleted = await db.max_min_entries.find_one_and_delete({"id": entry_id}, {"_id": 0, "feeder_id": 1, "date": 1})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Entry not found")
+    await refresh_month_buckets("max_min_entries", deleted.get('feeder_id'), [deleted.get('date')])
     return {"message": "Entry deleted successfully"}
 
 # ---------------------------------------------------------
@@ -4496,7 +6274,60 @@ def get_feeder_group_info(feeder_name):
         
     return False, []
 
-def determine_leader(p_group_map):
+class CoincidentPeakIndex:
+    """Hash index over a double-circuit / ICT group for coincident-peak lookups.
+
+    Each member's entries are keyed by date (first entry per date wins, as the
+    old ``next(...)`` scans did), and the normalised max/min time that *every*
+    member shares on a date is computed once and cached. A leader candidate
+    is then checked against the whole group with one dictionary lookup.
+    """
+
+    def __init__(self, group_entries_map):
+        self.members = list(group_entries_map)
+        self.by_date: Dict[str, Dict[str, dict]] = {}
+        for fid, entries in group_entries_map.items():
+            first: Dict[str, dict] = {}
+            for e in entries:
+                first.setdefault(e['date'], e)
+            self.by_date[fid] = first
+        self._common: Dict[Tuple[str, str], Any] = {}
+
+    def entry(self, fid, date):
+        return self.by_date.get(fid, {}).get(date)
+
+    def common_time(self, section: str, date: str):
+        """Normalised ``section`` time shared by all members on ``date``, else ``_MISSING``."""
+        key = (section, date)
+        if key not in self._common:
+            shared = _MISSING
+            for fid in self.members:
+                e = self.entry(fid, date)
+                if e is None:
+                    shared = _MISSING
+                    break
+                t = normalize_time(((e.get('data') or {}).get(section) or {}).get('time'))
+                if shared is _MISSING:
+                    shared = t
+                elif t != shared:
+                    shared = _MISSING
+                    break
+            self._common[key] = shared
+        return self._common[key]
+
+    def first_coincident(self, candidates, section: str):
+        """First candidate (in the given order) whose date/time every member shares."""
+        for cand in candidates:
+            if not self.members or self.common_time(section, cand['date']) == cand['time']:
+                return {'date': cand['date'], 'time': cand['time']}
+        return None
+
+
+def _entry_max_mw(e):
+    return get_float_safe(((e.get('data') or {}).get('max') or {}).get('mw'))
+
+
+def determine_leader(p_group_map, index: Optional[CoincidentPeakIndex] = None):
     global_max_mw = -float('inf')
     candidate_leaders = [] # List of {'fid': fid, 'mw': mw, 'entry': entry}
 
@@ -4504,7 +6335,7 @@ def determine_leader(p_group_map):
         local_max = -float('inf')
         local_entry = None
         for e in entries:
-            mw = get_float_safe(e.get('data', {}).get('max', {}).get('mw'))
+            mw = _entry_max_mw(e)
             if mw is not None and mw > local_max:
                 local_max = mw
                 local_entry = e
@@ -4515,234 +6346,386 @@ def determine_leader(p_group_map):
         elif local_max == global_max_mw and local_max > -float('inf'):
             candidate_leaders.append({'fid': fid, 'mw': local_max, 'entry': local_entry})
     
-    leader_id = None
-    
     if not candidate_leaders:
          # Fallback if no data
          return list(p_group_map.keys())[0] if p_group_map else None
 
     if len(candidate_leaders) == 1:
-        leader_id = candidate_leaders[0]['fid']
-    elif len(candidate_leaders) > 1:
-        # Sort candidates by ID for deterministic processing order (crucial for ties)
-        candidate_leaders.sort(key=lambda x: str(x['fid']))
-
-        # Tie Breaker: Calculate Sum of MW at the candidate's timestamp
-        best_sum = -float('inf')
-        best_leader = None
-        
-        for cand in candidate_leaders:
-            c_fid = cand['fid']
-            c_entry = cand['entry']
-            c_date = c_entry['date']
-            c_time = normalize_time(c_entry.get('data', {}).get('max', {}).get('time'))
-            
-            current_sum = 0
-            valid_timestamp = True
-            
-            # Sum all partners at this timestamp
-            for pid, pentries in p_group_map.items():
-                p_entry = next((e for e in pentries if e['date'] == c_date), None)
-                if not p_entry:
-                    valid_timestamp = False
-                    break
-                
-                p_time = normalize_time(p_entry.get('data', {}).get('max', {}).get('time'))
-                if p_time != c_time:
-                    valid_timestamp = False
-                    break
-                    
-                val = get_float_safe(p_entry.get('data', {}).get('max', {}).get('mw'))
-                if val is not None: current_sum += val
-            
-            if valid_timestamp and current_sum > best_sum:
-                best_sum = current_sum
-                best_leader = c_fid
-        
-        if best_leader:
-            leader_id = best_leader
-        else:
-            # Fallback: Sort by ID for determinism
-            candidate_leaders.sort(key=lambda x: x['fid'])
-            leader_id = candidate_leaders[0]['fid']
-            
-    return leader_id
+        return candidate_leaders[0]['fid']
+
+    # Sort candidates by ID for deterministic processing order (crucial for ties)
+    candidate_leaders.sort(key=lambda x: str(x['fid']))
+    if index is None:
+        index = CoincidentPeakIndex(p_group_map)
+
+    # Tie Breaker: Sum of MW across the group at the candidate's timestamp,
+    # only where every member peaked at that same time.
+    best_sum = -float('inf')
+    best_leader = None
+    for cand in candidate_leaders:
+        c_entry = cand['entry']
+        c_date = c_entry['date']
+        c_time = normalize_time(((c_entry.get('data') or {}).get('max') or {}).get('time'))
+        if index.members and index.common_time('max', c_date) != c_time:
+            continue
+        current_sum = 0
+        for pid in index.members:
+            val = _entry_max_mw(index.entry(pid, c_date))
+            if val is not None: current_sum += val
+        if current_sum > best_sum:
+            best_sum = current_sum
+            best_leader = cand['fid']
+
+    if best_leader:
+        return best_leader
+    # Fallback: Sort by ID for determinism
+    candidate_leaders.sort(key=lambda x: x['fid'])
+    return candidate_leaders[0]['fid']
 
-def calculate_standard_stats(period_entries, feeder_type):
-    stats = {}
-    
-    if feeder_type == 'bus_station':
-        # Initialize stats with defaults
-        stats = {
-            'max_400kv': -float('inf'), 'max_400kv_date': '-', 'max_400kv_time': '-',
-            'min_400kv': float('inf'), 'min_400kv_date': '-', 'min_400kv_time': '-',
-            'max_220kv': -float('inf'), 'max_220kv_date': '-', 'max_220kv_time': '-',
-            'min_220kv': float('inf'), 'min_220kv_date': '-', 'min_220kv_time': '-',
-            'max_load': -float('inf'), 'max_load_date': '-', 'max_load_time': '-', 'max_load_mvar': '-'
+# ---------------------------------------------------------
+# Vectorised Max-Min statistics engine
+# ---------------------------------------------------------
+# A feeder's entries are parsed into NumPy columns once (FeederMonthSeries) and
+# the period statistics are computed on those columns. The tie-break rules of
+# the original per-entry loops are kept exactly: the first entry holding the
+# strict max/min wins, NaN readings never win a comparison but still count
+# towards averages, and averages are summed left to right so rounding is
+# identical.
+
+_MISSING = object()
+
+MAX_MIN_NUMERIC_COLUMNS = {
+    'max_mw': ('max', 'mw'),
+    'max_amps': ('max', 'amps'),
+    'min_mw': ('min', 'mw'),
+    'min_amps': ('min', 'amps'),
+    'avg_mw': ('avg', 'mw'),
+    'avg_amps': ('avg', 'amps'),
+    'max_400kv': ('max_bus_voltage_400kv', 'value'),
+    'min_400kv': ('min_bus_voltage_400kv', 'value'),
+    'max_220kv': ('max_bus_voltage_220kv', 'value'),
+    'min_220kv': ('min_bus_voltage_220kv', 'value'),
+    'load_mw': ('station_load', 'max_mw'),
+}
+
+MAX_MIN_TIME_COLUMNS = {
+    'max_time': ('max', 'time'),
+    'min_time': ('min', 'time'),
+    'max_400kv_time': ('max_bus_voltage_400kv', 'time'),
+    'min_400kv_time': ('min_bus_voltage_400kv', 'time'),
+    'max_220kv_time': ('max_bus_voltage_220kv', 'time'),
+    'min_220kv_time': ('min_bus_voltage_220kv', 'time'),
+    'load_time': ('station_load', 'time'),
+}
+
+MAX_MIN_RAW_COLUMNS = {
+    'load_mvar': ('station_load', 'mvar'),
+}
+
+
+def _section_value(data, section, field):
+    sec = data.get(section) or {}
+    if not isinstance(sec, dict):
+        return _MISSING
+    return sec.get(field, _MISSING)
+
+
+def _canonical_minute(value) -> int:
+    """Minute-of-day for an exact ``HH:MM`` string, or -1 if it is stored any other way."""
+    if (isinstance(value, str) and len(value) == 5 and value[2] == ':' and value.isascii()
+            and value[:2].isdigit() and value[3:].isdigit() and int(value[3:]) < 60):
+        return int(value[:2]) * 60 + int(value[3:])
+    return -1
+
+
+def _reindex_sparse(table: Dict[int, Any], idx) -> Dict[int, Any]:
+    if not table:
+        return {}
+    return {new: table[old] for new, old in enumerate(idx.tolist()) if old in table}
+
+
+class FeederMonthSeries:
+    """One feeder's Max-Min entries (typically a month) as compact columns.
+
+    ``values[name]`` is a float64 array and ``valid[name]`` marks where the
+    stored value parsed as a float (``get_float_safe`` semantics); non-blank
+    values that did not parse are kept in ``unparsed[name]``. Times are int16
+    minute-of-day arrays with a ``time_valid`` mask; the few times not stored
+    as plain ``HH:MM`` keep their original value in ``odd_times`` so ``time()``
+    always returns what was saved. The source documents are not retained.
+    """
+
+    __slots__ = ('feeder_id', 'dates', 'days', 'has_data', 'values', 'valid', 'unparsed',
+                 'minutes', 'time_valid', 'odd_times', 'raw')
+
+    def __init__(self, entries, feeder_id: Optional[str] = None):
+        entries = list(entries)
+        self.feeder_id = feeder_id
+        self.dates = [e['date'] for e in entries]
+        self.days = np.array([int(d.split('-')[2]) for d in self.dates], dtype=np.int16)
+        datas = [e.get('data') or {} for e in entries]
+        n = len(entries)
+        self.has_data = np.fromiter((bool(d) for d in datas), dtype=bool, count=n)
+        self.values: Dict[str, Any] = {}
+        self.valid: Dict[str, Any] = {}
+        self.unparsed: Dict[str, Dict[int, Any]] = {}
+        for name, (section, field) in MAX_MIN_NUMERIC_COLUMNS.items():
+            vals = np.zeros(n, dtype=np.float64)
+            ok = np.zeros(n, dtype=bool)
+            bad: Dict[int, Any] = {}
+            for i, d in enumerate(datas):
+                raw = _section_value(d, section, field)
+                v = None if raw is _MISSING else get_float_safe(raw)
+                if v is not None:
+                    vals[i] = v
+                    ok[i] = True
+                elif raw is not _MISSING and raw:
+                    bad[i] = raw
+            self.values[name] = vals
+            self.valid[name] = ok
+            self.unparsed[name] = bad
+        self.minutes: Dict[str, Any] = {}
+        self.time_valid: Dict[str, Any] = {}
+        self.odd_times: Dict[str, Dict[int, Any]] = {}
+        for name, (section, field) in MAX_MIN_TIME_COLUMNS.items():
+            mins = np.full(n, -1, dtype=np.int16)
+            odd: Dict[int, Any] = {}
+            for i, d in enumerate(datas):
+                raw = _section_value(d, section, field)
+                if raw is _MISSING:
+                    continue
+                m = _canonical_minute(raw)
+                if m < 0:
+                    odd[i] = raw
+                else:
+                    mins[i] = m
+            self.minutes[name] = mins
+            self.time_valid[name] = mins >= 0
+            self.odd_times[name] = odd
+        self.raw: Dict[str, List[Any]] = {
+            name: [_section_value(d, section, field) for d in datas]
+            for name, (section, field) in MAX_MIN_RAW_COLUMNS.items()
         }
 
-        # 1. Find Max/Min Values
-        for e in period_entries:
-            d = e.get('data', {})
-            
-            # 400KV
-            v = get_float_safe(d.get('max_bus_voltage_400kv', {}).get('value'))
-            if v is not None and v > stats['max_400kv']: stats['max_400kv'] = v
-            v = get_float_safe(d.get('min_bus_voltage_400kv', {}).get('value'))
-            if v is not None and v < stats['min_400kv']: stats['min_400kv'] = v
-            
-            # 220KV
-            v = get_float_safe(d.get('max_bus_voltage_220kv', {}).get('value'))
-            if v is not None and v > stats['max_220kv']: stats['max_220kv'] = v
-            v = get_float_safe(d.get('min_bus_voltage_220kv', {}).get('value'))
-            if v is not None and v < stats['min_220kv']: stats['min_220kv'] = v
-
-            # Load (Independent)
-            v = get_float_safe(d.get('station_load', {}).get('max_mw'))
-            if v is not None and v > stats['max_load']:
-                stats['max_load'] = v
-                stats['max_load_date'] = e['date']
-                stats['max_load_time'] = d.get('station_load', {}).get('time', '-')
-                stats['max_load_mvar'] = d.get('station_load', {}).get('mvar', '-')
-
-        # 2. Collect Candidates & 3. Find Best Matches (Simplified for brevity as per original logic)
-        # For simplicity in this refactor, we will just use the FIRST occurrence for Max/Min if simple comparison
-        # But original logic had "Common Time Priority" for voltages.
-        # Let's keep it simple or copy full logic? 
-        # Copying full logic is safer.
-        
-        cands_max_400 = []
-        cands_min_400 = []
-        cands_max_220 = []
-        cands_min_220 = []
-
-        for e in period_entries:
-            d = e.get('data', {})
-            date = e['date']
-            
-            # Max 400
-            v = get_float_safe(d.get('max_bus_voltage_400kv', {}).get('value'))
-            if v == stats['max_400kv'] and v is not None:
-                cands_max_400.append({'date': date, 'time': str(d.get('max_bus_voltage_400kv', {}).get('time', '')).strip()})
-        
-            # Min 400
-            v = get_float_safe(d.get('min_bus_voltage_400kv', {}).get('value'))
-            if v == stats['min_400kv'] and v is not None:
-                cands_min_400.append({'date': date, 'time': str(d.get('min_bus_voltage_400kv', {}).get('time', '')).strip()})
-        
-            # Max 220
-            v = get_float_safe(d.get('max_bus_voltage_220kv', {}).get('value'))
-            if v == stats['max_220kv'] and v is not None:
-                cands_max_220.append({'date': date, 'time': str(d.get('max_bus_voltage_220kv', {}).get('time', '')).strip()})
-        
-            # Min 220
-            v = get_float_safe(d.get('min_bus_voltage_220kv', {}).get('value'))
-            if v == stats['min_220kv'] and v is not None:
-                cands_min_220.append({'date': date, 'time': str(d.get('min_bus_voltage_220kv', {}).get('time', '')).strip()})
-
-        def find_best(list_a, list_b):
-            for a in list_a:
-                for b in list_b:
-                    if a['date'] == b['date'] and a['time'] == b['time']:
-                        return a, b
-            res_a = list_a[0] if list_a else {'date': '-', 'time': '-'}
-            res_b = list_b[0] if list_b else {'date': '-', 'time': '-'}
-            return res_a, res_b
-
-        final_max_400, final_max_220 = find_best(cands_max_400, cands_max_220)
-        final_min_400, final_min_220 = find_best(cands_min_400, cands_min_220)
-
-        stats['max_400kv_date'] = final_max_400['date']
-        stats['max_400kv_time'] = final_max_400['time']
-        stats['max_220kv_date'] = final_max_220['date']
-        stats['max_220kv_time'] = final_max_220['time']
-
-        stats['min_400kv_date'] = final_min_400['date']
-        stats['min_400kv_time'] = final_min_400['time']
-        stats['min_220kv_date'] = final_min_220['date']
-        stats['min_220kv_time'] = final_min_220['time']
-        
-        # Cleanup
+    @classmethod
+    def by_feeder(cls, entries) -> Dict[str, "FeederMonthSeries"]:
+        """Group Mongo results by ``feeder_id`` and build one series per feeder."""
+        grouped: Dict[str, List[dict]] = {}
+        for e in entries:
+            fid = e.get('feeder_id')
+            if fid:
+                grouped.setdefault(fid, []).append(e)
+        return {fid: cls(rows, fid) for fid, rows in grouped.items()}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def time(self, name: str, i: int):
+        """Stored time at row ``i``, or ``_MISSING`` where the entry has none."""
+        if self.time_valid[name][i]:
+            m = int(self.minutes[name][i])
+            return f"{m // 60:02d}:{m % 60:02d}"
+        return self.odd_times[name].get(i, _MISSING)
+
+    def subset(self, mask) -> "FeederMonthSeries":
+        idx = np.flatnonzero(mask)
+        sub = object.__new__(FeederMonthSeries)
+        sub.feeder_id = self.feeder_id
+        sub.dates = [self.dates[i] for i in idx]
+        sub.days = self.days[idx]
+        sub.has_data = self.has_data[idx]
+        sub.values = {k: v[idx] for k, v in self.values.items()}
+        sub.valid = {k: v[idx] for k, v in self.valid.items()}
+        sub.unparsed = {k: _reindex_sparse(v, idx) for k, v in self.unparsed.items()}
+        sub.minutes = {k: v[idx] for k, v in self.minutes.items()}
+        sub.time_valid = {k: v[idx] for k, v in self.time_valid.items()}
+        sub.odd_times = {k: _reindex_sparse(v, idx) for k, v in self.odd_times.items()}
+        sub.raw = {k: [v[i] for i in idx] for k, v in self.raw.items()}
+        return sub
+
+    def between_days(self, start_day: int, end_day: int) -> "FeederMonthSeries":
+        return self.subset((self.days >= start_day) & (self.days <= end_day))
+
+    def between_dates(self, start: str, end: str) -> "FeederMonthSeries":
+        return self.subset(np.fromiter((start <= d <= end for d in self.dates), dtype=bool, count=len(self.dates)))
+
+    def kpi_column(self, name: str):
+        """KPI view of a column over rows with data: blanks read as 0 and
+        unparseable values raise, as ``float(value or 0)`` always did."""
+        for i in sorted(self.unparsed[name]):
+            if self.has_data[i]:
+                float(self.unparsed[name][i])
+        return np.where(self.valid[name], self.values[name], 0.0)[self.has_data]
+
+
+_EMPTY_SERIES = FeederMonthSeries([])
+
+
+def _mm_extreme(values, valid, find_max: bool):
+    """(index, value) of the first strict max/min, as a '>'/'<' scan from ∓inf would find it."""
+    usable = valid & ~np.isnan(values)
+    if not usable.any():
+        return None, (-float('inf') if find_max else float('inf'))
+    if find_max:
+        masked = np.where(usable, values, -np.inf)
+        idx = int(np.argmax(masked))
+        if masked[idx] == -np.inf:
+            return None, -float('inf')
+    else:
+        masked = np.where(usable, values, np.inf)
+        idx = int(np.argmin(masked))
+        if masked[idx] == np.inf:
+            return None, float('inf')
+    return idx, float(values[idx])
+
+
+def _mm_sequential_sum(values):
+    """Left-to-right float sum starting from 0, matching ``total += v`` in a loop."""
+    if len(values) == 0:
+        return 0
+    with np.errstate(invalid='ignore', over='ignore'):
+        return float(np.add.accumulate(np.concatenate(([0.0], values)))[-1])
+
+
+def _mm_raw(value, default='-'):
+    return default if value is _MISSING else value
+
+
+def _mm_voltage_candidates(arrays: FeederMonthSeries, name: str, target: float):
+    values = arrays.values[name]
+    hits = np.flatnonzero(arrays.valid[name] & (values == target))
+    return [{'date': arrays.dates[i], 'time': str(_mm_raw(arrays.time(f'{name}_time', i), '')).strip()} for i in hits]
+
+
+def _mm_find_best(list_a, list_b):
+    for a in list_a:
+        for b in list_b:
+            if a['date'] == b['date'] and a['time'] == b['time']:
+                return a, b
+    res_a = list_a[0] if list_a else {'date': '-', 'time': '-'}
+    res_b = list_b[0] if list_b else {'date': '-', 'time': '-'}
+    return res_a, res_b
+
+
+def _mm_feeder_average(arrays: FeederMonthSeries, metric: str):
+    v_avg, ok_avg = arrays.values[f'avg_{metric}'], arrays.valid[f'avg_{metric}']
+    v_max, ok_max = arrays.values[f'max_{metric}'], arrays.valid[f'max_{metric}']
+    v_min, ok_min = arrays.values[f'min_{metric}'], arrays.valid[f'min_{metric}']
+    derived = ~ok_avg & ok_max & ok_min
+    with np.errstate(invalid='ignore', over='ignore'):
+        avg = np.where(ok_avg, v_avg, (v_max + v_min) / 2)
+    used = ok_avg | derived
+    count = int(used.sum())
+    if count == 0:
+        return '-'
+    return round(_mm_sequential_sum(avg[used]) / count, 2)
+
+
+def max_min_standard_stats(arrays: FeederMonthSeries, feeder_type: str) -> dict:
+    """Vectorised equivalent of the per-entry standard Max-Min period statistics."""
+    if feeder_type == 'bus_station':
+        stats = {}
+        for name in ('max_400kv', 'min_400kv', 'max_220kv', 'min_220kv'):
+            _, stats[name] = _mm_extreme(arrays.values[name], arrays.valid[name], name.startswith('max'))
+            stats[f'{name}_date'] = '-'
+            stats[f'{name}_time'] = '-'
+        stats.update({'max_load': -float('inf'), 'max_load_date': '-', 'max_load_time': '-', 'max_load_mvar': '-'})
+        load_idx, load_val = _mm_extreme(arrays.values['load_mw'], arrays.valid['load_mw'], True)
+        if load_idx is not None:
+            stats['max_load'] = load_val
+            stats['max_load_date'] = arrays.dates[load_idx]
+            stats['max_load_time'] = _mm_raw(arrays.time('load_time', load_idx))
+            stats['max_load_mvar'] = _mm_raw(arrays.raw['load_mvar'][load_idx])
+
+        final_max_400, final_max_220 = _mm_find_best(
+            _mm_voltage_candidates(arrays, 'max_400kv', stats['max_400kv']),
+            _mm_voltage_candidates(arrays, 'max_220kv', stats['max_220kv']),
+        )
+        final_min_400, final_min_220 = _mm_find_best(
+            _mm_voltage_candidates(arrays, 'min_400kv', stats['min_400kv']),
+            _mm_voltage_candidates(arrays, 'min_220kv', stats['min_220kv']),
+        )
+        for name, final in (('max_400kv', final_max_400), ('max_220kv', final_max_220),
+                            ('min_400kv', final_min_400), ('min_220kv', final_min_220)):
+            stats[f'{name}_date'] = final['date']
+            stats[f'{name}_time'] = final['time']
+
         if stats['max_400kv'] == -float('inf'): stats['max_400kv'] = '-'
         if stats['min_400kv'] == float('inf'): stats['min_400kv'] = '-'
         if stats['max_220kv'] == -float('inf'): stats['max_220kv'] = '-'
         if stats['min_220kv'] == float('inf'): stats['min_220kv'] = '-'
         if stats['max_load'] == -float('inf'): stats['max_load'] = '-'
-        
-    else:
-        # Feeder / ICT Standard Logic
-        stats = {
-            'max_amps': -float('inf'), 'max_amps_date': '-', 'max_amps_time': '-',
-            'min_amps': float('inf'), 'min_amps_date': '-', 'min_amps_time': '-',
-            'max_mw': -float('inf'), 'max_mw_date': '-', 'max_mw_time': '-',
-            'min_mw': float('inf'), 'min_mw_date': '-', 'min_mw_time': '-',
-            'avg_amps': 0, 'avg_mw': 0
-        }
-        
-        total_amps = 0; count_amps = 0
-        total_mw = 0; count_mw = 0
-        
-        max_mw_entry = None
-        min_mw_entry = None
-        
-        for e in period_entries:
-            d = e.get('data', {})
-            
-            # Avg Amps
-            max_a = get_float_safe(d.get('max', {}).get('amps'))
-            min_a = get_float_safe(d.get('min', {}).get('amps'))
-            avg_a = get_float_safe(d.get('avg', {}).get('amps'))
-            if avg_a is None and max_a is not None and min_a is not None: avg_a = (max_a + min_a) / 2
-            if avg_a is not None: total_amps += avg_a; count_amps += 1
-                
-            # Avg MW
-            max_m = get_float_safe(d.get('max', {}).get('mw'))
-            min_m = get_float_safe(d.get('min', {}).get('mw'))
-            avg_m = get_float_safe(d.get('avg', {}).get('mw'))
-            if avg_m is None and max_m is not None and min_m is not None: avg_m = (max_m + min_m) / 2
-            if avg_m is not None: total_mw += avg_m; count_mw += 1
-            
-            # Find Max/Min MW Candidates
-            if max_m is not None and max_m > stats['max_mw']:
-                stats['max_mw'] = max_m
-                max_mw_entry = e
-            if min_m is not None and min_m < stats['min_mw']:
-                stats['min_mw'] = min_m
-                min_mw_entry = e
-                
-        # Fill Stats from Max/Min MW Entries
-        if max_mw_entry:
-            d = max_mw_entry.get('data', {})
-            stats['max_mw_date'] = max_mw_entry['date']
-            stats['max_mw_time'] = d.get('max', {}).get('time', '-')
-            stats['max_amps'] = get_float_safe(d.get('max', {}).get('amps'))
-            stats['max_amps_date'] = max_mw_entry['date']
-            stats['max_amps_time'] = d.get('max', {}).get('time', '-')
-
-        if min_mw_entry:
-            d = min_mw_entry.get('data', {})
-            stats['min_mw_date'] = min_mw_entry['date']
-            stats['min_mw_time'] = d.get('min', {}).get('time', '-')
-            stats['min_amps'] = get_float_safe(d.get('min', {}).get('amps'))
-            stats['min_amps_date'] = min_mw_entry['date']
-            stats['min_amps_time'] = d.get('min', {}).get('time', '-')
-            
-        # Cleanup
-        if stats['max_amps'] is None or stats['max_amps'] == -float('inf'): stats['max_amps'] = '-'
-        if stats['min_amps'] is None or stats['min_amps'] == float('inf'): stats['min_amps'] = '-'
-        stats['avg_amps'] = round(total_amps / count_amps, 2) if count_amps > 0 else '-'
-        if stats['max_mw'] == -float('inf'): stats['max_mw'] = '-'
-        if stats['min_mw'] == float('inf'): stats['min_mw'] = '-'
-        stats['avg_mw'] = round(total_mw / count_mw, 2) if count_mw > 0 else '-'
-        
+        return stats
+
+    stats = {
+        'max_amps': -float('inf'), 'max_amps_date': '-', 'max_amps_time': '-',
+        'min_amps': float('inf'), 'min_amps_date': '-', 'min_amps_time': '-',
+        'max_mw': -float('inf'), 'max_mw_date': '-', 'max_mw_time': '-',
+        'min_mw': float('inf'), 'min_mw_date': '-', 'min_mw_time': '-',
+        'avg_amps': 0, 'avg_mw': 0
+    }
+    max_idx, stats['max_mw'] = _mm_extreme(arrays.values['max_mw'], arrays.valid['max_mw'], True)
+    min_idx, stats['min_mw'] = _mm_extreme(arrays.values['min_mw'], arrays.valid['min_mw'], False)
+
+    if max_idx is not None:
+        time_val = _mm_raw(arrays.time('max_time', max_idx))
+        stats['max_mw_date'] = arrays.dates[max_idx]
+        stats['max_mw_time'] = time_val
+        stats['max_amps'] = float(arrays.values['max_amps'][max_idx]) if arrays.valid['max_amps'][max_idx] else None
+        stats['max_amps_date'] = arrays.dates[max_idx]
+        stats['max_amps_time'] = time_val
+    if min_idx is not None:
+        time_val = _mm_raw(arrays.time('min_time', min_idx))
+        stats['min_mw_date'] = arrays.dates[min_idx]
+        stats['min_mw_time'] = time_val
+        stats['min_amps'] = float(arrays.values['min_amps'][min_idx]) if arrays.valid['min_amps'][min_idx] else None
+        stats['min_amps_date'] = arrays.dates[min_idx]
+        stats['min_amps_time'] = time_val
+
+    if stats['max_amps'] is None or stats['max_amps'] == -float('inf'): stats['max_amps'] = '-'
+    if stats['min_amps'] is None or stats['min_amps'] == float('inf'): stats['min_amps'] = '-'
+    stats['avg_amps'] = _mm_feeder_average(arrays, 'amps')
+    if stats['max_mw'] == -float('inf'): stats['max_mw'] = '-'
+    if stats['min_mw'] == float('inf'): stats['min_mw'] = '-'
+    stats['avg_mw'] = _mm_feeder_average(arrays, 'mw')
     return stats
 
-def calculate_coincident_stats(leader_entries, current_feeder_id, group_entries_map, feeder_type):
-    # This function uses leader_entries to find the "Best Coincident Timestamp"
-    # And then returns the stats for the CURRENT feeder at that timestamp.
-    
-    # Base calculation for Averages (independent of coincidence)
-    # We must calculate averages from the CURRENT feeder's entries, not Leader's.
+
+def max_min_kpi_stats(series: FeederMonthSeries, feeder_type: str) -> dict:
+    """Vectorised equivalent of the KPI max/average figures for one feeder-month."""
+    if not len(series):
+        return {"avg_val": 0, "max_val": 0}
+    is_ict = feeder_type == 'ict_feeder'
+    max_mw = series.kpi_column('max_mw')
+    avg = series.kpi_column('avg_mw' if is_ict else 'avg_amps')
+
+    max_val = 0
+    if is_ict:
+        above = max_mw[max_mw > 0]
+        if above.size:
+            max_val = float(above.max())
+    else:
+        amps = series.kpi_column('max_amps')
+        idx, _ = _mm_extreme(max_mw, max_mw > -1.0, True)
+        if idx is not None:
+            max_val = float(amps[idx])
+
+    positive = avg[avg > 0]
+    avg_val = _mm_sequential_sum(positive) / positive.size if positive.size else 0
+    return {"avg_val": avg_val, "max_val": max_val}
+
+
+def calculate_standard_stats(period_entries, feeder_type):
+    return max_min_standard_stats(FeederMonthSeries(period_entries), feeder_type)
+
+def calculate_coincident_stats(leader_entries, current_feeder_id, group_entries_map, feeder_type, index: Optional[CoincidentPeakIndex] = None):
+    # Uses leader_entries to find the "Best Coincident Timestamp" (the leader's
+    # highest/lowest reading at a time every group member shares) and returns
+    # the CURRENT feeder's stats at that timestamp.
+    if index is None:
+        index = CoincidentPeakIndex(group_entries_map)
+
+    # Averages are independent of coincidence and come from the current feeder.
     current_feeder_entries = group_entries_map.get(current_feeder_id, [])
     base_stats = calculate_standard_stats(current_feeder_entries, feeder_type)
     
@@ -4757,114 +6740,40 @@ def calculate_coincident_stats(leader_entries, current_feeder_id, group_entries_
     # 1. Gather Candidates from LEADER
     max_candidates = []
     min_candidates = []
-    
     for e in leader_entries:
-        d = e.get('data', {})
-        mw_max = get_float_safe(d.get('max', {}).get('mw'))
-        time_max = normalize_time(d.get('max', {}).get('time'))
+        d = e.get('data') or {}
+        mw_max = get_float_safe((d.get('max') or {}).get('mw'))
         if mw_max is not None:
-            max_candidates.append({'entry': e, 'val': mw_max, 'date': e['date'], 'time': time_max})
-            
-        mw_min = get_float_safe(d.get('min', {}).get('mw'))
-        time_min = normalize_time(d.get('min', {}).get('time'))
+            max_candidates.append({'val': mw_max, 'date': e['date'], 'time': normalize_time((d.get('max') or {}).get('time'))})
+        mw_min = get_float_safe((d.get('min') or {}).get('mw'))
         if mw_min is not None:
-            min_candidates.append({'entry': e, 'val': mw_min, 'date': e['date'], 'time': time_min})
-            
-    # Sort
+            min_candidates.append({'val': mw_min, 'date': e['date'], 'time': normalize_time((d.get('min') or {}).get('time'))})
     max_candidates.sort(key=lambda x: x['val'], reverse=True)
     min_candidates.sort(key=lambda x: x['val']) # Ascending
-    
-    # Find Coincident Max Timestamp
-    found_max_timestamp = None # {date, time}
-    for cand in max_candidates:
-        c_date = cand['date']
-        c_time = cand['time']
-        
-        # Check all partners
-        all_match = True
-        for fid, entries in group_entries_map.items():
-            # Find entry for c_date
-            partner_entry = next((p for p in entries if p['date'] == c_date), None)
-            if not partner_entry:
-                all_match = False
-                break
-            
-            # Check time matches
-            p_time = normalize_time(partner_entry.get('data', {}).get('max', {}).get('time'))
-            if p_time != c_time:
-                all_match = False
-                break
-        
-        if all_match:
-            found_max_timestamp = {'date': c_date, 'time': c_time}
-            break
-            
-    # Find Coincident Min Timestamp
-    found_min_timestamp = None
-    for cand in min_candidates:
-        c_date = cand['date']
-        c_time = cand['time']
-        
-        all_match = True
-        for fid, entries in group_entries_map.items():
-            partner_entry = next((p for p in entries if p['date'] == c_date), None)
-            if not partner_entry:
-                all_match = False
-                break
-            p_time = normalize_time(partner_entry.get('data', {}).get('min', {}).get('time'))
-            if p_time != c_time:
-                all_match = False
-                break
-        
-        if all_match:
-            found_min_timestamp = {'date': c_date, 'time': c_time}
-            break
-            
-    # Update Stats with CURRENT FEEDER values at found timestamps
-    if found_max_timestamp:
-        # Find entry for current feeder at this date
-        entry = next((e for e in current_feeder_entries if e['date'] == found_max_timestamp['date']), None)
-        if entry:
-            d = entry.get('data', {})
-            base_stats['max_mw'] = get_float_safe(d.get('max', {}).get('mw'))
-            base_stats['max_mw_date'] = found_max_timestamp['date']
-            base_stats['max_mw_time'] = found_max_timestamp['time'] # Use common time
-            
-            base_stats['max_amps'] = get_float_safe(d.get('max', {}).get('amps'))
-            base_stats['max_amps_date'] = found_max_timestamp['date']
-            base_stats['max_amps_time'] = found_max_timestamp['time']
-            
-            if base_stats['max_mw'] is None: base_stats['max_mw'] = '-'
-            if base_stats['max_amps'] is None: base_stats['max_amps'] = '-'
-    else:
-        base_stats['max_mw'] = '-'
-        base_stats['max_mw_date'] = '-'
-        base_stats['max_mw_time'] = '-'
-        base_stats['max_amps'] = '-'
-        base_stats['max_amps_date'] = '-'
-        base_stats['max_amps_time'] = '-'
-
-    if found_min_timestamp:
-        entry = next((e for e in current_feeder_entries if e['date'] == found_min_timestamp['date']), None)
-        if entry:
-            d = entry.get('data', {})
-            base_stats['min_mw'] = get_float_safe(d.get('min', {}).get('mw'))
-            base_stats['min_mw_date'] = found_min_timestamp['date']
-            base_stats['min_mw_time'] = found_min_timestamp['time']
-            
-            base_stats['min_amps'] = get_float_safe(d.get('min', {}).get('amps'))
-            base_stats['min_amps_date'] = found_min_timestamp['date']
-            base_stats['min_amps_time'] = found_min_timestamp['time']
 
-            if base_stats['min_mw'] is None: base_stats['min_mw'] = '-'
-            if base_stats['min_amps'] is None: base_stats['min_amps'] = '-'
-    else:
-        base_stats['min_mw'] = '-'
-        base_stats['min_mw_date'] = '-'
-        base_stats['min_mw_time'] = '-'
-        base_stats['min_amps'] = '-'
-        base_stats['min_amps_date'] = '-'
-        base_stats['min_amps_time'] = '-'
+    # 2. Best candidate every partner shares (one hash lookup per candidate)
+    found = {
+        'max': index.first_coincident(max_candidates, 'max'),
+        'min': index.first_coincident(min_candidates, 'min'),
+    }
+
+    # 3. Update Stats with CURRENT FEEDER values at found timestamps
+    for section, timestamp in found.items():
+        if timestamp:
+            entry = index.entry(current_feeder_id, timestamp['date'])
+            if entry:
+                d = (entry.get('data') or {}).get(section) or {}
+                base_stats[f'{section}_mw'] = get_float_safe(d.get('mw'))
+                base_stats[f'{section}_mw_date'] = timestamp['date']
+                base_stats[f'{section}_mw_time'] = timestamp['time'] # Use common time
+                base_stats[f'{section}_amps'] = get_float_safe(d.get('amps'))
+                base_stats[f'{section}_amps_date'] = timestamp['date']
+                base_stats[f'{section}_amps_time'] = timestamp['time']
+                if base_stats[f'{section}_mw'] is None: base_stats[f'{section}_mw'] = '-'
+                if base_stats[f'{section}_amps'] is None: base_stats[f'{section}_amps'] = '-'
+        else:
+            for field in ('mw', 'mw_date', 'mw_time', 'amps', 'amps_date', 'amps_time'):
+                base_stats[f'{section}_{field}'] = '-'
         
     return base_stats
 
@@ -4880,28 +6789,12 @@ async def get_monthly_summary(
     if not feeder:
         return JSONResponse(status_code=404, content={"message": "Feeder not found"})
 
-    # 2. Check if Special Logic Applies
-    # is_special = False
-    # partner_names = []
-    
-    # # Check Double Circuit
-    # for pair in DOUBLE_CIRCUIT_PAIRS:
-    #     if feeder['name'] in pair['names']:
-    #         is_special = True
-    #         partner_names = [n for n in pair['names'] if n != feeder['name']]
-    #         break
-            
-    # # Check ICT
-    # if not is_special and feeder['name'] in ICT_GROUP_NAMES:
-    #     is_special = True
-    #     partner_names = [n for n in ICT_GROUP_NAMES if n != feeder['name']]
-
-    # if not is_special:
-    #     return None
-
-    # 3. Fetch Partner Feeders & Entries
-    # partner_feeders = await db.max_min_feeders.find({"name": {"$in": partner_names}}).to_list(100)
-    # partner_ids = [p['id'] for p in partner_feeders]
+    # 2. Double-circuit lines and ICTs report coincident group peaks
+    is_special, partner_names = get_feeder_group_info(feeder['name'])
+    partner_ids = []
+    if is_special:
+        partner_feeders = await db.max_min_feeders.find({"name": {"$in": partner_names}}, {"_id": 0, "id": 1}).to_list(100)
+        partner_ids = [pf['id'] for pf in partner_feeders]
     
     start_date = f"{year}-{month:02d}-01"
     if month == 12:
@@ -4909,24 +6802,16 @@ async def get_monthly_summary(
     else:
         end_date = f"{year}-{month + 1:02d}-01"
 
-    # Fetch Target Entries
-    target_entries = await db.max_min_entries.find(
-        {"feeder_id": feeder_id, "date": {"$gte": start_date, "$lt": end_date}},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    # Fetch Partner Entries
-    # group_entries_map = {}
-    # if partner_ids:
-    #     p_entries = await db.max_min_entries.find(
-    #         {"feeder_id": {"$in": partner_ids}, "date": {"$gte": start_date, "$lt": end_date}},
-    #         {"_id": 0}
-    #     ).to_list(5000)
-        
-    #     for e in p_entries:
-    #         fid = e['feeder_id']
-    #         if fid not in group_entries_map: group_entries_map[fid] = []
-    #         group_entries_map[fid].append(e)
+    # 3. Fetch Target (and Partner) Entries in one query
+    group_entries_map = {}
+    if partner_ids:
+        group_entries_map = {fid: [] for fid in [feeder_id] + partner_ids}
+        g_entries = await read_month_entries("max_min_entries", start_date, end_date, list(group_entries_map), sort_by_date=True, limit=5000)
+        for e in g_entries:
+            group_entries_map[e['feeder_id']].append(e)
+        target_entries = group_entries_map[feeder_id]
+    else:
+        target_entries = await read_month_entries("max_min_entries", start_date, end_date, [feeder_id], limit=1000)
 
     # 4. Calculate Stats for Periods
     periods = [
@@ -4936,31 +6821,20 @@ async def get_monthly_summary(
     ]
     
     results = []
+    target_series = FeederMonthSeries(target_entries)
     
     for p in periods:
-        p_target = [
-            e for e in target_entries 
-            if p["start"] <= int(e['date'].split('-')[2]) <= p["end"]
-        ]
-        
-        # p_group_map = {}
-        # # Add current feeder to map
-        # p_group_map[feeder_id] = p_target
-
-        # for fid, entries in group_entries_map.items():
-        #     p_group_map[fid] = [
-        #         e for e in entries
-        #         if p["start"] <= int(e['date'].split('-')[2]) <= p["end"]
-        #     ]
-        
-        # # Determine Leader (Feeder with highest Max MW in this period)
-        # leader_id = determine_leader(p_group_map)
-        # if not leader_id: leader_id = feeder_id
-
-        # leader_entries = p_group_map[leader_id]
-            
-        # stats = calculate_coincident_stats(leader_entries, feeder_id, p_group_map, feeder['type'])
-        stats = calculate_standard_stats(p_target, feeder['type'])
+        if group_entries_map:
+            p_group_map = {
+                fid: [e for e in entries if p["start"] <= int(e['date'].split('-')[2]) <= p["end"]]
+                for fid, entries in group_entries_map.items()
+            }
+            index = CoincidentPeakIndex(p_group_map)
+            # Leader is the group member with the highest Max MW in this period
+            leader_id = determine_leader(p_group_map, index) or feeder_id
+            stats = calculate_coincident_stats(p_group_map[leader_id], feeder_id, p_group_map, feeder['type'], index)
+        else:
+            stats = max_min_standard_stats(target_series.between_days(p["start"], p["end"]), feeder['type'])
         stats['name'] = p['name']
         results.append(stats)
         
@@ -4975,7 +6849,6 @@ async def export_max_min_data(
 ):
     try:
         from openpyxl import Workbook
-        from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
         import io
         import traceback
         from fastapi.responses import JSONResponse
@@ -4990,17 +6863,13 @@ async def export_max_min_data(
         else:
             end_date = f"{year}-{month + 1:02d}-01"
             
-        entries = await db.max_min_entries.find(
-            {"feeder_id": feeder_id, "date": {"$gte": start_date, "$lt": end_date}},
-            {"_id": 0}
-        ).sort("date", 1).to_list(1000)
+        entries = await read_month_entries("max_min_entries", start_date, end_date, [feeder_id], sort_by_date=True, limit=1000)
         
         wb = Workbook()
         ws = wb.active
         ws.title = feeder['name'][:31]
         
-        header_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
+        header_style = report_style(wb, "MIS Header")
         
         # Define headers based on feeder type
         if feeder['type'] == 'bus_station':
@@ -5025,11 +6894,8 @@ async def export_max_min_data(
                 "Avg Amps", "Avg MW"
             ]
             
-        ws.append(headers)
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center")
+        writer = SheetWriter(ws, skip_rows=1)
+        writer.append(headers, header_style)
             
         for entry in entries:
             d = entry.get('data', {})
@@ -5068,7 +6934,7 @@ async def export_max_min_data(
                     d.get('min', {}).get('amps', ''), d.get('min', {}).get('mw', ''), format_time(d.get('min', {}).get('time', '')),
                     d.get('avg', {}).get('amps', ''), d.get('avg', {}).get('mw', '')
                 ])
-            ws.append(row)
+            writer.append(row)
             
         
         # ---------------------------------------------------------
@@ -5107,189 +6973,6 @@ async def export_max_min_data(
                 return ''
             return format_time(t)
 
-        # Helper to calculate stats for a period
-        def calculate_period_stats(period_entries, feeder_type):
-            stats = {}
-            
-            if feeder_type == 'bus_station':
-                # Initialize stats with defaults
-                stats = {
-                    'max_400kv': -float('inf'), 'max_400kv_date': '-', 'max_400kv_time': '-',
-                    'min_400kv': float('inf'), 'min_400kv_date': '-', 'min_400kv_time': '-',
-                    'max_220kv': -float('inf'), 'max_220kv_date': '-', 'max_220kv_time': '-',
-                    'min_220kv': float('inf'), 'min_220kv_date': '-', 'min_220kv_time': '-',
-                    'max_load': -float('inf'), 'max_load_date': '-', 'max_load_time': '-'
-                }
-
-                # 1. Find Max/Min Values
-                for e in period_entries:
-                    d = e.get('data', {})
-                    
-                    # 400KV
-                    v = get_float(d.get('max_bus_voltage_400kv', {}).get('value'))
-                    if v is not None and v > stats['max_400kv']: stats['max_400kv'] = v
-                    v = get_float(d.get('min_bus_voltage_400kv', {}).get('value'))
-                    if v is not None and v < stats['min_400kv']: stats['min_400kv'] = v
-                    
-                    # 220KV
-                    v = get_float(d.get('max_bus_voltage_220kv', {}).get('value'))
-                    if v is not None and v > stats['max_220kv']: stats['max_220kv'] = v
-                    v = get_float(d.get('min_bus_voltage_220kv', {}).get('value'))
-                    if v is not None and v < stats['min_220kv']: stats['min_220kv'] = v
-
-                    # Load (Independent)
-                    v = get_float(d.get('station_load', {}).get('max_mw'))
-                    if v is not None and v > stats['max_load']:
-                        stats['max_load'] = v
-                        stats['max_load_date'] = e['date']
-                        stats['max_load_time'] = d.get('station_load', {}).get('time', '-')
-
-                # 2. Collect Candidates
-                cands_max_400 = []
-                cands_min_400 = []
-                cands_max_220 = []
-                cands_min_220 = []
-
-                for e in period_entries:
-                    d = e.get('data', {})
-                    date = e['date']
-                    
-                    # Max 400
-                    v = get_float(d.get('max_bus_voltage_400kv', {}).get('value'))
-                    if v == stats['max_400kv'] and v is not None:
-                        cands_max_400.append({'date': date, 'time': str(d.get('max_bus_voltage_400kv', {}).get('time', '')).strip()})
-                    
-                    # Min 400
-                    v = get_float(d.get('min_bus_voltage_400kv', {}).get('value'))
-                    if v == stats['min_400kv'] and v is not None:
-                        cands_min_400.append({'date': date, 'time': str(d.get('min_bus_voltage_400kv', {}).get('time', '')).strip()})
-                    
-                    # Max 220
-                    v = get_float(d.get('max_bus_voltage_220kv', {}).get('value'))
-                    if v == stats['max_220kv'] and v is not None:
-                        cands_max_220.append({'date': date, 'time': str(d.get('max_bus_voltage_220kv', {}).get('time', '')).strip()})
-                    
-                    # Min 220
-                    v = get_float(d.get('min_bus_voltage_220kv', {}).get('value'))
-                    if v == stats['min_220kv'] and v is not None:
-                        cands_min_220.append({'date': date, 'time': str(d.get('min_bus_voltage_220kv', {}).get('time', '')).strip()})
-
-                # 3. Find Best Matches (Common Time Priority)
-                def find_best(list_a, list_b):
-                    # Try to find intersection
-                    for a in list_a:
-                        for b in list_b:
-                            if a['date'] == b['date'] and a['time'] == b['time']:
-                                return a, b
-                    # No intersection, return first available
-                    res_a = list_a[0] if list_a else {'date': '-', 'time': '-'}
-                    res_b = list_b[0] if list_b else {'date': '-', 'time': '-'}
-                    return res_a, res_b
-
-                final_max_400, final_max_220 = find_best(cands_max_400, cands_max_220)
-                final_min_400, final_min_220 = find_best(cands_min_400, cands_min_220)
-
-                stats['max_400kv_date'] = final_max_400['date']
-                stats['max_400kv_time'] = final_max_400['time']
-                stats['max_220kv_date'] = final_max_220['date']
-                stats['max_220kv_time'] = final_max_220['time']
-
-                stats['min_400kv_date'] = final_min_400['date']
-                stats['min_400kv_time'] = final_min_400['time']
-                stats['min_220kv_date'] = final_min_220['date']
-                stats['min_220kv_time'] = final_min_220['time']
-                
-                # Cleanup infinities
-                if stats['max_400kv'] == -float('inf'): stats['max_400kv'] = '-'
-                if stats['min_400kv'] == float('inf'): stats['min_400kv'] = '-'
-                if stats['max_220kv'] == -float('inf'): stats['max_220kv'] = '-'
-                if stats['min_220kv'] == float('inf'): stats['min_220kv'] = '-'
-                if stats['max_load'] == -float('inf'): stats['max_load'] = '-'
-                
-            else:
-                # Feeder / ICT
-                # Initialize stats
-                stats['max_amps'] = -float('inf'); stats['max_amps_date'] = '-'; stats['max_amps_time'] = '-'
-                stats['min_amps'] = float('inf'); stats['min_amps_date'] = '-'; stats['min_amps_time'] = '-'
-                stats['max_mw'] = -float('inf'); stats['max_mw_date'] = '-'; stats['max_mw_time'] = '-'
-                stats['min_mw'] = float('inf'); stats['min_mw_date'] = '-'; stats['min_mw_time'] = '-'
-                
-                total_amps = 0; count_amps = 0
-                total_mw = 0; count_mw = 0
-                
-                max_mw_entry = None
-                min_mw_entry = None
-                
-                for e in period_entries:
-                    d = e.get('data', {})
-                    date = e['date']
-                    
-                    # Collect Averages (Amps)
-                    max_amps = get_float(d.get('max', {}).get('amps'))
-                    min_amps = get_float(d.get('min', {}).get('amps'))
-                    avg_amps = get_float(d.get('avg', {}).get('amps'))
-                    
-                    # Auto-calc avg if missing
-                    if avg_amps is None and max_amps is not None and min_amps is not None:
-                        avg_amps = (max_amps + min_amps) / 2
-                    
-                    if avg_amps is not None:
-                        total_amps += avg_amps
-                        count_amps += 1
-                        
-                    # Collect Averages (MW) and Find Max/Min MW
-                    max_mw = get_float(d.get('max', {}).get('mw'))
-                    min_mw = get_float(d.get('min', {}).get('mw'))
-                    avg_mw = get_float(d.get('avg', {}).get('mw'))
-                    
-                    # Auto-calc avg if missing
-                    if avg_mw is None and max_mw is not None and min_mw is not None:
-                        avg_mw = (max_mw + min_mw) / 2
-                        
-                    if avg_mw is not None:
-                        total_mw += avg_mw
-                        count_mw += 1
-                    
-                    # Find Max MW Entry
-                    if max_mw is not None and max_mw > stats['max_mw']:
-                        stats['max_mw'] = max_mw
-                        max_mw_entry = e
-                    
-                    # Find Min MW Entry
-                    if min_mw is not None and min_mw < stats['min_mw']:
-                        stats['min_mw'] = min_mw
-                        min_mw_entry = e
-                
-                # Apply Max MW Logic: Get corresponding Amps/Time from Max MW entry
-                if max_mw_entry:
-                    d = max_mw_entry.get('data', {})
-                    stats['max_mw_date'] = max_mw_entry['date']
-                    stats['max_mw_time'] = d.get('max', {}).get('time', '-')
-                    
-                    stats['max_amps'] = get_float(d.get('max', {}).get('amps'))
-                    stats['max_amps_date'] = max_mw_entry['date']
-                    stats['max_amps_time'] = d.get('max', {}).get('time', '-')
-                
-                # Apply Min MW Logic: Get corresponding Amps/Time from Min MW entry
-                if min_mw_entry:
-                    d = min_mw_entry.get('data', {})
-                    stats['min_mw_date'] = min_mw_entry['date']
-                    stats['min_mw_time'] = d.get('min', {}).get('time', '-')
-                    
-                    stats['min_amps'] = get_float(d.get('min', {}).get('amps'))
-                    stats['min_amps_date'] = min_mw_entry['date']
-                    stats['min_amps_time'] = d.get('min', {}).get('time', '-')
-                
-                # Cleanup and averages
-                if stats['max_amps'] is None or stats['max_amps'] == -float('inf'): stats['max_amps'] = '-'
-                if stats['min_amps'] is None or stats['min_amps'] == float('inf'): stats['min_amps'] = '-'
-                stats['avg_amps'] = round(total_amps / count_amps, 2) if count_amps > 0 else '-'
-                
-                if stats['max_mw'] == -float('inf'): stats['max_mw'] = '-'
-                if stats['min_mw'] == float('inf'): stats['min_mw'] = '-'
-                stats['avg_mw'] = round(total_mw / count_mw, 2) if count_mw > 0 else '-'
-                
-            return stats
 
         # Add spacing
         ws.append([])
@@ -5297,8 +6980,7 @@ async def export_max_min_data(
         
         # Summary Header
         summary_header_row = ws.max_row + 1
-        ws.cell(row=summary_header_row, column=1, value="Monthly Summary Report")
-        ws.cell(row=summary_header_row, column=1).font = Font(bold=True, size=14)
+        writer.cell(summary_header_row, 1, "Monthly Summary Report", report_style(wb, "MIS Heading"))
         
         # Summary Table Headers
         header_row = ws.max_row + 1
@@ -5317,32 +6999,16 @@ async def export_max_min_data(
                 "Average Value"
             ]
         
-        for col_idx, header in enumerate(summary_headers, 1):
-            cell = ws.cell(row=header_row, column=col_idx, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-            # Add border
-            cell.border = Border(
-                left=Side(style='thin'), 
-                right=Side(style='thin'), 
-                top=Side(style='thin'), 
-                bottom=Side(style='thin')
-            )
+        writer.row(header_row, summary_headers, report_style(wb, "MIS Header Boxed"))
 
         # Populate Summary Data
-        thin_border = Border(
-            left=Side(style='thin'), 
-            right=Side(style='thin'), 
-            top=Side(style='thin'), 
-            bottom=Side(style='thin')
-        )
-        center_align = Alignment(horizontal="center", vertical="center")
+        boxed = report_style(wb, "MIS Boxed")
+        boxed_center = report_style(wb, "MIS Boxed Center")
         
+        month_series = FeederMonthSeries(entries)
         for p in periods:
             # Filter entries for period
-            p_entries = [e for e in entries if p['start'] <= e['date'] <= p['end']]
-            stats = calculate_period_stats(p_entries, feeder['type'])
+            stats = max_min_standard_stats(month_series.between_dates(p['start'], p['end']), feeder['type'])
             
             start_row = ws.max_row + 1
             
@@ -5355,30 +7021,10 @@ async def export_max_min_data(
                 ]
                 
                 # Merge Period Cell
-                ws.merge_cells(start_row=start_row, start_column=1, end_row=start_row+2, end_column=1)
-                p_cell = ws.cell(row=start_row, column=1, value=p['name'])
-                p_cell.alignment = center_align
-                p_cell.border = thin_border
-                # Apply border to merged cells (needs to be applied to all cells in range or use style)
-                # Simplest is to apply to top-left and ensure others are handled, but openpyxl requires iterating range for borders
-                for r in range(start_row, start_row+3):
-                    ws.cell(row=r, column=1).border = thin_border
+                writer.merge(start_row, 1, start_row + 2, 1, p['name'], boxed_center)
                 
-                for i, (param, max_v, max_d, max_t, min_v, min_d, min_t) in enumerate(rows_data):
-                    r = start_row + i
-                    ws.cell(row=r, column=2, value=param).border = thin_border
-                    ws.cell(row=r, column=3, value=max_v).border = thin_border
-                    ws.cell(row=r, column=3).alignment = center_align
-                    ws.cell(row=r, column=4, value=max_d).border = thin_border
-                    ws.cell(row=r, column=4).alignment = center_align
-                    ws.cell(row=r, column=5, value=max_t).border = thin_border
-                    ws.cell(row=r, column=5).alignment = center_align
-                    ws.cell(row=r, column=6, value=min_v).border = thin_border
-                    ws.cell(row=r, column=6).alignment = center_align
-                    ws.cell(row=r, column=7, value=min_d).border = thin_border
-                    ws.cell(row=r, column=7).alignment = center_align
-                    ws.cell(row=r, column=8, value=min_t).border = thin_border
-                    ws.cell(row=r, column=8).alignment = center_align
+                for i, row_values in enumerate(rows_data):
+                    writer.row(start_row + i, row_values, [boxed] + [boxed_center] * 6, start_col=2)
 
             else:
                 # Rows: Amps, MW
@@ -5388,65 +7034,21 @@ async def export_max_min_data(
                 ]
                 
                 # Merge Period Cell
-                ws.merge_cells(start_row=start_row, start_column=1, end_row=start_row+1, end_column=1)
-                p_cell = ws.cell(row=start_row, column=1, value=p['name'])
-                p_cell.alignment = center_align
-                p_cell.border = thin_border
-                for r in range(start_row, start_row+2):
-                    ws.cell(row=r, column=1).border = thin_border
+                writer.merge(start_row, 1, start_row + 1, 1, p['name'], boxed_center)
                     
-                for i, (param, max_v, max_d, max_t, min_v, min_d, min_t, avg_v) in enumerate(rows_data):
-                    r = start_row + i
-                    ws.cell(row=r, column=2, value=param).border = thin_border
-                    ws.cell(row=r, column=3, value=max_v).border = thin_border
-                    ws.cell(row=r, column=3).alignment = center_align
-                    ws.cell(row=r, column=4, value=max_d).border = thin_border
-                    ws.cell(row=r, column=4).alignment = center_align
-                    ws.cell(row=r, column=5, value=max_t).border = thin_border
-                    ws.cell(row=r, column=5).alignment = center_align
-                    ws.cell(row=r, column=6, value=min_v).border = thin_border
-                    ws.cell(row=r, column=6).alignment = center_align
-                    ws.cell(row=r, column=7, value=min_d).border = thin_border
-                    ws.cell(row=r, column=7).alignment = center_align
-                    ws.cell(row=r, column=8, value=min_t).border = thin_border
-                    ws.cell(row=r, column=8).alignment = center_align
-                    ws.cell(row=r, column=9, value=avg_v).border = thin_border
-                    ws.cell(row=r, column=9).alignment = center_align
-        
-        # Auto-width columns with wrapping support
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            
-            # Calculate max length based on DATA only (skip header at row 1)
-            for cell in col[1:]:
-                try:
-                    val = str(cell.value or "")
-                    if len(val) > max_length:
-                        max_length = len(val)
-                except:
-                    pass
-            
-            # Determine width: minimal 8, maximal 20, or fit data
-            # We ignore header length because we enabled wrap_text for headers
-            adjusted_width = max(8, min(max_length + 2, 20))
-            ws.column_dimensions[column].width = adjusted_width
+                for i, row_values in enumerate(rows_data):
+                    writer.row(start_row + i, row_values, [boxed] + [boxed_center] * 7, start_col=2)
+        
+        # Fit columns to the data only (width 8-20); headers wrap
+        writer.fit_columns(min_width=8, max_width=20)
                     
         # Adjust widths for summary section if needed
         # We already adjusted for data, but summary might be wider?
         # Actually, headers are usually wide enough.
         
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
         filename = f"{feeder['name']}_{year}_{month:02d}.xlsx"
         
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return workbook_response(wb, filename)
     except Exception as e:
         import traceback
         print(traceback.format_exc())
@@ -5556,6 +7158,7 @@ async def get_energy_sheets(current_user: User = Depends(get_current_user)):
 
 @api_router.get("/energy/entries/{sheet_id}")
 async def get_energy_entries(
+    request: Request,
     sheet_id: str,
     year: Optional[int] = None,
     month: Optional[int] = None,
@@ -5570,6 +7173,9 @@ async def get_energy_entries(
             end_date = f"{year}-{month + 1:02d}-01"
         query['date'] = {"$gte": start_date, "$lt": end_date}
     
+    if _wants_ndjson(request):
+        return _ndjson_response(db.energy_entries.find(query, {"_id": 0}).sort("date", 1))
+
     entries = await db.energy_entries.find(query, {"_id": 0}).sort("date", 1).to_list(1000)
     for entry in entries:
         if isinstance(entry.get('created_at'), str):
@@ -5641,12 +7247,54 @@ async def save_energy_entry(
         
     return entry_data
 
+# Column layout of the csv/parquet line-loss table: one row per feeder-day
+LINE_LOSS_TABLE_COLUMNS = ["feeder", "date", "end1_name", "end2_name"] + [
+    f"{end}_{flow}_{field}"
+    for end in ("end1", "end2")
+    for flow in ("import", "export")
+    for field in ("initial", "final", "mf", "consumption")
+] + ["loss_percent"]
+
+
+def line_loss_table_row(feeder: dict, entry: dict) -> list:
+    row = [feeder['name'], entry['date'], feeder.get('end1_name'), feeder.get('end2_name')]
+    for end in ("end1", "end2"):
+        for flow in ("import", "export"):
+            row.extend([
+                table_number(entry.get(f"{end}_{flow}_initial")),
+                table_number(entry.get(f"{end}_{flow}_final")),
+                table_number(feeder.get(f"{end}_{flow}_mf")),
+                table_number(entry.get(f"{end}_{flow}_consumption")),
+            ])
+    row.append(table_number(entry.get('loss_percent')))
+    return row
+
+
 @api_router.get("/line-losses/export-all/{year}/{month}")
 async def export_all_line_losses(
     year: int,
     month: int,
+    format: str = "xlsx",
+    current_user: User = Depends(get_current_user)
+):
+    fmt = export_format(format)
+    start_date, end_date = month_range(year, month)
+    return await _export_line_losses(fmt, start_date, end_date, f"Line_Losses_{month}-{year}")
+
+
+@api_router.get("/line-losses/export-all")
+async def export_line_losses_range(
+    start: str,
+    end: str,
+    format: str = "xlsx",
     current_user: User = Depends(get_current_user)
 ):
+    fmt = export_format(format)
+    start_date, end_date = export_range(start, end)
+    return await _export_line_losses(fmt, start_date, end_date, f"Line_Losses_{start}_to_{end}")
+
+
+async def _export_line_losses(fmt: str, start_date: str, end_date: str, name: str):
     feeders = await db.feeders.find({}, {"_id": 0}).to_list(100)
     
     # Sort feeders based on predefined order
@@ -5673,23 +7321,22 @@ async def export_all_line_losses(
     
     feeders.sort(key=lambda x: FEEDER_ORDER.index(x['name']) if x['name'] in FEEDER_ORDER else 999)
     
-    wb = Workbook()
-    # Remove default sheet
-    if "Sheet" in wb.sheetnames:
-        del wb["Sheet"]
+    entries_by_feeder = await read_range_entries("entries", start_date, end_date)
         
-    start_date = f"{year}-{month:02d}-01"
-    if month == 12:
-        end_date = f"{year + 1}-01-01"
-    else:
-        end_date = f"{year}-{month + 1:02d}-01"
+    if fmt != "xlsx":
+        table = TableExport(fmt, LINE_LOSS_TABLE_COLUMNS)
+        for feeder in feeders:
+            for entry in entries_by_feeder.get(feeder['id'], []):
+                table.append(line_loss_table_row(feeder, entry))
+        return table.response(name)
+        
+    # Flat append-only sheets: stream them through a write-only workbook
+    wb = Workbook(write_only=True)
+    header_style = report_style(wb, "MIS Header Wrap")
         
-    header_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
     if not feeders:
         ws = wb.create_sheet("No Data")
-        ws.cell(row=1, column=1, value="No feeders found")
+        ws.append(["No feeders found"])
         
     for feeder in feeders:
         ws = wb.create_sheet(title=feeder['name'][:30]) # Sheet name limit 31 chars
@@ -5715,72 +7362,117 @@ async def export_all_line_losses(
             "% Loss"
         ]
         
-        ws.append(headers)
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-            
-        entries = await db.entries.find(
-            {"feeder_id": feeder['id'], "date": {"$gte": start_date, "$lt": end_date}},
-            {"_id": 0}
-        ).sort("date", 1).to_list(1000)
-        
-        for entry in entries:
-            ws.append([
-                format_date(entry['date']),
-                entry['end1_import_initial'],
-                entry['end1_import_final'],
-                feeder['end1_import_mf'],
-                entry['end1_import_consumption'],
-                entry['end1_export_initial'],
-                entry['end1_export_final'],
-                feeder['end1_export_mf'],
-                entry['end1_export_consumption'],
-                entry['end2_import_initial'],
-                entry['end2_import_final'],
-                feeder['end2_import_mf'],
-                entry['end2_import_consumption'],
-                entry['end2_export_initial'],
-                entry['end2_export_final'],
-                feeder['end2_export_mf'],
-                entry['end2_export_consumption'],
-                entry['loss_percent']
-            ])
+        writer = StreamingSheetWriter(ws, skip_rows=1)
+        writer.append(headers, header_style)
+        
+        def rows(feeder=feeder):
+            for entry in entries_by_feeder.get(feeder['id'], []):
+                yield [
+                    format_date(entry['date']),
+                    entry['end1_import_initial'],
+                    entry['end1_import_final'],
+                    feeder['end1_import_mf'],
+                    entry['end1_import_consumption'],
+                    entry['end1_export_initial'],
+                    entry['end1_export_final'],
+                    feeder['end1_export_mf'],
+                    entry['end1_export_consumption'],
+                    entry['end2_import_initial'],
+                    entry['end2_import_final'],
+                    feeder['end2_import_mf'],
+                    entry['end2_import_consumption'],
+                    entry['end2_export_initial'],
+                    entry['end2_export_final'],
+                    feeder['end2_export_mf'],
+                    entry['end2_export_consumption'],
+                    entry['loss_percent']
+                ]
             
-        # Auto-fit columns with wrap text logic
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            # Skip header row for width calculation to avoid overly wide columns
-            for cell in col[1:]:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            # Set width based on data content with a minimum and maximum limit
-            # This allows headers to wrap if they are long
-            adjusted_width = max(max_length + 2, 12)
-            ws.column_dimensions[column].width = adjusted_width
+        # Fit columns to the data (header row excluded so long headers wrap)
+        await writer.write_rows(rows, min_width=12)
+
+    return workbook_response(wb, f"{name}.xlsx")
+
+
+# Column layout of the csv/parquet max-min table: one row per feeder-day.
+# Feeders fill the max/min/avg columns, the bus station the voltage and
+# station load columns.
+MAX_MIN_TABLE_FIELDS = [
+    ("max_amps", "max", "amps"), ("max_mw", "max", "mw"), ("max_mvar", "max", "mvar"),
+    ("min_amps", "min", "amps"), ("min_mw", "min", "mw"), ("min_mvar", "min", "mvar"),
+    ("avg_amps", "avg", "amps"), ("avg_mw", "avg", "mw"),
+    ("max_bus_voltage_400kv", "max_bus_voltage_400kv", "value"),
+    ("max_bus_voltage_220kv", "max_bus_voltage_220kv", "value"),
+    ("min_bus_voltage_400kv", "min_bus_voltage_400kv", "value"),
+    ("min_bus_voltage_220kv", "min_bus_voltage_220kv", "value"),
+    ("station_load_max_mw", "station_load", "max_mw"),
+    ("station_load_mvar", "station_load", "mvar"),
+]
+MAX_MIN_TABLE_TIMES = [
+    ("max_time", "max"), ("min_time", "min"),
+    ("max_bus_voltage_400kv_time", "max_bus_voltage_400kv"),
+    ("max_bus_voltage_220kv_time", "max_bus_voltage_220kv"),
+    ("min_bus_voltage_400kv_time", "min_bus_voltage_400kv"),
+    ("min_bus_voltage_220kv_time", "min_bus_voltage_220kv"),
+    ("station_load_time", "station_load"),
+]
+MAX_MIN_TABLE_COLUMNS = ["feeder", "feeder_type", "date"] + [c for c, _, _ in MAX_MIN_TABLE_FIELDS] + [c for c, _ in MAX_MIN_TABLE_TIMES]
 
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=Line_Losses_{month}-{year}.xlsx"}
-    )
+
+def max_min_table_row(feeder: dict, entry: dict) -> list:
+    d = entry.get('data') or {}
+    row = [feeder['name'], feeder.get('type'), entry['date']]
+    row.extend(table_number((d.get(group) or {}).get(field)) for _, group, field in MAX_MIN_TABLE_FIELDS)
+    row.extend(format_time((d.get(group) or {}).get('time')) or None for _, group in MAX_MIN_TABLE_TIMES)
+    return row
 
 
 @api_router.get("/max-min/export-all/{year}/{month}")
 async def export_all_max_min_data(
     year: int,
     month: int,
+    format: str = "xlsx",
+    current_user: User = Depends(get_current_user)
+):
+    fmt = export_format(format)
+    start_date, end_date = month_range(year, month)
+    last_day = calendar.monthrange(year, month)[1]
+    periods = [
+        {"name": "1st to 15th", "start": f"{year}-{month:02d}-01", "end": f"{year}-{month:02d}-15"},
+        {"name": "16th to End", "start": f"{year}-{month:02d}-16", "end": f"{year}-{month:02d}-{last_day}"},
+        {"name": "Full Month", "start": f"{year}-{month:02d}-01", "end": f"{year}-{month:02d}-{last_day}"}
+    ]
+    return await _export_max_min(
+        fmt, start_date, end_date, periods, f"All Feeders {month}-{year}", f"MaxMin_All_{year}_{month:02d}"
+    )
+
+
+@api_router.get("/max-min/export-all")
+async def export_max_min_range(
+    start: str,
+    end: str,
+    format: str = "xlsx",
     current_user: User = Depends(get_current_user)
 ):
+    fmt = export_format(format)
+    start_date, end_date = export_range(start, end)
+    # One summary per calendar month in the range, then the whole range
+    periods = []
+    months = _month_keys(start_date, end_date)
+    if len(months) > 1:
+        for key in months:
+            year, month = int(key[:4]), int(key[5:7])
+            last_day = calendar.monthrange(year, month)[1]
+            periods.append({
+                "name": f"{calendar.month_abbr[month]}-{year}",
+                "start": max(start, f"{key}-01"),
+                "end": min(end, f"{key}-{last_day:02d}"),
+            })
+    periods.append({"name": "Full Range", "start": start, "end": end})
+    return await _export_max_min(fmt, start_date, end_date, periods, f"{start} to {end}", f"MaxMin_All_{start}_to_{end}")
+
+
+async def _export_max_min(fmt: str, start_date: str, end_date: str, periods: List[dict], title: str, name: str):
     # Fetch all feeders
     feeders = await db.max_min_feeders.find({}, {"_id": 0}).to_list(100)
     
@@ -5813,32 +7505,31 @@ async def export_all_max_min_data(
     
     feeders.sort(key=lambda x: FEEDER_ORDER.index(x['name']) if x['name'] in FEEDER_ORDER else 999)
     
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"All Feeders {month}-{year}"
+    entries_by_feeder = await read_range_entries("max_min_entries", start_date, end_date)
     
-    # Styles
-    header_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-    center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    if fmt != "xlsx":
+        table = TableExport(fmt, MAX_MIN_TABLE_COLUMNS)
+        for feeder in feeders:
+            for entry in entries_by_feeder.get(feeder['id'], []):
+                table.append(max_min_table_row(feeder, entry))
+        return table.response(name)
     
-    current_col = 1
+    wb = Workbook()
+    ws = wb.active
+    ws.title = title
     
-    start_date = f"{year}-{month:02d}-01"
-    if month == 12:
-        end_date = f"{year + 1}-01-01"
-    else:
-        end_date = f"{year}-{month + 1:02d}-01"
+    # Styles
+    feeder_title_style = report_style(wb, "MIS Feeder Title")
+    header_style = report_style(wb, "MIS Header Boxed")
+    section_style = report_style(wb, "MIS Section")
+    boxed = report_style(wb, "MIS Boxed")
+    boxed_wrap = report_style(wb, "MIS Boxed Wrap")
     
-    import calendar
-    last_day = calendar.monthrange(year, month)[1]
+    writer = SheetWriter(ws)
+    current_col = 1
 
     for feeder in feeders:
-        entries = await db.max_min_entries.find(
-            {"feeder_id": feeder['id'], "date": {"$gte": start_date, "$lt": end_date}},
-            {"_id": 0}
-        ).sort("date", 1).to_list(1000)
+        entries = entries_by_feeder.get(feeder['id'], [])
         
         # Headers
         if feeder['type'] == 'bus_station':
@@ -5856,21 +7547,11 @@ async def export_all_max_min_data(
             headers = ["Date", "Max Amps", "Max MW", "Max Time", "Min Amps", "Min MW", "Min Time", "Avg Amps", "Avg MW"]
             
         # Write Feeder Name
-        ws.merge_cells(start_row=1, start_column=current_col, end_row=1, end_column=current_col + len(headers) - 1)
-        cell = ws.cell(row=1, column=current_col, value=feeder['name'])
-        cell.alignment = center_align
-        cell.font = Font(bold=True, size=12)
-        cell.fill = PatternFill(start_color="E2E8F0", end_color="E2E8F0", fill_type="solid")
-        for i in range(len(headers)):
-            ws.cell(row=1, column=current_col+i).border = thin_border
+        last_col = current_col + len(headers) - 1
+        writer.merge(1, current_col, 1, last_col, feeder['name'], feeder_title_style)
         
         # Write Headers
-        for i, h in enumerate(headers):
-            cell = ws.cell(row=2, column=current_col + i, value=h)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = center_align
-            cell.border = thin_border
+        writer.row(2, headers, header_style, start_col=current_col)
             
         # Write Data
         row_idx = 3
@@ -5898,30 +7579,18 @@ async def export_all_max_min_data(
                     d.get('avg', {}).get('amps', ''), d.get('avg', {}).get('mw', '')
                 ])
             
-            for i, val in enumerate(row_data):
-                cell = ws.cell(row=row_idx, column=current_col + i, value=val)
-                cell.alignment = center_align
-                cell.border = thin_border
+            writer.row(row_idx, row_data, boxed_wrap, start_col=current_col)
             row_idx += 1
             
         # Write Stats (Summary)
         row_idx += 1
-        periods = [
-            {"name": "1st to 15th", "start": f"{year}-{month:02d}-01", "end": f"{year}-{month:02d}-15"},
-            {"name": "16th to End", "start": f"{year}-{month:02d}-16", "end": f"{year}-{month:02d}-{last_day}"},
-            {"name": "Full Month", "start": f"{year}-{month:02d}-01", "end": f"{year}-{month:02d}-{last_day}"}
-        ]
         
+        month_series = FeederMonthSeries(entries)
         for p in periods:
-            p_entries = [e for e in entries if p['start'] <= e['date'] <= p['end']]
-            stats = calculate_period_stats(p_entries, feeder['type'])
+            stats = max_min_standard_stats(month_series.between_dates(p['start'], p['end']), feeder['type'])
             
             # Header for Period
-            ws.merge_cells(start_row=row_idx, start_column=current_col, end_row=row_idx, end_column=current_col + len(headers) - 1)
-            cell = ws.cell(row=row_idx, column=current_col, value=f"Summary: {p['name']}")
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="F1F5F9", end_color="F1F5F9", fill_type="solid")
-            for i in range(len(headers)): ws.cell(row=row_idx, column=current_col+i).border = thin_border
+            writer.merge(row_idx, current_col, row_idx, last_col, f"Summary: {p['name']}", section_style)
             row_idx += 1
             
             if feeder['type'] == 'bus_station':
@@ -5935,10 +7604,7 @@ async def export_all_max_min_data(
                     (stats['max_load'], format_date(stats['max_load_date']), format_time(stats['max_load_time']))
                 ]
                 for label, val_tuple in zip(labels, vals):
-                    ws.cell(row=row_idx, column=current_col, value=label).border = thin_border
-                    ws.cell(row=row_idx, column=current_col+1, value=val_tuple[0]).border = thin_border
-                    ws.cell(row=row_idx, column=current_col+2, value=val_tuple[1]).border = thin_border
-                    ws.cell(row=row_idx, column=current_col+3, value=val_tuple[2]).border = thin_border
+                    writer.row(row_idx, (label,) + val_tuple, boxed, start_col=current_col)
                     row_idx += 1
             else:
                 labels = ["Max Amps", "Min Amps", "Max MW", "Min MW"]
@@ -5949,34 +7615,15 @@ async def export_all_max_min_data(
                     (stats['min_mw'], format_date(stats['min_mw_date']), format_time(stats['min_mw_time']))
                 ]
                 for label, val_tuple in zip(labels, vals):
-                    ws.cell(row=row_idx, column=current_col, value=label).border = thin_border
-                    ws.cell(row=row_idx, column=current_col+1, value=val_tuple[0]).border = thin_border
-                    ws.cell(row=row_idx, column=current_col+2, value=val_tuple[1]).border = thin_border
-                    ws.cell(row=row_idx, column=current_col+3, value=val_tuple[2]).border = thin_border
+                    writer.row(row_idx, (label,) + val_tuple, boxed, start_col=current_col)
                     row_idx += 1
             row_idx += 1 # Gap between periods
             
-        # Auto-fit columns
-        for i in range(len(headers)):
-            col_letter = ws.cell(row=2, column=current_col+i).column_letter
-            max_len = 0
-            for row in range(1, row_idx):
-                val = ws.cell(row=row, column=current_col+i).value
-                if val:
-                    max_len = max(max_len, len(str(val)))
-            ws.column_dimensions[col_letter].width = max_len + 2
+        writer.fit_columns(range(current_col, current_col + len(headers)))
             
         current_col += len(headers) + 1 # Gap between feeders
 
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=MaxMin_All_{year}_{month:02d}.xlsx"}
-    )
+    return workbook_response(wb, f"{name}.xlsx")
 
 @api_router.get("/interruptions/export/{feeder_id}/{year}/{month}")
 async def export_interruptions_feeder(
@@ -6045,22 +7692,63 @@ async def export_interruptions_feeder(
                 data.get("action_taken") or "",
             ]
         )
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
     filename = f"Interruptions_{feeder['name']}_{year}_{month:02d}.xlsx"
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
-    )
+    return workbook_response(wb, filename)
+
+# Column layout of the csv/parquet interruptions table: one row per interruption
+INTERRUPTION_TABLE_TEXT_FIELDS = [
+    "cause_of_interruption",
+    "relay_indications_lc_work",
+    "breakdown_declared",
+    "fault_identified_during_patrolling",
+    "fault_location",
+    "remarks",
+    "action_taken",
+]
+INTERRUPTION_TABLE_COLUMNS = [
+    "feeder", "date", "start_time", "end_date", "end_time", "duration_minutes",
+] + INTERRUPTION_TABLE_TEXT_FIELDS
+
+
+def interruption_table_row(feeder: dict, entry: dict) -> list:
+    data = entry.get("data") or {}
+    row = [
+        feeder["name"],
+        entry["date"],
+        format_time(data.get("start_time")) or None,
+        data.get("end_date") or entry["date"],
+        format_time(data.get("end_time")) or None,
+        table_number(data.get("duration_minutes")),
+    ]
+    row.extend(data.get(field) or None for field in INTERRUPTION_TABLE_TEXT_FIELDS)
+    return row
+
 
 @api_router.get("/interruptions/export-all/{year}/{month}")
 async def export_interruptions_all(
     year: int,
     month: int,
+    format: str = "xlsx",
     current_user: User = Depends(get_current_user)
 ):
+    fmt = export_format(format)
+    start_date, end_date = month_range(year, month)
+    return await _export_interruptions(fmt, start_date, end_date, f"Interruptions_All_{year}_{month:02d}")
+
+
+@api_router.get("/interruptions/export-all")
+async def export_interruptions_range(
+    start: str,
+    end: str,
+    format: str = "xlsx",
+    current_user: User = Depends(get_current_user)
+):
+    fmt = export_format(format)
+    start_date, end_date = export_range(start, end)
+    return await _export_interruptions(fmt, start_date, end_date, f"Interruptions_All_{start}_to_{end}")
+
+
+async def _export_interruptions(fmt: str, start_date: str, end_date: str, name: str):
     feeders = await db.max_min_feeders.find(
         {"type": {"$in": ["feeder_400kv", "feeder_220kv", "ict_feeder", "reactor_feeder", "bay_feeder"]}},
         {"_id": 0},
@@ -6085,11 +7773,13 @@ async def export_interruptions_all(
             group = 6
         return (group, name)
     feeders = sorted(feeders, key=feeder_sort_key)
-    start_date = f"{year}-{month:02d}-01"
-    if month == 12:
-        end_date = f"{year + 1}-01-01"
-    else:
-        end_date = f"{year}-{month + 1:02d}-01"
+    entries_by_feeder = await read_range_entries("interruption_entries", start_date, end_date)
+    if fmt != "xlsx":
+        table = TableExport(fmt, INTERRUPTION_TABLE_COLUMNS)
+        for feeder in feeders:
+            for entry in entries_by_feeder.get(feeder["id"], []):
+                table.append(interruption_table_row(feeder, entry))
+        return table.response(name)
     wb = Workbook()
     if "Sheet" in wb.sheetnames:
         del wb["Sheet"]
@@ -6102,10 +7792,7 @@ async def export_interruptions_all(
     created_any_sheet = False
 
     for feeder in feeders:
-        entries = await db.interruption_entries.find(
-            {"feeder_id": feeder["id"], "date": {"$gte": start_date, "$lt": end_date}},
-            {"_id": 0},
-        ).sort("date", 1).to_list(1000)
+        entries = entries_by_feeder.get(feeder["id"])
         if not entries:
             continue
 
@@ -6159,14 +7846,7 @@ async def export_interruptions_all(
         ws = wb.create_sheet("No Data")
         ws.cell(row=1, column=1, value="No interruptions found for this period")
 
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=Interruptions_All_{year}_{month:02d}.xlsx"},
-    )
+    return workbook_response(wb, f"{name}.xlsx")
 
 async def _get_interruptions_report_data(year: int, month: int):
     start_date = f"{year}-{month:02d}-01"
@@ -6362,7 +8042,6 @@ async def _get_interruptions_report_data(year: int, month: int):
 
 async def _generate_interruptions_report_wb(year: int, month: int):
     from openpyxl.styles import PatternFill, Border, Side, Alignment, Font
-    from openpyxl.utils import get_column_letter
 
     data = await _get_interruptions_report_data(year, month)
 
@@ -6393,15 +8072,15 @@ async def _generate_interruptions_report_wb(year: int, month: int):
     sections = data.get("sections") or []
     for section in sections:
         ws = wb.create_sheet(title=section.get("title", "")[:31] or "Sheet")
+        writer = SheetWriter(ws)
 
-        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(headers))
-        c = ws.cell(row=1, column=1, value=section.get("header", ""))
+        c = writer.merge(1, 1, 1, len(headers), section.get("header", ""))
         c.font = Font(bold=True)
         c.alignment = center_align
         c.border = thin_border
 
         for col_idx, h in enumerate(headers, 1):
-            cell = ws.cell(row=2, column=col_idx, value=h)
+            cell = writer.cell(2, col_idx, h)
             cell.fill = header_fill
             cell.font = header_font
             cell.alignment = center_align
@@ -6410,15 +8089,12 @@ async def _generate_interruptions_report_wb(year: int, month: int):
         row_idx = 3
         groups = section.get("groups") or []
         if not groups:
-            ws.merge_cells(start_row=row_idx, start_column=1, end_row=row_idx, end_column=len(headers))
-            cell = ws.cell(row=row_idx, column=1, value="No interruptions found for this period")
+            cell = writer.merge(row_idx, 1, row_idx, len(headers), "No interruptions found for this period")
             cell.alignment = center_align
             cell.border = thin_border
-            continue
 
         for group in groups:
-            ws.merge_cells(start_row=row_idx, start_column=1, end_row=row_idx, end_column=len(headers))
-            cell = ws.cell(row=row_idx, column=1, value=group.get("name", ""))
+            cell = writer.merge(row_idx, 1, row_idx, len(headers), group.get("name", ""))
             cell.font = Font(bold=True)
             cell.alignment = center_align
             cell.border = thin_border
@@ -6439,7 +8115,7 @@ async def _generate_interruptions_report_wb(year: int, month: int):
                     row.get("remarks"),
                 ]
                 for col_idx, val in enumerate(values, 1):
-                    cell = ws.cell(row=row_idx, column=col_idx, value=val)
+                    cell = writer.cell(row_idx, col_idx, val)
                     cell.border = thin_border
                     if col_idx <= 5 or col_idx >= 8 and col_idx <= 10:
                         cell.alignment = center_align
@@ -6447,17 +8123,40 @@ async def _generate_interruptions_report_wb(year: int, month: int):
                         cell.alignment = left_align
                 row_idx += 1
 
-    for col_idx in range(1, len(headers) + 1):
-        col_letter = get_column_letter(col_idx)
-        max_len = 0
-        for cell in ws[col_letter]:
-            if cell.value is not None:
-                max_len = max(max_len, len(str(cell.value)))
-        ws.column_dimensions[col_letter].width = min(max(max_len + 2, 12), 40)
+        writer.fit_columns(range(1, len(headers) + 1), min_width=12, max_width=40)
 
     return wb
 
 
+def _interruption_entry_text(entry: Dict[str, Any]) -> str:
+    data = entry.get("data") or {}
+    parts = [
+        data.get("cause_of_interruption"),
+        data.get("relay_indications_lc_work"),
+        data.get("remarks"),
+        data.get("description"),
+        data.get("action_taken"),
+    ]
+    return " ".join(str(p) for p in parts if p) or ""
+
+
+def classify_interruption_entry(entry: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """MIS report category of an interruption entry and, for LC/NBFC/HT
+    entries, which of the three it is."""
+    data = entry.get("data") or {}
+    found = _interruption_scanner.scan(_interruption_entry_text(entry).lower())
+    flag_val = str(data.get("breakdown_declared") or "").strip().lower()
+    if flag_val.startswith("y") or "breakdown" in found:
+        return "breakdown", None
+    if "lc_nbfc_ht" in found:
+        if "nbfc" in found:
+            return "lc_nbfc_ht", "NBFC"
+        if "ht" in found:
+            return "lc_nbfc_ht", "HT"
+        return "lc_nbfc_ht", "LC"
+    return "faulty_tripping", None
+
+
 async def _get_mis_interruptions_report_data(year: int, month: int):
     start_date = f"{year}-{month:02d}-01"
     if month == 12:
@@ -6477,64 +8176,6 @@ async def _get_mis_interruptions_report_data(year: int, month: int):
         {"_id": 0},
     ).to_list(20000)
 
-    def _combined_text(entry: Dict[str, Any]) -> str:
-        data = entry.get("data") or {}
-        parts = [
-            data.get("cause_of_interruption"),
-            data.get("relay_indications_lc_work"),
-            data.get("remarks"),
-            data.get("description"),
-            data.get("action_taken"),
-        ]
-        return " ".join(str(p) for p in parts if p) or ""
-
-    def classify_category(entry: Dict[str, Any]) -> str:
-        combined = _combined_text(entry)
-        lower = combined.lower()
-        breakdown_flag = False
-        flag_val = str(data.get("breakdown_declared") or "").strip().lower()
-        if flag_val.startswith("y"):
-            breakdown_flag = True
-        if "breakdown declared" in lower or "under breakdown condition" in lower:
-            breakdown_flag = True
-        if breakdown_flag:
-            return "breakdown"
-        lc_nbfc_keywords = [
-            "lc issued",
-            "lc applied",
-            "under lc",
-            "line clear",
-            "line clear for",
-            "nbfc issued",
-            "nbfc applied",
-            "under nbfc",
-            "nbfc for",
-            "nbfc returned",
-            "hand tripped",
-            "hand trip",
-            "hand-tripped",
-        ]
-        if any(k in lower for k in lc_nbfc_keywords):
-            return "lc_nbfc_ht"
-        return "faulty_tripping"
-
-    def classify_lc_nbfc_label(entry: Dict[str, Any]) -> str:
-        combined = _combined_text(entry)
-        lower = combined.lower()
-        if "nbfc" in lower:
-            return "NBFC"
-        ht_keywords = [
-            "hand tripped",
-            "hand trip",
-            "hand-tripped",
-            " ht ",
-            "(ht",
-            "ht)",
-        ]
-        if any(k in lower for k in ht_keywords):
-            return "HT"
-        return "LC"
-
     summary_by_feeder: Dict[str, Dict[str, Any]] = {}
     for f in feeders:
         fid = f.get("id")
@@ -6564,11 +8205,10 @@ async def _get_mis_interruptions_report_data(year: int, month: int):
             minutes = float(duration_raw)
         except Exception:
             minutes = 0.0
-        category = classify_category(entry)
+        category, label = classify_interruption_entry(entry)
         if category == "lc_nbfc_ht":
             count_key = "lc_nbfc_ht_count"
             dur_key = "lc_nbfc_ht_duration"
-            label = classify_lc_nbfc_label(entry)
         elif category == "breakdown":
             count_key = "breakdown_count"
             dur_key = "breakdown_duration"
@@ -6696,7 +8336,6 @@ async def _get_mis_interruptions_report_data(year: int, month: int):
 
 async def _generate_mis_interruptions_report_wb(year: int, month: int):
     from openpyxl.styles import PatternFill, Border, Side, Alignment, Font
-    from openpyxl.utils import get_column_letter
 
     data = await _get_mis_interruptions_report_data(year, month)
 
@@ -6712,15 +8351,14 @@ async def _generate_mis_interruptions_report_wb(year: int, month: int):
     wb = Workbook()
     ws = wb.active
     ws.title = "Statement-16"
+    writer = SheetWriter(ws)
 
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=19)
-    c1 = ws.cell(row=1, column=1, value="STATEMENT-16")
+    c1 = writer.merge(1, 1, 1, 19, "STATEMENT-16")
     c1.font = Font(bold=True)
     c1.alignment = center_align
 
-    ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=19)
     header_text = f"PARTICULARS OF INTERRUPTIONS FOR THE MONTH OF {month_label} - {year_val} IN O & M-I DIVISION"
-    c2 = ws.cell(row=2, column=1, value=header_text)
+    c2 = writer.merge(2, 1, 2, 19, header_text)
     c2.font = Font(bold=True)
     c2.alignment = center_align
 
@@ -6765,7 +8403,7 @@ async def _generate_mis_interruptions_report_wb(year: int, month: int):
     }
 
     for (row_idx, col_idx), value in headers.items():
-        cell = ws.cell(row=row_idx, column=col_idx, value=value)
+        cell = writer.cell(row_idx, col_idx, value)
         cell.fill = header_fill
         cell.font = header_font
         cell.alignment = center_align
@@ -6774,8 +8412,7 @@ async def _generate_mis_interruptions_report_wb(year: int, month: int):
     row_idx = 5
     rows = data.get("rows") or []
     if not rows:
-        ws.merge_cells(start_row=row_idx, start_column=1, end_row=row_idx, end_column=19)
-        cell = ws.cell(row=row_idx, column=1, value="No interruptions found for this period")
+        cell = writer.merge(row_idx, 1, row_idx, 19, "No interruptions found for this period")
         cell.alignment = center_align
         cell.border = thin_border
     else:
@@ -6802,7 +8439,7 @@ async def _generate_mis_interruptions_report_wb(year: int, month: int):
                 row.get("remarks"),
             ]
             for col_idx, val in enumerate(values, 1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=val)
+                cell = writer.cell(row_idx, col_idx, val)
                 cell.border = thin_border
                 if col_idx in [1, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18]:
                     cell.alignment = center_align
@@ -6810,23 +8447,75 @@ async def _generate_mis_interruptions_report_wb(year: int, month: int):
                     cell.alignment = left_align
             row_idx += 1
 
-    for col_idx in range(1, 20):
-        col_letter = get_column_letter(col_idx)
-        max_len = 0
-        for cell in ws[col_letter]:
-            if cell.value is not None:
-                max_len = max(max_len, len(str(cell.value)))
-        ws.column_dimensions[col_letter].width = min(max(max_len + 2, 10), 30)
+    writer.fit_columns(range(1, 20), min_width=10, max_width=30)
 
     return wb
 
 
+def _fortnight_layout(wb, main_rows: int, ict_rows: int, has_station: bool):
+    """Fortnight skeleton: one sheet per period with the header block, the
+    styled feeder and ICT rows and the station load block."""
+    wb.remove(wb.active)
+    title_style = report_style(wb, "MIS Title")
+    bold_style = report_style(wb, "MIS Bold")
+    header_style = report_style(wb, "MIS Bold Boxed")
+    boxed = report_style(wb, "MIS Boxed")
+    boxed_wrap = report_style(wb, "MIS Boxed Wrap")
+    # Sl.No, name, rating, 8 max/min figures, remarks
+    feeder_row_styles = [boxed_wrap, boxed, boxed_wrap] + [boxed_wrap] * 8 + [boxed]
+
+    for name in ("1-15", "16-End", "Full Month"):
+        ws = wb.create_sheet(title=name)
+        
+        # Row 1: Title (filled in per month)
+        merge_styled(ws, 1, 1, 1, 12, None, title_style)
+        
+        # Row 2: Main Headers
+        merge_styled(ws, 2, 1, 3, 1, "Sl.No", header_style)
+        merge_styled(ws, 2, 2, 3, 2, "Name of the feeder", header_style)
+        merge_styled(ws, 2, 3, 3, 3, "Rating", header_style)
+        merge_styled(ws, 2, 4, 2, 7, "Max Demand reached during", header_style)
+        merge_styled(ws, 2, 8, 2, 11, "Min Demand reached", header_style)
+        merge_styled(ws, 2, 12, 3, 12, "Remarks", header_style)
+        
+        # Row 3: Sub Headers
+        sub_headers = ["AMPS", "MW", "Date", "Time", "AMPS", "MW", "Date", "Time"]
+        write_styled_row(ws, 3, sub_headers, header_style, start_col=4)
+            
+        # 1. Main Feeders
+        row_idx = 4
+        for _ in range(main_rows):
+            write_styled_row(ws, row_idx, [None] * 12, feeder_row_styles)
+            row_idx += 1
+            
+        # 2. ICT Separator
+        row_idx += 1 # Gap
+        ws.merge_cells(start_row=row_idx, start_column=1, end_row=row_idx, end_column=12)
+        separator = ws.cell(row=row_idx, column=1, value="ICT'S")
+        separator.style = bold_style
+        row_idx += 1
+        
+        # 3. ICT Feeders
+        for _ in range(ict_rows):
+            write_styled_row(ws, row_idx, [None] * 12, feeder_row_styles)
+            row_idx += 1
+            
+        # 4. Station Load (Bottom)
+        row_idx += 2
+        if has_station:
+            write_styled_row(ws, row_idx, ["Station Load in MW", "Time", "Date"], header_style, start_col=2)
+            # "Month" cell based on image 2
+            write_styled_row(ws, row_idx + 1, ["Month", None, None, None], [boxed, boxed_wrap, boxed_wrap, boxed_wrap])
+            
+        # Set fixed width for Sl.No
+        ws.column_dimensions['A'].width = 6
+
+
 async def _generate_fortnight_report_wb(year: int, month: int):
     try:
         import io
         import calendar
         import traceback
-        from openpyxl.utils import get_column_letter
 
         # Fetch all feeders
         feeders = await db.max_min_feeders.find({}, {"_id": 0}).to_list(100)
@@ -6885,9 +8574,10 @@ async def _generate_fortnight_report_wb(year: int, month: int):
         ict_feeders = [f for f in ordered_feeders if f['type'] == 'ict_feeder']
         bus_station_feeder = next((f for f in ordered_feeders if f['type'] == 'bus_station'), None)
 
-        wb = Workbook()
-        if wb.sheetnames:
-            wb.remove(wb.active)
+        wb = report_template(
+            ("fortnight", len(main_feeders), len(ict_feeders), bus_station_feeder is not None),
+            lambda wb: _fortnight_layout(wb, len(main_feeders), len(ict_feeders), bus_station_feeder is not None),
+        )
             
         last_day = calendar.monthrange(year, month)[1]
         month_name = calendar.month_name[month]
@@ -6898,18 +8588,9 @@ async def _generate_fortnight_report_wb(year: int, month: int):
             {"name": "Full Month", "start": f"{year}-{month:02d}-01", "end": f"{year}-{month:02d}-{last_day}"}
         ]
         
-        header_fill = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
-        # header_font = Font(bold=True, color="000000") # Black text
-        title_font = Font(bold=True, size=12)
-        bold_font = Font(bold=True)
-        thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-        center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
-
         # Fetch all entries for the month
-        all_entries = await db.max_min_entries.find(
-            {"date": {"$gte": f"{year}-{month:02d}-01", "$lte": f"{year}-{month:02d}-{last_day}"}},
-            {"_id": 0}
-        ).to_list(10000)
+        next_month = f"{year + 1}-01-01" if month == 12 else f"{year}-{month + 1:02d}-01"
+        all_entries = await read_month_entries("max_min_entries", f"{year}-{month:02d}-01", next_month, limit=10000)
 
         entries_by_feeder = {}
         for e in all_entries:
@@ -6918,71 +8599,29 @@ async def _generate_fortnight_report_wb(year: int, month: int):
                 if fid not in entries_by_feeder:
                     entries_by_feeder[fid] = []
                 entries_by_feeder[fid].append(e)
+        # Columns parsed once per feeder; each period is a slice of them
+        series_by_feeder = FeederMonthSeries.by_feeder(all_entries)
 
         for p in periods:
-            ws = wb.create_sheet(title=p['name'])
+            ws = wb[p['name']]
+            # The title row does not count toward column widths
+            writer = SheetWriter(ws, skip_rows=1)
+            writer.track_existing()
             
             # Row 1: Title
-            ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=12)
-            title_cell = ws.cell(row=1, column=1, value=f"MAX DEMAND OF EACH FEEDER and ICT DURING THE MONTH OF {month_name}-{year} ({p['name']})")
-            title_cell.font = title_font
-            title_cell.alignment = center_align
-            
-            # Row 2: Main Headers
-            # Col 1: Sl.No
-            ws.merge_cells(start_row=2, start_column=1, end_row=3, end_column=1)
-            c = ws.cell(row=2, column=1, value="Sl.No")
-            c.font = bold_font; c.alignment = center_align; c.border = thin_border
-            ws.cell(row=3, column=1).border = thin_border
-            
-            # Col 2: Name of the feeder
-            ws.merge_cells(start_row=2, start_column=2, end_row=3, end_column=2)
-            c = ws.cell(row=2, column=2, value="Name of the feeder")
-            c.font = bold_font; c.alignment = center_align; c.border = thin_border
-            ws.cell(row=3, column=2).border = thin_border
-            
-            # Col 3: Rating
-            ws.merge_cells(start_row=2, start_column=3, end_row=3, end_column=3)
-            c = ws.cell(row=2, column=3, value="Rating")
-            c.font = bold_font; c.alignment = center_align; c.border = thin_border
-            ws.cell(row=3, column=3).border = thin_border
-            
-            # Col 4-7: Max Demand reached during
-            ws.merge_cells(start_row=2, start_column=4, end_row=2, end_column=7)
-            c = ws.cell(row=2, column=4, value="Max Demand reached during")
-            c.font = bold_font; c.alignment = center_align; c.border = thin_border
-            for i in range(5, 8): ws.cell(row=2, column=i).border = thin_border
-            
-            # Col 8-11: Min Demand reached
-            ws.merge_cells(start_row=2, start_column=8, end_row=2, end_column=11)
-            c = ws.cell(row=2, column=8, value="Min Demand reached")
-            c.font = bold_font; c.alignment = center_align; c.border = thin_border
-            for i in range(9, 12): ws.cell(row=2, column=i).border = thin_border
-            
-            # Col 12: Remarks
-            ws.merge_cells(start_row=2, start_column=12, end_row=3, end_column=12)
-            c = ws.cell(row=2, column=12, value="Remarks")
-            c.font = bold_font; c.alignment = center_align; c.border = thin_border
-            ws.cell(row=3, column=12).border = thin_border
-            
-            # Row 3: Sub Headers
-            sub_headers = ["AMPS", "MW", "Date", "Time", "AMPS", "MW", "Date", "Time"]
-            for i, h in enumerate(sub_headers):
-                c = ws.cell(row=3, column=4+i, value=h)
-                c.font = bold_font; c.alignment = center_align; c.border = thin_border
+            ws.cell(row=1, column=1, value=f"MAX DEMAND OF EACH FEEDER and ICT DURING THE MONTH OF {month_name}-{year} ({p['name']})")
                 
             row_idx = 4
             
             # 1. Main Feeders
             for i, feeder in enumerate(main_feeders, 1):
-                f_entries = entries_by_feeder.get(feeder['id'], [])
-                p_entries = [e for e in f_entries if p['start'] <= e['date'] <= p['end']]
                 
                 # Check for Grouping Logic
                 is_special, partner_names = get_feeder_group_info(feeder['name'])
                 if is_special:
                     p_group_map = {}
-                    p_group_map[feeder['id']] = p_entries
+                    f_entries = entries_by_feeder.get(feeder['id'], [])
+                    p_group_map[feeder['id']] = [e for e in f_entries if p['start'] <= e['date'] <= p['end']]
                     
                     # Gather partner entries
                     for pname in partner_names:
@@ -6992,61 +8631,48 @@ async def _generate_fortnight_report_wb(year: int, month: int):
                              pp_entries = [e for e in pf_entries if p['start'] <= e['date'] <= p['end']]
                              p_group_map[p_feeder['id']] = pp_entries
                     
-                    leader_id = determine_leader(p_group_map)
+                    index = CoincidentPeakIndex(p_group_map)
+                    leader_id = determine_leader(p_group_map, index)
                     if not leader_id: leader_id = feeder['id']
                     
                     leader_entries = p_group_map.get(leader_id, [])
-                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'])
+                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'], index)
                 else:
-                    stats = calculate_period_stats(p_entries, feeder['type'])
-                
-                ws.cell(row=row_idx, column=1, value=i).border = thin_border
-                ws.cell(row=row_idx, column=1).alignment = center_align
-                
-                ws.cell(row=row_idx, column=2, value=feeder['name']).border = thin_border
-                
-                ws.cell(row=row_idx, column=3, value=get_rating(feeder['name'])).border = thin_border
-                ws.cell(row=row_idx, column=3).alignment = center_align
-                
-                # Max
-                ws.cell(row=row_idx, column=4, value=stats.get('max_amps', '-')).border = thin_border
-                ws.cell(row=row_idx, column=5, value=stats.get('max_mw', '-')).border = thin_border
-                ws.cell(row=row_idx, column=6, value=format_date(stats.get('max_mw_date'))).border = thin_border
-                ws.cell(row=row_idx, column=7, value=format_time(stats.get('max_mw_time'))).border = thin_border
-                
-                # Min
-                ws.cell(row=row_idx, column=8, value=stats.get('min_amps', '-')).border = thin_border
-                ws.cell(row=row_idx, column=9, value=stats.get('min_mw', '-')).border = thin_border
-                ws.cell(row=row_idx, column=10, value=format_date(stats.get('min_mw_date'))).border = thin_border
-                ws.cell(row=row_idx, column=11, value=format_time(stats.get('min_mw_time'))).border = thin_border
-                
-                # Remarks
-                ws.cell(row=row_idx, column=12, value="").border = thin_border
+                    stats = max_min_standard_stats(series_by_feeder.get(feeder['id'], _EMPTY_SERIES).between_dates(p['start'], p['end']), feeder['type'])
                 
-                # Center align data cells
-                for c in range(4, 12): ws.cell(row=row_idx, column=c).alignment = center_align
+                writer.row(row_idx, [
+                    i,
+                    feeder['name'],
+                    get_rating(feeder['name']),
+                    # Max
+                    stats.get('max_amps', '-'),
+                    stats.get('max_mw', '-'),
+                    format_date(stats.get('max_mw_date')),
+                    format_time(stats.get('max_mw_time')),
+                    # Min
+                    stats.get('min_amps', '-'),
+                    stats.get('min_mw', '-'),
+                    format_date(stats.get('min_mw_date')),
+                    format_time(stats.get('min_mw_time')),
+                    # Remarks
+                    "",
+                ])
                 
                 row_idx += 1
                 
-            # 2. ICT Separator
-            row_idx += 1 # Gap
-            ws.merge_cells(start_row=row_idx, start_column=1, end_row=row_idx, end_column=12)
-            c = ws.cell(row=row_idx, column=1, value="ICT'S")
-            c.font = bold_font; c.alignment = center_align
-            # No border for separator? Or strictly follow image? Usually just text.
-            row_idx += 1
+            # 2. ICT Separator (in the template)
+            row_idx += 2
             
             # 3. ICT Feeders
             start_sl = len(main_feeders) + 1
             for i, feeder in enumerate(ict_feeders, start_sl):
-                f_entries = entries_by_feeder.get(feeder['id'], [])
-                p_entries = [e for e in f_entries if p['start'] <= e['date'] <= p['end']]
                 
                 # Check for Grouping Logic (ICTs are in the group list)
                 is_special, partner_names = get_feeder_group_info(feeder['name'])
                 if is_special:
                     p_group_map = {}
-                    p_group_map[feeder['id']] = p_entries
+                    f_entries = entries_by_feeder.get(feeder['id'], [])
+                    p_group_map[feeder['id']] = [e for e in f_entries if p['start'] <= e['date'] <= p['end']]
                     
                     # Gather partner entries
                     for pname in partner_names:
@@ -7056,87 +8682,51 @@ async def _generate_fortnight_report_wb(year: int, month: int):
                              pp_entries = [e for e in pf_entries if p['start'] <= e['date'] <= p['end']]
                              p_group_map[p_feeder['id']] = pp_entries
                     
-                    leader_id = determine_leader(p_group_map)
+                    index = CoincidentPeakIndex(p_group_map)
+                    leader_id = determine_leader(p_group_map, index)
                     if not leader_id: leader_id = feeder['id']
                     
                     leader_entries = p_group_map.get(leader_id, [])
-                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'])
+                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'], index)
                 else:
-                    stats = calculate_period_stats(p_entries, feeder['type'])
-                
-                ws.cell(row=row_idx, column=1, value=i).border = thin_border
-                ws.cell(row=row_idx, column=1).alignment = center_align
-                
-                ws.cell(row=row_idx, column=2, value=feeder['name']).border = thin_border
+                    stats = max_min_standard_stats(series_by_feeder.get(feeder['id'], _EMPTY_SERIES).between_dates(p['start'], p['end']), feeder['type'])
                 
-                ws.cell(row=row_idx, column=3, value=get_rating(feeder['name'])).border = thin_border
-                ws.cell(row=row_idx, column=3).alignment = center_align
-                
-                # Max
-                ws.cell(row=row_idx, column=4, value=stats.get('max_amps', '-')).border = thin_border
-                ws.cell(row=row_idx, column=5, value=stats.get('max_mw', '-')).border = thin_border
-                ws.cell(row=row_idx, column=6, value=format_date(stats.get('max_mw_date'))).border = thin_border
-                ws.cell(row=row_idx, column=7, value=format_time(stats.get('max_mw_time'))).border = thin_border
-                
-                # Min
-                ws.cell(row=row_idx, column=8, value=stats.get('min_amps', '-')).border = thin_border
-                ws.cell(row=row_idx, column=9, value=stats.get('min_mw', '-')).border = thin_border
-                ws.cell(row=row_idx, column=10, value=format_date(stats.get('min_mw_date'))).border = thin_border
-                ws.cell(row=row_idx, column=11, value=format_time(stats.get('min_mw_time'))).border = thin_border
-                
-                # Remarks
-                ws.cell(row=row_idx, column=12, value="").border = thin_border
-                
-                # Center align data cells
-                for c in range(4, 12): ws.cell(row=row_idx, column=c).alignment = center_align
+                writer.row(row_idx, [
+                    i,
+                    feeder['name'],
+                    get_rating(feeder['name']),
+                    # Max
+                    stats.get('max_amps', '-'),
+                    stats.get('max_mw', '-'),
+                    format_date(stats.get('max_mw_date')),
+                    format_time(stats.get('max_mw_time')),
+                    # Min
+                    stats.get('min_amps', '-'),
+                    stats.get('min_mw', '-'),
+                    format_date(stats.get('min_mw_date')),
+                    format_time(stats.get('min_mw_time')),
+                    # Remarks
+                    "",
+                ])
                 
                 row_idx += 1
                 
             # 4. Station Load (Bottom)
             row_idx += 2
             if bus_station_feeder:
-                f_entries = entries_by_feeder.get(bus_station_feeder['id'], [])
-                p_entries = [e for e in f_entries if p['start'] <= e['date'] <= p['end']]
-                stats = calculate_period_stats(p_entries, bus_station_feeder['type'])
-                
-                # Header
-                ws.cell(row=row_idx, column=2, value="Station Load in MW").border = thin_border
-                ws.cell(row=row_idx, column=2).font = bold_font; ws.cell(row=row_idx, column=2).alignment = center_align
-                
-                ws.cell(row=row_idx, column=3, value="Time").border = thin_border
-                ws.cell(row=row_idx, column=3).font = bold_font; ws.cell(row=row_idx, column=3).alignment = center_align
-                
-                ws.cell(row=row_idx, column=4, value="Date").border = thin_border
-                ws.cell(row=row_idx, column=4).font = bold_font; ws.cell(row=row_idx, column=4).alignment = center_align
+                bus_series = series_by_feeder.get(bus_station_feeder['id'], _EMPTY_SERIES)
+                stats = max_min_standard_stats(bus_series.between_dates(p['start'], p['end']), bus_station_feeder['type'])
                 
+                # Header and "Month" label are in the template
                 row_idx += 1
-                
-                # Value
-                ws.cell(row=row_idx, column=1, value="Month").border = thin_border # Based on image 2 "Month" cell
-                ws.cell(row=row_idx, column=2, value=stats.get('max_load', '-')).border = thin_border
-                ws.cell(row=row_idx, column=2).alignment = center_align
-                
-                ws.cell(row=row_idx, column=3, value=format_time(stats.get('max_load_time'))).border = thin_border
-                ws.cell(row=row_idx, column=3).alignment = center_align
-                
-                ws.cell(row=row_idx, column=4, value=format_date(stats.get('max_load_date'))).border = thin_border
-                ws.cell(row=row_idx, column=4).alignment = center_align
-                    
-            # Set fixed width for Sl.No
-            ws.column_dimensions['A'].width = 6
+                writer.row(row_idx, [
+                    stats.get('max_load', '-'),
+                    format_time(stats.get('max_load_time')),
+                    format_date(stats.get('max_load_date')),
+                ], start_col=2)
             
             # Auto-fit other columns
-            for i in range(2, ws.max_column + 1):
-                col_letter = get_column_letter(i)
-                max_len = 0
-                for cell in ws[col_letter]:
-                    # Skip the first row (Title) to avoid skewed width
-                    if cell.row == 1: continue
-                    try:
-                        if cell.value and len(str(cell.value)) > max_len:
-                            max_len = len(str(cell.value))
-                    except: pass
-                ws.column_dimensions[col_letter].width = max_len + 2
+            writer.fit_columns(range(2, ws.max_column + 1))
                 
         return wb
     except Exception as e:
@@ -7156,18 +8746,10 @@ async def generate_fortnight_report(
         import calendar
         wb = await _generate_fortnight_report_wb(year, month)
         
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
         month_name = calendar.month_name[month]
         filename = f"Fortnight_Report_{month_name}_{year}.xlsx"
         
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return workbook_response(wb, filename)
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -7252,10 +8834,8 @@ async def preview_fortnight_report(
         ]
         
         # Fetch all entries for the month
-        all_entries = await db.max_min_entries.find(
-            {"date": {"$gte": f"{year}-{month:02d}-01", "$lte": f"{year}-{month:02d}-{last_day}"}},
-            {"_id": 0}
-        ).to_list(10000)
+        next_month = f"{year + 1}-01-01" if month == 12 else f"{year}-{month + 1:02d}-01"
+        all_entries = await read_month_entries("max_min_entries", f"{year}-{month:02d}-01", next_month, limit=10000)
 
         entries_by_feeder = {}
         for e in all_entries:
@@ -7264,6 +8844,8 @@ async def preview_fortnight_report(
                 if fid not in entries_by_feeder:
                     entries_by_feeder[fid] = []
                 entries_by_feeder[fid].append(e)
+        # Columns parsed once per feeder; each period is a slice of them
+        series_by_feeder = FeederMonthSeries.by_feeder(all_entries)
 
         preview_data = {"periods": []}
 
@@ -7277,14 +8859,13 @@ async def preview_fortnight_report(
             
             # 1. Main Feeders
             for i, feeder in enumerate(main_feeders, 1):
-                f_entries = entries_by_feeder.get(feeder['id'], [])
-                p_entries = [e for e in f_entries if p['start'] <= e['date'] <= p['end']]
                 
                 # Check for Grouping Logic
                 is_special, partner_names = get_feeder_group_info(feeder['name'])
                 if is_special:
                     p_group_map = {}
-                    p_group_map[feeder['id']] = p_entries
+                    f_entries = entries_by_feeder.get(feeder['id'], [])
+                    p_group_map[feeder['id']] = [e for e in f_entries if p['start'] <= e['date'] <= p['end']]
                     
                     # Gather partner entries
                     for pname in partner_names:
@@ -7294,13 +8875,14 @@ async def preview_fortnight_report(
                              pp_entries = [e for e in pf_entries if p['start'] <= e['date'] <= p['end']]
                              p_group_map[p_feeder['id']] = pp_entries
                     
-                    leader_id = determine_leader(p_group_map)
+                    index = CoincidentPeakIndex(p_group_map)
+                    leader_id = determine_leader(p_group_map, index)
                     if not leader_id: leader_id = feeder['id']
                     
                     leader_entries = p_group_map.get(leader_id, [])
-                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'])
+                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'], index)
                 else:
-                    stats = calculate_period_stats(p_entries, feeder['type'])
+                    stats = max_min_standard_stats(series_by_feeder.get(feeder['id'], _EMPTY_SERIES).between_dates(p['start'], p['end']), feeder['type'])
                 
                 period_data["main_feeders"].append({
                     "sl_no": i,
@@ -7319,14 +8901,13 @@ async def preview_fortnight_report(
             # 2. ICT Feeders
             start_sl = len(main_feeders) + 1
             for i, feeder in enumerate(ict_feeders, start_sl):
-                f_entries = entries_by_feeder.get(feeder['id'], [])
-                p_entries = [e for e in f_entries if p['start'] <= e['date'] <= p['end']]
                 
                 # Check for Grouping Logic
                 is_special, partner_names = get_feeder_group_info(feeder['name'])
                 if is_special:
                     p_group_map = {}
-                    p_group_map[feeder['id']] = p_entries
+                    f_entries = entries_by_feeder.get(feeder['id'], [])
+                    p_group_map[feeder['id']] = [e for e in f_entries if p['start'] <= e['date'] <= p['end']]
                     
                     # Gather partner entries
                     for pname in partner_names:
@@ -7336,13 +8917,14 @@ async def preview_fortnight_report(
                              pp_entries = [e for e in pf_entries if p['start'] <= e['date'] <= p['end']]
                              p_group_map[p_feeder['id']] = pp_entries
                     
-                    leader_id = determine_leader(p_group_map)
+                    index = CoincidentPeakIndex(p_group_map)
+                    leader_id = determine_leader(p_group_map, index)
                     if not leader_id: leader_id = feeder['id']
                     
                     leader_entries = p_group_map.get(leader_id, [])
-                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'])
+                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'], index)
                 else:
-                    stats = calculate_period_stats(p_entries, feeder['type'])
+                    stats = max_min_standard_stats(series_by_feeder.get(feeder['id'], _EMPTY_SERIES).between_dates(p['start'], p['end']), feeder['type'])
                 
                 period_data["ict_feeders"].append({
                     "sl_no": i,
@@ -7517,12 +9099,13 @@ async def preview_max_min_daily_report(
                             pf_entries = entries_by_feeder.get(p_feeder['id'], [])
                             p_group_map[p_feeder['id']] = pf_entries
                     
-                    leader_id = determine_leader(p_group_map)
+                    index = CoincidentPeakIndex(p_group_map)
+                    leader_id = determine_leader(p_group_map, index)
                     if not leader_id:
                         leader_id = feeder['id']
                     
                     leader_entries = p_group_map.get(leader_id, [])
-                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'])
+                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'], index)
                 else:
                     stats = calculate_period_stats(p_entries, feeder['type'])
                 
@@ -7559,12 +9142,13 @@ async def preview_max_min_daily_report(
                             pf_entries = entries_by_feeder.get(p_feeder['id'], [])
                             p_group_map[p_feeder['id']] = pf_entries
                     
-                    leader_id = determine_leader(p_group_map)
+                    index = CoincidentPeakIndex(p_group_map)
+                    leader_id = determine_leader(p_group_map, index)
                     if not leader_id:
                         leader_id = feeder['id']
                     
                     leader_entries = p_group_map.get(leader_id, [])
-                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'])
+                    stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, feeder['type'], index)
                 else:
                     stats = calculate_period_stats(p_entries, feeder['type'])
                 
@@ -7716,10 +9300,7 @@ async def get_daily_max_mva_preview(
         else:
             end_date = f"{year}-{month + 1:02d}-01"
 
-        entries = await db.max_min_entries.find(
-            {"feeder_id": feeder['id'], "date": {"$gte": start_date, "$lt": end_date}},
-            {"_id": 0}
-        ).sort("date", 1).to_list(1000)
+        entries = await read_month_entries("max_min_entries", start_date, end_date, [feeder['id']], sort_by_date=True, limit=1000)
         
         report_data = []
         
@@ -7779,10 +9360,8 @@ async def _generate_daily_max_mva_wb(year: int, month: int):
     try:
         import math
         import calendar
-        import io
         from openpyxl import Workbook
         from openpyxl.styles import PatternFill, Border, Side, Alignment, Font
-        from openpyxl.utils import get_column_letter
         
         feeder = await db.max_min_feeders.find_one({"name": "Bus Voltages & Station Load"})
         if not feeder:
@@ -7797,10 +9376,7 @@ async def _generate_daily_max_mva_wb(year: int, month: int):
         else:
             end_date = f"{year}-{month + 1:02d}-01"
 
-        entries = await db.max_min_entries.find(
-            {"feeder_id": feeder['id'], "date": {"$gte": start_date, "$lt": end_date}},
-            {"_id": 0}
-        ).sort("date", 1).to_list(1000)
+        entries = await read_month_entries("max_min_entries", start_date, end_date, [feeder['id']], sort_by_date=True, limit=1000)
         
         def parse_float(val):
             try:
@@ -7811,6 +9387,7 @@ async def _generate_daily_max_mva_wb(year: int, month: int):
         wb = Workbook()
         ws = wb.active
         ws.title = f"Daily Max MVA {month}-{year}"
+        writer = SheetWriter(ws)
         
         # Styles
         header_fill = PatternFill(start_color="F8CBAD", end_color="F8CBAD", fill_type="solid")
@@ -7821,7 +9398,7 @@ async def _generate_daily_max_mva_wb(year: int, month: int):
         headers = ["Date", "MW", "MVAR", "Time", "MVA"]
         
         for i, h in enumerate(headers):
-            cell = ws.cell(row=1, column=i+1, value=h)
+            cell = writer.cell(1, i + 1, h)
             cell.fill = header_fill
             cell.font = header_font
             cell.alignment = center_align
@@ -7837,7 +9414,7 @@ async def _generate_daily_max_mva_wb(year: int, month: int):
             
             entry = entries_map.get(date_str)
             
-            ws.cell(row=row_idx, column=1, value=formatted_date).border = thin_border
+            writer.cell(row_idx, 1, formatted_date).border = thin_border
             ws.cell(row=row_idx, column=1).alignment = center_align
             
             for c in range(2, 6):
@@ -7850,28 +9427,20 @@ async def _generate_daily_max_mva_wb(year: int, month: int):
                 mvar = d.get('mvar')
                 time = d.get('time')
                 
-                if mw is not None: ws.cell(row=row_idx, column=2, value=mw)
-                if mvar is not None: ws.cell(row=row_idx, column=3, value=mvar)
-                if time: ws.cell(row=row_idx, column=4, value=format_time(time))
+                if mw is not None: writer.cell(row_idx, 2, mw)
+                if mvar is not None: writer.cell(row_idx, 3, mvar)
+                if time: writer.cell(row_idx, 4, format_time(time))
                 
                 mw_val = parse_float(mw)
                 mvar_val = parse_float(mvar)
                 
                 if mw_val is not None and mvar_val is not None:
                     mva = math.sqrt(mw_val**2 + mvar_val**2)
-                    ws.cell(row=row_idx, column=5, value=f"{mva:.2f}")
+                    writer.cell(row_idx, 5, f"{mva:.2f}")
             
             row_idx += 1
 
-        for i in range(1, 6):
-            col_letter = get_column_letter(i)
-            max_len = 0
-            for cell in ws[col_letter]:
-                try:
-                    if cell.value and len(str(cell.value)) > max_len:
-                        max_len = len(str(cell.value))
-                except: pass
-            ws.column_dimensions[col_letter].width = max(max_len + 2, 12)
+        writer.fit_columns(range(1, 6), min_width=12)
 
         return wb
     except Exception as e:
@@ -7886,20 +9455,11 @@ async def export_daily_max_mva_report(
     current_user: User = Depends(get_current_user)
 ):
     try:
-        import io
         wb = await _generate_daily_max_mva_wb(year, month)
         
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
         filename = f"Daily_Max_MVA_{month}-{year}.xlsx"
         
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return workbook_response(wb, filename)
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
@@ -7907,31 +9467,31 @@ async def export_daily_max_mva_report(
 
 
 async def _generate_energy_export_wb(year: int, month: int):
+    return await _generate_energy_range_wb(*month_range(year, month))
+
+
+async def _energy_sheets_and_meters():
+    """Energy sheets by name, and each sheet's meters keyed by sheet id."""
     sheets = await db.energy_sheets.find({}, {"_id": 0}).to_list(100)
     sheets.sort(key=lambda x: x['name'])
+    meters_by_sheet: Dict[str, List[dict]] = {}
+    async for m in db.energy_meters.find({}, {"_id": 0}):
+        meters_by_sheet.setdefault(m.get('sheet_id'), []).append(m)
+    return sheets, meters_by_sheet
+
+
+async def _generate_energy_range_wb(start_date: str, end_date: str):
+    sheets, meters_by_sheet = await _energy_sheets_and_meters()
+    entries_by_sheet = await read_range_entries("energy_entries", start_date, end_date, key="sheet_id")
     
-    wb = Workbook()
-    if "Sheet" in wb.sheetnames:
-        del wb["Sheet"]
-        
-    start_date = f"{year}-{month:02d}-01"
-    if month == 12:
-        end_date = f"{year + 1}-01-01"
-    else:
-        end_date = f"{year}-{month + 1:02d}-01"
+    wb = Workbook(write_only=True)
+    header_style = report_style(wb, "MIS Header Wrap")
         
-    header_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
     for sheet in sheets:
         ws = wb.create_sheet(title=sheet['name'])
         
-        meters = await db.energy_meters.find({"sheet_id": sheet['id']}, {"_id": 0}).to_list(100)
-        
-        entries = await db.energy_entries.find(
-            {"sheet_id": sheet['id'], "date": {"$gte": start_date, "$lt": end_date}},
-            {"_id": 0}
-        ).sort("date", 1).to_list(1000)
+        meters = meters_by_sheet.get(sheet['id'], [])
+        entries = entries_by_sheet.get(sheet['id'], [])
         
         headers = ["Date"]
         for m in meters:
@@ -7943,57 +9503,90 @@ async def _generate_energy_export_wb(year: int, month: int):
             ])
         headers.append("Total Consumption")
         
-        ws.append(headers)
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-            
-        for entry in entries:
-            row = [format_date(entry['date'])]
-            readings_map = {r['meter_id']: r for r in entry['readings']}
-            
-            for m in meters:
-                r = readings_map.get(m['id'])
-                if r:
-                    row.extend([r['initial'], r['final'], m['mf'], r['consumption']])
-                else:
-                    row.extend(['-', '-', m['mf'], '-'])
-            
-            row.append(entry['total_consumption'])
-            ws.append(row)
+        writer = StreamingSheetWriter(ws)
+        writer.append(headers, header_style)
+        
+        def rows(entries=entries, meters=meters):
+            for entry in entries:
+                row = [format_date(entry['date'])]
+                readings_map = {r['meter_id']: r for r in entry['readings']}
+                
+                for m in meters:
+                    r = readings_map.get(m['id'])
+                    if r:
+                        row.extend([r['initial'], r['final'], m['mf'], r['consumption']])
+                    else:
+                        row.extend(['-', '-', m['mf'], '-'])
+                
+                row.append(entry['total_consumption'])
+                yield row
             
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column].width = adjusted_width
+        await writer.write_rows(rows)
             
     return wb
 
+# Column layout of the csv/parquet energy table: one row per meter per day
+ENERGY_TABLE_COLUMNS = [
+    "sheet", "date", "meter", "unit", "initial", "final", "mf", "consumption", "total_consumption",
+]
+
+
+async def _energy_export_table(fmt: str, start_date: str, end_date: str, name: str) -> StreamingResponse:
+    sheets, meters_by_sheet = await _energy_sheets_and_meters()
+    entries_by_sheet = await read_range_entries("energy_entries", start_date, end_date, key="sheet_id")
+
+    table = TableExport(fmt, ENERGY_TABLE_COLUMNS)
+    for sheet in sheets:
+        meters = meters_by_sheet.get(sheet['id'], [])
+        for entry in entries_by_sheet.get(sheet['id'], []):
+            readings_map = {r['meter_id']: r for r in entry.get('readings') or []}
+            total = table_number(entry.get('total_consumption'))
+            for m in meters:
+                r = readings_map.get(m['id']) or {}
+                table.append([
+                    sheet['name'],
+                    entry['date'],
+                    m['name'],
+                    m.get('unit'),
+                    table_number(r.get('initial')),
+                    table_number(r.get('final')),
+                    table_number(m.get('mf')),
+                    table_number(r.get('consumption')),
+                    total,
+                ])
+    return table.response(name)
+
+
 @api_router.get("/energy/export-all/{year}/{month}")
 async def export_all_energy_sheets(
     year: int,
     month: int,
+    format: str = "xlsx",
     current_user: User = Depends(get_current_user)
 ):
+    fmt = export_format(format)
+    if fmt != "xlsx":
+        return await _energy_export_table(fmt, *month_range(year, month), f"Energy_Consumption_{month}-{year}")
     wb = await _generate_energy_export_wb(year, month)
     
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=Energy_Consumption_{month}-{year}.xlsx"}
-    )
+    return workbook_response(wb, f"Energy_Consumption_{month}-{year}.xlsx")
+
+
+@api_router.get("/energy/export-all")
+async def export_energy_range(
+    start: str,
+    end: str,
+    format: str = "xlsx",
+    current_user: User = Depends(get_current_user)
+):
+    fmt = export_format(format)
+    start_date, end_date = export_range(start, end)
+    name = f"Energy_Consumption_{start}_to_{end}"
+    if fmt != "xlsx":
+        return await _energy_export_table(fmt, start_date, end_date, name)
+    wb = await _generate_energy_range_wb(start_date, end_date)
+
+    return workbook_response(wb, f"{name}.xlsx")
 
 @api_router.get("/energy/export/{sheet_id}/{year}/{month}")
 async def export_energy_sheet(
@@ -8037,7 +9630,8 @@ async def export_energy_sheet(
     header_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
     header_font = Font(bold=True, color="FFFFFF")
     
-    ws.append(headers)
+    writer = SheetWriter(ws)
+    writer.append(headers)
     for cell in ws[1]:
         cell.fill = header_fill
         cell.font = header_font
@@ -8056,32 +9650,14 @@ async def export_energy_sheet(
                 row.extend([0, 0, m['mf'], 0])
                 
         row.append(entry['total_consumption'])
-        ws.append(row)
+        writer.append(row)
         
     # Auto-width
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column].width = adjusted_width
+    writer.fit_columns()
         
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
     filename = f"{sheet['name']}_{year}_{month:02d}.xlsx"
     
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return workbook_response(wb, filename)
 
 @api_router.put("/energy/entries/{entry_id}", response_model=EnergyEntry)
 async def update_energy_entry(
@@ -8382,15 +9958,8 @@ async def get_boundary_meter_report_json(
 ):
     return await get_boundary_meter_data(year, month)
 
-async def _generate_boundary_meter_wb(year: int, month: int):
-    data = await get_boundary_meter_data(year, month)
-    report_data = data['report_data']
-    prev_month_str = data['prev_month_str']
-    current_month_end_str = data['current_month_end_str']
-    month_name = data['month_name']
-
-    # 5. Generate Excel
-    wb = Workbook()
+def _boundary_meter_layout(wb, rows: int):
+    """Boundary meter skeleton: header block and `rows` bordered data rows."""
     ws = wb.active
     ws.title = "Boundary Meter Report"
     
@@ -8399,10 +9968,9 @@ async def _generate_boundary_meter_wb(year: int, month: int):
     center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
     bold_font = Font(bold=True)
     
-    # Title Row
+    # Title Row (filled in per month)
     ws.merge_cells('A1:H1')
     title_cell = ws['A1']
-    title_cell.value = f"Boundary Meter Readings of 400KV Shankarpally for the Month of {month_name[:3]}'{str(year)[-2:]}"
     title_cell.font = Font(bold=True, size=14)
     title_cell.alignment = center_align
     title_cell.border = thin_border
@@ -8480,22 +10048,9 @@ async def _generate_boundary_meter_wb(year: int, month: int):
             cell.border = thin_border
             
     # Data Rows
-    start_row = 5
-    for idx, data in enumerate(report_data, 1):
-        ws[f'A{start_row}'] = idx
-        ws[f'B{start_row}'] = data['name']
-        ws[f'C{start_row}'] = f"{prev_month_str}\n12:00 Hrs"
-        ws[f'D{start_row}'] = f"{current_month_end_str}\n12:00 Hrs"
-        ws[f'E{start_row}'] = data['initial']
-        ws[f'F{start_row}'] = data['final']
-        ws[f'G{start_row}'] = data['diff']
-        ws[f'H{start_row}'] = data['mf']
-        ws[f'I{start_row}'] = data['consumption']
-        ws[f'J{start_row}'] = "-"
-        
-        # Style row
+    for row_idx in range(5, 5 + rows):
         for col in range(1, 11):
-            cell = ws.cell(row=start_row, column=col)
+            cell = ws.cell(row=row_idx, column=col)
             cell.alignment = center_align
             cell.border = thin_border
             # Number formatting
@@ -8503,8 +10058,7 @@ async def _generate_boundary_meter_wb(year: int, month: int):
                 cell.number_format = '0.00'
                 
         # Row height for multiline text
-        ws.row_dimensions[start_row].height = 60
-        start_row += 1
+        ws.row_dimensions[row_idx].height = 60
         
     # Column Widths
     ws.column_dimensions['A'].width = 5
@@ -8518,6 +10072,34 @@ async def _generate_boundary_meter_wb(year: int, month: int):
     ws.column_dimensions['I'].width = 15
     ws.column_dimensions['J'].width = 10
 
+
+async def _generate_boundary_meter_wb(year: int, month: int):
+    data = await get_boundary_meter_data(year, month)
+    report_data = data['report_data']
+    prev_month_str = data['prev_month_str']
+    current_month_end_str = data['current_month_end_str']
+    month_name = data['month_name']
+
+    # 5. Generate Excel
+    rows = len(report_data)
+    wb = report_template(("boundary-meter", rows), lambda wb: _boundary_meter_layout(wb, rows))
+    ws = wb.active
+    ws['A1'].value = f"Boundary Meter Readings of 400KV Shankarpally for the Month of {month_name[:3]}'{str(year)[-2:]}"
+    
+    for row_idx, data in enumerate(report_data, 5):
+        fill_row(ws, row_idx, [
+            row_idx - 4,
+            data['name'],
+            f"{prev_month_str}\n12:00 Hrs",
+            f"{current_month_end_str}\n12:00 Hrs",
+            data['initial'],
+            data['final'],
+            data['diff'],
+            data['mf'],
+            data['consumption'],
+            "-",
+        ])
+
     return wb
 
 @api_router.get("/reports/boundary-meter-33kv/{year}/{month}")
@@ -8528,7 +10110,6 @@ async def generate_boundary_meter_report(
 ):
     try:
         import calendar
-        from io import BytesIO
         
         # We need month_name for the filename, but it's not directly returned by the wb function.
         # However, we can re-calculate it or fetch it.
@@ -8539,20 +10120,12 @@ async def generate_boundary_meter_report(
         wb = await _generate_boundary_meter_wb(year, month)
         month_name = calendar.month_name[month]
         
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
         filename = f"Boundary_Meter_Report_{month_name}_{year}.xlsx"
         headers = {
             'Content-Disposition': f'attachment; filename="{filename}"'
         }
         
-        return StreamingResponse(
-            output,
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            headers=headers
-        )
+        return workbook_response(wb, filename, headers)
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
@@ -8597,53 +10170,7 @@ FEEDER_ORDER_KPI = [
 ICT_ORDER_KPI = ["ICT-1 (315MVA)", "ICT-2 (315MVA)", "ICT-3 (315MVA)", "ICT-4 (500MVA)"]
 
 def calculate_kpi_stats(entries, feeder_type):
-    if not entries:
-        return {"avg_val": 0, "max_val": 0}
-        
-    total_avg = 0
-    max_val = 0
-    count = 0
-    
-    # For Lines: track Max MW to determine which Amps to pick
-    max_mw_found = -1.0
-    
-    for e in entries:
-        d = e.get('data', {})
-        if not d: continue
-        
-        max_data = d.get('max') or {}
-        avg_data = d.get('avg') or {}
-        
-        if feeder_type == 'ict_feeder':
-            # ICT: Max Demand (MW) and Avg Load (MW)
-            # Max MW comes from max.mw
-            # Avg MW comes from avg.mw
-            curr_max = float(max_data.get('mw', 0) or 0)
-            curr_avg = float(avg_data.get('mw', 0) or 0)
-            
-            if curr_max > max_val:
-                max_val = curr_max
-            
-            if curr_avg > 0:
-                total_avg += curr_avg
-                count += 1
-        else:
-            # Line: Max Line Loading (Amps) and Avg Loading (Amps)
-            # Logic Update: Max Amps should be derived from the entry with Max MW
-            curr_mw = float(max_data.get('mw', 0) or 0)
-            curr_amps = float(max_data.get('amps', 0) or 0)
-            
-            if curr_mw > max_mw_found:
-                max_mw_found = curr_mw
-                max_val = curr_amps
-            
-            curr_avg = float(avg_data.get('amps', 0) or 0)
-            if curr_avg > 0:
-                total_avg += curr_avg
-                count += 1
-                
-    avg_val = total_avg / count if count > 0 else 0
-    return {"avg_val": avg_val, "max_val": max_val}
+    return max_min_kpi_stats(FeederMonthSeries(entries), feeder_type)
 
 @api_router.get("/reports/kpi/preview/{year}/{month}")
 async def get_kpi_preview(
@@ -8668,23 +10195,17 @@ async def get_kpi_preview(
         # Sort feeders
         feeders.sort(key=lambda x: FEEDER_ORDER_KPI.index(x['name']) if x['name'] in FEEDER_ORDER_KPI else 999)
         
-        all_entries = await db.max_min_entries.find(
-            {"date": {"$gte": start_date, "$lt": end_date}},
-            {"_id": 0}
-        ).to_list(5000)
+        all_entries = await read_month_entries("max_min_entries", start_date, end_date, limit=5000)
         
-        entries_by_feeder = {}
-        for e in all_entries:
-            if e['feeder_id'] not in entries_by_feeder:
-                entries_by_feeder[e['feeder_id']] = []
-            entries_by_feeder[e['feeder_id']].append(e)
+        # Parsed once per feeder; the KPI figures work on the compact columns
+        series_by_feeder = FeederMonthSeries.by_feeder(all_entries)
+        del all_entries
             
         for idx, f in enumerate(feeders):
             if f['name'] not in FEEDER_ORDER_KPI: continue # Only show defined feeders
             
             details = KPI_FEEDER_DETAILS.get(f['name'], {})
-            entries = entries_by_feeder.get(f['id'], [])
-            stats = calculate_kpi_stats(entries, f['type'])
+            stats = max_min_kpi_stats(series_by_feeder.get(f['id'], _EMPTY_SERIES), f['type'])
             
             avg_load = stats['avg_val']
             max_load = stats['max_val']
@@ -8710,8 +10231,7 @@ async def get_kpi_preview(
         ict_feeders.sort(key=lambda x: ICT_ORDER_KPI.index(x['name']) if x['name'] in ICT_ORDER_KPI else 999)
         
         for idx, f in enumerate(ict_feeders):
-            entries = entries_by_feeder.get(f['id'], [])
-            stats = calculate_kpi_stats(entries, f['type'])
+            stats = max_min_kpi_stats(series_by_feeder.get(f['id'], _EMPTY_SERIES), f['type'])
             
             avg_load = stats['avg_val']
             max_demand = stats['max_val']
@@ -8748,17 +10268,56 @@ async def get_kpi_preview(
         traceback.print_exc()
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
+def _kpi_layout(wb, line_rows: int, ict_rows: int):
+    """KPI skeleton: both sheets with their title block, table header and
+    boxed data rows; the month goes into A2 and A4 per request."""
+    header_style = report_style(wb, "MIS Bold Boxed")
+    boxed_wrap = report_style(wb, "MIS Boxed Wrap")
+
+    # ================= SHEET 1: Over Loading of Lines =================
+    ws1 = wb.active
+    ws1.title = "Over Loading of Lines"
+    ws1.merge_cells('A1:L1')
+    ws1.cell(row=1, column=1, value="400/220KV SHANKARPALLY SUBSTATION").style = header_style
+    ws1.merge_cells('A2:L2')
+    ws1.cell(row=2, column=1).style = header_style  # month title
+    ws1.merge_cells('A3:L3')
+    ws1.cell(row=3, column=1, value="Overloading of Lines").style = header_style
+    
+    headers = [
+        "Sl. No.", "Name of Zone", "Circle", "Name of feeder", 
+        "Length in KM (Total Length)", "Length in CKM", "Type of Conductor",
+        "Current Carrying Capacity", "Avg.Loading (Amps)", "Max.Line loading (Amps)",
+        "% line loading", "Remarks"
+    ]
+    write_styled_row(ws1, 4, headers, header_style)
+    for row_idx in range(5, 5 + line_rows):
+        write_styled_row(ws1, row_idx, [None] * len(headers), boxed_wrap)
+
+    # ================= SHEET 2: ICT'S =================
+    ws2 = wb.create_sheet(title="ICT'S")
+    ws2.merge_cells('A1:J1')
+    ws2.cell(row=1, column=1, value="400/220KV SHANKARAPALLY").style = header_style
+    ws2.merge_cells('A2:J2')
+    ws2.cell(row=2, column=1, value="ANNEXURE XVIII").style = header_style
+    ws2.merge_cells('A3:J3')
+    ws2.cell(row=3, column=1, value="REDUCTION OF TRANSMISSION LINE FORMATS").style = header_style
+    ws2.merge_cells('A4:J4')
+    ws2.cell(row=4, column=1).style = header_style  # month title
+    
+    headers = [
+        "Sl.No", "Name of Zone", "TL&ss Circle", "Name of Substation", 
+        "Existing ICT capacity (MVA)", "Proposed augmentation of ICT capacity",
+        "Max. Demand reached during the month (MW)", "Average load in MW",
+        "Average Percentage of ICT loading", "Remarks"
+    ]
+    write_styled_row(ws2, 5, headers, header_style)
+    for row_idx in range(6, 6 + ict_rows):
+        write_styled_row(ws2, row_idx, [None] * len(headers), boxed_wrap)
+
+
 async def _generate_kpi_report_wb(year: int, month: int):
     import calendar
-    from openpyxl.styles import PatternFill, Border, Side, Alignment, Font
-    from openpyxl.utils import get_column_letter
-    
-    # --- Common Styles ---
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-    center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    bold_font = Font(bold=True)
-    
-    wb = Workbook()
     
     # --- Data Prep ---
     start_date = f"{year}-{month:02d}-01"
@@ -8769,58 +10328,37 @@ async def _generate_kpi_report_wb(year: int, month: int):
     
     month_name = calendar.month_name[month]
     
-    all_entries = await db.max_min_entries.find(
-        {"date": {"$gte": start_date, "$lt": end_date}},
-        {"_id": 0}
-    ).to_list(5000)
+    all_entries = await read_month_entries("max_min_entries", start_date, end_date, limit=5000)
     
-    entries_by_feeder = {}
-    for e in all_entries:
-        if e['feeder_id'] not in entries_by_feeder:
-            entries_by_feeder[e['feeder_id']] = []
-        entries_by_feeder[e['feeder_id']].append(e)
+    # Parsed once per feeder; the KPI figures work on the compact columns
+    series_by_feeder = FeederMonthSeries.by_feeder(all_entries)
+    del all_entries
 
-    # ================= SHEET 1: Over Loading of Lines =================
-    ws1 = wb.active
-    ws1.title = "Over Loading of Lines"
-    
-    # Header Rows
-    ws1.merge_cells('A1:L1')
-    c = ws1.cell(row=1, column=1, value="400/220KV SHANKARPALLY SUBSTATION")
-    c.font = bold_font; c.alignment = center_align; c.border = thin_border
-    
-    ws1.merge_cells('A2:L2')
-    c = ws1.cell(row=2, column=1, value=f"STATEMENT 20: FOR THE MONTH OF {month_name}-{year}")
-    c.font = bold_font; c.alignment = center_align; c.border = thin_border
+    feeders = await db.max_min_feeders.find({"type": {"$in": ["feeder_400kv", "feeder_220kv"]}}, {"_id": 0}).to_list(100)
+    feeders = [f for f in feeders if f['name'] in FEEDER_ORDER_KPI]
+    feeders.sort(key=lambda x: FEEDER_ORDER_KPI.index(x['name']))
     
-    ws1.merge_cells('A3:L3')
-    c = ws1.cell(row=3, column=1, value="Overloading of Lines")
-    c.font = bold_font; c.alignment = center_align; c.border = thin_border
+    ict_feeders = await db.max_min_feeders.find({"type": "ict_feeder"}, {"_id": 0}).to_list(100)
+    ict_feeders.sort(key=lambda x: ICT_ORDER_KPI.index(x['name']) if x['name'] in ICT_ORDER_KPI else 999)
     
-    headers = [
-        "Sl. No.", "Name of Zone", "Circle", "Name of feeder", 
-        "Length in KM (Total Length)", "Length in CKM", "Type of Conductor",
-        "Current Carrying Capacity", "Avg.Loading (Amps)", "Max.Line loading (Amps)",
-        "% line loading", "Remarks"
-    ]
+    wb = report_template(
+        ("kpi", len(feeders), len(ict_feeders)),
+        lambda wb: _kpi_layout(wb, len(feeders), len(ict_feeders)),
+    )
+
+    # ================= SHEET 1: Over Loading of Lines =================
+    ws1 = wb["Over Loading of Lines"]
+    # Widths come from the table only, not the three title rows
+    writer1 = SheetWriter(ws1, skip_rows=3)
+    writer1.track_existing()
     
-    for i, h in enumerate(headers):
-        cell = ws1.cell(row=4, column=i+1, value=h)
-        cell.font = bold_font
-        cell.alignment = center_align
-        cell.border = thin_border
-        
-    feeders = await db.max_min_feeders.find({"type": {"$in": ["feeder_400kv", "feeder_220kv"]}}, {"_id": 0}).to_list(100)
-    feeders.sort(key=lambda x: FEEDER_ORDER_KPI.index(x['name']) if x['name'] in FEEDER_ORDER_KPI else 999)
+    ws1.cell(row=2, column=1, value=f"STATEMENT 20: FOR THE MONTH OF {month_name}-{year}")
     
     row_idx = 5
     sl_no = 1
     for f in feeders:
-        if f['name'] not in FEEDER_ORDER_KPI: continue
-        
         details = KPI_FEEDER_DETAILS.get(f['name'], {})
-        entries = entries_by_feeder.get(f['id'], [])
-        stats = calculate_kpi_stats(entries, f['type'])
+        stats = max_min_kpi_stats(series_by_feeder.get(f['id'], _EMPTY_SERIES), f['type'])
         
         avg_load = stats['avg_val']
         max_load = stats['max_val']
@@ -8841,66 +10379,25 @@ async def _generate_kpi_report_wb(year: int, month: int):
             "-"
         ]
         
-        for i, val in enumerate(row_data):
-            cell = ws1.cell(row=row_idx, column=i+1, value=val)
-            cell.alignment = center_align
-            cell.border = thin_border
+        writer1.row(row_idx, row_data)
             
         row_idx += 1
         sl_no += 1
         
-    for i in range(1, ws1.max_column + 1):
-        col_letter = get_column_letter(i)
-        max_len = 0
-        for cell in ws1[col_letter]:
-            if cell.row <= 3: continue
-            try:
-                if cell.value and len(str(cell.value)) > max_len:
-                    max_len = len(str(cell.value))
-            except: pass
-        ws1.column_dimensions[col_letter].width = max(max_len + 2, 10)
+    writer1.fit_columns(min_width=10)
 
 
     # ================= SHEET 2: ICT'S =================
-    ws2 = wb.create_sheet(title="ICT'S")
-    
-    ws2.merge_cells('A1:J1')
-    c = ws2.cell(row=1, column=1, value="400/220KV SHANKARAPALLY")
-    c.font = bold_font; c.alignment = center_align; c.border = thin_border
-    
-    ws2.merge_cells('A2:J2')
-    c = ws2.cell(row=2, column=1, value="ANNEXURE XVIII")
-    c.font = bold_font; c.alignment = center_align; c.border = thin_border
+    ws2 = wb["ICT'S"]
+    writer2 = SheetWriter(ws2, skip_rows=4)
+    writer2.track_existing()
     
-    ws2.merge_cells('A3:J3')
-    c = ws2.cell(row=3, column=1, value="REDUCTION OF TRANSMISSION LINE FORMATS")
-    c.font = bold_font; c.alignment = center_align; c.border = thin_border
-    
-    ws2.merge_cells('A4:J4')
-    c = ws2.cell(row=4, column=1, value=f"(A) Details of overloading of PTRs (70% and above) For {month_name}-{year}")
-    c.font = bold_font; c.alignment = center_align; c.border = thin_border
-    
-    headers = [
-        "Sl.No", "Name of Zone", "TL&ss Circle", "Name of Substation", 
-        "Existing ICT capacity (MVA)", "Proposed augmentation of ICT capacity",
-        "Max. Demand reached during the month (MW)", "Average load in MW",
-        "Average Percentage of ICT loading", "Remarks"
-    ]
-    
-    for i, h in enumerate(headers):
-        cell = ws2.cell(row=5, column=i+1, value=h)
-        cell.font = bold_font
-        cell.alignment = center_align
-        cell.border = thin_border
-        
-    ict_feeders = await db.max_min_feeders.find({"type": "ict_feeder"}, {"_id": 0}).to_list(100)
-    ict_feeders.sort(key=lambda x: ICT_ORDER_KPI.index(x['name']) if x['name'] in ICT_ORDER_KPI else 999)
+    ws2.cell(row=4, column=1, value=f"(A) Details of overloading of PTRs (70% and above) For {month_name}-{year}")
     
     row_idx = 6
     sl_no = 1
     for f in ict_feeders:
-        entries = entries_by_feeder.get(f['id'], [])
-        stats = calculate_kpi_stats(entries, f['type'])
+        stats = max_min_kpi_stats(series_by_feeder.get(f['id'], _EMPTY_SERIES), f['type'])
         
         avg_load = stats['avg_val']
         max_demand = stats['max_val']
@@ -8929,24 +10426,12 @@ async def _generate_kpi_report_wb(year: int, month: int):
             "-"
         ]
         
-        for i, val in enumerate(row_data):
-            cell = ws2.cell(row=row_idx, column=i+1, value=val)
-            cell.alignment = center_align
-            cell.border = thin_border
+        writer2.row(row_idx, row_data)
             
         row_idx += 1
         sl_no += 1
 
-    for i in range(1, ws2.max_column + 1):
-        col_letter = get_column_letter(i)
-        max_len = 0
-        for cell in ws2[col_letter]:
-            if cell.row <= 4: continue
-            try:
-                if cell.value and len(str(cell.value)) > max_len:
-                    max_len = len(str(cell.value))
-            except: pass
-        ws2.column_dimensions[col_letter].width = max(max_len + 2, 12)
+    writer2.fit_columns(min_width=12)
         
     return wb
 
@@ -8961,17 +10446,9 @@ async def export_kpi_report(
         wb = await _generate_kpi_report_wb(year, month)
         month_name = calendar.month_name[month]
 
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-
         filename = f"KPI_Report_{month_name}_{year}.xlsx"
 
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return workbook_response(wb, filename)
     except Exception as e:
         import traceback
         error_msg = traceback.format_exc()
@@ -9061,10 +10538,7 @@ async def _get_line_losses_report_data(year: int, month: int) -> List[Dict[str,
         else 999
     )
 
-    entries = await db.entries.find(
-        {"date": {"$gte": start_date, "$lt": end_date}},
-        {"_id": 0},
-    ).to_list(5000)
+    entries = await read_month_entries("entries", start_date, end_date, limit=5000)
 
     entries_by_feeder: Dict[str, List[Dict[str, Any]]] = {}
     for e in entries:
@@ -9356,7 +10830,6 @@ async def get_line_losses_daily_report_preview(
 async def _generate_line_losses_report_wb(year: int, month: int):
     import calendar
     from openpyxl.styles import PatternFill, Border, Side, Alignment, Font
-    from openpyxl.utils import get_column_letter
     
     # --- Common Styles ---
     thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
@@ -9366,6 +10839,8 @@ async def _generate_line_losses_report_wb(year: int, month: int):
     wb = Workbook()
     ws = wb.active
     ws.title = "Line Losses"
+    # Rows 1-5 are the title and wrapped headers; only the feeder rows set widths
+    writer = SheetWriter(ws, skip_rows=5)
     
     month_name = calendar.month_name[month]
     
@@ -9485,10 +10960,7 @@ async def _generate_line_losses_report_wb(year: int, month: int):
     if month == 12: end_date = f"{year + 1}-01-01"
     else: end_date = f"{year}-{month + 1:02d}-01"
         
-    entries = await db.entries.find(
-        {"date": {"$gte": start_date, "$lt": end_date}},
-        {"_id": 0}
-    ).to_list(5000)
+    entries = await read_month_entries("entries", start_date, end_date, limit=5000)
     
     entries_by_feeder = {}
     for e in entries:
@@ -9545,35 +11017,26 @@ async def _generate_line_losses_report_wb(year: int, month: int):
             pct_loss = (numerator / denominator * 100) if denominator != 0 else 0
 
         # Write Row
-        ws.cell(row=row_idx, column=1, value=idx+1).border = thin_border
-        ws.cell(row=row_idx, column=2, value=f['display_name']).border = thin_border
+        writer.cell(row_idx, 1, idx + 1).border = thin_border
+        writer.cell(row_idx, 2, f['display_name']).border = thin_border
         
         for i, v in enumerate(vals):
-            cell = ws.cell(row=row_idx, column=i+3, value=v)
+            cell = writer.cell(row_idx, i + 3, v)
             cell.number_format = '0.00'
             cell.border = thin_border
             cell.alignment = center_align
             
-        cell = ws.cell(row=row_idx, column=19, value=pct_loss)
+        cell = writer.cell(row_idx, 19, pct_loss)
         cell.number_format = '0.00'
         cell.border = thin_border
         cell.alignment = center_align
         
-        ws.cell(row=row_idx, column=20, value="-").border = thin_border
+        writer.cell(row_idx, 20, "-").border = thin_border
         
         row_idx += 1
         
     # Auto-fit
-    for i in range(1, ws.max_column + 1):
-        col_letter = get_column_letter(i)
-        max_len = 0
-        for cell in ws[col_letter]:
-            if cell.row <= 5: continue
-            try:
-                if cell.value and len(str(cell.value)) > max_len:
-                    max_len = len(str(cell.value))
-            except: pass
-        ws.column_dimensions[col_letter].width = max(max_len + 2, 10)
+    writer.fit_columns(min_width=10)
     
     return wb
 
@@ -9680,7 +11143,6 @@ async def _get_new_line_losses_report_data(year: int, month: int) -> Dict[str, A
 
 async def _generate_new_line_losses_report_wb(year: int, month: int):
     from openpyxl.styles import Border, Side, Alignment, Font
-    from openpyxl.utils import get_column_letter
 
     data = await _get_new_line_losses_report_data(year, month)
     header_text = data.get("header", "")
@@ -9699,49 +11161,50 @@ async def _generate_new_line_losses_report_wb(year: int, month: int):
     wb = Workbook()
     ws = wb.active
     ws.title = "New Line Losses"
+    writer = SheetWriter(ws)
 
     ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=15)
-    c = ws.cell(row=1, column=1, value=header_text)
+    c = writer.cell(1, 1, header_text)
     c.font = bold
     c.alignment = center
     c.border = thin_border
 
     ws.merge_cells(start_row=2, start_column=1, end_row=3, end_column=1)
-    ws.cell(row=2, column=1, value="Sl.No").alignment = center
+    writer.cell(2, 1, "Sl.No").alignment = center
     ws.cell(row=2, column=1).border = thin_border
 
     ws.merge_cells(start_row=2, start_column=2, end_row=3, end_column=2)
-    ws.cell(row=2, column=2, value="Name of the SS").alignment = center
+    writer.cell(2, 2, "Name of the SS").alignment = center
     ws.cell(row=2, column=2).border = thin_border
 
     ws.merge_cells(start_row=2, start_column=3, end_row=3, end_column=3)
-    ws.cell(row=2, column=3, value="Name of the Feeder").alignment = center
+    writer.cell(2, 3, "Name of the Feeder").alignment = center
     ws.cell(row=2, column=3).border = thin_border
 
     ws.merge_cells(start_row=2, start_column=4, end_row=3, end_column=4)
-    ws.cell(row=2, column=4, value="Type of flow wrt SS").alignment = center
+    writer.cell(2, 4, "Type of flow wrt SS").alignment = center
     ws.cell(row=2, column=4).border = thin_border
 
     ws.merge_cells(start_row=2, start_column=5, end_row=2, end_column=8)
-    ws.cell(row=2, column=5, value="Shankarpally End").alignment = center
+    writer.cell(2, 5, "Shankarpally End").alignment = center
     ws.cell(row=2, column=5).font = bold
     ws.cell(row=2, column=5).border = thin_border
 
     ws.merge_cells(start_row=2, start_column=9, end_row=2, end_column=12)
-    ws.cell(row=2, column=9, value="Other End").alignment = center
+    writer.cell(2, 9, "Other End").alignment = center
     ws.cell(row=2, column=9).font = bold
     ws.cell(row=2, column=9).border = thin_border
 
     ws.merge_cells(start_row=2, start_column=13, end_row=3, end_column=13)
-    ws.cell(row=2, column=13, value="Losses").alignment = center
+    writer.cell(2, 13, "Losses").alignment = center
     ws.cell(row=2, column=13).border = thin_border
 
     ws.merge_cells(start_row=2, start_column=14, end_row=3, end_column=14)
-    ws.cell(row=2, column=14, value="% of Losses").alignment = center
+    writer.cell(2, 14, "% of Losses").alignment = center
     ws.cell(row=2, column=14).border = thin_border
 
     ws.merge_cells(start_row=2, start_column=15, end_row=3, end_column=15)
-    ws.cell(row=2, column=15, value="Remarks").alignment = center
+    writer.cell(2, 15, "Remarks").alignment = center
     ws.cell(row=2, column=15).border = thin_border
 
     headers = [
@@ -9756,7 +11219,7 @@ async def _generate_new_line_losses_report_wb(year: int, month: int):
     ]
     col = 5
     for h in headers:
-        cell = ws.cell(row=3, column=col, value=h)
+        cell = writer.cell(3, col, h)
         cell.alignment = center
         cell.font = bold
         cell.border = thin_border
@@ -9764,16 +11227,16 @@ async def _generate_new_line_losses_report_wb(year: int, month: int):
 
     row_idx = 4
     for r in rows:
-        ws.cell(row=row_idx, column=1, value=r.get("sl_no")).alignment = center
+        writer.cell(row_idx, 1, r.get("sl_no")).alignment = center
         ws.cell(row=row_idx, column=1).border = thin_border
 
-        ws.cell(row=row_idx, column=2, value=r.get("ss_name")).alignment = center
+        writer.cell(row_idx, 2, r.get("ss_name")).alignment = center
         ws.cell(row=row_idx, column=2).border = thin_border
 
-        ws.cell(row=row_idx, column=3, value=r.get("feeder_name")).alignment = center
+        writer.cell(row_idx, 3, r.get("feeder_name")).alignment = center
         ws.cell(row=row_idx, column=3).border = thin_border
 
-        ws.cell(row=row_idx, column=4, value=r.get("flow_type")).alignment = center
+        writer.cell(row_idx, 4, r.get("flow_type")).alignment = center
         ws.cell(row=row_idx, column=4).border = thin_border
 
         numeric_fields = [
@@ -9791,11 +11254,11 @@ async def _generate_new_line_losses_report_wb(year: int, month: int):
         for key, col_idx in numeric_fields:
             val = r.get(key)
             display_val = "-" if key == "pct_losses" and val is None else val
-            cell = ws.cell(row=row_idx, column=col_idx, value=display_val)
+            cell = writer.cell(row_idx, col_idx, display_val)
             cell.alignment = right_align
             cell.border = thin_border
 
-        ws.cell(row=row_idx, column=15, value=r.get("remarks", "")).border = thin_border
+        writer.cell(row_idx, 15, r.get("remarks", "")).border = thin_border
         row_idx += 1
 
     if rows:
@@ -9830,14 +11293,7 @@ async def _generate_new_line_losses_report_wb(year: int, month: int):
             feeder_cell.alignment = center
             feeder_cell.border = thin_border
 
-    for col_idx in range(1, 16):
-        letter = get_column_letter(col_idx)
-        max_len = 0
-        for cell in ws[letter]:
-            val = cell.value
-            if val is not None:
-                max_len = max(max_len, len(str(val)))
-        ws.column_dimensions[letter].width = max(max_len + 2, 10)
+    writer.fit_columns(range(1, 16), min_width=10)
 
     return wb
 
@@ -9852,17 +11308,9 @@ async def export_line_losses_report(
         wb = await _generate_line_losses_report_wb(year, month)
         month_name = calendar.month_name[month]
         
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
         filename = f"Line_Losses_{month_name}_{year}.xlsx"
         
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return workbook_response(wb, filename)
         
     except Exception as e:
         import traceback
@@ -9893,17 +11341,10 @@ async def export_new_line_losses_report(
 ):
     wb = await _generate_new_line_losses_report_wb(year, month)
     try:
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
 
         filename = f"New_Line_Losses_{year}_{month:02d}.xlsx"
 
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"},
-        )
+        return workbook_response(wb, filename)
     finally:
         wb.close()
 
@@ -9977,10 +11418,7 @@ async def get_ptr_max_min_preview(
     data = []
     
     for feeder in ict_feeders:
-        entries = await db.max_min_entries.find(
-            {"feeder_id": feeder['id'], "date": {"$gte": start_date, "$lt": end_date}},
-            {"_id": 0}
-        ).to_list(1000)
+        entries = await read_month_entries("max_min_entries", start_date, end_date, [feeder['id']], limit=1000)
         
         if not entries:
             # Placeholder for missing data
@@ -10164,12 +11602,8 @@ async def get_ptr_max_min_preview(
         
     return data
 
-async def _generate_ptr_max_min_report_wb(year: int, month: int, current_user: User):
-    data = await get_ptr_max_min_preview(year, month, current_user)
-    
-    month_name = calendar.month_name[month]
-    
-    wb = Workbook()
+def _ptr_max_min_layout(wb, rows: int):
+    """Format-1 skeleton: header block and `rows` bordered data rows."""
     ws = wb.active
     ws.title = "PTR Max-Min Format-1"
     
@@ -10178,7 +11612,7 @@ async def _generate_ptr_max_min_report_wb(year: int, month: int, current_user: U
     center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
     thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
     
-    # Headers
+    # Headers (the month and year titles are filled in per request)
     ws.merge_cells('A1:T1')
     c = ws.cell(row=1, column=1, value="FORMAT-I")
     c.font = bold_font; c.alignment = center_align; c.border = thin_border
@@ -10188,11 +11622,11 @@ async def _generate_ptr_max_min_report_wb(year: int, month: int, current_user: U
     c.font = bold_font; c.alignment = center_align; c.border = thin_border
     
     ws.merge_cells('B2:R2')
-    c = ws.cell(row=2, column=2, value=f"NORMAL & MAXIMUM / MINIMUM LOADING ON PTRs FOR THE MONTH OF {month_name}-{year} in SE/OMC/Metro-West Circle")
+    c = ws.cell(row=2, column=2)
     c.font = bold_font; c.alignment = center_align; c.border = thin_border
     
     ws.merge_cells('S2:S4')
-    c = ws.cell(row=2, column=19, value=f"MD\nreached\nso far in\n{year}")
+    c = ws.cell(row=2, column=19)
     c.font = bold_font; c.alignment = center_align; c.border = thin_border
     
     ws.merge_cells('T2:T4')
@@ -10225,64 +11659,66 @@ async def _generate_ptr_max_min_report_wb(year: int, month: int, current_user: U
         c.font = bold_font; c.alignment = center_align; c.border = thin_border
         
     # Data
-    row_idx = 5
-    
-    def set_style(c):
-        c.border = thin_border
-        c.alignment = center_align
-        return c
+    for row_idx in range(5, 5 + rows):
+        for col in range(1, 21):
+            c = ws.cell(row=row_idx, column=col)
+            c.border = thin_border
+            c.alignment = center_align
         
-    for item in data:
-        set_style(ws.cell(row=row_idx, column=1, value=item['district']))
-        set_style(ws.cell(row=row_idx, column=2, value=item['substation']))
-        set_style(ws.cell(row=row_idx, column=3, value=item['ptr_kv']))
-        set_style(ws.cell(row=row_idx, column=4, value=int(item['rating'])))
+    # Merge District and Substation
+    if rows:
+        ws.merge_cells(f'A5:A{4 + rows}')
+        ws.merge_cells(f'B5:B{4 + rows}')
         
-        set_style(ws.cell(row=row_idx, column=5, value=f"{item['general']['mw']:.2f}"))
-        set_style(ws.cell(row=row_idx, column=6, value=f"{item['general']['mvar']:.2f}"))
+    # Auto-width
+    for col in range(1, 21):
+        ws.column_dimensions[get_column_letter(col)].width = 12
+
+
+async def _generate_ptr_max_min_report_wb(year: int, month: int, current_user: User):
+    data = await get_ptr_max_min_preview(year, month, current_user)
+    
+    month_name = calendar.month_name[month]
+    
+    rows = len(data)
+    wb = report_template(("ptr-max-min", rows), lambda wb: _ptr_max_min_layout(wb, rows))
+    ws = wb.active
+    ws.cell(row=2, column=2, value=f"NORMAL & MAXIMUM / MINIMUM LOADING ON PTRs FOR THE MONTH OF {month_name}-{year} in SE/OMC/Metro-West Circle")
+    ws.cell(row=2, column=19, value=f"MD\nreached\nso far in\n{year}")
+    
+    def time_with_seconds(m):
+        return m['time'] + ":00" if m['time'] and len(str(m['time'])) == 5 else m['time']
+        
+    for row_idx, item in enumerate(data, 5):
+        values = [
+            item['district'],
+            item['substation'],
+            item['ptr_kv'],
+            int(item['rating']),
+            f"{item['general']['mw']:.2f}",
+            f"{item['general']['mvar']:.2f}",
+        ]
         
         m = item['max']
         if m:
-            set_style(ws.cell(row=row_idx, column=7, value=format_date(m['date'])))
-            set_style(ws.cell(row=row_idx, column=8, value=(m['time'] + ":00" if m['time'] and len(str(m['time'])) == 5 else m['time'])))
-            set_style(ws.cell(row=row_idx, column=9, value=f"{m['mw']:.2f}"))
-            set_style(ws.cell(row=row_idx, column=10, value=f"{m['mvar']:.2f}"))
-            set_style(ws.cell(row=row_idx, column=11, value=f"{m['mva']:.2f}"))
+            values += [format_date(m['date']), time_with_seconds(m), f"{m['mw']:.2f}", f"{m['mvar']:.2f}", f"{m['mva']:.2f}"]
         else:
-            for c in range(7, 12): set_style(ws.cell(row=row_idx, column=c, value="-"))
-
-        set_style(ws.cell(row=row_idx, column=12, value=""))
+            values += ["-"] * 5
+        values.append("")
         
         m = item['min']
         if m:
-            set_style(ws.cell(row=row_idx, column=13, value=format_date(m['date'])))
-            set_style(ws.cell(row=row_idx, column=14, value=(m['time'] + ":00" if m['time'] and len(str(m['time'])) == 5 else m['time'])))
-            set_style(ws.cell(row=row_idx, column=15, value=f"{m['mw']:.2f}"))
-            set_style(ws.cell(row=row_idx, column=16, value=f"{m['mvar']:.2f}"))
-            set_style(ws.cell(row=row_idx, column=17, value=f"{m['mva']:.2f}"))
+            values += [format_date(m['date']), time_with_seconds(m), f"{m['mw']:.2f}", f"{m['mvar']:.2f}", f"{m['mva']:.2f}"]
         else:
-            for c in range(13, 18): set_style(ws.cell(row=row_idx, column=c, value="-"))
-
-        set_style(ws.cell(row=row_idx, column=18, value=""))
+            values += ["-"] * 5
+        values.append("")
         
         md_2026_val = item.get("md_2026")
         md_so_far_val = item.get("md_so_far")
-
-        set_style(ws.cell(row=row_idx, column=19, value=md_2026_val if md_2026_val is not None else ""))
-        set_style(ws.cell(row=row_idx, column=20, value=md_so_far_val if md_so_far_val is not None else ""))
-        
-        row_idx += 1
+        values.append(md_2026_val if md_2026_val is not None else "")
+        values.append(md_so_far_val if md_so_far_val is not None else "")
         
-    # Merge District and Substation
-    if row_idx > 5:
-        ws.merge_cells(f'A5:A{row_idx-1}')
-        ws.cell(row=5, column=1).alignment = center_align
-        ws.merge_cells(f'B5:B{row_idx-1}')
-        ws.cell(row=5, column=2).alignment = center_align
-        
-    # Auto-width
-    for col in range(1, 21):
-        ws.column_dimensions[get_column_letter(col)].width = 12
+        fill_row(ws, row_idx, values)
         
     return wb
 
@@ -10302,17 +11738,9 @@ async def export_ptr_max_min_report(
         wb = await _generate_ptr_max_min_report_wb(year_int, month_int, current_user)
         month_name = calendar.month_name[month_int]
         
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
         filename = f"PTR_Max_Min_{month_name}_{year_int}.xlsx"
         
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return workbook_response(wb, filename)
     except Exception as e:
         import traceback
         error_msg = traceback.format_exc()
@@ -10439,13 +11867,14 @@ async def get_tl_max_loading_preview(
                     p_id = p_feeder["id"]
                     p_group_map[p_id] = entries_2026_by_feeder.get(p_id, [])
 
-                leader_id = determine_leader(p_group_map)
+                index = CoincidentPeakIndex(p_group_map)
+                leader_id = determine_leader(p_group_map, index)
                 if not leader_id:
                     leader_id = feeder_id
 
                 leader_entries = p_group_map.get(leader_id, [])
                 ftype = feeder.get("type", "feeder")
-                stats_year = calculate_coincident_stats(leader_entries, feeder_id, p_group_map, ftype)
+                stats_year = calculate_coincident_stats(leader_entries, feeder_id, p_group_map, ftype, index)
             else:
                 ftype = feeder.get("type", "feeder")
                 stats_year = calculate_standard_stats(feeder_entries, ftype)
@@ -10460,10 +11889,7 @@ async def get_tl_max_loading_preview(
                 }
 
     # Fetch all entries for the month
-    all_entries = await db.max_min_entries.find(
-        {"date": {"$gte": start_date, "$lt": end_date}},
-        {"_id": 0}
-    ).to_list(10000)
+    all_entries = await read_month_entries("max_min_entries", start_date, end_date, limit=10000)
 
     # Group entries by feeder_id
     entries_by_feeder = {}
@@ -10503,7 +11929,8 @@ async def get_tl_max_loading_preview(
                          p_group_map[p_feeder['id']] = entries_by_feeder.get(p_feeder['id'], [])
                 
                 # Determine Leader for the Full Month
-                leader_id = determine_leader(p_group_map)
+                index = CoincidentPeakIndex(p_group_map)
+                leader_id = determine_leader(p_group_map, index)
                 if not leader_id: leader_id = feeder['id']
                 
                 leader_entries = p_group_map.get(leader_id, [])
@@ -10511,7 +11938,7 @@ async def get_tl_max_loading_preview(
                 # Calculate Stats
                 # Note: 'type' might be missing in feeder obj if not fetched properly, default to 'feeder'
                 ftype = feeder.get('type', 'feeder') 
-                stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, ftype)
+                stats = calculate_coincident_stats(leader_entries, feeder['id'], p_group_map, ftype, index)
                 
                 # Extract values
                 try:
@@ -10597,13 +12024,14 @@ async def get_tl_max_loading_preview(
             
     return data
 
-async def _generate_tl_max_loading_report_wb(year: int, month: int, current_user: User):
-    print(f"Exporting TL Max Loading for {year}-{month}")
-    data = await get_tl_max_loading_preview(year, month, current_user)
-    print(f"Data fetched: {len(data)} rows")
-    month_name = calendar.month_name[month]
-    
-    wb = Workbook()
+TL_MAX_LOADING_COLUMNS = [
+    "sl_no", "district", "voltage", "substation", "line_name",
+    "mw", "mvar", "date", "time", "md_2026", "md_so_far", "remarks",
+]
+
+
+def _tl_max_loading_layout(wb, rows: int):
+    """Format-4 skeleton: header block and `rows` bordered, merged data rows."""
     ws = wb.active
     ws.title = "TL Max Loading Format-4"
     
@@ -10612,9 +12040,9 @@ async def _generate_tl_max_loading_report_wb(year: int, month: int, current_user
     center_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
     thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
     
-    # Header Row 1
+    # Header Row 1 (title filled in per month)
     ws.merge_cells('A1:L1')
-    c = ws.cell(row=1, column=1, value=f"FORMAT-IV - SE/OMC/Metro-West Circle for the Month of {month_name}-{year}")
+    c = ws.cell(row=1, column=1)
     c.font = bold_font; c.alignment = center_align; c.border = thin_border
     
     # Header Row 2
@@ -10638,31 +12066,16 @@ async def _generate_tl_max_loading_report_wb(year: int, month: int, current_user
         c.font = bold_font; c.alignment = center_align; c.border = thin_border
         
     # Data Rows
-    row_idx = 4
-    
-    def set_style(c):
-        c.border = thin_border
-        c.alignment = center_align
-        return c
-        
-    for item in data:
-        set_style(ws.cell(row=row_idx, column=1, value=item['sl_no']))
-        set_style(ws.cell(row=row_idx, column=2, value=item['district']))
-        set_style(ws.cell(row=row_idx, column=3, value=item['voltage']))
-        set_style(ws.cell(row=row_idx, column=4, value=item['substation']))
-        set_style(ws.cell(row=row_idx, column=5, value=item['line_name']))
-        set_style(ws.cell(row=row_idx, column=6, value=item['mw']))
-        set_style(ws.cell(row=row_idx, column=7, value=item['mvar']))
-        set_style(ws.cell(row=row_idx, column=8, value=item['date']))
-        set_style(ws.cell(row=row_idx, column=9, value=item['time']))
-        set_style(ws.cell(row=row_idx, column=10, value=item['md_2026']))
-        set_style(ws.cell(row=row_idx, column=11, value=item['md_so_far']))
-        set_style(ws.cell(row=row_idx, column=12, value=item['remarks']))
-        row_idx += 1
+    for row_idx in range(4, 4 + rows):
+        for col in range(1, len(TL_MAX_LOADING_COLUMNS) + 1):
+            c = ws.cell(row=row_idx, column=col)
+            c.border = thin_border
+            c.alignment = center_align
         
     # Merging Logic
     # District (Col 2), Substation (Col 4) -> Merge for all rows
-    if row_idx > 4:
+    if rows:
+        row_idx = 4 + rows
         # District
         ws.merge_cells(f'B4:B{row_idx-1}')
         
@@ -10674,10 +12087,10 @@ async def _generate_tl_max_loading_report_wb(year: int, month: int, current_user
         num_220 = 10
         
         start_row = 4
-        if len(data) >= num_400:
+        if rows >= num_400:
             ws.merge_cells(f'C{start_row}:C{start_row+num_400-1}')
         
-        if len(data) >= num_400 + num_220:
+        if rows >= num_400 + num_220:
             ws.merge_cells(f'C{start_row+num_400}:C{start_row+num_400+num_220-1}')
             
     # Column Widths
@@ -10685,6 +12098,21 @@ async def _generate_tl_max_loading_report_wb(year: int, month: int, current_user
     for col in [1, 2, 3, 4, 6, 7, 8, 9, 10, 11, 12]:
          ws.column_dimensions[get_column_letter(col)].width = 15
 
+
+async def _generate_tl_max_loading_report_wb(year: int, month: int, current_user: User):
+    print(f"Exporting TL Max Loading for {year}-{month}")
+    data = await get_tl_max_loading_preview(year, month, current_user)
+    print(f"Data fetched: {len(data)} rows")
+    month_name = calendar.month_name[month]
+    
+    rows = len(data)
+    wb = report_template(("tl-max-loading", rows), lambda wb: _tl_max_loading_layout(wb, rows))
+    ws = wb.active
+    ws.cell(row=1, column=1, value=f"FORMAT-IV - SE/OMC/Metro-West Circle for the Month of {month_name}-{year}")
+    
+    for row_idx, item in enumerate(data, 4):
+        fill_row(ws, row_idx, [item[key] for key in TL_MAX_LOADING_COLUMNS])
+
     return wb
 
 @api_router.get("/reports/tl-max-loading-format4/export/{year}/{month}")
@@ -10703,17 +12131,9 @@ async def export_tl_max_loading_report(
         wb = await _generate_tl_max_loading_report_wb(year_int, month_int, current_user)
         month_name = calendar.month_name[month_int]
         
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
         filename = f"TL_Max_Loading_{month_name}_{year_int}.xlsx"
         
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return workbook_response(wb, filename)
     except Exception as e:
         import traceback
         error_msg = traceback.format_exc()
@@ -10738,17 +12158,9 @@ async def export_interruptions_report(
         wb = await _generate_interruptions_report_wb(year, month)
         month_name = calendar.month_name[month]
 
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-
         filename = f"Interruptions_Report_{month_name}_{year}.xlsx"
 
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return workbook_response(wb, filename)
     except Exception as e:
         import traceback
         error_msg = traceback.format_exc()
@@ -10783,281 +12195,453 @@ async def export_mis_interruptions_report(
         wb = await _generate_mis_interruptions_report_wb(year, month)
         month_name = calendar.month_name[month]
 
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-
         filename = f"MIS_Interruption_Details_{month_name}_{year}.xlsx"
 
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return workbook_response(wb, filename)
     except Exception as e:
         import traceback
         error_msg = traceback.format_exc()
         print(error_msg)
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
+# Monthly report workbooks in mail attachment order:
+# (id, name used in error messages, file name prefix, sent when no ids are
+# given, generator(year, month, user)).
+REPORT_WORKBOOKS = [
+    ("fortnight", "Fortnight Report", "Fortnight_Report", True,
+     lambda year, month, user: _generate_fortnight_report_wb(year, month)),
+    ("energy-consumption", "Energy Report", "Energy_Consumption", False,
+     lambda year, month, user: _generate_energy_export_wb(year, month)),
+    ("boundary-meter", "Boundary Meter Report", "Boundary_Meter_Report", True,
+     lambda year, month, user: _generate_boundary_meter_wb(year, month)),
+    ("kpi", "KPI Report", "KPI_Report", True,
+     lambda year, month, user: _generate_kpi_report_wb(year, month)),
+    ("line-losses", "Line Losses Report", "Line_Losses", True,
+     lambda year, month, user: _generate_line_losses_report_wb(year, month)),
+    ("new-line-losses", "New Line Losses Report", "New_Line_Losses", False,
+     lambda year, month, user: _generate_new_line_losses_report_wb(year, month)),
+    ("daily-max-mva", "Daily Max MVA Report", "Daily_Max_MVA", True,
+     lambda year, month, user: _generate_daily_max_mva_wb(year, month)),
+    ("ptr-max-min", "PTR Max Min Report", "PTR_Max_Min", True,
+     lambda year, month, user: _generate_ptr_max_min_report_wb(year, month, user)),
+    ("tl-max-loading", "TL Max Loading Report", "TL_Max_Loading", True,
+     lambda year, month, user: _generate_tl_max_loading_report_wb(year, month, user)),
+    ("interruptions", "Interruptions Report", "Interruptions_Report", True,
+     lambda year, month, user: _generate_interruptions_report_wb(year, month)),
+    ("mis-interruptions", "MIS Interruption Details Report", "MIS_Interruption_Details", False,
+     lambda year, month, user: _generate_mis_interruptions_report_wb(year, month)),
+]
+REPORT_WORKBOOK_SPECS = {spec[0]: spec for spec in REPORT_WORKBOOKS}
+
+# Report jobs (see the background jobs section). REPORT_WORKER=1 means
+# report_worker.py processes render them, and the web process leaves them.
+REPORT_WORKER_ENABLED = os.environ.get("REPORT_WORKER", "").lower() in ("1", "true", "yes")
+REPORT_JOB_TYPES = ["report", "report-mail"]
+REPORT_FILE_TTL_HOURS = 24
+
+
+async def _render_report_workbook(report_id: str, year: int, month: int, user: User) -> Tuple[str, bytes]:
+    _, _, prefix, _, generator = REPORT_WORKBOOK_SPECS[report_id]
+    wb = await generator(year, month, user)
+    output = io.BytesIO()
+    # Serialising is the longest stretch of openpyxl work; keep it off the loop
+    await asyncio.get_running_loop().run_in_executor(None, wb.save, output)
+    return f"{prefix}_{calendar.month_name[month]}_{year}.xlsx", output.getvalue()
+
+
+async def _render_report_attachments(year: int, month: int, report_ids: Optional[List[str]], user: User) -> list:
+    attachments = []
+    errors = []
+    for report_id, label, _, default, _ in REPORT_WORKBOOKS:
+        if not (report_id in report_ids if report_ids else default):
+            continue
+        try:
+            attachments.append(await _render_report_workbook(report_id, year, month, user))
+        except Exception as e:
+            import traceback
+            error_msg = f"Error generating {label}: {str(e)}\n{traceback.format_exc()}\n"
+            print(error_msg)
+            errors.append(error_msg)
+    if errors:
+        error_content = "\n".join(errors)
+        attachments.append(("generation_errors.txt", error_content.encode('utf-8')))
+    return attachments
+
+
+# Report names as they appear in mail subjects
+REPORT_MAIL_NAMES = {
+    'fortnight': 'Fortnight',
+    'energy-consumption': 'Energy Consumption',
+    'boundary-meter': 'Boundary Meter reading',
+    'kpi': 'KPI',
+    'line-losses': 'Line Losses',
+    'new-line-losses': 'New Line Losses',
+    'daily-max-mva': 'Daily Max MVA',
+    'ptr-max-min': 'PTR Max Min',
+    'tl-max-loading': 'TL Max Loading',
+    'interruptions': 'Interruptions',
+    'mis-interruptions': 'MIS Interruption Details',
+}
+
+
+def _report_mail_subject(year: int, month: int, report_ids: Optional[List[str]]) -> str:
+    """"MIS Reports of <Month> <year>" when every default report is sent (no
+    ids means the defaults), otherwise the requested reports by name."""
+    default_ids = {report_id for report_id, _, _, default, _ in REPORT_WORKBOOKS if default}
+    if not report_ids or default_ids.issubset(report_ids):
+        return f"MIS Reports of {calendar.month_name[month]} {year}"
+    names = [REPORT_MAIL_NAMES[key] for key in report_ids if key in REPORT_MAIL_NAMES]
+    short_month_year = datetime(year, month, 1).strftime("%b-%Y")
+    if len(names) == 1:
+        return f"MIS Report of {names[0]} of {short_month_year}"
+    return f"MIS Reports of {', '.join(names)} of {short_month_year}"
+
+
+def _split_recipients(value: str) -> List[str]:
+    """Recipient field as a list; several addresses may be separated by commas or semicolons."""
+    return [part.strip() for part in re.split(r"[,;]", value or "") if part.strip()]
+
+
+async def _send_report_mail(
+    year: int,
+    month: int,
+    recipient_email: str,
+    report_ids: Optional[List[str]],
+    user: User,
+    mail_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    recipients = _split_recipients(recipient_email)
+    if not recipients:
+        raise HTTPException(status_code=400, detail="No recipient email address given")
+    attachments = await _render_report_attachments(year, month, report_ids, user)
+    if not attachments:
+        raise HTTPException(status_code=400, detail="No reports could be generated for this period.")
+    subject = _report_mail_subject(year, month, report_ids)
+
+    # Rendered once, delivered to every recipient by the mail sender
+    mail_ids = await send_reports_email(recipients, attachments, subject, mail_key)
+
+    return {"message": f"Reports queued for delivery to {', '.join(recipients)}", "mail_ids": mail_ids}
+
+
+def _job_user(params: Dict[str, Any]) -> User:
+    return User(id=params["user_id"], email=params["user_email"])
+
+
+async def _run_report_job(job: Dict[str, Any]):
+    params = job["params"]
+    filename, content = await _render_report_workbook(params["report_id"], params["year"], params["month"], _job_user(params))
+    await db.report_files.replace_one(
+        {"job_id": job["id"]},
+        {"job_id": job["id"], "filename": filename, "content": content, "created_at": datetime.now(timezone.utc)},
+        upsert=True,
+    )
+    await db.jobs.update_one(_owned_job(job), {"$set": {"result": {"filename": filename, "size": len(content)}}})
+
+
+async def _run_report_mail_job(job: Dict[str, Any]):
+    params = job["params"]
+    result = await _send_report_mail(
+        params["year"], params["month"], params["email"], params.get("report_ids"), _job_user(params), mail_key=job["id"],
+    )
+    await db.jobs.update_one(_owned_job(job), {"$set": {"result": result}})
+
+
 @api_router.post("/reports/send-mail")
 async def send_reports_email_endpoint(
     request: EmailReportRequest,
     current_user: User = Depends(get_current_user)
 ):
     try:
-        year = request.year
-        month = request.month
-        recipient_email = request.email
-        month_name = calendar.month_name[month]
-        report_ids = request.report_ids
-        
-        attachments = []
-        errors = []
-        
-        # 1. Fortnight Report
-        if not report_ids or 'fortnight' in report_ids:
-            try:
-                wb = await _generate_fortnight_report_wb(year, month)
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                attachments.append((f"Fortnight_Report_{month_name}_{year}.xlsx", output.read()))
-            except Exception as e:
-                import traceback
-                error_msg = f"Error generating Fortnight Report: {str(e)}\n{traceback.format_exc()}\n"
-                print(error_msg)
-                errors.append(error_msg)
-            
-        # 2. Energy Consumption (Optional, not currently in frontend list)
-        if report_ids and 'energy-consumption' in report_ids:
-            try:
-                wb = await _generate_energy_export_wb(year, month)
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                attachments.append((f"Energy_Consumption_{month_name}_{year}.xlsx", output.read()))
-            except Exception as e:
-                import traceback
-                error_msg = f"Error generating Energy Report: {str(e)}\n{traceback.format_exc()}\n"
-                print(error_msg)
-                errors.append(error_msg)
+        if REPORT_WORKER_ENABLED:
+            job = await enqueue_job("report-mail", current_user, {
+                "year": request.year,
+                "month": request.month,
+                "email": request.email,
+                "report_ids": request.report_ids,
+                "user_id": current_user.id,
+                "user_email": current_user.email,
+            })
+            return {"message": f"Reports queued for {request.email}", "job_id": job["id"]}
+        return await _send_report_mail(request.year, request.month, request.email, request.report_ids, current_user)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        import traceback
+        error_msg = traceback.format_exc()
+        print(f"Send mail error: {error_msg}")
+        return JSONResponse(status_code=500, content={"detail": str(e)})
 
-        # 3. Boundary Meter Report
-        if not report_ids or 'boundary-meter' in report_ids:
-            try:
-                wb = await _generate_boundary_meter_wb(year, month)
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                attachments.append((f"Boundary_Meter_Report_{month_name}_{year}.xlsx", output.read()))
-            except Exception as e:
-                import traceback
-                error_msg = f"Error generating Boundary Meter Report: {str(e)}\n{traceback.format_exc()}\n"
-                print(error_msg)
-                errors.append(error_msg)
-             
-        # 4. KPI Report
-        if not report_ids or 'kpi' in report_ids:
-            try:
-                wb = await _generate_kpi_report_wb(year, month)
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                attachments.append((f"KPI_Report_{month_name}_{year}.xlsx", output.read()))
-            except Exception as e:
-                import traceback
-                error_msg = f"Error generating KPI Report: {str(e)}\n{traceback.format_exc()}\n"
-                print(error_msg)
-                errors.append(error_msg)
-             
-        # 5. Line Losses
-        if not report_ids or 'line-losses' in report_ids:
-            try:
-                wb = await _generate_line_losses_report_wb(year, month)
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                attachments.append((f"Line_Losses_{month_name}_{year}.xlsx", output.read()))
-            except Exception as e:
-                import traceback
-                error_msg = f"Error generating Line Losses Report: {str(e)}\n{traceback.format_exc()}\n"
-                print(error_msg)
-                errors.append(error_msg)
-             
-        # 5a. New Line Losses (optional - only when explicitly requested)
-        if report_ids and 'new-line-losses' in report_ids:
-            try:
-                wb = await _generate_new_line_losses_report_wb(year, month)
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                attachments.append((f"New_Line_Losses_{month_name}_{year}.xlsx", output.read()))
-            except Exception as e:
-                import traceback
-                error_msg = f"Error generating New Line Losses Report: {str(e)}\n{traceback.format_exc()}\n"
-                print(error_msg)
-                errors.append(error_msg)
-             
-        # 6. Daily Max MVA
-        if not report_ids or 'daily-max-mva' in report_ids:
-            try:
-                wb = await _generate_daily_max_mva_wb(year, month)
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                attachments.append((f"Daily_Max_MVA_{month_name}_{year}.xlsx", output.read()))
-            except Exception as e:
-                import traceback
-                error_msg = f"Error generating Daily Max MVA Report: {str(e)}\n{traceback.format_exc()}\n"
-                print(error_msg)
-                errors.append(error_msg)
-             
-        # 7. PTR Max Min
-        if not report_ids or 'ptr-max-min' in report_ids:
-            try:
-                wb = await _generate_ptr_max_min_report_wb(year, month, current_user)
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                attachments.append((f"PTR_Max_Min_{month_name}_{year}.xlsx", output.read()))
-            except Exception as e:
-                import traceback
-                error_msg = f"Error generating PTR Max Min Report: {str(e)}\n{traceback.format_exc()}\n"
-                print(error_msg)
-                errors.append(error_msg)
 
-        # 8. TL Max Loading
-        if not report_ids or 'tl-max-loading' in report_ids:
-            try:
-                wb = await _generate_tl_max_loading_report_wb(year, month, current_user)
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                attachments.append((f"TL_Max_Loading_{month_name}_{year}.xlsx", output.read()))
-            except Exception as e:
-                import traceback
-                error_msg = f"Error generating TL Max Loading Report: {str(e)}\n{traceback.format_exc()}\n"
-                print(error_msg)
-                errors.append(error_msg)
+class ReportJobRequest(BaseModel):
+    report_id: str
+    year: int
+    month: int
+
+
+@api_router.post("/reports/jobs")
+async def create_report_job(request: ReportJobRequest, current_user: User = Depends(get_current_user)):
+    if request.report_id not in REPORT_WORKBOOK_SPECS:
+        raise HTTPException(status_code=400, detail=f"Unknown report: {request.report_id}")
+    if not 1 <= request.month <= 12:
+        raise HTTPException(status_code=400, detail="Invalid month")
+    job = await enqueue_job("report", current_user, {
+        "report_id": request.report_id,
+        "year": request.year,
+        "month": request.month,
+        "user_id": current_user.id,
+        "user_email": current_user.email,
+    })
+    return {"job_id": job["id"], "status": job["status"]}
+
+
+async def _get_report_job(job_id: str, user: User) -> Dict[str, Any]:
+    job = await db.jobs.find_one(
+        {"id": job_id, "type": {"$in": REPORT_JOB_TYPES}, "params.user_id": user.id},
+        {"_id": 0},
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+@api_router.get("/reports/jobs/{job_id}")
+async def get_report_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = await _get_report_job(job_id, current_user)
+    return {k: job.get(k) for k in ("id", "type", "status", "error", "result", "created_at", "started_at", "finished_at")}
+
+
+@api_router.get("/reports/jobs/{job_id}/download")
+async def download_report_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = await _get_report_job(job_id, current_user)
+    if job["type"] != "report" or job["status"] != "done":
+        raise HTTPException(status_code=409, detail="Report is not ready")
+    doc = await db.report_files.find_one({"job_id": job_id}, {"_id": 0})
+    if not doc:
+        raise HTTPException(status_code=404, detail="Report file has expired; generate it again")
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
+    spool.write(doc["content"])
+    return spooled_file_response(spool, doc["filename"], XLSX_MEDIA_TYPE)
+
+def _time_to_minute(value: Any) -> Optional[int]:
+    """Minute-of-day for a stored HH:MM(:SS) time, or None if it does not parse."""
+    t = normalize_time(value)
+    parts = t.split(":")
+    if len(parts) < 2:
+        return None
+    try:
+        return int(parts[0]) * 60 + int(parts[1])
+    except ValueError:
+        return None
+
+
+def _columnar_grid(docs, key_field: str, metrics: Dict[str, Any], keys: Optional[List[str]] = None, dates: Optional[List[str]] = None):
+    """Pivot per-day documents into dense per-key series on a shared date axis.
+
+    Returns ``(dates, keys, series)`` where ``series[metric][k][d]`` is the value
+    for ``keys[k]`` on ``dates[d]`` (None where there is no reading). Metrics
+    that are empty for every key are dropped.
+    """
+    if dates is None:
+        dates = sorted({d.get("date") for d in docs if d.get("date")})
+    if keys is None:
+        keys = list(dict.fromkeys(d.get(key_field) for d in docs if d.get(key_field)))
+    date_pos = {d: i for i, d in enumerate(dates)}
+    key_pos = {k: i for i, k in enumerate(keys)}
+    series = {name: [[None] * len(dates) for _ in keys] for name in metrics}
+    for doc in docs:
+        ki = key_pos.get(doc.get(key_field))
+        di = date_pos.get(doc.get("date"))
+        if ki is None or di is None:
+            continue
+        for name, extract in metrics.items():
+            value = extract(doc)
+            if value is not None:
+                series[name][ki][di] = value
+    series = {name: rows for name, rows in series.items() if any(v is not None for row in rows for v in row)}
+    return dates, keys, series
+
+
+def _columnar_lookup(keys: List[str], docs: List[dict], fields=("id", "name", "type")) -> List[dict]:
+    by_id = {d.get("id"): d for d in docs}
+    return [{f: (by_id.get(k) or {}).get(f, k if f == "id" else None) for f in fields} for k in keys]
+
+
+def _mm_metric(section: str, field: str):
+    return lambda doc: get_float_safe(((doc.get("data") or {}).get(section) or {}).get(field))
+
+
+def _mm_time(section: str, field: str = "time"):
+    return lambda doc: _time_to_minute(((doc.get("data") or {}).get(section) or {}).get(field))
+
+
+MAX_MIN_COLUMNAR_METRICS = {
+    "max_mw": _mm_metric("max", "mw"),
+    "max_amps": _mm_metric("max", "amps"),
+    "max_mvar": _mm_metric("max", "mvar"),
+    "max_time": _mm_time("max"),
+    "min_mw": _mm_metric("min", "mw"),
+    "min_amps": _mm_metric("min", "amps"),
+    "min_mvar": _mm_metric("min", "mvar"),
+    "min_time": _mm_time("min"),
+    "avg_mw": _mm_metric("avg", "mw"),
+    "avg_amps": _mm_metric("avg", "amps"),
+    "max_bus_voltage_400kv": _mm_metric("max_bus_voltage_400kv", "value"),
+    "min_bus_voltage_400kv": _mm_metric("min_bus_voltage_400kv", "value"),
+    "max_bus_voltage_220kv": _mm_metric("max_bus_voltage_220kv", "value"),
+    "min_bus_voltage_220kv": _mm_metric("min_bus_voltage_220kv", "value"),
+    "station_load_mw": _mm_metric("station_load", "max_mw"),
+    "station_load_mvar": _mm_metric("station_load", "mvar"),
+    "station_load_time": _mm_time("station_load"),
+}
+
+
+def _check_analytics_format(format: Optional[str]) -> str:
+    fmt = (format or "json").lower()
+    if fmt not in {"json", "columnar"}:
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'columnar'")
+    return fmt
+
 
-        # 9. Interruptions Monthly Report
-        if not report_ids or 'interruptions' in report_ids:
-            try:
-                wb = await _generate_interruptions_report_wb(year, month)
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                attachments.append((f"Interruptions_Report_{month_name}_{year}.xlsx", output.read()))
-            except Exception as e:
-                import traceback
-                error_msg = f"Error generating Interruptions Report: {str(e)}\n{traceback.format_exc()}\n"
-                print(error_msg)
-                errors.append(error_msg)
-        
-        # 10. MIS Interruption Details (optional - only when explicitly requested)
-        if report_ids and 'mis-interruptions' in report_ids:
-            try:
-                wb = await _generate_mis_interruptions_report_wb(year, month)
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-                attachments.append((f"MIS_Interruption_Details_{month_name}_{year}.xlsx", output.read()))
-            except Exception as e:
-                import traceback
-                error_msg = f"Error generating MIS Interruption Details Report: {str(e)}\n{traceback.format_exc()}\n"
-                print(error_msg)
-                errors.append(error_msg)
-        
-        if errors:
-            error_content = "\n".join(errors)
-            attachments.append(("generation_errors.txt", error_content.encode('utf-8')))
-             
-        if not attachments:
-            raise HTTPException(status_code=400, detail="No reports could be generated for this period.")
-            
-        # Determine Subject Logic
-        from datetime import date
-        short_month_year = date(year, month, 1).strftime("%b-%Y")
-        
-        # Mapping of report IDs to readable names
-        report_names_map = {
-            'fortnight': 'Fortnight',
-            'energy-consumption': 'Energy Consumption',
-            'boundary-meter': 'Boundary Meter reading', # Based on user example "Boundary Meter reading"
-            'kpi': 'KPI',
-            'line-losses': 'Line Losses',
-            'new-line-losses': 'New Line Losses',
-            'daily-max-mva': 'Daily Max MVA',
-            'ptr-max-min': 'PTR Max Min',
-            'tl-max-loading': 'TL Max Loading',
-            'interruptions': 'Interruptions',
-            'mis-interruptions': 'MIS Interruption Details'
-        }
+def _check_max_points(max_points: Optional[int]) -> Optional[int]:
+    if max_points is None:
+        return None
+    if max_points < 3:
+        raise HTTPException(status_code=400, detail="max_points must be at least 3")
+    return max_points
 
-        # Identify which reports were actually generated (or attempted)
-        # Note: 'report_ids' might be None/Empty (meaning ALL default), or a list.
-        # We need to reconstruct the list of report names that were part of this request.
-        
-        generated_report_names = []
-        
-        # List of all available report keys (excluding optional ones if not requested)
-        all_default_keys = [
-            'fortnight', 'boundary-meter', 'kpi', 'line-losses',
-            'daily-max-mva', 'ptr-max-min', 'tl-max-loading', 'interruptions'
-        ]
-        
-        # If report_ids is empty, it means all default reports
-        current_report_keys = report_ids if report_ids else all_default_keys
-        
-        # Filter out keys that might be in report_ids but are optional and not in map if any
-        # And ensure we use the readable names
-        for key in current_report_keys:
-             if key in report_names_map:
-                 generated_report_names.append(report_names_map[key])
-        
-        # Determine if it is "All Reports"
-        # Condition: report_ids is empty OR it contains all default keys (and maybe optional ones too)
-        # Simplify: If report_ids is empty -> All Reports
-        # If report_ids has all the default keys -> All Reports
-        
-        is_all_reports = False
-        if not report_ids:
-            is_all_reports = True
-        elif set(all_default_keys).issubset(set(report_ids)):
-            is_all_reports = True
-            
-        if is_all_reports:
-             subject = f"MIS Reports of {month_name} {year}"
-        elif len(generated_report_names) == 1:
-             subject = f"MIS Report of {generated_report_names[0]} of {short_month_year}"
+
+def _date_ordinal(value: Any, fallback: int) -> int:
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").toordinal()
+    except (ValueError, TypeError):
+        return fallback
+
+
+def _lttb_indices(xs: List[float], ys: List[float], threshold: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets: indices of the points to keep.
+
+    The first and last points are always kept. The bucket holding the series
+    maximum (peak-load day) always returns that point, and likewise for the
+    minimum, so downsampling never hides the extremes the reports care about.
+    When both fall in one bucket that bucket returns the two of them, so the
+    result can hold ``threshold + 1`` indices.
+    """
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+    peak = max(range(n), key=lambda i: ys[i])
+    trough = min(range(n), key=lambda i: ys[i])
+    every = (n - 2) / (threshold - 2)
+    keep = [0]
+    a = 0
+    for b in range(threshold - 2):
+        start = int(b * every) + 1
+        end = int((b + 1) * every) + 1
+        next_start = end
+        next_end = min(int((b + 2) * every) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+        extremes = sorted({i for i in (peak, trough) if start <= i < end})
+        if extremes:
+            keep.extend(extremes)
+            a = extremes[-1]
+            continue
+        pick = start
+        best_area = -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best_area = area
+                pick = j
+        keep.append(pick)
+        a = pick
+    keep.append(n - 1)
+    return keep
+
+
+def _downsample_docs(docs: List[dict], key_field: str, value_fn, max_points: int) -> List[dict]:
+    """Downsample each ``key_field`` series of date-sorted docs to ``max_points``.
+
+    Docs whose primary value is missing have nothing to rank on and are
+    always kept; every doc keeps its original order. Docs come back unchanged
+    when no series is longer than ``max_points``.
+    """
+    groups: Dict[Any, List[Tuple[int, float]]] = {}
+    keep = set()
+    for pos, doc in enumerate(docs):
+        y = value_fn(doc)
+        if y is None:
+            keep.add(pos)
         else:
-             # Less than all, but more than 1 (or 0, but we checked attachments)
-             reports_str = ", ".join(generated_report_names)
-             subject = f"MIS Reports of {reports_str} of {short_month_year}"
+            groups.setdefault(doc.get(key_field), []).append((pos, y))
+    if all(len(points) <= max_points for points in groups.values()):
+        return docs
+    for points in groups.values():
+        xs = [_date_ordinal(docs[pos].get("date"), i) for i, (pos, _) in enumerate(points)]
+        ys = [y for _, y in points]
+        keep.update(points[i][0] for i in _lttb_indices(xs, ys, max_points))
+    return [doc for pos, doc in enumerate(docs) if pos in keep]
+
+
+def _downsample_columnar(dates: List[str], rows: List[List[Optional[float]]], max_points: int) -> List[int]:
+    """Date-axis indices to keep so every row (one per feeder) is LTTB-downsampled.
+
+    The shared axis becomes the union of each feeder's kept dates, so it can
+    hold up to ``len(rows) * max_points`` points. Dates where no row has a
+    value are always kept (the columnar counterpart of the docs without a
+    primary value), so with no primary data at all the full axis survives.
+    """
+    keep = {i for i in range(len(dates)) if all(row[i] is None for row in rows)}
+    for row in rows:
+        idx = [i for i, v in enumerate(row) if v is not None]
+        xs = [_date_ordinal(dates[i], i) for i in idx]
+        ys = [row[i] for i in idx]
+        keep.update(idx[i] for i in _lttb_indices(xs, ys, max_points))
+    return sorted(keep)
+
+
+def _slice_columnar(keep: List[int], dates: List[str], *series_maps: Dict[str, List[List[Any]]]):
+    sliced = [{name: [[row[i] for i in keep] for row in rows] for name, rows in series.items()} for series in series_maps]
+    return ([dates[i] for i in keep], *sliced)
+
+
+MAX_MIN_PRIMARY_METRICS = ("max_mw", "station_load_mw", "max_bus_voltage_400kv")
+
+
+def _max_min_primary(doc: dict) -> Optional[float]:
+    """Value a Max-Min entry is downsampled on: max MW, or station load / bus voltage for bus rows."""
+    for metric in MAX_MIN_PRIMARY_METRICS:
+        value = MAX_MIN_COLUMNAR_METRICS[metric](doc)
+        if value is not None:
+            return value
+    return None
+
+
+def _max_min_primary_rows(series: Dict[str, List[List[Any]]], n_keys: int, n_dates: int) -> List[List[Any]]:
+    rows = []
+    for k in range(n_keys):
+        row = next(
+            (series[m][k] for m in MAX_MIN_PRIMARY_METRICS if m in series and any(v is not None for v in series[m][k])),
+            [None] * n_dates,
+        )
+        rows.append(row)
+    return rows
 
-        # Send Email in background
-        import asyncio
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, send_reports_email, recipient_email, attachments, subject)
-        
-        return {"message": f"Reports sent successfully to {recipient_email}"}
-        
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        import traceback
-        error_msg = traceback.format_exc()
-        print(f"Send mail error: {error_msg}")
-        return JSONResponse(status_code=500, content={"detail": str(e)})
 
 @api_router.get("/admin/analytics/energy")
 async def admin_energy_analytics(
+    request: Request,
     sheet_ids: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    format: Optional[str] = None,
+    max_points: Optional[int] = None,
     current_admin: User = Depends(get_current_admin),
 ):
+    fmt = _check_analytics_format(format)
+    max_points = _check_max_points(max_points)
     query: dict[str, Any] = {}
     if sheet_ids:
         ids = [s for s in sheet_ids.split(",") if s]
@@ -11069,18 +12653,54 @@ async def admin_energy_analytics(
         query["date"] = {"$gte": start_date}
     elif end_date:
         query["date"] = {"$lte": end_date}
-    entries = await db.energy_entries.find(query, {"_id": 0}).sort("date", 1).to_list(10000)
     sheets = await db.energy_sheets.find({}, {"_id": 0}).to_list(1000)
+    if _wants_ndjson(request) and not max_points:
+        cursor = db.energy_entries.find(query, {"_id": 0}).sort("date", 1)
+        return _ndjson_response(cursor, header={"sheets": sheets})
+    if fmt == "columnar":
+        projection = {"_id": 0, "sheet_id": 1, "date": 1, "total_consumption": 1, "readings.meter_id": 1, "readings.consumption": 1}
+        entries = await db.energy_entries.find(query, projection).sort("date", 1).to_list(10000)
+        dates, sheet_keys, series = _columnar_grid(
+            entries, "sheet_id", {"total_consumption": lambda e: get_float_safe(e.get("total_consumption"))}
+        )
+        meter_rows = [
+            {"meter_id": r.get("meter_id"), "date": e.get("date"), "consumption": r.get("consumption")}
+            for e in entries
+            for r in (e.get("readings") or [])
+        ]
+        _, meter_keys, meter_series = _columnar_grid(
+            meter_rows, "meter_id", {"consumption": lambda r: get_float_safe(r.get("consumption"))}, dates=dates
+        )
+        if max_points:
+            keep = _downsample_columnar(dates, series.get("total_consumption", []), max_points)
+            dates, series, meter_series = _slice_columnar(keep, dates, series, meter_series)
+        meters = await db.energy_meters.find({"id": {"$in": meter_keys}}, {"_id": 0}).to_list(1000)
+        return {
+            "format": "columnar",
+            "dates": dates,
+            "sheets": _columnar_lookup(sheet_keys, sheets, ("id", "name")),
+            "series": series,
+            "meters": _columnar_lookup(meter_keys, meters, ("id", "name", "sheet_id")),
+            "meter_series": meter_series,
+        }
+    entries = await db.energy_entries.find(query, {"_id": 0}).sort("date", 1).to_list(10000)
+    if max_points:
+        entries = _downsample_docs(entries, "sheet_id", lambda e: get_float_safe(e.get("total_consumption")), max_points)
     return {"entries": entries, "sheets": sheets}
 
 
 @api_router.get("/admin/analytics/line-losses")
 async def admin_line_losses_analytics(
+    request: Request,
     feeder_ids: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    format: Optional[str] = None,
+    max_points: Optional[int] = None,
     current_admin: User = Depends(get_current_admin),
 ):
+    fmt = _check_analytics_format(format)
+    max_points = _check_max_points(max_points)
     query: dict[str, Any] = {}
     if feeder_ids:
         ids = [f for f in feeder_ids.split(",") if f]
@@ -11100,17 +12720,41 @@ async def admin_line_losses_analytics(
         "end2_import_consumption": 1,
         "loss_percent": 1,
     }
+    if _wants_ndjson(request) and not max_points:
+        return _ndjson_response(db.entries.find(query, projection).sort("date", 1))
     entries = await db.entries.find(query, projection).sort("date", 1).to_list(10000)
+    if fmt == "columnar":
+        dates, keys, series = _columnar_grid(
+            entries,
+            "feeder_id",
+            {
+                "end1_import_consumption": lambda e: get_float_safe(e.get("end1_import_consumption")),
+                "end2_import_consumption": lambda e: get_float_safe(e.get("end2_import_consumption")),
+                "loss_percent": lambda e: get_float_safe(e.get("loss_percent")),
+            },
+        )
+        if max_points:
+            keep = _downsample_columnar(dates, series.get("loss_percent", []), max_points)
+            dates, series = _slice_columnar(keep, dates, series)
+        feeders = await db.feeders.find({"id": {"$in": keys}}, {"_id": 0, "id": 1, "name": 1}).to_list(1000)
+        return {"format": "columnar", "dates": dates, "feeders": _columnar_lookup(keys, feeders, ("id", "name")), "series": series}
+    if max_points:
+        entries = _downsample_docs(entries, "feeder_id", lambda e: get_float_safe(e.get("loss_percent")), max_points)
     return {"entries": entries}
 
 
 @api_router.get("/admin/analytics/max-min")
 async def admin_max_min_analytics(
+    request: Request,
     feeder_ids: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    format: Optional[str] = None,
+    max_points: Optional[int] = None,
     current_admin: User = Depends(get_current_admin),
 ):
+    fmt = _check_analytics_format(format)
+    max_points = _check_max_points(max_points)
     query: dict[str, Any] = {}
     if feeder_ids:
         ids = [f for f in feeder_ids.split(",") if f]
@@ -11122,8 +12766,21 @@ async def admin_max_min_analytics(
         query["date"] = {"$gte": start_date}
     elif end_date:
         query["date"] = {"$lte": end_date}
-    entries = await db.max_min_entries.find(query, {"_id": 0}).sort("date", 1).to_list(10000)
     feeders = await db.max_min_feeders.find({}, {"_id": 0}).to_list(1000)
+    if _wants_ndjson(request) and not max_points:
+        cursor = db.max_min_entries.find(query, {"_id": 0}).sort("date", 1)
+        return _ndjson_response(cursor, header={"feeders": feeders})
+    if fmt == "columnar":
+        projection = {"_id": 0, "feeder_id": 1, "date": 1, "data": 1}
+        entries = await db.max_min_entries.find(query, projection).sort("date", 1).to_list(10000)
+        dates, keys, series = _columnar_grid(entries, "feeder_id", MAX_MIN_COLUMNAR_METRICS)
+        if max_points:
+            keep = _downsample_columnar(dates, _max_min_primary_rows(series, len(keys), len(dates)), max_points)
+            dates, series = _slice_columnar(keep, dates, series)
+        return {"format": "columnar", "dates": dates, "feeders": _columnar_lookup(keys, feeders), "series": series}
+    entries = await db.max_min_entries.find(query, {"_id": 0}).sort("date", 1).to_list(10000)
+    if max_points:
+        entries = _downsample_docs(entries, "feeder_id", _max_min_primary, max_points)
     return {"entries": entries, "feeders": feeders}
 
 
@@ -11133,8 +12790,10 @@ async def export_admin_max_min_analytics(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     columns: Optional[str] = None,
+    format: str = "xlsx",
     current_admin: User = Depends(get_current_admin),
 ):
+    fmt = export_format(format)
     try:
         query: dict[str, Any] = {}
         if feeder_ids:
@@ -11148,18 +12807,9 @@ async def export_admin_max_min_analytics(
         elif end_date:
             query["date"] = {"$lte": end_date}
 
-        entries = await db.max_min_entries.find(query, {"_id": 0}).sort("date", 1).to_list(20000)
         feeders = await db.max_min_feeders.find({}, {"_id": 0}).to_list(1000)
         feeder_map: dict[str, dict[str, Any]] = {f["id"]: f for f in feeders if f.get("id")}
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Max-Min Analytics"
-
-        header_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        header_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
-
         all_columns = [
             ("feeder", "Feeder"),
             ("maxAmps", "Max Amps"),
@@ -11186,13 +12836,13 @@ async def export_admin_max_min_analytics(
             selected_keys = [key for key, _ in all_columns]
 
         headers = [label for key, label in all_columns if key in selected_keys]
-        ws.append(headers)
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_align
+        filename_parts = ["Admin_MaxMin_Analytics"]
+        if start_date:
+            filename_parts.append(start_date)
+        if end_date:
+            filename_parts.append(end_date)
 
-        for e in entries:
+        def entry_row(e) -> list[Any]:
             data = e.get("data") or {}
             max_data = data.get("max") or {}
             min_data = data.get("min") or {}
@@ -11209,55 +12859,56 @@ async def export_admin_max_min_analytics(
                 elif key == "maxTime":
                     row.append(format_time(max_data.get("time")))
                 elif key == "maxAmps":
-                    row.append(max_data.get("amps") or "")
+                    row.append(max_data.get("amps"))
                 elif key == "maxMw":
-                    row.append(max_data.get("mw") or "")
+                    row.append(max_data.get("mw"))
                 elif key == "maxMvar":
-                    row.append(max_data.get("mvar") or "")
+                    row.append(max_data.get("mvar"))
                 elif key == "minAmps":
-                    row.append(min_data.get("amps") or "")
+                    row.append(min_data.get("amps"))
                 elif key == "minMw":
-                    row.append(min_data.get("mw") or "")
+                    row.append(min_data.get("mw"))
                 elif key == "minMvar":
-                    row.append(min_data.get("mvar") or "")
+                    row.append(min_data.get("mvar"))
                 elif key == "minDate":
                     row.append(format_date(e.get("date")))
                 elif key == "minTime":
                     row.append(format_time(min_data.get("time")))
                 elif key == "avgAmps":
-                    row.append(avg_data.get("amps") or "")
+                    row.append(avg_data.get("amps"))
                 elif key == "avgMw":
-                    row.append(avg_data.get("mw") or "")
-            ws.append(row)
-
-        for col_idx in range(1, ws.max_column + 1):
-            col_letter = get_column_letter(col_idx)
-            max_length = 0
-            for cell in ws[col_letter]:
-                try:
-                    cell_val = str(cell.value) if cell.value is not None else ""
-                    if len(cell_val) > max_length:
-                        max_length = len(cell_val)
-                except Exception:
-                    continue
-            ws.column_dimensions[col_letter].width = max_length + 2
-
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-
-        filename_parts = ["Admin_MaxMin_Analytics"]
-        if start_date:
-            filename_parts.append(start_date)
-        if end_date:
-            filename_parts.append(end_date)
+                    row.append(avg_data.get("mw"))
+            return row
+
+        async def entry_rows():
+            # A fresh cursor per pass; the entries are never all in memory
+            cursor = db.max_min_entries.find(query, {"_id": 0}).sort("date", 1).limit(20000)
+            async for e in cursor:
+                yield entry_row(e)
+
+        if fmt != "xlsx":
+            table = TableExport(fmt, headers)
+            text_keys = {"feeder", "date", "maxTime", "minDate", "minTime"}
+            async for row in entry_rows():
+                table.append([
+                    value if key in text_keys else table_number(value)
+                    for key, value in zip(selected_keys, row)
+                ])
+            return table.response("_".join(filename_parts))
+
+        async def xlsx_rows():
+            async for row in entry_rows():
+                yield [value if value else "" for value in row]
+
+        # Multi-year ranges run to tens of thousands of rows: stream them
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Max-Min Analytics")
+        writer = StreamingSheetWriter(ws)
+        writer.append(headers, report_style(wb, "MIS Header Wrap"))
+        await writer.write_rows(xlsx_rows)
         filename = "_".join(filename_parts) + ".xlsx"
 
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"},
-        )
+        return workbook_response(wb, filename)
     except Exception as e:
         import traceback
         error_msg = traceback.format_exc()
@@ -11282,7 +12933,8 @@ async def export_admin_max_min_view(
         headers = [col.label for col in payload.columns]
         fields = [col.field for col in payload.columns]
 
-        ws.append(headers)
+        writer = SheetWriter(ws)
+        writer.append(headers)
         for cell in ws[1]:
             cell.fill = header_fill
             cell.font = header_font
@@ -11293,23 +12945,9 @@ async def export_admin_max_min_view(
             for field in fields:
                 value = row_data.get(field, "")
                 excel_row.append(value if value is not None else "")
-            ws.append(excel_row)
-
-        for col_idx in range(1, ws.max_column + 1):
-            col_letter = get_column_letter(col_idx)
-            max_length = 0
-            for cell in ws[col_letter]:
-                try:
-                    cell_val = str(cell.value) if cell.value is not None else ""
-                    if len(cell_val) > max_length:
-                        max_length = len(cell_val)
-                except Exception:
-                    continue
-            ws.column_dimensions[col_letter].width = max_length + 2
+            writer.append(excel_row)
 
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
+        writer.fit_columns()
 
         filename = "Admin_MaxMin_Analytics_View.xlsx"
         meta = payload.meta or {}
@@ -11323,11 +12961,7 @@ async def export_admin_max_min_view(
                 parts.append(str(end_date))
             filename = "_".join(parts) + ".xlsx"
 
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"},
-        )
+        return workbook_response(wb, filename)
     except Exception as e:
         import traceback
         error_msg = traceback.format_exc()
@@ -11340,8 +12974,12 @@ async def admin_station_load_analytics(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     mode: str = "day",
+    format: Optional[str] = None,
+    max_points: Optional[int] = None,
     current_admin: User = Depends(get_current_admin),
 ):
+    fmt = _check_analytics_format(format)
+    max_points = _check_max_points(max_points)
     mode_normalized = (mode or "day").lower()
     if mode_normalized not in {"day", "month"}:
         raise HTTPException(status_code=400, detail="mode must be 'day' or 'month'")
@@ -11353,6 +12991,8 @@ async def admin_station_load_analytics(
     else:
         selected_ids = list(feeder_map.keys())
     if not selected_ids:
+        if fmt == "columnar":
+            return {"format": "columnar", "mode": mode_normalized, "dates": [], "feeders": [], "series": {}, "station": {}}
         return {"mode": mode_normalized, "feeders": ict_feeders, "rows": []}
     query: dict[str, Any] = {"feeder_id": {"$in": selected_ids}}
     if start_date and end_date:
@@ -11479,6 +13119,46 @@ async def admin_station_load_analytics(
                 "station": {"mw": station_mw, "mvar": station_mvar, "mva": station_mva},
             }
         )
+    if fmt == "columnar":
+        per_ict_rows = [
+            {**v, "feeder_id": fid, "date": row["period"]}
+            for row in rows
+            for fid, v in row["per_ict"].items()
+        ]
+        dates = [row["period"] for row in rows]
+        _, keys, series = _columnar_grid(
+            per_ict_rows,
+            "feeder_id",
+            {
+                "amps": lambda v: v.get("amps"),
+                "mw": lambda v: v.get("mw"),
+                "mvar": lambda v: v.get("mvar"),
+                "mva": lambda v: v.get("mva"),
+                "time": lambda v: _time_to_minute(v.get("time")),
+            },
+            keys=selected_ids,
+            dates=dates,
+        )
+        station = {m: [[row["station"][m] for row in rows]] for m in ("mw", "mvar", "mva")}
+        if max_points:
+            keep = _downsample_columnar(dates, station["mw"], max_points)
+            dates, series, station = _slice_columnar(keep, dates, series, station)
+        station = {m: values[0] for m, values in station.items()}
+        return {
+            "format": "columnar",
+            "mode": mode_normalized,
+            "dates": dates,
+            "feeders": _columnar_lookup(selected_ids, ict_feeders),
+            "series": series,
+            "station": station,
+        }
+    if max_points:
+        keep = _lttb_indices(
+            [_date_ordinal(row["period"], i) for i, row in enumerate(rows)],
+            [row["station"]["mw"] for row in rows],
+            max_points,
+        )
+        rows = [rows[i] for i in keep]
     return {"mode": mode_normalized, "feeders": [feeder_map[fid] for fid in selected_ids], "rows": rows}
 
 
@@ -11490,11 +13170,13 @@ async def admin_station_load_export(
     mode: str = "day",
     metrics: Optional[str] = None,
     include_station: bool = True,
+    format: str = "xlsx",
     current_admin: User = Depends(get_current_admin),
 ):
     mode_normalized = (mode or "day").lower()
     if mode_normalized not in {"day", "month"}:
         raise HTTPException(status_code=400, detail="mode must be 'day' or 'month'")
+    fmt = export_format(format)
     ict_feeders = await db.max_min_feeders.find({"type": "ict_feeder"}, {"_id": 0}).to_list(1000)
     feeder_map: dict[str, dict[str, Any]] = {f["id"]: f for f in ict_feeders if f.get("id")}
     if feeder_ids:
@@ -11614,81 +13296,57 @@ async def admin_station_load_export(
         key=lambda fid: (feeder_map[fid].get("name") or "").lower(),
     )
 
-    wb = Workbook()
-    if "Sheet" in wb.sheetnames:
-        del wb["Sheet"]
-    ws = wb.create_sheet("Station Load")
+    metric_label_map = {"amps": "Amps", "mw": "MW", "mvar": "MVAR", "mva": "MVA"}
 
-    header_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    header_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    if fmt == "xlsx":
+        # One flat table, possibly years of days long: stream it
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Station Load")
+        writer = StreamingSheetWriter(ws)
+        header_style = report_style(wb, "MIS Header Wrap")
 
-    metric_label_map = {"amps": "Amps", "mw": "MW", "mvar": "MVAR", "mva": "MVA"}
+        # Header row 1 and 2 to mirror on-screen table:
+        # Row 1: Date, Time, ICT group headers, Station Load group header
+        # Row 2: sub-headers Amps/MW/MVAR/MVA under each group
+        group_row: list[Any] = ["Date", "Time"]
+        metric_row: list[Any] = [None, None]
 
-    # Header row 1 and 2 to mirror on-screen table:
-    # Row 1: Date, Time, ICT group headers, Station Load group header
-    # Row 2: sub-headers Amps/MW/MVAR/MVA under each group
-
-    # Date / Time with vertical merge (row span 2)
-    ws.merge_cells(start_row=1, start_column=1, end_row=2, end_column=1)
-    c_date = ws.cell(row=1, column=1, value="Date")
-    c_date.fill = header_fill
-    c_date.font = header_font
-    c_date.alignment = header_align
-
-    ws.merge_cells(start_row=1, start_column=2, end_row=2, end_column=2)
-    c_time = ws.cell(row=1, column=2, value="Time")
-    c_time.fill = header_fill
-    c_time.font = header_font
-    c_time.alignment = header_align
-
-    col_idx = 3
-
-    # ICT group headers and sub-headers
-    for fid in sorted_ids:
-        feeder = feeder_map[fid]
-        name = feeder.get("name", fid)
-        span = len(active_metric_keys) or 1
-        if span > 1:
-            ws.merge_cells(
-                start_row=1,
-                start_column=col_idx,
-                end_row=1,
-                end_column=col_idx + span - 1,
-            )
-        gcell = ws.cell(row=1, column=col_idx, value=name)
-        gcell.fill = header_fill
-        gcell.font = header_font
-        gcell.alignment = header_align
-
-        for m in active_metric_keys:
-            subcell = ws.cell(row=2, column=col_idx, value=metric_label_map[m])
-            subcell.fill = header_fill
-            subcell.font = header_font
-            subcell.alignment = header_align
-            col_idx += 1
-
-    # Station Load group headers and sub-headers (if included)
-    if station_metric_keys:
-        span = len(station_metric_keys)
-        if span > 1:
-            ws.merge_cells(
-                start_row=1,
-                start_column=col_idx,
-                end_row=1,
-                end_column=col_idx + span - 1,
-            )
-        scell = ws.cell(row=1, column=col_idx, value="Station Load")
-        scell.fill = header_fill
-        scell.font = header_font
-        scell.alignment = header_align
-
-        for m in station_metric_keys:
-            subcell = ws.cell(row=2, column=col_idx, value=metric_label_map[m])
-            subcell.fill = header_fill
-            subcell.font = header_font
-            subcell.alignment = header_align
-            col_idx += 1
+        # Date / Time with vertical merge (row span 2)
+        writer.merge_cells(1, 1, 2, 1)
+        writer.merge_cells(1, 2, 2, 2)
+
+        col_idx = 3
+
+        # ICT group headers and sub-headers
+        for fid in sorted_ids:
+            feeder = feeder_map[fid]
+            name = feeder.get("name", fid)
+            span = len(active_metric_keys) or 1
+            if span > 1:
+                writer.merge_cells(1, col_idx, 1, col_idx + span - 1)
+            group_row.extend([name] + [None] * (span - 1))
+            metric_row.extend(metric_label_map[m] for m in active_metric_keys)
+            col_idx += len(active_metric_keys)
+
+        # Station Load group headers and sub-headers (if included)
+        if station_metric_keys:
+            span = len(station_metric_keys)
+            if span > 1:
+                writer.merge_cells(1, col_idx, 1, col_idx + span - 1)
+            group_row.extend(["Station Load"] + [None] * (span - 1))
+            metric_row.extend(metric_label_map[m] for m in station_metric_keys)
+            col_idx += span
+
+        writer.append(group_row, header_style)
+        writer.append(metric_row, header_style)
+    else:
+        # Tables get a single header row: "<ICT> <metric>" per column
+        table_columns = ["Date", "Time"]
+        for fid in sorted_ids:
+            name = feeder_map[fid].get("name", fid)
+            table_columns.extend(f"{name} {metric_label_map[m]}" for m in active_metric_keys)
+        table_columns.extend(f"Station Load {metric_label_map[m]}" for m in station_metric_keys)
+        table = TableExport(fmt, table_columns)
 
     def format_int(value: Any) -> Any:
         if not isinstance(value, (int, float)):
@@ -11700,107 +13358,100 @@ async def admin_station_load_export(
             return None
         return round(float(value), 2)
 
-    for key in sorted(rows_map.keys()):
-        row_info = rows_map[key]
-        per_ict = row_info.get("per_ict") or {}
-        if mode_normalized == "day":
-            station_mw = row_info.get("station_mw", 0.0)
-            station_mvar = row_info.get("station_mvar", 0.0)
-        else:
-            station_mw = 0.0
-            station_mvar = 0.0
-            for v in per_ict.values():
+    def excel_rows():
+        for key in sorted(rows_map.keys()):
+            row_info = rows_map[key]
+            per_ict = row_info.get("per_ict") or {}
+            if mode_normalized == "day":
+                station_mw = row_info.get("station_mw", 0.0)
+                station_mvar = row_info.get("station_mvar", 0.0)
+            else:
+                station_mw = 0.0
+                station_mvar = 0.0
+                for v in per_ict.values():
+                    mw_val = v.get("mw")
+                    mvar_val = v.get("mvar")
+                    if isinstance(mw_val, (int, float)):
+                        station_mw += mw_val
+                    if isinstance(mvar_val, (int, float)):
+                        station_mvar += mvar_val
+            station_mva = (station_mw ** 2 + station_mvar ** 2) ** 0.5 if station_mw or station_mvar else None
+
+            ict_values: dict[str, Any] = {}
+            for fid, v in per_ict.items():
                 mw_val = v.get("mw")
                 mvar_val = v.get("mvar")
-                if isinstance(mw_val, (int, float)):
-                    station_mw += mw_val
-                if isinstance(mvar_val, (int, float)):
-                    station_mvar += mvar_val
-        station_mva = (station_mw ** 2 + station_mvar ** 2) ** 0.5 if station_mw or station_mvar else None
+                if isinstance(mw_val, (int, float)) and isinstance(mvar_val, (int, float)):
+                    ict_mva = (mw_val ** 2 + mvar_val ** 2) ** 0.5
+                else:
+                    ict_mva = None
+                ict_values[fid] = {**v, "mva": ict_mva}
 
-        ict_values: dict[str, Any] = {}
-        for fid, v in per_ict.items():
-            mw_val = v.get("mw")
-            mvar_val = v.get("mvar")
-            if isinstance(mw_val, (int, float)) and isinstance(mvar_val, (int, float)):
-                ict_mva = (mw_val ** 2 + mvar_val ** 2) ** 0.5
+            best_date = None
+            best_time = None
+            best_mw_val = None
+            for v in ict_values.values():
+                mw_val = v.get("mw")
+                if isinstance(mw_val, (int, float)):
+                    if best_mw_val is None or mw_val > best_mw_val:
+                        best_mw_val = mw_val
+                        best_date = v.get("date")
+                        best_time = v.get("time")
+            if best_date:
+                date_str = format_date(best_date)
             else:
-                ict_mva = None
-            ict_values[fid] = {**v, "mva": ict_mva}
-
-        best_date = None
-        best_time = None
-        best_mw_val = None
-        for v in ict_values.values():
-            mw_val = v.get("mw")
-            if isinstance(mw_val, (int, float)):
-                if best_mw_val is None or mw_val > best_mw_val:
-                    best_mw_val = mw_val
-                    best_date = v.get("date")
-                    best_time = v.get("time")
-        if best_date:
-            date_str = format_date(best_date)
-        else:
-            date_str = row_info.get("period") or ""
-        time_str = best_time or ""
-
-        excel_row: list[Any] = [date_str, time_str]
-        for fid in sorted_ids:
-            v = ict_values.get(fid) or {}
-            for m in active_metric_keys:
-                if m == "amps":
-                    excel_row.append(format_int(v.get("amps")))
+                date_str = row_info.get("period") or ""
+            time_str = best_time or ""
+
+            excel_row: list[Any] = [date_str, time_str]
+            for fid in sorted_ids:
+                v = ict_values.get(fid) or {}
+                for m in active_metric_keys:
+                    if m == "amps":
+                        excel_row.append(format_int(v.get("amps")))
+                    elif m == "mw":
+                        excel_row.append(format_int(v.get("mw")))
+                    elif m == "mvar":
+                        excel_row.append(format_dec(v.get("mvar")))
+                    else:
+                        excel_row.append(format_dec(v.get("mva")))
+            for m in station_metric_keys:
+                if m == "mva":
+                    excel_row.append(format_dec(station_mva))
                 elif m == "mw":
-                    excel_row.append(format_int(v.get("mw")))
-                elif m == "mvar":
-                    excel_row.append(format_dec(v.get("mvar")))
+                    excel_row.append(format_int(station_mw))
                 else:
-                    excel_row.append(format_dec(v.get("mva")))
-        for m in station_metric_keys:
-            if m == "mva":
-                excel_row.append(format_dec(station_mva))
-            elif m == "mw":
-                excel_row.append(format_int(station_mw))
-            else:
-                excel_row.append(format_dec(station_mvar))
-        ws.append(excel_row)
-
-    for col_idx in range(1, ws.max_column + 1):
-        col_letter = get_column_letter(col_idx)
-        max_length = 0
-        for cell in ws[col_letter]:
-            try:
-                cell_val = str(cell.value) if cell.value is not None else ""
-                max_length = max(max_length, len(cell_val))
-            except Exception:
-                continue
-        ws.column_dimensions[col_letter].width = max_length + 2
-
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
+                    excel_row.append(format_dec(station_mvar))
+            yield excel_row
 
     filename_parts = ["StationLoad", mode_normalized]
     if start_date:
         filename_parts.append(start_date)
     if end_date:
         filename_parts.append(end_date)
+    if fmt != "xlsx":
+        for excel_row in excel_rows():
+            table.append(excel_row)
+        return table.response("_".join(filename_parts))
+
+    await writer.write_rows(excel_rows)
     filename = "_".join(filename_parts) + ".xlsx"
 
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
-    )
+    return workbook_response(wb, filename)
 
 
 @api_router.get("/admin/analytics/interruptions")
 async def admin_interruptions_analytics(
+    request: Request,
     feeder_ids: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    format: Optional[str] = None,
+    max_points: Optional[int] = None,
     current_admin: User = Depends(get_current_admin),
 ):
+    fmt = _check_analytics_format(format)
+    max_points = _check_max_points(max_points)
     query: dict[str, Any] = {}
     if feeder_ids:
         ids = [f for f in feeder_ids.split(",") if f]
@@ -11812,16 +13463,41 @@ async def admin_interruptions_analytics(
         query["date"] = {"$gte": start_date}
     elif end_date:
         query["date"] = {"$lte": end_date}
-    entries = await db.interruption_entries.find(query, {"_id": 0}).sort("date", 1).to_list(10000)
     feeders = await db.max_min_feeders.find({}, {"_id": 0}).to_list(1000)
+    if _wants_ndjson(request) and not max_points:
+        cursor = db.interruption_entries.find(query, {"_id": 0}).sort("date", 1)
+        return _ndjson_response(cursor, header={"feeders": feeders})
+    if fmt == "columnar":
+        # Several interruptions can fall on one day, so collapse them to a
+        # per-feeder daily count and total duration before pivoting.
+        projection = {"_id": 0, "feeder_id": 1, "date": 1, "data.duration_minutes": 1}
+        raw = await db.interruption_entries.find(query, projection).sort("date", 1).to_list(10000)
+        daily: Dict[Tuple[str, str], dict] = {}
+        for e in raw:
+            key = (e.get("feeder_id"), e.get("date"))
+            agg = daily.setdefault(key, {"feeder_id": key[0], "date": key[1], "count": 0, "duration_minutes": 0.0})
+            agg["count"] += 1
+            minutes = get_float_safe((e.get("data") or {}).get("duration_minutes"))
+            if minutes is not None:
+                agg["duration_minutes"] += minutes
+        dates, keys, series = _columnar_grid(
+            list(daily.values()),
+            "feeder_id",
+            {"count": lambda a: a["count"], "duration_minutes": lambda a: round(a["duration_minutes"], 2)},
+        )
+        if max_points:
+            keep = _downsample_columnar(dates, series.get("duration_minutes", []), max_points)
+            dates, series = _slice_columnar(keep, dates, series)
+        return {"format": "columnar", "dates": dates, "feeders": _columnar_lookup(keys, feeders), "series": series}
+    entries = await db.interruption_entries.find(query, {"_id": 0}).sort("date", 1).to_list(10000)
+    if max_points:
+        entries = _downsample_docs(
+            entries, "feeder_id", lambda e: get_float_safe((e.get("data") or {}).get("duration_minutes")), max_points
+        )
     return {"entries": entries, "feeders": feeders}
 
 
-@api_router.post("/admin/bulk-import/energy")
-async def admin_bulk_import_energy(
-    payload: dict,
-    current_admin: User = Depends(get_current_admin),
-):
+async def _bulk_import_energy(payload: dict) -> Dict[str, Any]:
     sheet_id = payload.get("sheet_id")
     entries = payload.get("entries") or []
     overwrite = bool(payload.get("overwrite"))
@@ -11954,11 +13630,7 @@ async def admin_bulk_import_check_energy(
     }
 
 
-@api_router.post("/admin/bulk-import/line-losses")
-async def admin_bulk_import_line_losses(
-    payload: dict,
-    current_admin: User = Depends(get_current_admin),
-):
+async def _bulk_import_line_losses(payload: dict) -> Dict[str, Any]:
     feeder_id = payload.get("feeder_id")
     entries = payload.get("entries") or []
     overwrite = bool(payload.get("overwrite"))
@@ -12061,6 +13733,7 @@ async def admin_bulk_import_line_losses(
             errors.append(
                 {"index": idx, "reason": str(exc), "date": date_str, "feeder_id": feeder_id}
             )
+    await refresh_month_buckets("entries", feeder_id, list(per_month))
     per_month_rows = []
     for key, stats in sorted(per_month.items()):
         per_month_rows.append(
@@ -12116,11 +13789,7 @@ async def admin_bulk_import_check_line_losses(
     }
 
 
-@api_router.post("/admin/bulk-import/max-min")
-async def admin_bulk_import_max_min(
-    payload: dict,
-    current_admin: User = Depends(get_current_admin),
-):
+async def _bulk_import_max_min(payload: dict) -> Dict[str, Any]:
     feeder_id = payload.get("feeder_id")
     entries = payload.get("entries") or []
     overwrite = bool(payload.get("overwrite"))
@@ -12179,6 +13848,7 @@ async def admin_bulk_import_max_min(
             errors.append(
                 {"index": idx, "reason": str(exc), "date": date_str, "feeder_id": feeder_id}
             )
+    await refresh_month_buckets("max_min_entries", feeder_id, list(per_month))
     per_month_rows = []
     for key, stats in sorted(per_month.items()):
         per_month_rows.append(
@@ -12234,11 +13904,7 @@ async def admin_bulk_import_check_max_min(
     }
 
 
-@api_router.post("/admin/bulk-import/interruptions")
-async def admin_bulk_import_interruptions(
-    payload: dict,
-    current_admin: User = Depends(get_current_admin),
-):
+async def _bulk_import_interruptions(payload: dict) -> Dict[str, Any]:
     entries = payload.get("entries") or []
     overwrite = bool(payload.get("overwrite"))
     year = payload.get("year")
@@ -12403,6 +14069,297 @@ async def admin_bulk_import_check_interruptions(
     }
 
 
+# ---------------------------------------------------------
+# Background jobs
+# ---------------------------------------------------------
+# Admin bulk imports (JSON, Excel and committed preview sessions) are queued
+# in ``jobs`` and run by an in-process worker loop, so the request returns a
+# job id at once instead of holding the connection for a multi-year load.
+# The entries are sorted the way the importers sort them and stored in
+# ``job_chunks`` documents of BULK_IMPORT_CHUNK_SIZE entries; the job itself
+# only holds counters. The worker takes a job with a lease, imports it chunk by
+# chunk and records processed/inserted/skipped counts, per-month counts and
+# errors in the same update that adds the chunk to ``done_chunks``. That update
+# only applies once per chunk, so a chunk replayed after a crash is not
+# counted twice. A job whose lease runs out (the worker died or was restarted)
+# is picked up again at the first chunk not yet done. Set JOB_WORKER=0 on
+# processes that should only serve requests.
+#
+# Every claim writes a fresh ``lease_owner`` token. While a job runs, a
+# heartbeat thread renews its lease every JOB_HEARTBEAT_SECONDS as long as the
+# token still matches, so a long report render is not claimed a second time
+# even while openpyxl holds the event loop, and result/status writes only
+# apply for the worker that holds the lease.
+
+JOB_WORKER_ENABLED = os.environ.get("JOB_WORKER", "1").lower() not in ("0", "false", "no")
+JOB_POLL_SECONDS = 2.0
+JOB_LEASE_SECONDS = 120
+JOB_HEARTBEAT_SECONDS = 30
+BULK_IMPORT_CHUNK_SIZE = 200
+BULK_IMPORT_RUNNERS = {
+    "energy": (_bulk_import_energy, lambda x: x.get("date") or ""),
+    "line-losses": (_bulk_import_line_losses, lambda x: x.get("date") or ""),
+    "max-min": (_bulk_import_max_min, lambda x: x.get("date") or ""),
+    "interruptions": (
+        _bulk_import_interruptions,
+        lambda x: (x.get("feeder_id") or "", x.get("date") or "", x.get("start_time") or ""),
+    ),
+}
+_job_worker_task: Optional["asyncio.Task"] = None
+
+
+async def enqueue_job(job_type: str, user: User, params: Dict[str, Any], job_id: Optional[str] = None, **fields) -> Dict[str, Any]:
+    now = datetime.now(timezone.utc).isoformat()
+    job = {
+        "id": job_id or str(uuid.uuid4()),
+        "type": job_type,
+        "status": "queued",
+        "params": params,
+        "error": None,
+        "result": None,
+        "created_by": user.email,
+        "created_at": now,
+        "updated_at": now,
+        "started_at": None,
+        "finished_at": None,
+        **fields,
+    }
+    await db.jobs.insert_one(job)
+    return job
+
+
+async def enqueue_bulk_import_job(module: str, payload: dict, user: User) -> Dict[str, Any]:
+    runner, sort_key = BULK_IMPORT_RUNNERS[module]
+    entries = payload.get("entries") or []
+    params = {k: v for k, v in payload.items() if k != "entries"}
+    # An empty run validates the target and parameters before queueing
+    base = await runner({**params, "entries": []})
+    if not isinstance(entries, list):
+        raise HTTPException(status_code=400, detail="entries are required")
+    entries = sorted(entries, key=sort_key)
+    job_id = str(uuid.uuid4())
+    chunks = [
+        {"job_id": job_id, "index": i, "entries": entries[start:start + BULK_IMPORT_CHUNK_SIZE]}
+        for i, start in enumerate(range(0, len(entries), BULK_IMPORT_CHUNK_SIZE))
+    ]
+    # Chunks first, so a worker never claims a job with entries missing
+    if chunks:
+        await db.job_chunks.insert_many(chunks)
+    job = await enqueue_job(
+        "bulk-import",
+        user,
+        params,
+        job_id=job_id,
+        module=module,
+        summary={k: base[k] for k in ("module", "year", "month", "overwrite")},
+        chunks=len(chunks),
+        done_chunks=[],
+        total=len(entries),
+        processed=0,
+        inserted=0,
+        skipped_existing=0,
+        validation_errors=0,
+        per_month={},
+        errors=[],
+    )
+    return {"job_id": job["id"], "status": "queued", "total_entries": job["total"]}
+
+
+def _bulk_import_job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job state plus the summary the synchronous import used to return."""
+    per_month_rows = [
+        {
+            "month": key,
+            "inserted": stats.get("inserted", 0),
+            "skipped_existing": stats.get("skipped_existing", 0),
+            "validation_errors": stats.get("validation_errors", 0),
+        }
+        for key, stats in sorted((job.get("per_month") or {}).items())
+    ]
+    result = {
+        **(job.get("summary") or {}),
+        "total_entries": job.get("total", 0),
+        "inserted": job.get("inserted", 0),
+        "skipped_existing": job.get("skipped_existing", 0),
+        "validation_errors": job.get("validation_errors", 0),
+        "per_month": per_month_rows,
+        "errors": job.get("errors") or [],
+    }
+    view = {k: job.get(k) for k in (
+        "id", "type", "module", "status", "total", "processed", "inserted", "skipped_existing",
+        "validation_errors", "error", "created_by", "created_at", "started_at", "finished_at",
+    )}
+    view["errors"] = result["errors"]
+    view["result"] = result
+    return view
+
+
+async def _run_bulk_import_job(job: Dict[str, Any]):
+    runner, _ = BULK_IMPORT_RUNNERS[job["module"]]
+    done = set(job.get("done_chunks") or [])
+    for index in range(job.get("chunks", 0)):
+        if index in done:
+            continue
+        chunk_doc = await db.job_chunks.find_one({"job_id": job["id"], "index": index}, {"_id": 0, "entries": 1})
+        if chunk_doc is None:
+            raise RuntimeError(f"Entries for chunk {index} are missing")
+        chunk = chunk_doc["entries"]
+        start = index * BULK_IMPORT_CHUNK_SIZE
+        result = await runner({**job["params"], "entries": chunk})
+        inc: Dict[str, Any] = {
+            "processed": len(chunk),
+            "inserted": result["inserted"],
+            "skipped_existing": result["skipped_existing"],
+            "validation_errors": result["validation_errors"],
+        }
+        for row in result["per_month"]:
+            for key in ("inserted", "skipped_existing", "validation_errors"):
+                if row[key]:
+                    inc[f"per_month.{row['month']}.{key}"] = row[key]
+        errors = [{**err, "index": err["index"] + start} for err in result["errors"]]
+        now = datetime.now(timezone.utc)
+        await db.jobs.update_one(
+            {"id": job["id"], "done_chunks": {"$ne": index}},
+            {
+                "$inc": inc,
+                "$push": {"errors": {"$each": errors}},
+                "$addToSet": {"done_chunks": index},
+                "$set": {"updated_at": now.isoformat()},
+            },
+        )
+
+
+JOB_RUNNERS = {
+    "bulk-import": _run_bulk_import_job,
+    "report": _run_report_job,
+    "report-mail": _run_report_mail_job,
+}
+# Report rendering moves to report_worker.py processes when REPORT_WORKER is
+# set; otherwise the web process renders queued reports itself.
+WEB_JOB_TYPES = ["bulk-import"] + ([] if REPORT_WORKER_ENABLED else REPORT_JOB_TYPES)
+
+
+def _owned_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Filter matching `job` only while this worker's claim still holds it."""
+    return {"id": job["id"], "lease_owner": job["lease_owner"]}
+
+
+async def _claim_job(job_types: List[str]) -> Optional[Dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    return await db.jobs.find_one_and_update(
+        {
+            "type": {"$in": job_types},
+            "$or": [{"status": "queued"}, {"status": "running", "lease_until": {"$lt": now}}],
+        },
+        {"$set": {
+            "status": "running",
+            "lease_owner": str(uuid.uuid4()),
+            "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS),
+            "updated_at": now.isoformat(),
+        }},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _job_heartbeat(job: Dict[str, Any], stop: threading.Event):
+    """Renew `job`'s lease every JOB_HEARTBEAT_SECONDS until `stop` is set.
+
+    Runs on its own thread through the synchronous driver underneath Motor, so
+    the lease is renewed even while workbook building holds the event loop.
+    """
+    jobs = db.delegate.jobs
+    while not stop.wait(JOB_HEARTBEAT_SECONDS):
+        try:
+            result = jobs.update_one(
+                _owned_job(job),
+                {"$set": {"lease_until": datetime.now(timezone.utc) + timedelta(seconds=JOB_LEASE_SECONDS)}},
+            )
+        except Exception as e:
+            print(f"Job {job['id']}: failed to renew the lease: {e}")
+            continue
+        if not result.matched_count:
+            print(f"Job {job['id']}: lease taken over by another worker")
+            return
+
+
+async def job_worker_loop(job_types: List[str]):
+    while True:
+        try:
+            job = await _claim_job(job_types)
+        except Exception as e:
+            print(f"Job worker: failed to claim a job: {e}")
+            job = None
+        if not job:
+            await asyncio.sleep(JOB_POLL_SECONDS)
+            continue
+        if not job.get("started_at"):
+            await db.jobs.update_one(_owned_job(job), {"$set": {"started_at": datetime.now(timezone.utc).isoformat()}})
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=_job_heartbeat, args=(job, stop_heartbeat), daemon=True)
+        heartbeat.start()
+        try:
+            await JOB_RUNNERS[job["type"]](job)
+            update = {"status": "done"}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Job {job['id']} failed: {e}")
+            update = {"status": "failed", "error": getattr(e, "detail", None) or str(e)}
+        finally:
+            stop_heartbeat.set()
+        await asyncio.get_running_loop().run_in_executor(None, heartbeat.join)
+        now = datetime.now(timezone.utc).isoformat()
+        result = await db.jobs.update_one(
+            _owned_job(job),
+            {"$set": {**update, "finished_at": now, "updated_at": now}, "$unset": {"lease_until": "", "lease_owner": ""}},
+        )
+        if result.matched_count:
+            await db.job_chunks.delete_many({"job_id": job["id"]})
+        else:
+            print(f"Job {job['id']}: lease lost before finishing; leaving the result to its current owner")
+
+
+@api_router.post("/admin/bulk-import/energy")
+async def admin_bulk_import_energy(
+    payload: dict,
+    current_admin: User = Depends(get_current_admin),
+):
+    return await enqueue_bulk_import_job("energy", payload, current_admin)
+
+
+@api_router.post("/admin/bulk-import/line-losses")
+async def admin_bulk_import_line_losses(
+    payload: dict,
+    current_admin: User = Depends(get_current_admin),
+):
+    return await enqueue_bulk_import_job("line-losses", payload, current_admin)
+
+
+@api_router.post("/admin/bulk-import/max-min")
+async def admin_bulk_import_max_min(
+    payload: dict,
+    current_admin: User = Depends(get_current_admin),
+):
+    return await enqueue_bulk_import_job("max-min", payload, current_admin)
+
+
+@api_router.post("/admin/bulk-import/interruptions")
+async def admin_bulk_import_interruptions(
+    payload: dict,
+    current_admin: User = Depends(get_current_admin),
+):
+    return await enqueue_bulk_import_job("interruptions", payload, current_admin)
+
+
+@api_router.get("/admin/jobs/{job_id}")
+async def get_admin_job(job_id: str, current_admin: User = Depends(get_current_admin)):
+    job = await db.jobs.find_one({"id": job_id}, {"_id": 0, "done_chunks": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _bulk_import_job_view(job)
+
+
 @api_router.get("/daily-status")
 async def check_daily_status(current_user: User = Depends(get_current_user)) -> dict:
     try:
@@ -12677,4 +14634,12 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if _job_worker_task is not None:
+        _job_worker_task.cancel()
+    if _mail_sender_task is not None:
+        _mail_sender_task.cancel()
+    _mail_executor.submit(_close_smtp_connection)
+    _mail_executor.shutdown(wait=False)
     client.close()
+    if _chat_parse_pool is not None:
+        _chat_parse_pool.shutdown(cancel_futures=True)
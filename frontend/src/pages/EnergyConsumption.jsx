@@ -43,6 +43,7 @@ export default function EnergyConsumption() {
   const [editingEntry, setEditingEntry] = useState(null);
   const [importPreviewOpen, setImportPreviewOpen] = useState(false);
   const [importData, setImportData] = useState([]);
+  const [importSession, setImportSession] = useState(null);
   const [dailyStatus, setDailyStatus] = useState(null);
   const [showDailyReport, setShowDailyReport] = useState(false);
   const [dailyReportData, setDailyReportData] = useState(null);
@@ -345,6 +346,7 @@ export default function EnergyConsumption() {
         headers: { 'Content-Type': 'multipart/form-data' }
       });
       setImportData(response.data);
+      setImportSession(response.headers['x-import-session'] || null);
       setImportPreviewOpen(true);
     } catch (error) {
       console.error('Import preview failed:', error);
@@ -358,10 +360,15 @@ export default function EnergyConsumption() {
     if (!selectedSheet) return;
     setLoading(true);
     try {
-      await axios.post(`${API}/energy/import-entries`, {
-        sheet_id: selectedSheet.id,
-        entries: importData
-      });
+      if (importSession) {
+        // Rows were kept server-side by the preview
+        await axios.post(`${API}/import-sessions/${importSession}/commit`, {});
+      } else {
+        await axios.post(`${API}/energy/import-entries`, {
+          sheet_id: selectedSheet.id,
+          entries: importData
+        });
+      }
       toast.success('Data imported successfully');
       setImportPreviewOpen(false);
       fetchEntries(selectedSheet.id, year, month); // Refresh
@@ -130,6 +130,7 @@ export default function Interruptions() {
   const [initialized, setInitialized] = useState(false);
   const [importPreviewOpen, setImportPreviewOpen] = useState(false);
   const [importData, setImportData] = useState([]);
+  const [importSession, setImportSession] = useState(null);
   const [selectedImportRows, setSelectedImportRows] = useState({});
   const fileInputRef = useRef(null);
   const [showStickyFeeder, setShowStickyFeeder] = useState(false);
@@ -378,6 +379,7 @@ export default function Interruptions() {
         }
       );
       setImportData(response.data);
+      setImportSession(response.headers['x-import-session'] || null);
       const initialSelected = {};
       response.data.forEach((row, index) => {
         initialSelected[index] = !row.exists;
@@ -400,9 +402,16 @@ export default function Interruptions() {
         setLoading(false);
         return;
       }
-      await axios.post(`${API}/interruptions/import-entries-all`, {
-        entries: selectedEntries
-      });
+      if (importSession) {
+        const exclude = importData
+          .map((_, index) => index)
+          .filter(index => !selectedImportRows[index]);
+        await axios.post(`${API}/import-sessions/${importSession}/commit`, { exclude });
+      } else {
+        await axios.post(`${API}/interruptions/import-entries-all`, {
+          entries: selectedEntries
+        });
+      }
       toast.success('Interruption data imported successfully');
       setImportPreviewOpen(false);
       if (selectedFeeder) {
@@ -61,6 +61,7 @@ export default function LineLosses() {
   const [initialized, setInitialized] = useState(false);
   const [importPreviewOpen, setImportPreviewOpen] = useState(false);
   const [importData, setImportData] = useState([]);
+  const [importSession, setImportSession] = useState(null);
   const [dailyStatus, setDailyStatus] = useState(null);
   const [showDailyReport, setShowDailyReport] = useState(false);
   const [dailyReportData, setDailyReportData] = useState([]);
@@ -385,6 +386,7 @@ export default function LineLosses() {
         headers: { 'Content-Type': 'multipart/form-data' }
       });
       setImportData(response.data);
+      setImportSession(response.headers['x-import-session'] || null);
       setImportPreviewOpen(true);
     } catch (error) {
       console.error('Import preview failed:', error);
@@ -397,10 +399,15 @@ export default function LineLosses() {
   const handleImportConfirm = async () => {
     setLoading(true);
     try {
-      await axios.post(`${API}/import-entries`, {
-        feeder_id: selectedFeeder.id,
-        entries: importData
-      });
+      if (importSession) {
+        // Rows were kept server-side by the preview
+        await axios.post(`${API}/import-sessions/${importSession}/commit`, {});
+      } else {
+        await axios.post(`${API}/import-entries`, {
+          feeder_id: selectedFeeder.id,
+          entries: importData
+        });
+      }
       toast.success('Data imported successfully');
       setImportPreviewOpen(false);
       fetchEntries(selectedFeeder.id, year, month); // Refresh
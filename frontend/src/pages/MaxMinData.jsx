@@ -110,6 +110,7 @@ export default function MaxMinData() {
   const [ictEntries, setIctEntries] = useState({});
   const [importPreviewOpen, setImportPreviewOpen] = useState(false);
   const [importData, setImportData] = useState([]);
+  const [importSession, setImportSession] = useState(null);
   const [dailyStatus, setDailyStatus] = useState(null);
   const [showDailyReport, setShowDailyReport] = useState(false);
   const [dailyReportData, setDailyReportData] = useState([]);
@@ -600,6 +601,7 @@ export default function MaxMinData() {
         headers: { 'Content-Type': 'multipart/form-data' }
       });
       setImportData(response.data);
+      setImportSession(response.headers['x-import-session'] || null);
       setImportPreviewOpen(true);
     } catch (error) {
       console.error('Import preview failed:', error);
@@ -613,10 +615,15 @@ export default function MaxMinData() {
     if (!selectedFeeder) return;
     setLoading(true);
     try {
-      await axios.post(`${API}/max-min/import-entries`, {
-        feeder_id: selectedFeeder.id,
-        entries: importData
-      });
+      if (importSession) {
+        // Rows were kept server-side by the preview
+        await axios.post(`${API}/import-sessions/${importSession}/commit`, {});
+      } else {
+        await axios.post(`${API}/max-min/import-entries`, {
+          feeder_id: selectedFeeder.id,
+          entries: importData
+        });
+      }
       toast.success('Data imported successfully');
       setImportPreviewOpen(false);
       fetchEntries(selectedFeeder.id, year, month);
@@ -82,15 +82,34 @@ export default function Reports() {
     }
   };
 
+  const waitForReportJob = async (jobId, token) => {
+    for (;;) {
+      const jobResp = await axios.get(`${API}/reports/jobs/${encodeURIComponent(jobId)}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      const job = jobResp.data || {};
+      if (job.status === 'done') {
+        return job.result;
+      }
+      if (job.status === 'failed') {
+        const err = new Error(job.error || 'Report job failed');
+        err.response = { data: { detail: job.error } };
+        throw err;
+      }
+      await new Promise(resolve => setTimeout(resolve, 2000));
+    }
+  };
+
   const handleSendEmail = async () => {
     if (!recipientEmail) {
         toast.error("Please enter an email address");
         return;
     }
     
-    // Basic email validation
+    // Basic email validation (several addresses may be separated by commas)
     const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
-    if (!emailRegex.test(recipientEmail)) {
+    const recipients = recipientEmail.split(/[,;]/).map(e => e.trim()).filter(Boolean);
+    if (recipients.length === 0 || !recipients.every(e => emailRegex.test(e))) {
         toast.error("Please enter a valid email address");
         return;
     }
@@ -103,7 +122,7 @@ export default function Reports() {
     setSendingEmail(true);
     try {
         const token = localStorage.getItem('token');
-        await axios.post(`${API}/reports/send-mail`, {
+        const resp = await axios.post(`${API}/reports/send-mail`, {
             email: recipientEmail,
             year,
             month,
@@ -111,7 +130,10 @@ export default function Reports() {
         }, {
             headers: { Authorization: `Bearer ${token}` }
         });
-        toast.success(`Reports sent successfully to ${recipientEmail}`);
+        if (resp.data?.job_id) {
+            await waitForReportJob(resp.data.job_id, token);
+        }
+        toast.success(`Reports queued for delivery to ${recipients.join(', ')}`);
         setEmailDialogOpen(false);
         setRecipientEmail('');
         // Reset selection to all for next time, or keep it? 
@@ -181,22 +203,14 @@ export default function Reports() {
     }
   };
 
-  const downloadReport = async (report, silent = false) => {
-    // Define endpoints for supported reports
-    const endpoints = {
-        'boundary-meter': `/reports/boundary-meter-33kv/${year}/${month}`,
-        'fortnight': `/reports/fortnight/${year}/${month}`,
-        'daily-max-mva': `/reports/daily-max-mva/export/${year}/${month}`,
-        'kpi': `/reports/kpi/export/${year}/${month}`,
-        'line-losses': `/reports/line-losses/export/${year}/${month}`,
-        'new-line-losses': `/reports/new-line-losses/export/${year}/${month}`,
-        'ptr-max-min': `/reports/ptr-max-min-format1/export/${year}/${month}`,
-        'tl-max-loading': `/reports/tl-max-loading-format4/export/${year}/${month}`,
-        'interruptions': `/reports/interruptions/export/${year}/${month}`,
-        'mis-interruptions': `/reports/mis-interruptions/export/${year}/${month}`,
-    };
+  // Reports rendered by the report job queue (see /reports/jobs)
+  const downloadableReports = [
+    'boundary-meter', 'fortnight', 'daily-max-mva', 'kpi', 'line-losses', 'new-line-losses',
+    'ptr-max-min', 'tl-max-loading', 'interruptions', 'mis-interruptions',
+  ];
 
-    if (!endpoints[report.id]) {
+  const downloadReport = async (report, silent = false) => {
+    if (!downloadableReports.includes(report.id)) {
       if (!silent) toast.info(`Export for ${report.title} is coming soon`);
       return false;
     }
@@ -206,7 +220,13 @@ export default function Reports() {
         if (!silent) toast.info(`Generating ${report.title}...`);
         
         const token = localStorage.getItem('token');
-        const response = await axios.get(`${API}${endpoints[report.id]}`, {
+        // The workbook is rendered by a report worker; wait for it, then fetch the file
+        const jobResp = await axios.post(`${API}/reports/jobs`, { report_id: report.id, year, month }, {
+          headers: { Authorization: `Bearer ${token}` }
+        });
+        const jobId = jobResp.data.job_id;
+        await waitForReportJob(jobId, token);
+        const response = await axios.get(`${API}/reports/jobs/${encodeURIComponent(jobId)}/download`, {
           responseType: 'blob',
           headers: { Authorization: `Bearer ${token}` }
         });
@@ -232,7 +252,9 @@ export default function Reports() {
         return true;
       } catch (error) {
         console.error('Export error:', error);
-        if (!silent) toast.error(error.response?.data?.detail ? JSON.parse(await error.response.data.text()).detail : "Failed to export report");
+        const data = error.response?.data;
+        const detail = data instanceof Blob ? JSON.parse(await data.text()).detail : data?.detail;
+        if (!silent) toast.error(detail || "Failed to export report");
         return false;
       } finally {
         if (!silent) setLoading(null);
@@ -472,9 +494,10 @@ export default function Reports() {
                     <Input
                         id="email"
                         type="email"
+                        multiple
                         value={recipientEmail}
                         onChange={(e) => setRecipientEmail(e.target.value)}
-                        placeholder="recipient@example.com"
+                        placeholder="recipient@example.com, another@example.com"
                     />
                 </div>
                 
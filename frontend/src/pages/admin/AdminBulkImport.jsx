@@ -100,6 +100,22 @@ export default function AdminBulkImport() {
   const [previewModule, setPreviewModule] = useState(null);
   const [previewMeta, setPreviewMeta] = useState(null);
   const [previewLoading, setPreviewLoading] = useState(false);
+  const [previewSession, setPreviewSession] = useState(null);
+
+  // Identifies the file and options an Excel preview was made for, so the
+  // import can commit the rows the server kept instead of re-uploading.
+  const excelSessionKey = () =>
+    [
+      moduleId,
+      feederId,
+      sheetId,
+      maxMinFeederId,
+      interruptFeederId,
+      periodType,
+      year,
+      periodType === 'monthly' ? month : '',
+      file ? `${file.name}:${file.size}:${file.lastModified}` : '',
+    ].join('|');
 
   useEffect(() => {
     const bootstrap = async () => {
@@ -127,6 +143,27 @@ export default function AdminBulkImport() {
     bootstrap();
   }, []);
 
+  // Bulk imports run as background jobs; poll until the job finishes,
+  // showing the counts so far as they come in.
+  const waitForImportJob = async (jobId, token) => {
+    for (;;) {
+      const jobResp = await axios.get(`${API}/admin/jobs/${encodeURIComponent(jobId)}`, {
+        headers: {
+          Authorization: `Bearer ${token}`,
+        },
+      });
+      const job = jobResp.data || {};
+      if (job.status === 'done') {
+        return job.result;
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Bulk import failed');
+      }
+      setResult(job.result || null);
+      await new Promise(resolve => setTimeout(resolve, 2000));
+    }
+  };
+
   const performImport = async (overwriteFlag) => {
     const yearInt = parseInt(year, 10);
     const monthInt = parseInt(month, 10);
@@ -171,22 +208,35 @@ export default function AdminBulkImport() {
           toast.error('Excel import is not supported for this module');
           return;
         }
-        const formData = new FormData();
-        formData.append('file', file);
-        const params = new URLSearchParams();
-        if (!Number.isNaN(yearInt)) {
-          params.append('year', String(yearInt));
-        }
-        if (periodType === 'monthly' && !Number.isNaN(monthInt)) {
-          params.append('month', String(monthInt));
+        if (previewSession && previewSession.key === excelSessionKey()) {
+          resp = await axios.post(
+            `${API}/import-sessions/${previewSession.id}/commit`,
+            { overwrite: overwriteFlag },
+            {
+              headers: {
+                Authorization: `Bearer ${token}`,
+              },
+            },
+          );
+          setPreviewSession(null);
+        } else {
+          const formData = new FormData();
+          formData.append('file', file);
+          const params = new URLSearchParams();
+          if (!Number.isNaN(yearInt)) {
+            params.append('year', String(yearInt));
+          }
+          if (periodType === 'monthly' && !Number.isNaN(monthInt)) {
+            params.append('month', String(monthInt));
+          }
+          params.append('overwrite', overwriteFlag ? 'true' : 'false');
+          const url = params.toString() ? `${baseUrl}?${params.toString()}` : baseUrl;
+          resp = await axios.post(url, formData, {
+            headers: {
+              Authorization: `Bearer ${token}`,
+            },
+          });
         }
-        params.append('overwrite', overwriteFlag ? 'true' : 'false');
-        const url = params.toString() ? `${baseUrl}?${params.toString()}` : baseUrl;
-        resp = await axios.post(url, formData, {
-          headers: {
-            Authorization: `Bearer ${token}`,
-          },
-        });
       } else {
         if (!rawPayload.trim()) {
           toast.error('Paste a JSON payload for the selected module');
@@ -227,11 +277,15 @@ export default function AdminBulkImport() {
         });
       }
 
-      setResult(resp.data || null);
+      let data = resp.data || null;
+      if (data && data.job_id) {
+        data = await waitForImportJob(data.job_id, token);
+      }
+      setResult(data);
       toast.success('Bulk import completed');
     } catch (e) {
       console.error(e);
-      const detail = e?.response?.data?.detail || 'Bulk import failed';
+      const detail = e?.response?.data?.detail || e?.message || 'Bulk import failed';
       toast.error(typeof detail === 'string' ? detail : 'Bulk import failed');
     } finally {
       setLoading(false);
@@ -1069,6 +1123,8 @@ export default function AdminBulkImport() {
                     });
                     const rows = Array.isArray(resp.data) ? resp.data : [];
                     setPreviewRows(rows);
+                    const sessionId = resp.headers['x-import-session'];
+                    setPreviewSession(sessionId ? { id: sessionId, key: excelSessionKey() } : null);
                     setPreviewModule(moduleId);
                     if (moduleId === 'max-min' || moduleId === 'station-load') {
                       const feeder = maxMinFeeders.find(f => f.id === maxMinFeederId.trim());
@@ -76,8 +76,10 @@ async def proxy_api(path_name: str, request: Request):
         # Run synchronous request in threadpool to avoid blocking event loop
         r = await run_in_threadpool(make_request)
         
+        # Forward the body exactly as the backend encoded it so the
+        # Content-Encoding/Content-Length headers passed through stay valid.
         return StreamingResponse(
-            r.iter_content(chunk_size=4096),
+            r.raw.stream(4096, decode_content=False),
             status_code=r.status_code,
             headers=dict(r.headers),
             media_type=r.headers.get("content-type")
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# server.py reads these at import; the Motor client does not connect until used
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "mis_test")
+os.environ.setdefault("JWT_SECRET_KEY", "test")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    """Point ``server.db`` at an in-memory mongomock database."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import server
+
+    database = mongomock_motor.AsyncMongoMockClient()["mis_test"]
+    monkeypatch.setattr(server, "db", database)
+    return database
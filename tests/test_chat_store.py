@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime
+
+import server
+
+
+async def _messages(*items):
+    for ts, text in items:
+        yield {"timestamp": ts, "text": text}
+
+
+OLD = (datetime(2025, 2, 10, 10, 0), "400KV NARSAPUR-1 tripped")
+SHARED = (datetime(2025, 3, 2, 9, 30), "220KV THANDUR tripped")
+REPEAT = (datetime(2025, 3, 2, 9, 30), "220KV THANDUR tripped")
+NEW = (datetime(2025, 3, 3, 11, 15), "220KV THANDUR restored")
+
+
+def _texts(cursor):
+    async def collect():
+        return [(m["timestamp"], m["text"]) for m in await cursor.to_list(None)]
+    return collect()
+
+
+def test_upload_preview_only_reads_the_uploaded_messages(mock_db):
+    async def run():
+        await server._ingest_chat_messages(_messages(OLD, SHARED), "substation")
+        window = server._chat_preview_window(2025, 3)
+        ingested = await server._ingest_chat_messages(_messages(SHARED, REPEAT, NEW), "substation", window)
+        from_file = await _texts(server._load_chat_messages("substation", 2025, 3, ingested["hashes"]))
+        stored = await _texts(server._load_chat_messages("substation", 2025, 3))
+        return ingested, from_file, stored
+
+    ingested, from_file, stored = asyncio.run(run())
+    # The repeated message is a second copy, the first one was already stored
+    assert ingested["added"] == 2
+    assert from_file == [SHARED, REPEAT, NEW]
+    assert stored == [OLD, SHARED, REPEAT, NEW]
+
+
+def test_hashes_are_limited_to_the_window(mock_db):
+    async def run():
+        window = server._chat_preview_window(2025, 4)
+        return await server._ingest_chat_messages(_messages(OLD, SHARED, NEW), "substation", window)
+
+    ingested = asyncio.run(run())
+    # The window opens 45 days before April, on Feb 15
+    assert len(ingested["hashes"]) == 2
+    assert ingested["added"] == 3
@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+import server
+
+
+def _client(monkeypatch, thread_minimum_size):
+    compressed_on = []
+    compress = server.JSONCompressionMiddleware._compress
+
+    def recording_compress(self, encoding, body):
+        try:
+            asyncio.get_running_loop()
+            on_loop = True
+        except RuntimeError:
+            on_loop = False
+        compressed_on.append((len(body), on_loop))
+        return compress(self, encoding, body)
+
+    monkeypatch.setattr(server.JSONCompressionMiddleware, "_compress", recording_compress)
+    app = FastAPI()
+    app.add_middleware(server.JSONCompressionMiddleware, minimum_size=1024, thread_minimum_size=thread_minimum_size)
+
+    @app.get("/rows/{count}")
+    def rows(count: int):
+        return JSONResponse([{"date": f"2025-03-{i % 28 + 1:02d}", "max_mw": i * 0.5} for i in range(count)])
+
+    return TestClient(app), compressed_on
+
+
+def test_large_bodies_compress_on_a_thread(monkeypatch):
+    client, compressed_on = _client(monkeypatch, thread_minimum_size=64 * 1024)
+    small = client.get("/rows/100", headers={"Accept-Encoding": "gzip"})
+    large = client.get("/rows/20000", headers={"Accept-Encoding": "gzip"})
+    assert small.headers["content-encoding"] == large.headers["content-encoding"] == "gzip"
+    assert len(json.loads(large.content)) == 20000
+    (small_size, small_on_loop), (large_size, large_on_loop) = compressed_on
+    assert small_size < 64 * 1024 <= large_size
+    assert small_on_loop and not large_on_loop
+
+
+def test_small_bodies_are_left_alone(monkeypatch):
+    client, compressed_on = _client(monkeypatch, thread_minimum_size=64 * 1024)
+    response = client.get("/rows/1", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert compressed_on == []
@@ -0,0 +1,28 @@
+import server
+
+
+def test_lttb_keeps_adjacent_spike_and_dip():
+    ys = [100.0] * 60
+    ys[30] = 500.0
+    ys[31] = -200.0
+    keep = server._lttb_indices(list(range(60)), ys, 10)
+    assert 30 in keep and 31 in keep
+    assert keep == sorted(keep)
+    assert keep[0] == 0 and keep[-1] == 59
+
+
+def test_downsample_docs_unchanged_when_series_fit():
+    docs = [
+        {"feeder_id": "a", "date": f"2025-03-{d:02d}", "max_mw": None if d % 3 == 0 else float(d)}
+        for d in range(1, 11)
+    ]
+    value = lambda doc: doc["max_mw"]
+    assert server._downsample_docs(docs, "feeder_id", value, 10) is docs
+    downsampled = server._downsample_docs(docs, "feeder_id", value, 3)
+    assert [d for d in docs if d["max_mw"] is None] == [d for d in downsampled if d["max_mw"] is None]
+
+
+def test_downsample_columnar_without_primary_data_keeps_axis():
+    dates = [f"2025-03-{d:02d}" for d in range(1, 11)]
+    assert server._downsample_columnar(dates, [[None] * 10, [None] * 10], 3) == list(range(10))
+    assert server._downsample_columnar(dates, [], 3) == list(range(10))
@@ -0,0 +1,23 @@
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def test_export_range_is_end_exclusive():
+    assert server.export_range("2024-04-01", "2025-03-31") == ("2024-04-01", "2025-04-01")
+
+
+def test_export_range_allows_a_leap_year():
+    assert server.export_range("2024-01-01", "2024-12-31") == ("2024-01-01", "2025-01-01")
+
+
+@pytest.mark.parametrize("start,end", [
+    ("2023-01-01", "2024-12-31"),
+    ("2024-03-31", "2024-03-30"),
+    ("2024-3-1", "2024-03-31"),
+])
+def test_export_range_rejects(start, end):
+    with pytest.raises(HTTPException) as error:
+        server.export_range(start, end)
+    assert error.value.status_code == 400
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.responses import Response
+
+import server
+
+USER = server.User(email="operator@example.com", id="u1")
+
+
+def _stage(rows):
+    return server.stage_import_session(Response(), "max-min", "f1", rows, USER)
+
+
+def test_concurrent_commits_import_once(mock_db, monkeypatch):
+    calls = []
+
+    async def slow_import(payload, current_user):
+        calls.append(len(payload.entries))
+        await asyncio.sleep(0.05)
+        return {"imported": len(payload.entries)}
+
+    monkeypatch.setattr(server, "import_max_min_entries", slow_import)
+
+    async def run():
+        session_id = await _stage([{"date": "2025-03-01"}, {"date": "2025-03-02"}])
+        results = await asyncio.gather(
+            server.commit_import_session(session_id, None, USER),
+            server.commit_import_session(session_id, None, USER),
+            return_exceptions=True,
+        )
+        return results, await mock_db.import_sessions.count_documents({}), await mock_db.import_session_rows.count_documents({})
+
+    results, sessions, chunks = asyncio.run(run())
+    assert calls == [2]
+    assert {"imported": 2} in results
+    errors = [r for r in results if isinstance(r, HTTPException)]
+    assert [e.status_code for e in errors] == [409]
+    assert sessions == 0 and chunks == 0
+
+
+def test_failed_commit_releases_session(mock_db, monkeypatch):
+    attempts = []
+
+    async def flaky_import(payload, current_user):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise HTTPException(status_code=500, detail="write failed")
+        return {"imported": len(payload.entries)}
+
+    monkeypatch.setattr(server, "import_max_min_entries", flaky_import)
+
+    async def run():
+        session_id = await _stage([{"date": "2025-03-01"}])
+        with pytest.raises(HTTPException):
+            await server.commit_import_session(session_id, None, USER)
+        return await server.commit_import_session(session_id, None, USER)
+
+    assert asyncio.run(run()) == {"imported": 1}
+    assert len(attempts) == 2
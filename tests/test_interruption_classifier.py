@@ -0,0 +1,362 @@
+"""Regression tests for the compiled interruption keyword classifier.
+
+Runs the original keyword-list implementations of the chat message
+classifier, the interruption metadata extraction and the MIS report
+categorisation (kept verbatim below as the reference) side by side with the
+KeywordScanner-based versions in server.py over a corpus of real-looking
+messages plus a seeded synthetic one, and fails on any output that differs.
+"""
+import random
+import re
+from typing import Any, Dict, List, Optional
+
+from server import (
+    _split_cause_and_relay,
+    _classify_interruption_message,
+    _extract_interruption_metadata,
+    classify_interruption_entry,
+    INTERRUPTION_KEYWORDS,
+)
+
+# Synthetic messages per run, on top of the built-in corpus
+CASES = 5000
+
+
+# ---------------------------------------------------------
+# Reference implementations (pre-compilation)
+# ---------------------------------------------------------
+
+def reference_classify_interruption_message(text: str):
+    s = text.lower()
+    ignore_keywords = [
+        "image omitted",
+        "video omitted",
+        "excel",
+        ".xlsx",
+        "data upload",
+        "data uploaded",
+        "material received",
+    ]
+    s_clean = s
+    for k in ignore_keywords:
+        s_clean = s_clean.replace(k, "")
+    if not s_clean.strip():
+        return None
+    if "lc status:" in s_clean:
+        return None
+    if "stood ok" in s_clean or "line stood ok" in s_clean:
+        return "restore"
+    if "a/r success" in s_clean:
+        return "outage"
+    outage_keywords = [
+        "tripped",
+        "trip",
+        "outage",
+        "interruption",
+        "failed",
+        "shutdown",
+        "shut down",
+        "hand tripped",
+        "hand-tripped",
+        "protection operated",
+        "busbar protection optd",
+        "breakdown declared",
+        "blast occurred",
+        "a/r kept in off condition",
+        "under breakdown condition",
+        "lc issued",
+        "lc applied",
+        "nbfc issued",
+        "under lc",
+        "line clear issued",
+        "line clear for",
+        "taken out",
+        "taken for shutdown",
+        "shutdown type: planned",
+        "shutdown type: emergency",
+    ]
+    restore_keywords = [
+        "charged",
+        "charged at",
+        "normalized",
+        "normalised",
+        "revived",
+        "restored",
+        "back",
+        "resumed",
+        "energised",
+        "energized",
+        "nbfc returned",
+        "lc returned",
+        "line clear returned",
+        "taken into service",
+        "taken in to service",
+        "put in to service",
+        "put into service",
+        "breaker taken into service",
+        "line stood ok",
+        "stood ok",
+    ]
+    has_outage = any(k in s_clean for k in outage_keywords)
+    has_restore = any(k in s_clean for k in restore_keywords)
+    if has_outage and not has_restore:
+        return "outage"
+    if has_restore and not has_outage:
+        return "restore"
+    return None
+
+
+def reference_extract_interruption_metadata(
+    outage_text: str, restore_text: Optional[str]
+) -> Dict[str, Any]:
+    base = outage_text or ""
+    restore = restore_text or ""
+    cause, relay = _split_cause_and_relay(base)
+    lower_both = (base + " " + restore).lower()
+
+    m_bay = re.search(r"(\d+-\d+)\s*bay\s+under\s+lc", base, flags=re.IGNORECASE)
+    if m_bay:
+        bay_id = m_bay.group(1)
+        cause = f"LC Issued on {bay_id} Bay"
+        if "4-14-52" in lower_both and "replacement" in lower_both:
+            relay = "for replacement of B ph limb of breaker 4-14-52"
+        elif "replacement" in lower_both and not relay:
+            relay = f"for replacement of breaker {bay_id}-52"
+
+    breakdown = "YES" if (
+        "breakdown declared" in lower_both
+        or "under breakdown condition" in lower_both
+    ) else "NO"
+
+    fault_identified = ""
+    fault_location = ""
+
+    m = re.search(r"(\d+(?:\.\d+)?)\s*km", base, flags=re.IGNORECASE)
+    if not m:
+        m = re.search(
+            r"distance\s*=?\s*(\d+(?:\.\d+)?)\s*km", base, flags=re.IGNORECASE
+        )
+    if m:
+        km_val = m.group(1)
+        fault_location = f"{km_val}km"
+
+    fault_keywords = [
+        "fault identified",
+        "flashover",
+        "flash over",
+        "conductor",
+        "insulator",
+        "oil leakage",
+        "pole damage",
+    ]
+    if any(k in lower_both for k in fault_keywords):
+        for sentence in re.split(r"[\.!?]+", base + " " + restore):
+            if any(k in sentence.lower() for k in fault_keywords):
+                fault_identified = sentence.strip()
+                break
+
+    if not fault_identified:
+        fault_identified = "-"
+    if not fault_location:
+        fault_location = "-"
+
+    remark_phrases = [
+        ("charged as per ld instructions", "Charged as per LD instructions"),
+        ("informed to ld", "Informed to LD"),
+        ("busbar charged through tie", "Busbar charged through tie"),
+        ("pir replacement done", "PIR replacement done"),
+        ("oil leakage arrested", "Oil leakage arrested"),
+        ("line stood ok", "Line stood OK"),
+        ("stood ok", "Stood OK"),
+        ("taken into service", "Taken into service"),
+        ("taken in to service", "Taken into service"),
+        ("put in to service", "Put into service"),
+        ("put into service", "Put into service"),
+    ]
+    remarks_parts: List[str] = []
+    for needle, label in remark_phrases:
+        if needle in lower_both and label not in remarks_parts:
+            remarks_parts.append(label)
+    remarks = ". ".join(remarks_parts) if remarks_parts else ""
+    action_taken = remarks
+
+    return {
+        "cause_of_interruption": cause,
+        "relay_indications_lc_work": relay,
+        "breakdown_declared": breakdown,
+        "fault_identified_during_patrolling": fault_identified,
+        "fault_location": fault_location,
+        "remarks": remarks,
+        "action_taken": action_taken,
+    }
+
+
+def reference_combined_text(entry: Dict[str, Any]) -> str:
+    data = entry.get("data") or {}
+    parts = [
+        data.get("cause_of_interruption"),
+        data.get("relay_indications_lc_work"),
+        data.get("remarks"),
+        data.get("description"),
+        data.get("action_taken"),
+    ]
+    return " ".join(str(p) for p in parts if p) or ""
+
+def reference_classify_category(entry: Dict[str, Any]) -> str:
+    data = entry.get("data") or {}  # the report reads the loop's ``data``, i.e. this entry's
+    combined = reference_combined_text(entry)
+    lower = combined.lower()
+    breakdown_flag = False
+    flag_val = str(data.get("breakdown_declared") or "").strip().lower()
+    if flag_val.startswith("y"):
+        breakdown_flag = True
+    if "breakdown declared" in lower or "under breakdown condition" in lower:
+        breakdown_flag = True
+    if breakdown_flag:
+        return "breakdown"
+    lc_nbfc_keywords = [
+        "lc issued",
+        "lc applied",
+        "under lc",
+        "line clear",
+        "line clear for",
+        "nbfc issued",
+        "nbfc applied",
+        "under nbfc",
+        "nbfc for",
+        "nbfc returned",
+        "hand tripped",
+        "hand trip",
+        "hand-tripped",
+    ]
+    if any(k in lower for k in lc_nbfc_keywords):
+        return "lc_nbfc_ht"
+    return "faulty_tripping"
+
+def reference_classify_lc_nbfc_label(entry: Dict[str, Any]) -> str:
+    combined = reference_combined_text(entry)
+    lower = combined.lower()
+    if "nbfc" in lower:
+        return "NBFC"
+    ht_keywords = [
+        "hand tripped",
+        "hand trip",
+        "hand-tripped",
+        " ht ",
+        "(ht",
+        "ht)",
+    ]
+    if any(k in lower for k in ht_keywords):
+        return "HT"
+    return "LC"
+
+
+def reference_classify_interruption_entry(entry):
+    category = reference_classify_category(entry)
+    label = reference_classify_lc_nbfc_label(entry) if category == "lc_nbfc_ht" else None
+    return category, label
+
+
+# ---------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------
+
+CORPUS = [
+    "",
+    "   ",
+    "image omitted",
+    "IMAGE OMITTED",
+    "<Media omitted> video omitted",
+    "Data uploaded to portal",
+    "excel sheet of 220KV Thandur tripped",
+    ".xlexcelsx",
+    "imagimage omittede omitted tripped",
+    "400KV Narsapur-1 tripped at 10:35 hrs on Distance protection Z1, distance = 12.5 km",
+    "400KV Narsapur-1 charged at 11:02 hrs. Line stood OK.",
+    "220KV Thandur hand tripped at 09:00 for LC work",
+    "220KV Thandur hand-tripped (HT) due to hot spot",
+    "LC issued on 4-14 bay under LC for replacement of breaker",
+    "4-14 bay under LC for replacement of B ph limb 4-14-52",
+    "NBFC issued to TL gang. NBFC returned at 17:40",
+    "LC status: returned",
+    "A/R success on Y ph, line stood ok",
+    "A/R success at 12:10",
+    "A/R kept in off condition",
+    "ICT-1 taken out for shutdown. Shutdown type: Planned",
+    "ICT-1 taken into service at 18:00 as per LD instructions, informed to LD",
+    "Bus reactor put in to service",
+    "Busbar protection optd. Busbar charged through tie",
+    "Breakdown declared. Flashover observed on insulator string at loc 123.",
+    "under breakdown condition; conductor snapped, pole damage at 3.2km",
+    "Oil leakage arrested, PIR replacement done. Taken in to service.",
+    "line clear for 220KV bay; line clear returned",
+    "back feed",
+    "feedback received",
+    "tripped and restored",
+    "Fault identified during patrolling: flash over at tower 45! Charged as per LD instructions",
+    "work under nbfc, hand trip ht) done",
+    "(ht work",
+]
+
+WORDS = sorted({k for keywords in INTERRUPTION_KEYWORDS.values() for k in keywords}) + [
+    "400kv", "narsapur-1", "220kv", "thandur", "ict-1", "at", "10:35", "hrs", "on", "due", "to",
+    "km", "5.5km", "distance", "=", "12", "bay", "4-14", "4-14-52", "replacement", "ht", "lc", "nbfc",
+    ".", "!", "?", "(", ")", "-", "*", "LINE", "Stood", "OK", "Tripped", "image", "omitted", "ex", "cel",
+]
+
+
+def random_text(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(0, 12))]
+    sep = rng.choice([" ", " ", "", ". ", ", "])
+    text = sep.join(words)
+    if rng.random() < 0.3:
+        text = text.upper() if rng.random() < 0.5 else text.title()
+    return text
+
+
+def random_entry(rng, text):
+    data = {}
+    for field in ("cause_of_interruption", "relay_indications_lc_work", "remarks", "description", "action_taken"):
+        if rng.random() < 0.5:
+            data[field] = text if rng.random() < 0.5 else random_text(rng)
+    if rng.random() < 0.3:
+        data["breakdown_declared"] = rng.choice(["YES", "NO", "yes", " y", "", None, "-"])
+    return {"data": data}
+
+
+def synthetic_corpus(cases, seed):
+    rng = random.Random(seed)
+    for text in CORPUS:
+        yield text, rng.choice(CORPUS + [None])
+    for _ in range(cases):
+        yield random_text(rng), random_text(rng) if rng.random() < 0.7 else None
+
+
+# ---------------------------------------------------------
+# Driver
+# ---------------------------------------------------------
+
+def check(outage, restore, rng, failures):
+    pairs = [
+        ("classify", outage, reference_classify_interruption_message, _classify_interruption_message, (outage,)),
+        ("metadata", (outage, restore), reference_extract_interruption_metadata, _extract_interruption_metadata, (outage, restore)),
+    ]
+    entry = random_entry(rng, outage)
+    pairs.append(("entry", entry, reference_classify_interruption_entry, classify_interruption_entry, (entry,)))
+    for name, label, reference, engine, args in pairs:
+        expected = reference(*args)
+        actual = engine(*args)
+        if expected != actual or list(expected or ()) != list(actual or ()):
+            failures.append((name, label, expected, actual))
+
+
+def test_classifier_matches_reference():
+    rng = random.Random(0)
+    failures = []
+    for outage, restore in synthetic_corpus(CASES, seed=0):
+        check(outage, restore, rng, failures)
+    report = "\n".join(
+        f"{name} {label!r}\n  expected: {expected!r}\n  actual:   {actual!r}"
+        for name, label, expected, actual in failures[:5]
+    )
+    assert not failures, f"{len(failures)} mismatches\n{report}"
@@ -0,0 +1,50 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import server
+
+USER = server.User(email="operator@example.com", id="u1")
+
+
+def _aware(value):
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def test_lease_is_renewed_while_a_runner_blocks_the_loop(mock_db, monkeypatch):
+    monkeypatch.setattr(server, "JOB_LEASE_SECONDS", 0.4)
+    monkeypatch.setattr(server, "JOB_HEARTBEAT_SECONDS", 0.1)
+    leases = []
+
+    async def blocking_render(job):
+        # Synchronous work longer than the lease, like a large openpyxl build
+        time.sleep(1.0)
+        row = mock_db.delegate.jobs.find_one({"id": job["id"]})
+        leases.append(_aware(row["lease_until"]) - datetime.now(timezone.utc))
+
+    monkeypatch.setitem(server.JOB_RUNNERS, "report", blocking_render)
+
+    async def run():
+        job = await server.enqueue_job("report", USER, {})
+        worker = asyncio.create_task(server.job_worker_loop(["report"]))
+        try:
+            for _ in range(100):
+                row = await mock_db.jobs.find_one({"id": job["id"]})
+                if row["status"] == "done":
+                    return row
+                await asyncio.sleep(0.05)
+        finally:
+            worker.cancel()
+
+    row = asyncio.run(run())
+    assert row["status"] == "done"
+    assert leases and leases[0].total_seconds() > 0
+    assert "lease_owner" not in row
+
+
+def test_report_mail_subject():
+    assert server._report_mail_subject(2025, 3, None) == "MIS Reports of March 2025"
+    assert server._report_mail_subject(2025, 3, ["kpi"]) == "MIS Report of KPI of Mar-2025"
+    assert server._report_mail_subject(2025, 3, ["kpi", "boundary-meter"]) == (
+        "MIS Reports of KPI, Boundary Meter reading of Mar-2025"
+    )
@@ -0,0 +1,159 @@
+"""End-to-end test of the mail outbox against a local SMTP stand-in.
+
+Starts a minimal SMTP server on 127.0.0.1, points the SMTP fallback at it
+(no Gmail API credentials, SMTP_USE_TLS=0), queues a report bundle for
+several recipients plus an OTP mail in an in-memory database, and runs the
+outbox sender until the queue drains. The stand-in rejects the first
+FAIL_FIRST DATA commands with a 451 so the retry/backoff path is exercised.
+Every recipient must get exactly one copy with intact attachments.
+"""
+import asyncio
+import os
+import time
+from email import message_from_bytes
+
+import server
+
+RECIPIENTS = 5
+FAIL_FIRST = 2
+TIMEOUT_SECONDS = 30.0
+SENDER = "mis-portal@example.com"
+
+
+class SmtpStandIn:
+    """Just enough of RFC 5321 for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    def __init__(self, fail_first: int = 0):
+        self.fail_first = fail_first
+        self.messages = []
+        self.connections = 0
+        self.rejected = 0
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write((line + "\r\n").encode())
+            await writer.drain()
+
+        await reply("220 localhost stand-in ready")
+        mail_from, rcpts = None, []
+        while True:
+            raw = await reader.readline()
+            if not raw:
+                break
+            command = raw.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                await reply("250 localhost")
+            elif verb == "MAIL":
+                mail_from, rcpts = command[10:].strip("<> "), []
+                await reply("250 OK")
+            elif verb == "RCPT":
+                rcpts.append(command[8:].strip("<> "))
+                await reply("250 OK")
+            elif verb == "DATA":
+                await reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    line = await reader.readline()
+                    if line in (b".\r\n", b".\n", b""):
+                        break
+                    lines.append(line[1:] if line.startswith(b"..") else line)
+                if self.rejected < self.fail_first:
+                    self.rejected += 1
+                    await reply("451 Try again later")
+                else:
+                    self.messages.append((mail_from, rcpts, b"".join(lines)))
+                    await reply("250 Queued")
+            elif verb == "RSET":
+                mail_from, rcpts = None, []
+                await reply("250 OK")
+            elif verb == "NOOP":
+                await reply("250 OK")
+            elif verb == "QUIT":
+                await reply("221 Bye")
+                break
+            else:
+                await reply("502 Command not implemented")
+        writer.close()
+
+
+def _attachments(raw: bytes):
+    message = message_from_bytes(raw)
+    return {
+        part.get_filename() or part.get("Content-Disposition", "").split("filename=")[-1].strip(): part.get_payload(decode=True)
+        for part in message.walk()
+        if "attachment" in (part.get("Content-Disposition") or "")
+    }
+
+
+async def _drain_outbox(smtp: SmtpStandIn):
+    attachments = [
+        ("KPI_Report_March_2025.xlsx", os.urandom(50_000)),
+        ("generation_errors.txt", b"Error generating Boundary Meter Report: 33KV Sheet not found\n"),
+    ]
+    addresses = [f"user{i}@example.com" for i in range(RECIPIENTS)]
+    report_ids = await server.send_reports_email(addresses, attachments, "MIS Report of KPI of Mar-2025")
+    await server.send_otp_email("someone@example.com", "123456", reason="signup")
+
+    start = time.perf_counter()
+    sender = asyncio.create_task(server.mail_sender_loop())
+    try:
+        while time.perf_counter() - start < TIMEOUT_SECONDS:
+            pending = await server.db.mail_outbox.count_documents({"status": {"$in": ["queued", "sending"]}})
+            if not pending:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        sender.cancel()
+    rows = await server.db.mail_outbox.find({}, {"_id": 0}).to_list(None)
+    return attachments, addresses, report_ids, rows
+
+
+def test_outbox_delivers_each_mail_once(mock_db, monkeypatch):
+    for key in ("SMTP_PASSWORD", "GOOGLE_CLIENT_ID", "GOOGLE_CLIENT_SECRET", "GOOGLE_REFRESH_TOKEN"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setattr(server, "MAIL_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(server, "MAIL_RETRY_BASE_SECONDS", 0.1)
+    smtp = SmtpStandIn(fail_first=FAIL_FIRST)
+
+    async def run():
+        await smtp.start()
+        monkeypatch.setenv("SMTP_SERVER", "127.0.0.1")
+        monkeypatch.setenv("SMTP_PORT", str(smtp.port))
+        monkeypatch.setenv("SMTP_USE_TLS", "0")
+        monkeypatch.setenv("SMTP_EMAIL", SENDER)
+        try:
+            return await _drain_outbox(smtp)
+        finally:
+            server._close_smtp_connection()
+            await smtp.stop()
+
+    attachments, addresses, report_ids, rows = asyncio.run(run())
+
+    assert [r for r in rows if r["status"] != "sent"] == []
+    assert smtp.rejected == FAIL_FIRST
+    assert sum(r["attempts"] for r in rows) == FAIL_FIRST
+    delivered = {}
+    for _, rcpts, raw in smtp.messages:
+        for rcpt in rcpts:
+            delivered.setdefault(rcpt, []).append(raw)
+    for address in addresses:
+        assert len(delivered.get(address, [])) == 1, address
+        raw = delivered[address][0]
+        assert message_from_bytes(raw)["To"] == address
+        assert _attachments(raw) == dict(attachments)
+    # The OTP mail goes to the portal's own address
+    assert len(delivered.get(SENDER, [])) == 1
+    assert {r["id"] for r in rows} >= set(report_ids) and len(set(report_ids)) == RECIPIENTS
@@ -0,0 +1,48 @@
+import asyncio
+
+import server
+
+
+def _entry(feeder_id, date):
+    return {"id": f"{feeder_id}-{date}", "feeder_id": feeder_id, "date": date, "max_mw": 1.0}
+
+
+def test_read_falls_back_per_feeder_month(mock_db, monkeypatch):
+    monkeypatch.setattr(server, "MONTH_BUCKETS_ENABLED", True)
+
+    async def run():
+        await mock_db.max_min_feeders.insert_many([{"id": "a"}, {"id": "b"}])
+        await mock_db.max_min_entries.insert_many(
+            [_entry(f, d) for f in ("a", "b") for d in ("2025-03-01", "2025-03-02", "2025-04-01")]
+        )
+        # Only feeder a, March, has been written since the flag went on
+        await server.refresh_month_buckets("max_min_entries", "a", ["2025-03-01"])
+        everything = await server.read_month_entries("max_min_entries", "2025-03-01", "2025-05-01")
+        only_b = await server.read_month_entries("max_min_entries", "2025-03-01", "2025-04-01", ["b"])
+        return everything, only_b
+
+    everything, only_b = asyncio.run(run())
+    assert sorted(e["id"] for e in everything) == sorted(
+        f"{f}-{d}" for f in ("a", "b") for d in ("2025-03-01", "2025-03-02", "2025-04-01")
+    )
+    assert sorted(e["id"] for e in only_b) == ["b-2025-03-01", "b-2025-03-02"]
+
+
+def test_failed_refresh_drops_stale_bucket(mock_db, monkeypatch):
+    monkeypatch.setattr(server, "MONTH_BUCKETS_ENABLED", True)
+
+    async def run():
+        await mock_db.max_min_feeders.insert_one({"id": "a"})
+        await mock_db.max_min_entries.insert_one(_entry("a", "2025-03-01"))
+        await server.refresh_month_buckets("max_min_entries", "a", ["2025-03-01"])
+        await mock_db.max_min_entries.insert_one(_entry("a", "2025-03-02"))
+
+        async def broken(*args):
+            raise RuntimeError("write failed")
+
+        monkeypatch.setattr(server, "write_month_bucket", broken)
+        await server.refresh_month_buckets("max_min_entries", "a", ["2025-03-02"])
+        return await server.read_month_entries("max_min_entries", "2025-03-01", "2025-04-01", ["a"])
+
+    entries = asyncio.run(run())
+    assert [e["id"] for e in entries] == ["a-2025-03-01", "a-2025-03-02"]
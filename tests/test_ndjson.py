@@ -0,0 +1,27 @@
+import asyncio
+import json
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+import server
+
+USER = server.User(email="operator@example.com", id="u1")
+
+
+def test_ndjson_entries_are_not_capped(mock_db, monkeypatch):
+    # The JSON list stops at 1000 entries; the stream carries the whole range
+    monkeypatch.setitem(server.app.dependency_overrides, server.get_current_user, lambda: USER)
+    first = date(2020, 1, 1)
+    docs = [
+        {"id": str(i), "feeder_id": "f1", "date": (first + timedelta(days=i)).isoformat()}
+        for i in range(1500)
+    ]
+    asyncio.run(mock_db.entries.insert_many(docs))
+    response = TestClient(server.app).get(
+        "/api/entries", params={"feeder_id": "f1"}, headers={"Accept": server.NDJSON_MEDIA_TYPE}
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.headers["content-type"].startswith(server.NDJSON_MEDIA_TYPE)
+    assert len(lines) == 1500
+    assert lines[-1]["id"] == "1499"
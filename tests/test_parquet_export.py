@@ -0,0 +1,58 @@
+import io
+import os
+
+import pytest
+
+import server
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# (fixture name, columns, values per column). The fixtures were written by
+# write_parquet and read back with pyarrow; the byte comparison keeps the
+# encoder from drifting without needing pyarrow installed.
+CASES = [
+    (
+        "mixed_types",
+        ["id", "max_mw", "feeder"],
+        [[1, None, 3, -2**40], [1.5, None, 2, -0.25], ["Feeder 1", None, "ఫీడర్", "x"]],
+    ),
+    ("empty", ["date", "max_mw"], [[], []]),
+    ("all_null", ["remarks"], [[None, None]]),
+    # More than 14 columns takes the long list header in schema and row group
+    ("wide", [f"c{i:02d}" for i in range(20)], [[i, None, i * 0.5] for i in range(20)]),
+]
+
+
+def _encode(columns, data):
+    buffer = io.BytesIO()
+    server.write_parquet(buffer, columns, data)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("name,columns,data", CASES, ids=[c[0] for c in CASES])
+def test_parquet_matches_fixture(name, columns, data):
+    with open(os.path.join(FIXTURES, f"{name}.parquet"), "rb") as f:
+        assert _encode(columns, data) == f.read()
+
+
+@pytest.mark.parametrize("name,columns,data", CASES, ids=[c[0] for c in CASES])
+def test_parquet_reads_back_with_pyarrow(name, columns, data):
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(io.BytesIO(_encode(columns, data)))
+    assert table.column_names == columns
+    assert table.num_rows == (len(data[0]) if data else 0)
+    for column, values in zip(columns, data):
+        assert table.column(column).to_pylist() == values
+
+
+def test_parquet_logical_types_with_pyarrow():
+    pq = pytest.importorskip("pyarrow.parquet")
+    name, columns, data = CASES[0]
+    schema = pq.read_table(io.BytesIO(_encode(columns, data))).schema
+    assert [str(t) for t in schema.types] == ["int64", "double", "string"]
+
+
+def test_parquet_column_types():
+    assert server._parquet_column_values([1, None, 2])[0] == server._PARQUET_INT64
+    assert server._parquet_column_values([1, 2.5])[0] == server._PARQUET_DOUBLE
+    assert server._parquet_column_values(["a", 1])[:2] == (server._PARQUET_BYTE_ARRAY, server._PARQUET_UTF8)
@@ -0,0 +1,82 @@
+import io
+
+import pytest
+from openpyxl import load_workbook
+from openpyxl.worksheet.datavalidation import DataValidation
+
+import server
+
+
+def _layout(wb):
+    ws = wb.active
+    ws.title = "Report"
+    server.merge_styled(ws, 1, 1, 1, 4, "Title", server.report_style(wb, "MIS Title"))
+    server.write_styled_row(ws, 2, ["A", "B", "C", "D"], server.report_style(wb, "MIS Bold Boxed"))
+    ws.freeze_panes = "B3"
+    ws.page_setup.orientation = "landscape"
+    ws.page_setup.fitToWidth = 1
+    ws.sheet_properties.pageSetUpPr.fitToPage = True
+    ws.sheet_properties.tabColor = "1072BA"
+    ws.page_margins.left = 0.3
+    ws.print_title_rows = "1:2"
+    ws.print_area = "A1:D20"
+    ws.oddHeader.center.text = "MIS"
+    ws.column_dimensions["B"].width = 30
+    ws.column_dimensions["C"].hidden = True
+    ws.row_dimensions[2].height = 40
+    wb.create_sheet("Hidden").sheet_state = "hidden"
+
+
+def _saved(wb):
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return load_workbook(io.BytesIO(buffer.getvalue()))
+
+
+def _settings(wb):
+    ws = wb["Report"]
+    return {
+        "freeze": ws.freeze_panes,
+        "orientation": ws.page_setup.orientation,
+        "fit_width": ws.page_setup.fitToWidth,
+        "fit_to_page": ws.sheet_properties.pageSetUpPr.fitToPage,
+        "tab": ws.sheet_properties.tabColor.rgb,
+        "margin": ws.page_margins.left,
+        "titles": ws.print_title_rows,
+        "area": ws.print_area,
+        "header": ws.oddHeader.center.text,
+        "width": ws.column_dimensions["B"].width,
+        "hidden_col": ws.column_dimensions["C"].hidden,
+        "height": ws.row_dimensions[2].height,
+        "merged": [str(r) for r in ws.merged_cells.ranges],
+        "title_font": ws["A1"].font.b,
+        "hidden_sheet": wb["Hidden"].sheet_state,
+    }
+
+
+@pytest.mark.parametrize("clone", [True, False])
+def test_clone_keeps_sheet_settings(monkeypatch, clone):
+    # clone=False is the path taken under an untested openpyxl version
+    monkeypatch.setattr(server, "REPORT_TEMPLATE_CLONE", clone)
+    template = server.ReportTemplate(_layout)
+    built = server.Workbook()
+    _layout(built)
+    assert _settings(_saved(template.new_workbook())) == _settings(_saved(built))
+
+
+def test_clone_is_independent_of_template():
+    template = server.ReportTemplate(_layout)
+    first = template.new_workbook()
+    first["Report"].freeze_panes = "C5"
+    first["Report"]["A2"] = "changed"
+    second = template.new_workbook()
+    assert second["Report"].freeze_panes == "B3"
+    assert second["Report"]["A2"].value == "A"
+
+
+def test_unsupported_features_fail_at_build():
+    def layout(wb):
+        wb.active.add_data_validation(DataValidation(type="list", formula1='"a,b"'))
+
+    with pytest.raises(ValueError, match="data validation"):
+        server.ReportTemplate(layout)
@@ -0,0 +1,820 @@
+"""Equivalence tests for the vectorised Max-Min statistics engines.
+
+Runs the original per-entry implementations of the period, standard and KPI
+statistics and of the double-circuit / ICT coincident-peak logic (kept
+verbatim below as the reference) side by side with the engines in server.py
+on a seeded synthetic corpus, and fails on any output that differs in value,
+type or key order. NaN, signed zero and infinities are compared exactly.
+"""
+import math
+import random
+
+import pytest
+
+from server import (
+    get_float,
+    get_float_safe,
+    normalize_time,
+    calculate_period_stats,
+    calculate_standard_stats,
+    calculate_kpi_stats,
+    determine_leader,
+    calculate_coincident_stats,
+    FeederMonthSeries,
+    max_min_standard_stats,
+)
+
+# Synthetic feeder-months per run; each is checked for every feeder type
+CASES = 300
+
+
+# ---------------------------------------------------------
+# Reference implementations (pre-vectorisation)
+# ---------------------------------------------------------
+
+def reference_calculate_period_stats(period_entries, feeder_type):
+    stats = {}
+    
+    if feeder_type == 'bus_station':
+        # Initialize stats with defaults
+        stats = {
+            'max_400kv': -float('inf'), 'max_400kv_date': '-', 'max_400kv_time': '-',
+            'min_400kv': float('inf'), 'min_400kv_date': '-', 'min_400kv_time': '-',
+            'max_220kv': -float('inf'), 'max_220kv_date': '-', 'max_220kv_time': '-',
+            'min_220kv': float('inf'), 'min_220kv_date': '-', 'min_220kv_time': '-',
+            'max_load': -float('inf'), 'max_load_date': '-', 'max_load_time': '-', 'max_load_mvar': '-'
+        }
+
+        # 1. Find Max/Min Values
+        for e in period_entries:
+            d = e.get('data') or {}
+            
+            # 400KV
+            v = get_float((d.get('max_bus_voltage_400kv') or {}).get('value'))
+            if v is not None and v > stats['max_400kv']: stats['max_400kv'] = v
+            v = get_float((d.get('min_bus_voltage_400kv') or {}).get('value'))
+            if v is not None and v < stats['min_400kv']: stats['min_400kv'] = v
+            
+            # 220KV
+            v = get_float((d.get('max_bus_voltage_220kv') or {}).get('value'))
+            if v is not None and v > stats['max_220kv']: stats['max_220kv'] = v
+            v = get_float((d.get('min_bus_voltage_220kv') or {}).get('value'))
+            if v is not None and v < stats['min_220kv']: stats['min_220kv'] = v
+
+            # Load (Independent)
+            v = get_float((d.get('station_load') or {}).get('max_mw'))
+            if v is not None and v > stats['max_load']:
+                stats['max_load'] = v
+                stats['max_load_date'] = e['date']
+                stats['max_load_time'] = (d.get('station_load') or {}).get('time', '-')
+                stats['max_load_mvar'] = (d.get('station_load') or {}).get('mvar', '-')
+
+        # 2. Collect Candidates
+        cands_max_400 = []
+        cands_min_400 = []
+        cands_max_220 = []
+        cands_min_220 = []
+
+        for e in period_entries:
+            d = e.get('data') or {}
+            date = e['date']
+            
+            # Max 400
+            v = get_float((d.get('max_bus_voltage_400kv') or {}).get('value'))
+            if v == stats['max_400kv'] and v is not None:
+                cands_max_400.append({'date': date, 'time': str((d.get('max_bus_voltage_400kv') or {}).get('time', '')).strip()})
+            
+            # Min 400
+            v = get_float((d.get('min_bus_voltage_400kv') or {}).get('value'))
+            if v == stats['min_400kv'] and v is not None:
+                cands_min_400.append({'date': date, 'time': str((d.get('min_bus_voltage_400kv') or {}).get('time', '')).strip()})
+            
+            # Max 220
+            v = get_float((d.get('max_bus_voltage_220kv') or {}).get('value'))
+            if v == stats['max_220kv'] and v is not None:
+                cands_max_220.append({'date': date, 'time': str((d.get('max_bus_voltage_220kv') or {}).get('time', '')).strip()})
+            
+            # Min 220
+            v = get_float((d.get('min_bus_voltage_220kv') or {}).get('value'))
+            if v == stats['min_220kv'] and v is not None:
+                cands_min_220.append({'date': date, 'time': str((d.get('min_bus_voltage_220kv') or {}).get('time', '')).strip()})
+
+        # 3. Find Best Matches (Common Time Priority)
+        def find_best(list_a, list_b):
+            # Try to find intersection
+            for a in list_a:
+                for b in list_b:
+                    if a['date'] == b['date'] and a['time'] == b['time']:
+                        return a, b
+            # No intersection, return first available
+            res_a = list_a[0] if list_a else {'date': '-', 'time': '-'}
+            res_b = list_b[0] if list_b else {'date': '-', 'time': '-'}
+            return res_a, res_b
+
+        final_max_400, final_max_220 = find_best(cands_max_400, cands_max_220)
+        final_min_400, final_min_220 = find_best(cands_min_400, cands_min_220)
+
+        stats['max_400kv_date'] = final_max_400['date']
+        stats['max_400kv_time'] = final_max_400['time']
+        stats['max_220kv_date'] = final_max_220['date']
+        stats['max_220kv_time'] = final_max_220['time']
+
+        stats['min_400kv_date'] = final_min_400['date']
+        stats['min_400kv_time'] = final_min_400['time']
+        stats['min_220kv_date'] = final_min_220['date']
+        stats['min_220kv_time'] = final_min_220['time']
+        
+        # Cleanup infinities
+        if stats['max_400kv'] == -float('inf'): stats['max_400kv'] = '-'
+        if stats['min_400kv'] == float('inf'): stats['min_400kv'] = '-'
+        if stats['max_220kv'] == -float('inf'): stats['max_220kv'] = '-'
+        if stats['min_220kv'] == float('inf'): stats['min_220kv'] = '-'
+        if stats['max_load'] == -float('inf'): stats['max_load'] = '-'
+        
+    else:
+        # Feeder / ICT
+        # Initialize stats
+        stats['max_amps'] = -float('inf'); stats['max_amps_date'] = '-'; stats['max_amps_time'] = '-'
+        stats['min_amps'] = float('inf'); stats['min_amps_date'] = '-'; stats['min_amps_time'] = '-'
+        stats['max_mw'] = -float('inf'); stats['max_mw_date'] = '-'; stats['max_mw_time'] = '-'
+        stats['min_mw'] = float('inf'); stats['min_mw_date'] = '-'; stats['min_mw_time'] = '-'
+        
+        total_amps = 0; count_amps = 0
+        total_mw = 0; count_mw = 0
+        
+        max_mw_entry = None
+        min_mw_entry = None
+        
+        for e in period_entries:
+            d = e.get('data') or {}
+            date = e['date']
+            
+            # Collect Averages (Amps)
+            max_amps = get_float((d.get('max') or {}).get('amps'))
+            min_amps = get_float((d.get('min') or {}).get('amps'))
+            avg_amps = get_float((d.get('avg') or {}).get('amps'))
+            
+            # Auto-calc avg if missing
+            if avg_amps is None and max_amps is not None and min_amps is not None:
+                avg_amps = (max_amps + min_amps) / 2
+            
+            if avg_amps is not None:
+                total_amps += avg_amps
+                count_amps += 1
+                
+            # Collect Averages (MW) and Find Max/Min MW
+            max_mw = get_float((d.get('max') or {}).get('mw'))
+            min_mw = get_float((d.get('min') or {}).get('mw'))
+            avg_mw = get_float((d.get('avg') or {}).get('mw'))
+            
+            # Auto-calc avg if missing
+            if avg_mw is None and max_mw is not None and min_mw is not None:
+                avg_mw = (max_mw + min_mw) / 2
+                
+            if avg_mw is not None:
+                total_mw += avg_mw
+                count_mw += 1
+            
+            # Find Max MW Entry
+            if max_mw is not None and max_mw > stats['max_mw']:
+                stats['max_mw'] = max_mw
+                max_mw_entry = e
+            
+            # Find Min MW Entry
+            if min_mw is not None and min_mw < stats['min_mw']:
+                stats['min_mw'] = min_mw
+                min_mw_entry = e
+        
+        # Apply Max MW Logic: Get corresponding Amps/Time from Max MW entry
+        if max_mw_entry:
+            d = max_mw_entry.get('data') or {}
+            stats['max_mw_date'] = max_mw_entry['date']
+            stats['max_mw_time'] = (d.get('max') or {}).get('time', '-')
+            
+            stats['max_amps'] = get_float((d.get('max') or {}).get('amps'))
+            stats['max_amps_date'] = max_mw_entry['date']
+            stats['max_amps_time'] = (d.get('max') or {}).get('time', '-')
+        
+        # Apply Min MW Logic: Get corresponding Amps/Time from Min MW entry
+        if min_mw_entry:
+            d = min_mw_entry.get('data') or {}
+            stats['min_mw_date'] = min_mw_entry['date']
+            stats['min_mw_time'] = (d.get('min') or {}).get('time', '-')
+            
+            stats['min_amps'] = get_float((d.get('min') or {}).get('amps'))
+            stats['min_amps_date'] = min_mw_entry['date']
+            stats['min_amps_time'] = (d.get('min') or {}).get('time', '-')
+        
+        # Cleanup and averages
+        if stats['max_amps'] is None or stats['max_amps'] == -float('inf'): stats['max_amps'] = '-'
+        if stats['min_amps'] is None or stats['min_amps'] == float('inf'): stats['min_amps'] = '-'
+        stats['avg_amps'] = round(total_amps / count_amps, 2) if count_amps > 0 else '-'
+        
+        if stats['max_mw'] == -float('inf'): stats['max_mw'] = '-'
+        if stats['min_mw'] == float('inf'): stats['min_mw'] = '-'
+        stats['avg_mw'] = round(total_mw / count_mw, 2) if count_mw > 0 else '-'
+        
+    return stats
+
+
+def reference_calculate_standard_stats(period_entries, feeder_type):
+    stats = {}
+    
+    if feeder_type == 'bus_station':
+        # Initialize stats with defaults
+        stats = {
+            'max_400kv': -float('inf'), 'max_400kv_date': '-', 'max_400kv_time': '-',
+            'min_400kv': float('inf'), 'min_400kv_date': '-', 'min_400kv_time': '-',
+            'max_220kv': -float('inf'), 'max_220kv_date': '-', 'max_220kv_time': '-',
+            'min_220kv': float('inf'), 'min_220kv_date': '-', 'min_220kv_time': '-',
+            'max_load': -float('inf'), 'max_load_date': '-', 'max_load_time': '-', 'max_load_mvar': '-'
+        }
+
+        # 1. Find Max/Min Values
+        for e in period_entries:
+            d = e.get('data', {})
+            
+            # 400KV
+            v = get_float_safe(d.get('max_bus_voltage_400kv', {}).get('value'))
+            if v is not None and v > stats['max_400kv']: stats['max_400kv'] = v
+            v = get_float_safe(d.get('min_bus_voltage_400kv', {}).get('value'))
+            if v is not None and v < stats['min_400kv']: stats['min_400kv'] = v
+            
+            # 220KV
+            v = get_float_safe(d.get('max_bus_voltage_220kv', {}).get('value'))
+            if v is not None and v > stats['max_220kv']: stats['max_220kv'] = v
+            v = get_float_safe(d.get('min_bus_voltage_220kv', {}).get('value'))
+            if v is not None and v < stats['min_220kv']: stats['min_220kv'] = v
+
+            # Load (Independent)
+            v = get_float_safe(d.get('station_load', {}).get('max_mw'))
+            if v is not None and v > stats['max_load']:
+                stats['max_load'] = v
+                stats['max_load_date'] = e['date']
+                stats['max_load_time'] = d.get('station_load', {}).get('time', '-')
+                stats['max_load_mvar'] = d.get('station_load', {}).get('mvar', '-')
+
+        # 2. Collect Candidates & 3. Find Best Matches (Simplified for brevity as per original logic)
+        # For simplicity in this refactor, we will just use the FIRST occurrence for Max/Min if simple comparison
+        # But original logic had "Common Time Priority" for voltages.
+        # Let's keep it simple or copy full logic? 
+        # Copying full logic is safer.
+        
+        cands_max_400 = []
+        cands_min_400 = []
+        cands_max_220 = []
+        cands_min_220 = []
+
+        for e in period_entries:
+            d = e.get('data', {})
+            date = e['date']
+            
+            # Max 400
+            v = get_float_safe(d.get('max_bus_voltage_400kv', {}).get('value'))
+            if v == stats['max_400kv'] and v is not None:
+                cands_max_400.append({'date': date, 'time': str(d.get('max_bus_voltage_400kv', {}).get('time', '')).strip()})
+        
+            # Min 400
+            v = get_float_safe(d.get('min_bus_voltage_400kv', {}).get('value'))
+            if v == stats['min_400kv'] and v is not None:
+                cands_min_400.append({'date': date, 'time': str(d.get('min_bus_voltage_400kv', {}).get('time', '')).strip()})
+        
+            # Max 220
+            v = get_float_safe(d.get('max_bus_voltage_220kv', {}).get('value'))
+            if v == stats['max_220kv'] and v is not None:
+                cands_max_220.append({'date': date, 'time': str(d.get('max_bus_voltage_220kv', {}).get('time', '')).strip()})
+        
+            # Min 220
+            v = get_float_safe(d.get('min_bus_voltage_220kv', {}).get('value'))
+            if v == stats['min_220kv'] and v is not None:
+                cands_min_220.append({'date': date, 'time': str(d.get('min_bus_voltage_220kv', {}).get('time', '')).strip()})
+
+        def find_best(list_a, list_b):
+            for a in list_a:
+                for b in list_b:
+                    if a['date'] == b['date'] and a['time'] == b['time']:
+                        return a, b
+            res_a = list_a[0] if list_a else {'date': '-', 'time': '-'}
+            res_b = list_b[0] if list_b else {'date': '-', 'time': '-'}
+            return res_a, res_b
+
+        final_max_400, final_max_220 = find_best(cands_max_400, cands_max_220)
+        final_min_400, final_min_220 = find_best(cands_min_400, cands_min_220)
+
+        stats['max_400kv_date'] = final_max_400['date']
+        stats['max_400kv_time'] = final_max_400['time']
+        stats['max_220kv_date'] = final_max_220['date']
+        stats['max_220kv_time'] = final_max_220['time']
+
+        stats['min_400kv_date'] = final_min_400['date']
+        stats['min_400kv_time'] = final_min_400['time']
+        stats['min_220kv_date'] = final_min_220['date']
+        stats['min_220kv_time'] = final_min_220['time']
+        
+        # Cleanup
+        if stats['max_400kv'] == -float('inf'): stats['max_400kv'] = '-'
+        if stats['min_400kv'] == float('inf'): stats['min_400kv'] = '-'
+        if stats['max_220kv'] == -float('inf'): stats['max_220kv'] = '-'
+        if stats['min_220kv'] == float('inf'): stats['min_220kv'] = '-'
+        if stats['max_load'] == -float('inf'): stats['max_load'] = '-'
+        
+    else:
+        # Feeder / ICT Standard Logic
+        stats = {
+            'max_amps': -float('inf'), 'max_amps_date': '-', 'max_amps_time': '-',
+            'min_amps': float('inf'), 'min_amps_date': '-', 'min_amps_time': '-',
+            'max_mw': -float('inf'), 'max_mw_date': '-', 'max_mw_time': '-',
+            'min_mw': float('inf'), 'min_mw_date': '-', 'min_mw_time': '-',
+            'avg_amps': 0, 'avg_mw': 0
+        }
+        
+        total_amps = 0; count_amps = 0
+        total_mw = 0; count_mw = 0
+        
+        max_mw_entry = None
+        min_mw_entry = None
+        
+        for e in period_entries:
+            d = e.get('data', {})
+            
+            # Avg Amps
+            max_a = get_float_safe(d.get('max', {}).get('amps'))
+            min_a = get_float_safe(d.get('min', {}).get('amps'))
+            avg_a = get_float_safe(d.get('avg', {}).get('amps'))
+            if avg_a is None and max_a is not None and min_a is not None: avg_a = (max_a + min_a) / 2
+            if avg_a is not None: total_amps += avg_a; count_amps += 1
+                
+            # Avg MW
+            max_m = get_float_safe(d.get('max', {}).get('mw'))
+            min_m = get_float_safe(d.get('min', {}).get('mw'))
+            avg_m = get_float_safe(d.get('avg', {}).get('mw'))
+            if avg_m is None and max_m is not None and min_m is not None: avg_m = (max_m + min_m) / 2
+            if avg_m is not None: total_mw += avg_m; count_mw += 1
+            
+            # Find Max/Min MW Candidates
+            if max_m is not None and max_m > stats['max_mw']:
+                stats['max_mw'] = max_m
+                max_mw_entry = e
+            if min_m is not None and min_m < stats['min_mw']:
+                stats['min_mw'] = min_m
+                min_mw_entry = e
+                
+        # Fill Stats from Max/Min MW Entries
+        if max_mw_entry:
+            d = max_mw_entry.get('data', {})
+            stats['max_mw_date'] = max_mw_entry['date']
+            stats['max_mw_time'] = d.get('max', {}).get('time', '-')
+            stats['max_amps'] = get_float_safe(d.get('max', {}).get('amps'))
+            stats['max_amps_date'] = max_mw_entry['date']
+            stats['max_amps_time'] = d.get('max', {}).get('time', '-')
+
+        if min_mw_entry:
+            d = min_mw_entry.get('data', {})
+            stats['min_mw_date'] = min_mw_entry['date']
+            stats['min_mw_time'] = d.get('min', {}).get('time', '-')
+            stats['min_amps'] = get_float_safe(d.get('min', {}).get('amps'))
+            stats['min_amps_date'] = min_mw_entry['date']
+            stats['min_amps_time'] = d.get('min', {}).get('time', '-')
+            
+        # Cleanup
+        if stats['max_amps'] is None or stats['max_amps'] == -float('inf'): stats['max_amps'] = '-'
+        if stats['min_amps'] is None or stats['min_amps'] == float('inf'): stats['min_amps'] = '-'
+        stats['avg_amps'] = round(total_amps / count_amps, 2) if count_amps > 0 else '-'
+        if stats['max_mw'] == -float('inf'): stats['max_mw'] = '-'
+        if stats['min_mw'] == float('inf'): stats['min_mw'] = '-'
+        stats['avg_mw'] = round(total_mw / count_mw, 2) if count_mw > 0 else '-'
+        
+    return stats
+
+
+def reference_calculate_kpi_stats(entries, feeder_type):
+    if not entries:
+        return {"avg_val": 0, "max_val": 0}
+        
+    total_avg = 0
+    max_val = 0
+    count = 0
+    
+    # For Lines: track Max MW to determine which Amps to pick
+    max_mw_found = -1.0
+    
+    for e in entries:
+        d = e.get('data', {})
+        if not d: continue
+        
+        max_data = d.get('max') or {}
+        avg_data = d.get('avg') or {}
+        
+        if feeder_type == 'ict_feeder':
+            # ICT: Max Demand (MW) and Avg Load (MW)
+            # Max MW comes from max.mw
+            # Avg MW comes from avg.mw
+            curr_max = float(max_data.get('mw', 0) or 0)
+            curr_avg = float(avg_data.get('mw', 0) or 0)
+            
+            if curr_max > max_val:
+                max_val = curr_max
+            
+            if curr_avg > 0:
+                total_avg += curr_avg
+                count += 1
+        else:
+            # Line: Max Line Loading (Amps) and Avg Loading (Amps)
+            # Logic Update: Max Amps should be derived from the entry with Max MW
+            curr_mw = float(max_data.get('mw', 0) or 0)
+            curr_amps = float(max_data.get('amps', 0) or 0)
+            
+            if curr_mw > max_mw_found:
+                max_mw_found = curr_mw
+                max_val = curr_amps
+            
+            curr_avg = float(avg_data.get('amps', 0) or 0)
+            if curr_avg > 0:
+                total_avg += curr_avg
+                count += 1
+                
+    avg_val = total_avg / count if count > 0 else 0
+    return {"avg_val": avg_val, "max_val": max_val}
+
+
+def reference_determine_leader(p_group_map):
+    global_max_mw = -float('inf')
+    candidate_leaders = [] # List of {'fid': fid, 'mw': mw, 'entry': entry}
+
+    for fid, entries in p_group_map.items():
+        local_max = -float('inf')
+        local_entry = None
+        for e in entries:
+            mw = get_float_safe(e.get('data', {}).get('max', {}).get('mw'))
+            if mw is not None and mw > local_max:
+                local_max = mw
+                local_entry = e
+        
+        if local_max > global_max_mw:
+            global_max_mw = local_max
+            candidate_leaders = [{'fid': fid, 'mw': local_max, 'entry': local_entry}]
+        elif local_max == global_max_mw and local_max > -float('inf'):
+            candidate_leaders.append({'fid': fid, 'mw': local_max, 'entry': local_entry})
+    
+    leader_id = None
+    
+    if not candidate_leaders:
+         # Fallback if no data
+         return list(p_group_map.keys())[0] if p_group_map else None
+
+    if len(candidate_leaders) == 1:
+        leader_id = candidate_leaders[0]['fid']
+    elif len(candidate_leaders) > 1:
+        # Sort candidates by ID for deterministic processing order (crucial for ties)
+        candidate_leaders.sort(key=lambda x: str(x['fid']))
+
+        # Tie Breaker: Calculate Sum of MW at the candidate's timestamp
+        best_sum = -float('inf')
+        best_leader = None
+        
+        for cand in candidate_leaders:
+            c_fid = cand['fid']
+            c_entry = cand['entry']
+            c_date = c_entry['date']
+            c_time = normalize_time(c_entry.get('data', {}).get('max', {}).get('time'))
+            
+            current_sum = 0
+            valid_timestamp = True
+            
+            # Sum all partners at this timestamp
+            for pid, pentries in p_group_map.items():
+                p_entry = next((e for e in pentries if e['date'] == c_date), None)
+                if not p_entry:
+                    valid_timestamp = False
+                    break
+                
+                p_time = normalize_time(p_entry.get('data', {}).get('max', {}).get('time'))
+                if p_time != c_time:
+                    valid_timestamp = False
+                    break
+                    
+                val = get_float_safe(p_entry.get('data', {}).get('max', {}).get('mw'))
+                if val is not None: current_sum += val
+            
+            if valid_timestamp and current_sum > best_sum:
+                best_sum = current_sum
+                best_leader = c_fid
+        
+        if best_leader:
+            leader_id = best_leader
+        else:
+            # Fallback: Sort by ID for determinism
+            candidate_leaders.sort(key=lambda x: x['fid'])
+            leader_id = candidate_leaders[0]['fid']
+            
+    return leader_id
+
+
+def reference_calculate_coincident_stats(leader_entries, current_feeder_id, group_entries_map, feeder_type):
+    # This function uses leader_entries to find the "Best Coincident Timestamp"
+    # And then returns the stats for the CURRENT feeder at that timestamp.
+    
+    # Base calculation for Averages (independent of coincidence)
+    # We must calculate averages from the CURRENT feeder's entries, not Leader's.
+    current_feeder_entries = group_entries_map.get(current_feeder_id, [])
+    base_stats = reference_calculate_standard_stats(current_feeder_entries, feeder_type)
+    
+    # Reset Max/Min fields to be populated by Coincident Logic
+    base_stats.update({
+        'max_mw': -float('inf'), 'max_mw_date': '-', 'max_mw_time': '-',
+        'max_amps': -float('inf'), 'max_amps_date': '-', 'max_amps_time': '-',
+        'min_mw': float('inf'), 'min_mw_date': '-', 'min_mw_time': '-',
+        'min_amps': float('inf'), 'min_amps_date': '-', 'min_amps_time': '-'
+    })
+
+    # 1. Gather Candidates from LEADER
+    max_candidates = []
+    min_candidates = []
+    
+    for e in leader_entries:
+        d = e.get('data', {})
+        mw_max = get_float_safe(d.get('max', {}).get('mw'))
+        time_max = normalize_time(d.get('max', {}).get('time'))
+        if mw_max is not None:
+            max_candidates.append({'entry': e, 'val': mw_max, 'date': e['date'], 'time': time_max})
+            
+        mw_min = get_float_safe(d.get('min', {}).get('mw'))
+        time_min = normalize_time(d.get('min', {}).get('time'))
+        if mw_min is not None:
+            min_candidates.append({'entry': e, 'val': mw_min, 'date': e['date'], 'time': time_min})
+            
+    # Sort
+    max_candidates.sort(key=lambda x: x['val'], reverse=True)
+    min_candidates.sort(key=lambda x: x['val']) # Ascending
+    
+    # Find Coincident Max Timestamp
+    found_max_timestamp = None # {date, time}
+    for cand in max_candidates:
+        c_date = cand['date']
+        c_time = cand['time']
+        
+        # Check all partners
+        all_match = True
+        for fid, entries in group_entries_map.items():
+            # Find entry for c_date
+            partner_entry = next((p for p in entries if p['date'] == c_date), None)
+            if not partner_entry:
+                all_match = False
+                break
+            
+            # Check time matches
+            p_time = normalize_time(partner_entry.get('data', {}).get('max', {}).get('time'))
+            if p_time != c_time:
+                all_match = False
+                break
+        
+        if all_match:
+            found_max_timestamp = {'date': c_date, 'time': c_time}
+            break
+            
+    # Find Coincident Min Timestamp
+    found_min_timestamp = None
+    for cand in min_candidates:
+        c_date = cand['date']
+        c_time = cand['time']
+        
+        all_match = True
+        for fid, entries in group_entries_map.items():
+            partner_entry = next((p for p in entries if p['date'] == c_date), None)
+            if not partner_entry:
+                all_match = False
+                break
+            p_time = normalize_time(partner_entry.get('data', {}).get('min', {}).get('time'))
+            if p_time != c_time:
+                all_match = False
+                break
+        
+        if all_match:
+            found_min_timestamp = {'date': c_date, 'time': c_time}
+            break
+            
+    # Update Stats with CURRENT FEEDER values at found timestamps
+    if found_max_timestamp:
+        # Find entry for current feeder at this date
+        entry = next((e for e in current_feeder_entries if e['date'] == found_max_timestamp['date']), None)
+        if entry:
+            d = entry.get('data', {})
+            base_stats['max_mw'] = get_float_safe(d.get('max', {}).get('mw'))
+            base_stats['max_mw_date'] = found_max_timestamp['date']
+            base_stats['max_mw_time'] = found_max_timestamp['time'] # Use common time
+            
+            base_stats['max_amps'] = get_float_safe(d.get('max', {}).get('amps'))
+            base_stats['max_amps_date'] = found_max_timestamp['date']
+            base_stats['max_amps_time'] = found_max_timestamp['time']
+            
+            if base_stats['max_mw'] is None: base_stats['max_mw'] = '-'
+            if base_stats['max_amps'] is None: base_stats['max_amps'] = '-'
+    else:
+        base_stats['max_mw'] = '-'
+        base_stats['max_mw_date'] = '-'
+        base_stats['max_mw_time'] = '-'
+        base_stats['max_amps'] = '-'
+        base_stats['max_amps_date'] = '-'
+        base_stats['max_amps_time'] = '-'
+
+    if found_min_timestamp:
+        entry = next((e for e in current_feeder_entries if e['date'] == found_min_timestamp['date']), None)
+        if entry:
+            d = entry.get('data', {})
+            base_stats['min_mw'] = get_float_safe(d.get('min', {}).get('mw'))
+            base_stats['min_mw_date'] = found_min_timestamp['date']
+            base_stats['min_mw_time'] = found_min_timestamp['time']
+            
+            base_stats['min_amps'] = get_float_safe(d.get('min', {}).get('amps'))
+            base_stats['min_amps_date'] = found_min_timestamp['date']
+            base_stats['min_amps_time'] = found_min_timestamp['time']
+
+            if base_stats['min_mw'] is None: base_stats['min_mw'] = '-'
+            if base_stats['min_amps'] is None: base_stats['min_amps'] = '-'
+    else:
+        base_stats['min_mw'] = '-'
+        base_stats['min_mw_date'] = '-'
+        base_stats['min_mw_time'] = '-'
+        base_stats['min_amps'] = '-'
+        base_stats['min_amps_date'] = '-'
+        base_stats['min_amps_time'] = '-'
+        
+    return base_stats
+
+
+# ---------------------------------------------------------
+# Comparison
+# ---------------------------------------------------------
+
+def same_value(a, b):
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, float):
+        if math.isnan(a) or math.isnan(b):
+            return math.isnan(a) and math.isnan(b)
+        return a == b and math.copysign(1.0, a) == math.copysign(1.0, b)
+    if isinstance(a, dict):
+        return list(a.keys()) == list(b.keys()) and all(same_value(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(same_value(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def run_pair(reference, engine, entries, feeder_type):
+    try:
+        expected = ("ok", reference(entries, feeder_type))
+    except Exception as e:
+        expected = ("raise", type(e).__name__)
+    try:
+        actual = ("ok", engine(entries, feeder_type))
+    except Exception as e:
+        actual = ("raise", type(e).__name__)
+    return expected, actual
+
+
+def reference_first_fortnight(entries, feeder_type):
+    return reference_calculate_period_stats(
+        [e for e in entries if 1 <= int(e['date'].split('-')[2]) <= 15], feeder_type)
+
+
+def series_first_fortnight(entries, feeder_type):
+    return max_min_standard_stats(FeederMonthSeries(entries).between_days(1, 15), feeder_type)
+
+
+PAIRS = [
+    ("calculate_period_stats", reference_calculate_period_stats, calculate_period_stats),
+    ("FeederMonthSeries.between_days", reference_first_fortnight, series_first_fortnight),
+    ("calculate_standard_stats", reference_calculate_standard_stats, calculate_standard_stats),
+    ("calculate_kpi_stats", reference_calculate_kpi_stats, calculate_kpi_stats),
+]
+
+FEEDER_TYPES = ["bus_station", "feeder_400kv", "feeder_220kv", "ict_feeder"]
+
+
+def run_group(leader_fn, coincident_fn, group_map, feeder_type):
+    try:
+        leader_id = leader_fn(group_map) or next(iter(group_map))
+        return ("ok", leader_id, [
+            coincident_fn(group_map.get(leader_id, []), fid, group_map, feeder_type) for fid in group_map
+        ])
+    except Exception as e:
+        return ("raise", type(e).__name__)
+
+
+def check_group(group_map, feeder_type, label, failures):
+    expected = run_group(reference_determine_leader, reference_calculate_coincident_stats, group_map, feeder_type)
+    if expected[0] == "raise":
+        return
+    actual = run_group(determine_leader, calculate_coincident_stats, group_map, feeder_type)
+    if not same_value(expected, actual):
+        failures.append(("coincident group", feeder_type, label, expected, actual))
+
+
+def check(entries, feeder_type, label, failures):
+    for name, reference, engine in PAIRS:
+        expected, actual = run_pair(reference, engine, entries, feeder_type)
+        if expected[0] == "raise":
+            # The engine treats null sections as empty where the reference
+            # raised; only a successful reference result must be matched.
+            continue
+        if not same_value(expected, actual):
+            failures.append((name, feeder_type, label, expected, actual))
+
+
+# ---------------------------------------------------------
+# Synthetic corpus
+# ---------------------------------------------------------
+
+NUMBERS = ["", None, "abc", "nan", "inf", "-inf", " 12.5 ", "0", "-0.0", True, 0, 1e308]
+
+
+def random_number(rng):
+    roll = rng.random()
+    if roll < 0.1:
+        return rng.choice(NUMBERS)
+    if roll < 0.4:
+        return rng.choice([100, 200, 250.5, "300", 300.0])  # frequent ties
+    value = round(rng.uniform(-50, 500), rng.choice([0, 1, 2]))
+    return str(value) if rng.random() < 0.3 else value
+
+
+def random_time(rng):
+    roll = rng.random()
+    if roll < 0.05:
+        return None
+    if roll < 0.1:
+        return ""
+    if roll < 0.6:
+        return rng.choice(["10:00", "10:00:00", "18:30", "2024-01-01 18:30:00", " 10:00", "9:05", "24:00", "10:60", 1030])
+    return f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+
+
+def random_section(rng, fields):
+    if rng.random() < 0.05:
+        return {}
+    return {f: (random_time(rng) if f == "time" else random_number(rng)) for f in fields if rng.random() > 0.08}
+
+
+def random_entry(rng, day):
+    data = {}
+    for section in ("max", "min"):
+        data[section] = random_section(rng, ("amps", "mw", "mvar", "time"))
+    data["avg"] = random_section(rng, ("amps", "mw"))
+    for section in ("max_bus_voltage_400kv", "min_bus_voltage_400kv", "max_bus_voltage_220kv", "min_bus_voltage_220kv"):
+        data[section] = random_section(rng, ("value", "time"))
+    data["station_load"] = random_section(rng, ("max_mw", "mvar", "time"))
+    if rng.random() < 0.03:
+        data = {}
+    return {"date": f"2024-01-{day:02d}", "feeder_id": "synthetic", "data": data}
+
+
+def synthetic_corpus(cases, seed):
+    rng = random.Random(seed)
+    for case in range(cases):
+        days = rng.sample(range(1, 32), rng.randint(0, 31))
+        entries = [random_entry(rng, d) for d in sorted(days)]
+        yield f"synthetic#{case}", entries
+
+
+def synthetic_groups(cases, seed):
+    """Groups whose members often peak at the same date/time, so coincidence paths are exercised."""
+    rng = random.Random(seed)
+    for case in range(cases):
+        size = rng.choice([2, 2, 4])
+        days = sorted(rng.sample(range(1, 16), rng.randint(0, 15)))
+        shared_times = {d: rng.choice(["10:00", "18:30", "18:30:00"]) for d in days}
+        group = {}
+        for m in range(size):
+            member_days = [d for d in days if rng.random() > 0.1]
+            entries = []
+            for d in member_days:
+                e = random_entry(rng, d)
+                for section in ("max", "min"):
+                    if e["data"].get(section) is not None and rng.random() < 0.7:
+                        e["data"][section]["time"] = shared_times[d]
+                entries.append(e)
+            group[f"member-{m}"] = entries
+        yield f"group#{case}", group
+
+
+def _report(failures):
+    lines = [f"{len(failures)} mismatches"]
+    for name, feeder_type, label, expected, actual in failures[:5]:
+        lines.append(f"{name} [{feeder_type}] {label}\n  expected: {expected!r}\n  actual:   {actual!r}")
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("feeder_type", FEEDER_TYPES)
+def test_period_engines_match_reference(feeder_type):
+    failures = []
+    for label, entries in synthetic_corpus(CASES, seed=0):
+        check(entries, feeder_type, label, failures)
+    assert not failures, _report(failures)
+
+
+@pytest.mark.parametrize("feeder_type", ["feeder_400kv", "ict_feeder"])
+def test_coincident_engine_matches_reference(feeder_type):
+    failures = []
+    for label, group_map in synthetic_groups(CASES, seed=0):
+        check_group(group_map, feeder_type, label, failures)
+    assert not failures, _report(failures)